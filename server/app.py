@@ -8,8 +8,14 @@ import atexit
 
 # Import structured modules
 from server.utils.logger import setup_logger
-from server.routes import health, workflow, deployment, execution, schedule, storage
+from server.utils.timing import TimingMiddleware
+from server.utils.tracing import tracer
+from server.routes import health, workflow, deployment, execution, schedule, storage, metrics, diagnostics
 from server.services.schedule_service import schedule_service
+from server.services.execution_queue import execution_queue
+from server.services.code_sandbox import sandbox_pool
+from server.services.deployment_workers import deployment_workers
+from server.services.llm_resilience import llm_resilience
 from server.config.database import mongodb, init_database
 
 # Setup logger
@@ -23,11 +29,21 @@ def signal_handler(signum, frame):
     print("Shutting down server safely...")
     print("="*50)
     schedule_service.shutdown()
+    execution_queue.shutdown()
+    sandbox_pool.shutdown()
+    deployment_workers.shutdown()
+    llm_resilience.shutdown()
+    tracer.shutdown()
     mongodb.close()
     os._exit(0)
 
-# 스케줄러 및 MongoDB 종료 핸들러 등록
+# 스케줄러, 실행 큐, 샌드박스, 배포 워커, 트레이스 내보내기 및 MongoDB 종료 핸들러 등록
 atexit.register(schedule_service.shutdown)
+atexit.register(execution_queue.shutdown)
+atexit.register(sandbox_pool.shutdown)
+atexit.register(deployment_workers.shutdown)
+atexit.register(llm_resilience.shutdown)
+atexit.register(tracer.shutdown)
 atexit.register(mongodb.close)
 
 # SIGINT (Ctrl+C)와 SIGTERM 시그널 등록
@@ -40,8 +56,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
+# 요청별 단계 시간(Server-Timing)과 추적 ID(X-Request-ID)
+app.add_middleware(TimingMiddleware)
+
 # 앱 시작 시 즉시 실행되는 메시지
 sys.stdout.write("\n" + "="*60 + "\n")
 sys.stdout.write("LangStar server has started!\n")
@@ -63,8 +83,11 @@ app.include_router(deployment.router, prefix="/api", tags=["deployment"])
 app.include_router(execution.router, prefix="/api", tags=["execution"])
 app.include_router(schedule.router, prefix="/api", tags=["schedule"])
 app.include_router(storage.router, tags=["storage"])
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(diagnostics.router, prefix="/api", tags=["diagnostics"])
 
 # 서버 시작 시 저장된 스케줄 로드
 schedule_service.load_schedules_on_startup()
 
-
+# 실행 큐 시작 (이전 프로세스에서 남은 작업 복구)
+execution_queue.start()
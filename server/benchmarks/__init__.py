@@ -0,0 +1 @@
+# Benchmarks package (python -m server.benchmarks)
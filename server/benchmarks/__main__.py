@@ -0,0 +1,74 @@
+"""
+Command line entry point for the benchmark suite.
+
+    python -m server.benchmarks                                  # 모든 모양, 기본 크기
+    python -m server.benchmarks --shapes linear,fan_out --size 4,16 --iterations 50 --llm-latency-ms 20
+    python -m server.benchmarks --update-baseline                # 현재 결과를 기준선으로 저장
+
+결과는 --output(JSON)에 저장되고, --baseline 파일이 있으면 비교해 회귀가 있으면 종료 코드 1을 반환합니다.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from server.benchmarks.runner import (
+    BenchmarkCase, BenchmarkRunner, compare_results, format_report, load_results, save_results
+)
+from server.benchmarks.workflows import SHAPES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m server.benchmarks", description="LangStar workflow benchmarks")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma separated ({', '.join(SHAPES)})")
+    parser.add_argument("--size", default="4", help="comma separated workflow sizes")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--tools", type=int, default=2, help="tools per agent node (agent_tools)")
+    parser.add_argument("--allocation-samples", type=int, default=3, help="executions measured with tracemalloc")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="fake provider response latency")
+    parser.add_argument("--workdir", default=None, help="directory for deployments (default: temporary)")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--verbose", action="store_true", help="keep stdout of generated workflow code")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    cases = [
+        BenchmarkCase(shape=shape.strip(), size=int(size), iterations=args.iterations, warmup=args.warmup,
+                      tools=args.tools, allocation_samples=args.allocation_samples)
+        for shape in args.shapes.split(",") if shape.strip()
+        for size in args.size.split(",") if size.strip()
+    ]
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+
+    with tempfile.TemporaryDirectory(prefix="langstar-bench-") as scratch:
+        runner = BenchmarkRunner(args.workdir or scratch, llm_latency=args.llm_latency_ms / 1000,
+                                 quiet=not args.verbose)
+        results = runner.run(cases, progress=lambda message: print(message, file=sys.stderr))
+
+    save_results(results, output)
+    comparison = None
+    if args.update_baseline:
+        save_results(results, baseline_path)
+        print(f"baseline updated: {baseline_path}", file=sys.stderr)
+    elif os.path.exists(baseline_path):
+        comparison = compare_results(results, load_results(baseline_path), args.tolerance)
+        results["comparison"] = comparison
+        save_results(results, output)
+
+    print(format_report(results, comparison))
+    print(f"results: {output}", file=sys.stderr)
+    return 1 if comparison and comparison["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
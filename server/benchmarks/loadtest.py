@@ -0,0 +1,472 @@
+"""
+Open-loop HTTP load generator for the deployment, schedule and execution endpoints.
+
+    python -m server.benchmarks.loadtest --rates 2,4,8,16 --stage-seconds 15
+    python -m server.benchmarks.loadtest --url http://staging:8000 --deployment-id <id> --rates 5,10,20
+
+--url이 없으면 서버 앱(server.app)을 작업 디렉토리에서 이 프로세스 안의 uvicorn으로 띄웁니다.
+MongoDB는 메모리 저장소, LLM은 가짜 프로바이더(--llm-latency-ms)로 바뀝니다.
+요청은 응답을 기다리지 않는 open-loop 방식으로 보냅니다. 단계별 목표 도착률(포아송 또는 고정 간격)로
+보내므로, 서버가 느려져도 부하가 줄지 않고 대기열이 쌓이는 모습이 그대로 드러납니다.
+지연 시간은 예정된 전송 시각부터 잰다 (coordinated omission 방지).
+
+단계마다 지연 시간 분포, 오류율, 상태 코드별 개수, 달성 처리량, 실행 큐 대기 시간(Server-Timing queue_wait)을
+보고합니다. 오류율, p95 SLO 또는 처리량(목표 대비 비율) 기준을 처음 넘은 단계를 포화 지점으로 표시합니다.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from server.benchmarks.runner import _openai_endpoint, _quiet, _working_directory, percentiles, save_results
+from server.benchmarks.workflows import SHAPES, build_workflow, workflow_input
+from server.testing.fake_provider import FakeProvider
+from server.testing.memory_mongo import use_memory_mongo
+
+# 요청 종류별 비율 (합이 1일 필요는 없음)
+DEFAULT_MIX = {
+    "run": 0.55,
+    "execution_describe": 0.15,
+    "execution_list": 0.1,
+    "schedule_create": 0.05,
+    "schedule_get": 0.05,
+    "schedule_list": 0.05,
+    "schedule_delete": 0.05,
+}
+
+DEFAULT_SLO_P95_MS = 2000.0
+DEFAULT_MAX_ERROR_RATE = 0.01
+DEFAULT_MIN_THROUGHPUT_RATIO = 0.9
+SERVER_START_TIMEOUT = 30.0
+
+_QUEUE_WAIT_PATTERN = re.compile(r"queue_wait;dur=([0-9.]+)")
+
+
+@dataclass
+class LoadStage:
+    """Target arrival rate (requests/second) held for ``duration`` seconds."""
+    rate: float
+    duration: float
+
+
+@dataclass
+class Sample:
+    operation: str
+    status: str
+    latency_ms: float
+    queue_wait_ms: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status.isdigit() and 200 <= int(self.status) < 300
+
+
+@dataclass
+class LoadState:
+    """IDs created during the run that later requests refer to."""
+    deployment_id: str
+    iteration: int = 0
+    execution_ids: Deque[str] = field(default_factory=lambda: deque(maxlen=1000))
+    schedule_ids: List[str] = field(default_factory=list)
+
+
+# ----------------------------------------------------------------------
+# Operations: (method, path, JSON body) 또는 아직 보낼 수 없으면 None
+# ----------------------------------------------------------------------
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def _run(state: LoadState, rng: random.Random) -> Optional[Request]:
+    state.iteration += 1
+    return "POST", f"/api/deployment/{state.deployment_id}/run", workflow_input(state.iteration)
+
+
+def _execution_describe(state: LoadState, rng: random.Random) -> Optional[Request]:
+    if not state.execution_ids:
+        return None
+    return "GET", f"/api/executions/{rng.choice(state.execution_ids)}", None
+
+
+def _execution_list(state: LoadState, rng: random.Random) -> Optional[Request]:
+    return "GET", f"/api/workflows/{state.deployment_id}/executions?max_results=20", None
+
+
+def _schedule_create(state: LoadState, rng: random.Random) -> Optional[Request]:
+    # 부하 테스트 중에 실행되지 않도록 하루 간격으로 만든다
+    return "POST", "/api/schedules", {
+        "name": f"loadtest-{rng.randrange(1_000_000)}",
+        "deploymentId": state.deployment_id,
+        "scheduleType": "interval",
+        "scheduleConfig": {"days": 1},
+        "inputData": workflow_input(0),
+    }
+
+
+def _schedule_get(state: LoadState, rng: random.Random) -> Optional[Request]:
+    if not state.schedule_ids:
+        return None
+    return "GET", f"/api/schedules/{rng.choice(state.schedule_ids)}", None
+
+
+def _schedule_list(state: LoadState, rng: random.Random) -> Optional[Request]:
+    return "GET", f"/api/deployments/{state.deployment_id}/schedules", None
+
+
+def _schedule_delete(state: LoadState, rng: random.Random) -> Optional[Request]:
+    if not state.schedule_ids:
+        return None
+    return "DELETE", f"/api/schedules/{state.schedule_ids.pop(rng.randrange(len(state.schedule_ids)))}", None
+
+
+OPERATIONS: Dict[str, Callable[[LoadState, random.Random], Optional[Request]]] = {
+    "run": _run,
+    "execution_describe": _execution_describe,
+    "execution_list": _execution_list,
+    "schedule_create": _schedule_create,
+    "schedule_get": _schedule_get,
+    "schedule_list": _schedule_list,
+    "schedule_delete": _schedule_delete,
+}
+
+
+def _record_created(operation: str, state: LoadState, payload: Any) -> None:
+    """Remember IDs from successful responses for describe/get/delete requests."""
+    if not isinstance(payload, dict):
+        return
+    if operation == "run" and payload.get("execution_id"):
+        state.execution_ids.append(payload["execution_id"])
+    elif operation == "schedule_create" and isinstance(payload.get("schedule"), dict):
+        state.schedule_ids.append(payload["schedule"]["id"])
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def summarize_stage(stage: LoadStage, samples: List[Sample], elapsed: float, dropped: int = 0) -> Dict[str, Any]:
+    """Latency distribution, error rate and throughput of one stage."""
+    ok = [sample for sample in samples if sample.ok]
+    statuses = Counter(sample.status for sample in samples)
+    if dropped:
+        statuses["dropped"] += dropped
+    total = len(samples) + dropped
+    operations = {}
+    for name in sorted({sample.operation for sample in samples}):
+        subset = [sample for sample in samples if sample.operation == name]
+        operations[name] = {
+            "requests": len(subset),
+            "errors": sum(1 for sample in subset if not sample.ok),
+            "latency_ms": percentiles([sample.latency_ms for sample in subset]),
+        }
+    queue_waits = [sample.queue_wait_ms for sample in samples if sample.queue_wait_ms is not None]
+    return {
+        "target_rate": stage.rate,
+        "duration_seconds": stage.duration,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": total,
+        "offered_rate": round(total / stage.duration, 3) if stage.duration else 0.0,
+        "throughput_per_second": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round((total - len(ok)) / total, 4) if total else 0.0,
+        "statuses": dict(statuses),
+        "latency_ms": percentiles([sample.latency_ms for sample in samples]),
+        "queue_wait_ms": percentiles(queue_waits) if queue_waits else None,
+        "operations": operations,
+    }
+
+
+def find_saturation(stages: List[Dict[str, Any]], slo_p95_ms: float = DEFAULT_SLO_P95_MS,
+                    max_error_rate: float = DEFAULT_MAX_ERROR_RATE,
+                    min_throughput_ratio: float = DEFAULT_MIN_THROUGHPUT_RATIO) -> Dict[str, Any]:
+    """
+    First stage that breaks the error-rate, p95 or throughput criterion.
+
+    Returns:
+        {"saturated": bool, "rate", "reasons", "max_sustainable_rate"}
+    """
+    sustainable = None
+    for stage in stages:
+        reasons = []
+        if stage["error_rate"] > max_error_rate:
+            reasons.append(f"error rate {stage['error_rate']:.1%} > {max_error_rate:.1%}")
+        if stage["latency_ms"]["p95"] > slo_p95_ms:
+            reasons.append(f"p95 {stage['latency_ms']['p95']:.0f}ms > {slo_p95_ms:.0f}ms")
+        expected = stage["offered_rate"] * (1 - stage["error_rate"])
+        if expected and stage["throughput_per_second"] < expected * min_throughput_ratio:
+            reasons.append(f"throughput {stage['throughput_per_second']:.2f}/s < "
+                           f"{min_throughput_ratio:.0%} of offered {stage['offered_rate']:.2f}/s")
+        if reasons:
+            return {"saturated": True, "rate": stage["target_rate"], "reasons": reasons,
+                    "max_sustainable_rate": sustainable}
+        sustainable = stage["target_rate"]
+    return {"saturated": False, "rate": None, "reasons": [], "max_sustainable_rate": sustainable}
+
+
+def format_load_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'rate/s':>8}{'sent':>7}{'ok/s':>8}{'err %':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queue p95':>11}"]
+    for stage in report["stages"]:
+        queue = stage["queue_wait_ms"]["p95"] if stage["queue_wait_ms"] else 0.0
+        lines.append(
+            f"{stage['target_rate']:>8.1f}{stage['requests']:>7}{stage['throughput_per_second']:>8.2f}"
+            f"{stage['error_rate'] * 100:>8.1f}{stage['latency_ms']['p50']:>9.0f}{stage['latency_ms']['p95']:>9.0f}"
+            f"{stage['latency_ms']['p99']:>9.0f}{queue:>11.0f}"
+        )
+    saturation = report["saturation"]
+    if saturation["saturated"]:
+        lines.append(f"saturated at {saturation['rate']}/s: {'; '.join(saturation['reasons'])}")
+        lines.append(f"max sustainable rate: {saturation['max_sustainable_rate']}")
+    else:
+        lines.append(f"no saturation up to {saturation['max_sustainable_rate']}/s")
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Load generator
+# ----------------------------------------------------------------------
+
+class LoadTest:
+    """
+    Open-loop load generator against a running server.
+
+    Args:
+        base_url: Server root URL (e.g. http://127.0.0.1:8000)
+        mix: Relative weights of OPERATIONS
+        timeout: Per-request timeout in seconds (초과하면 "timeout"으로 기록)
+        max_in_flight: Client-side cap on concurrent requests (넘으면 "dropped"로 기록)
+        arrival: "poisson" (지수 분포 간격) or "constant"
+        seed: Random seed for arrivals and request choice
+    """
+
+    def __init__(self, base_url: str, mix: Optional[Dict[str, float]] = None, timeout: float = 60.0,
+                 max_in_flight: int = 512, arrival: str = "poisson", seed: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+        unknown = set(self.mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+        if arrival not in ("poisson", "constant"):
+            raise ValueError(f"Unknown arrival process: {arrival}")
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.arrival = arrival
+        self.rng = random.Random(seed)
+
+    async def create_deployment(self, client: httpx.AsyncClient, shape: str = "linear", size: int = 4) -> str:
+        """Create and activate a synthetic deployment through the API."""
+        response = await client.post("/api/deployment/create", json={
+            "deploymentData": {"name": f"loadtest-{shape}-{size}", "version": "1.0.0", "description": "load test"},
+            "workflowData": build_workflow(shape, size),
+        })
+        response.raise_for_status()
+        deployment_id = response.json()["deployment"]["id"]
+        (await client.post(f"/api/deployment/{deployment_id}/activate")).raise_for_status()
+        return deployment_id
+
+    def run(self, stages: List[LoadStage], deployment_id: Optional[str] = None, shape: str = "linear",
+            size: int = 4, **criteria: float) -> Dict[str, Any]:
+        """Run every stage in order (asyncio 이벤트 루프를 새로 만들어 실행)."""
+        return asyncio.run(self.run_async(stages, deployment_id, shape, size, **criteria))
+
+    async def run_async(self, stages: List[LoadStage], deployment_id: Optional[str] = None, shape: str = "linear",
+                        size: int = 4, **criteria: float) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            deployment_id = deployment_id or await self.create_deployment(client, shape, size)
+            state = LoadState(deployment_id=deployment_id)
+            results = []
+            for stage in stages:
+                results.append(await self._run_stage(client, stage, state))
+        return {
+            "base_url": self.base_url,
+            "deployment_id": deployment_id,
+            "arrival": self.arrival,
+            "mix": self.mix,
+            "stages": results,
+            "saturation": find_saturation(results, **criteria),
+        }
+
+    def _next_operation(self, state: LoadState) -> Tuple[str, Request]:
+        names = list(self.mix)
+        name = self.rng.choices(names, weights=[self.mix[n] for n in names])[0]
+        request = OPERATIONS[name](state, self.rng)
+        if request is None:
+            # 참조할 실행/스케줄이 아직 없으면 실행 요청으로 대신한다
+            name, request = "run", _run(state, self.rng)
+        return name, request
+
+    def _arrivals(self, stage: LoadStage) -> List[float]:
+        """Offsets (seconds from stage start) of every request in the stage."""
+        if stage.rate <= 0:
+            return []
+        offsets, now = [], 0.0
+        while True:
+            if self.arrival == "poisson":
+                now += self.rng.expovariate(stage.rate)
+            else:
+                # 고정 간격은 누적 오차가 없도록 순번으로 계산한다
+                now = (len(offsets) + 1) / stage.rate
+            if now >= stage.duration:
+                return offsets
+            offsets.append(now)
+
+    async def _run_stage(self, client: httpx.AsyncClient, stage: LoadStage, state: LoadState) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        samples: List[Sample] = []
+        tasks = set()
+        dropped = 0
+        started = loop.time()
+        for offset in self._arrivals(stage):
+            delay = started + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_in_flight:
+                dropped += 1
+                continue
+            name, request = self._next_operation(state)
+            task = asyncio.ensure_future(self._send(client, name, request, started + offset, state, samples))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        return summarize_stage(stage, samples, loop.time() - started, dropped)
+
+    async def _send(self, client: httpx.AsyncClient, name: str, request: Request, scheduled: float,
+                    state: LoadState, samples: List[Sample]) -> None:
+        loop = asyncio.get_running_loop()
+        method, path, body = request
+        queue_wait = None
+        try:
+            response = await client.request(method, path, json=body)
+            status = str(response.status_code)
+            match = _QUEUE_WAIT_PATTERN.search(response.headers.get("server-timing", ""))
+            if match:
+                queue_wait = float(match.group(1))
+            if response.is_success:
+                try:
+                    _record_created(name, state, response.json())
+                except ValueError:
+                    pass
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError:
+            status = "connection_error"
+        samples.append(Sample(name, status, (loop.time() - scheduled) * 1000, queue_wait))
+
+
+# ----------------------------------------------------------------------
+# In-process server
+# ----------------------------------------------------------------------
+
+@contextmanager
+def in_process_server(workdir: str, llm_latency: float = 0.0, app: Any = None) -> Iterator[str]:
+    """
+    Serve the app with uvicorn on a background thread and yield its base URL.
+
+    app이 없으면 작업 디렉토리로 이동한 뒤 server.app을 import한다 (배포/실행/스케줄/큐 파일이 그 아래에 생김).
+    MongoDB는 메모리 저장소, OpenAI 호환 LLM은 가짜 프로바이더로 바뀐다.
+    """
+    import uvicorn
+
+    with FakeProvider(latency=llm_latency, tool_calls=True) as provider, \
+            _openai_endpoint(provider.base_url), _working_directory(os.path.abspath(workdir)):
+        if app is None:
+            from server.app import app
+        # server.app import가 MongoDB 연결을 시도하므로 그 뒤에 메모리 저장소로 바꾼다
+        with use_memory_mongo():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("127.0.0.1", 0))
+            server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+            thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, name="loadtest-server",
+                                      daemon=True)
+            thread.start()
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while not server.started:
+                if not thread.is_alive() or time.monotonic() > deadline:
+                    sock.close()
+                    raise RuntimeError("In-process server failed to start")
+                time.sleep(0.01)
+            try:
+                yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+            finally:
+                server.should_exit = True
+                thread.join(timeout=10)
+                sock.close()
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def _parse_mix(value: Optional[str]) -> Optional[Dict[str, float]]:
+    """"run=6,execution_list=1" -> {"run": 6.0, "execution_list": 1.0}"""
+    if not value:
+        return None
+    mix = {}
+    for entry in value.split(","):
+        name, _, weight = entry.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m server.benchmarks.loadtest",
+                                     description="Open-loop load test for deployment/schedule/execution endpoints")
+    parser.add_argument("--url", default=None, help="target server (default: start the app in-process)")
+    parser.add_argument("--deployment-id", default=None, help="existing active deployment (default: create one)")
+    parser.add_argument("--shape", default="linear", choices=SHAPES)
+    parser.add_argument("--size", type=int, default=4)
+    parser.add_argument("--rates", default="1,2,4,8", help="comma separated requests/second per stage")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--mix", default=None, help="operation weights, e.g. run=6,execution_list=1")
+    parser.add_argument("--arrival", default="poisson", choices=("poisson", "constant"))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-in-flight", type=int, default=512)
+    parser.add_argument("--slo-p95-ms", type=float, default=DEFAULT_SLO_P95_MS)
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="fake provider latency (in-process only)")
+    parser.add_argument("--workdir", default=None, help="in-process working directory (default: temporary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--verbose", action="store_true", help="keep server logs and generated code output")
+    args = parser.parse_args(argv)
+
+    stages = [LoadStage(float(rate), args.stage_seconds) for rate in args.rates.split(",") if rate.strip()]
+    criteria = {"slo_p95_ms": args.slo_p95_ms, "max_error_rate": args.max_error_rate}
+
+    def run(base_url: str) -> Dict[str, Any]:
+        load_test = LoadTest(base_url, _parse_mix(args.mix), timeout=args.timeout,
+                             max_in_flight=args.max_in_flight, arrival=args.arrival, seed=args.seed)
+        print(f"load testing {base_url}: {len(stages)} stages x {args.stage_seconds}s", file=sys.stderr)
+        return load_test.run(stages, args.deployment_id, args.shape, args.size, **criteria)
+
+    output = os.path.abspath(args.output)
+    with nullcontext() if args.verbose else _quiet():
+        if args.url:
+            report = run(args.url)
+        else:
+            with tempfile.TemporaryDirectory(prefix="langstar-load-") as scratch:
+                with in_process_server(args.workdir or scratch, llm_latency=args.llm_latency_ms / 1000) as base_url:
+                    report = run(base_url)
+    save_results(report, output)
+    print(format_load_report(report))
+    print(f"results: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""
+Benchmark runner: codegen -> deployment -> execution -> persistence.
+
+합성 워크플로우를 실제 서버 코드 경로(WorkflowService.generate_langgraph_code,
+DeploymentService.create_deployment/run_deployment, 실행 로그/스냅샷 파일 쓰기)로 실행하고
+단계별 지연 시간 p50/p95/p99, 처리량, 실행당 할당량(tracemalloc)과 디스크 사용량을 잽니다.
+MongoDB는 메모리 저장소(server.testing.memory_mongo), LLM은 로컬 가짜 프로바이더
+(server.testing.fake_provider, OpenAI 호환)를 사용하므로 외부 서비스 없이 결정적으로 재현됩니다.
+
+실행은 작업 디렉토리(workdir) 아래 deployments/에 기록되며 순차적으로 수행합니다
+(생성된 코드가 실행 ID를 프로세스 환경 변수로 넘기므로 같은 프로세스에서 동시에 실행하면 로그가 섞임).
+"""
+
+import io
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from server.benchmarks.workflows import build_workflow, workflow_input
+from server.testing.fake_provider import FakeProvider
+from server.testing.memory_mongo import use_memory_mongo
+
+RESULTS_VERSION = 1
+
+# 기준선 대비 회귀로 보는 최소 변화량 (작은 값의 상대 변화는 잡음으로 봄)
+REGRESSION_FLOORS = {"ms": 1.0, "bytes": 4096, "per_second": 0.5}
+
+# 비교 지표: (경로, 단위, 클수록 좋은지)
+COMPARED_METRICS = (
+    (("execution", "latency_ms", "p50"), "ms", False),
+    (("execution", "latency_ms", "p95"), "ms", False),
+    (("execution", "latency_ms", "p99"), "ms", False),
+    (("execution", "throughput_per_second"), "per_second", True),
+    (("codegen", "latency_ms", "p50"), "ms", False),
+    (("persistence", "latency_ms", "p50"), "ms", False),
+    (("persistence", "disk_bytes_per_execution"), "bytes", False),
+    (("allocations", "peak_bytes_per_execution"), "bytes", False),
+    (("allocations", "retained_bytes_per_execution"), "bytes", False),
+)
+
+PERSISTENCE_PHASES = ("snapshot_write", "snapshot_metadata_write")
+
+
+@dataclass
+class BenchmarkCase:
+    """One workflow shape/size to benchmark."""
+    shape: str
+    size: int
+    iterations: int = 20
+    warmup: int = 2
+    tools: int = 2
+    allocation_samples: int = 3
+
+    @property
+    def name(self) -> str:
+        return f"{self.shape}-{self.size}"
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 with mean/min/max."""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "min": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return round(float(ordered[min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))]), 3)
+
+    return {
+        "p50": rank(0.5),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "min": round(ordered[0], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def directory_bytes(path: str) -> int:
+    """Total size of the files under ``path``."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+@contextmanager
+def _working_directory(path: str) -> Iterator[None]:
+    previous = os.getcwd()
+    os.makedirs(path, exist_ok=True)
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextmanager
+def _openai_endpoint(base_url: str) -> Iterator[None]:
+    """생성된 에이전트 노드의 ChatOpenAI가 가짜 프로바이더로 가도록 OPENAI_BASE_URL을 바꾼다"""
+    previous = os.environ.get("OPENAI_BASE_URL")
+    os.environ["OPENAI_BASE_URL"] = base_url
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OPENAI_BASE_URL", None)
+        else:
+            os.environ["OPENAI_BASE_URL"] = previous
+
+
+class BenchmarkRunner:
+    """
+    Runs benchmark cases through the deployment pipeline.
+
+    Args:
+        workdir: Directory for deployments/ and execution files (실행 전후 디스크 사용량 측정 기준)
+        llm_latency: Fake provider response latency in seconds
+        quiet: Swallow stdout printed by generated workflow code
+    """
+
+    def __init__(self, workdir: str, llm_latency: float = 0.0, quiet: bool = True):
+        self.workdir = os.path.abspath(workdir)
+        self.llm_latency = llm_latency
+        self.quiet = quiet
+
+    def run(self, cases: List[BenchmarkCase], progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Run every case and return the results document (save_results로 저장)."""
+        results: Dict[str, Any] = {
+            "version": RESULTS_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "settings": {"llm_latency_ms": round(self.llm_latency * 1000, 3)},
+            "cases": {},
+        }
+        with FakeProvider(latency=self.llm_latency, tool_calls=True) as provider, \
+                _openai_endpoint(provider.base_url), use_memory_mongo(), _working_directory(self.workdir):
+            for case in cases:
+                if progress:
+                    progress(f"running {case.name} ({case.iterations} iterations)")
+                requests_before = provider.requests
+                result = self.run_case(case)
+                result["llm_requests_per_execution"] = round(
+                    (provider.requests - requests_before) / max(1, case.warmup + case.iterations + case.allocation_samples), 3
+                )
+                results["cases"][case.name] = result
+        return results
+
+    def run_case(self, case: BenchmarkCase) -> Dict[str, Any]:
+        """Benchmark one case (작업 디렉토리, 메모리 MongoDB, 가짜 프로바이더가 준비된 상태에서 호출)."""
+        from server.models.deployment import DeploymentFormData, DeploymentStatus
+        from server.services.deployment_service import deployment_service
+        from server.services.workflow_service import WorkflowService
+
+        workflow = build_workflow(case.shape, case.size, tools=case.tools)
+
+        # 1. 코드 생성
+        codegen_ms = []
+        code = ""
+        for _ in range(case.iterations):
+            started = time.perf_counter()
+            with self._output():
+                code = WorkflowService.generate_langgraph_code(workflow)
+            codegen_ms.append((time.perf_counter() - started) * 1000)
+
+        # 2. 배포 생성 및 활성화 (메모리 MongoDB에 저장, 배포 코드 파일 쓰기)
+        started = time.perf_counter()
+        with self._output():
+            deployment = deployment_service.create_deployment(
+                DeploymentFormData(name=f"bench-{case.name}", version="1.0.0", description="benchmark"), workflow
+            )
+            deployment_service.update_deployment_status(deployment.id, DeploymentStatus.ACTIVE)
+        deployment_ms = (time.perf_counter() - started) * 1000
+        deployment_dir = os.path.join("deployments", deployment.id)
+        code_bytes = directory_bytes(deployment_dir)
+
+        # 3. 실행 (워밍업 제외) - 지연 시간, 단계별 시간, 실행당 디스크 사용량
+        for iteration in range(case.warmup):
+            self._execute(deployment.id, iteration)
+        latencies, phases, disk, failures = [], {}, [], 0
+        persistence_ms = []
+        wall_started = time.perf_counter()
+        for iteration in range(case.warmup, case.warmup + case.iterations):
+            elapsed_ms, result, timing = self._execute(deployment.id, iteration)
+            latencies.append(elapsed_ms)
+            if not result or result["result"]["execution_summary"]["overall_status"] != "succeeded":
+                failures += 1
+            for entry in timing:
+                phases.setdefault(entry["name"], []).append(entry["duration_ms"])
+            persistence_ms.append(sum(entry["duration_ms"] for entry in timing if entry["name"] in PERSISTENCE_PHASES))
+            if result:
+                disk.append(directory_bytes(os.path.join(deployment_dir, "executions", result["execution_id"])))
+        wall_seconds = time.perf_counter() - wall_started
+
+        # 4. 할당량 (tracemalloc은 느리므로 지연 시간 측정과 분리해 몇 번만 실행)
+        peak, retained = self._allocations(deployment.id, case)
+
+        return {
+            "settings": asdict(case),
+            "nodes": len(workflow["nodes"]),
+            "edges": len(workflow["edges"]),
+            "iterations": case.iterations,
+            "failures": failures,
+            "codegen": {"latency_ms": percentiles(codegen_ms), "code_chars": len(code)},
+            "deployment": {"latency_ms": round(deployment_ms, 3), "disk_bytes": code_bytes},
+            "execution": {
+                "latency_ms": percentiles(latencies),
+                "throughput_per_second": round(case.iterations / wall_seconds, 3) if wall_seconds else 0.0,
+                "phases_ms": {name: percentiles(values) for name, values in phases.items()},
+            },
+            "persistence": {
+                "latency_ms": percentiles(persistence_ms),
+                "disk_bytes_per_execution": round(sum(disk) / len(disk)) if disk else 0,
+            },
+            "allocations": {
+                "samples": len(peak),
+                "peak_bytes_per_execution": round(sum(peak) / len(peak)) if peak else 0,
+                "retained_bytes_per_execution": round(sum(retained) / len(retained)) if retained else 0,
+            },
+        }
+
+    def _execute(self, deployment_id: str, iteration: int):
+        """Run the deployment once; returns (elapsed ms, result or None, phase timings)."""
+        from server.services.deployment_service import deployment_service
+        from server.utils.timing import PhaseTimer, use_timer
+
+        timer = PhaseTimer()
+        result = None
+        started = time.perf_counter()
+        try:
+            with self._output(), use_timer(timer):
+                result = deployment_service.run_deployment(deployment_id, workflow_input(iteration),
+                                                           execution_source="benchmark")
+        except Exception:
+            result = None
+        return (time.perf_counter() - started) * 1000, result, timer.phases()
+
+    def _allocations(self, deployment_id: str, case: BenchmarkCase):
+        """Peak and retained traced bytes per execution."""
+        peak: List[int] = []
+        retained: List[int] = []
+        if case.allocation_samples <= 0:
+            return peak, retained
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            for iteration in range(case.allocation_samples):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self._execute(deployment_id, case.warmup + case.iterations + iteration)
+                after, high = tracemalloc.get_traced_memory()
+                peak.append(high - before)
+                retained.append(after - before)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        return peak, retained
+
+    def _output(self):
+        return _quiet() if self.quiet else nullcontext()
+
+
+@contextmanager
+def _quiet() -> Iterator[None]:
+    """생성된 코드의 print, INFO 로그, 라이브러리 경고를 숨긴다 (WARNING 이상 로그는 그대로 출력)"""
+    previous = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        with redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            yield
+    finally:
+        logging.disable(previous)
+
+
+# ----------------------------------------------------------------------
+# Results and baseline comparison
+# ----------------------------------------------------------------------
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """Write a results document as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _metric(case: Dict[str, Any], path: tuple) -> Optional[float]:
+    value: Any = case
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> Dict[str, Any]:
+    """
+    Compare results against a baseline document.
+
+    지표가 tolerance(상대 비율)와 단위별 최소 변화량(REGRESSION_FLOORS)을 모두 넘게 나빠지면 회귀로 봅니다.
+    기준선에 없는 케이스는 건너뜁니다.
+
+    Returns:
+        {"tolerance", "cases": {name: [{"metric", "baseline", "current", "change", "regression"}]}, "regressions": [...]}
+    """
+    report: Dict[str, Any] = {"tolerance": tolerance, "cases": {}, "regressions": [], "missing": []}
+    for name, case in current.get("cases", {}).items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            report["missing"].append(name)
+            continue
+        rows = []
+        for path, unit, higher_is_better in COMPARED_METRICS:
+            now, then = _metric(case, path), _metric(reference, path)
+            if now is None or then is None:
+                continue
+            delta = then - now if higher_is_better else now - then
+            change = round((now - then) / then, 4) if then else None
+            regression = delta > REGRESSION_FLOORS[unit] and delta > abs(then) * tolerance
+            row = {"metric": ".".join(path), "baseline": then, "current": now, "change": change, "regression": regression}
+            rows.append(row)
+            if regression:
+                report["regressions"].append({"case": name, **row})
+        report["cases"][name] = rows
+    return report
+
+
+def format_report(results: Dict[str, Any], comparison: Optional[Dict[str, Any]] = None) -> str:
+    """Human-readable summary table."""
+    lines = [f"{'case':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'exec/s':>10}{'alloc KiB':>12}{'disk KiB':>10}"]
+    for name, case in results.get("cases", {}).items():
+        latency = case["execution"]["latency_ms"]
+        lines.append(
+            f"{name:<18}{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+            f"{case['execution']['throughput_per_second']:>10.1f}"
+            f"{case['allocations']['peak_bytes_per_execution'] / 1024:>12.1f}"
+            f"{case['persistence']['disk_bytes_per_execution'] / 1024:>10.1f}"
+            + (f"  ({case['failures']} failed)" if case.get("failures") else "")
+        )
+    if comparison is not None:
+        if comparison["regressions"]:
+            lines.append(f"regressions (tolerance {comparison['tolerance']:.0%}):")
+            for row in comparison["regressions"]:
+                lines.append(f"  {row['case']}: {row['metric']} {row['baseline']} -> {row['current']}")
+        else:
+            lines.append(f"no regressions against baseline (tolerance {comparison['tolerance']:.0%})")
+        if comparison["missing"]:
+            lines.append(f"not in baseline: {', '.join(comparison['missing'])}")
+    return "\n".join(lines)
@@ -0,0 +1,495 @@
+"""
+Capture real deployment traffic and replay it against a server.
+
+    # 1. 실행 기록에서 시간 구간의 요청(입력 + 도착 시각)을 내보낸다
+    python -m server.benchmarks.traffic_replay export --since 2026-10-01T09:00:00+00:00 --until 2026-10-01T10:00:00+00:00 \\
+        --deployments-dir /srv/langstar/server/deployments --output capture.json
+    # 2. 원래 도착 간격 그대로(--speed 1) 또는 N배 빠르게 대상 서버에 보낸다
+    python -m server.benchmarks.traffic_replay replay capture.json --url http://build-a:8000 --output a.json
+    python -m server.benchmarks.traffic_replay replay capture.json --url http://build-b:8000 --speed 4 --output b.json
+    # 3. 두 빌드(또는 --deployment-map으로 바꾼 두 배포 버전)의 지연 시간과 출력을 비교한다
+    python -m server.benchmarks.traffic_replay diff a.json b.json
+
+export는 deployments/<배포 ID>/executions/<실행 ID>/workflow_snap.json의 실행 메타데이터를 읽습니다.
+기본값으로는 실행 API로 들어온 요청(api_call_info가 있는 실행)만 내보냅니다.
+도착 시각은 실행 시작 시각에서 큐 대기 시간을 뺀 값이고, 인증 관련 헤더는 내보내지 않습니다.
+replay는 응답을 기다리지 않고 도착 간격(/speed)대로 요청을 보내므로, 원래 트래픽의 동시 실행 분포가 그대로 재현됩니다.
+export와 replay 결과에는 동시 실행 수(최대/평균)를 함께 기록합니다.
+diff는 원래 실행 ID로 요청을 짝지어 지연 시간 분포, 결과 상태 변화, 출력 차이를 보고합니다.
+캡처 파일도 기준으로 쓸 수 있습니다 (서버 처리 시간과 출력만 비교).
+LLM 출력까지 비교하려면 두 서버를 같은 카세트 재생 모드(LANGSTAR_LLM_CASSETTE=replay)로 띄우세요.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from server.benchmarks.runner import load_results, percentiles, save_results
+from server.utils.security import redact_headers
+
+CAPTURE_VERSION = 1
+
+# 재생 요청에 원래 실행 ID를 붙이는 헤더 (대상 서버의 api_call_info에 남음)
+REPLAY_HEADER = "X-Langstar-Replay-Of"
+MAX_LISTED_DIFFERENCES = 20
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    # 시간대가 없으면 실행 기록과 같은 UTC로 본다
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _sanitize(api_call_info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not api_call_info:
+        return api_call_info
+    info = dict(api_call_info)
+    headers = info.get("headers")
+    if isinstance(headers, dict):
+        info["headers"] = redact_headers(headers)
+    return info
+
+
+def response_output(result: Any) -> Any:
+    """Graph result as returned in the run response's result.output (deployment_service와 같은 규칙)."""
+    if isinstance(result, dict):
+        if "result" in result:
+            return result["result"]
+        if "response" in result:
+            return result["response"]
+    return result
+
+
+def concurrency_profile(intervals: Iterable[Tuple[float, float]]) -> Dict[str, Any]:
+    """
+    Peak and time-averaged number of requests in flight.
+
+    Args:
+        intervals: (start, end) pairs in seconds
+    """
+    events = []
+    busy = 0.0
+    for start, end in intervals:
+        end = max(start, end)
+        events.append((start, 1))
+        events.append((end, -1))
+        busy += end - start
+    if not events:
+        return {"peak": 0, "mean": 0.0, "window_seconds": 0.0}
+    # 같은 시각에는 끝나는 요청을 먼저 처리한다
+    events.sort(key=lambda event: (event[0], event[1]))
+    in_flight = peak = 0
+    for _, change in events:
+        in_flight += change
+        peak = max(peak, in_flight)
+    window = events[-1][0] - events[0][0]
+    return {"peak": peak, "mean": round(busy / window, 3) if window else float(peak), "window_seconds": round(window, 3)}
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+def _execution_records(deployments_dir: str) -> Iterable[Dict[str, Any]]:
+    if not os.path.isdir(deployments_dir):
+        return
+    for deployment_id in sorted(os.listdir(deployments_dir)):
+        executions_dir = os.path.join(deployments_dir, deployment_id, "executions")
+        if not os.path.isdir(executions_dir):
+            continue
+        for execution_id in os.listdir(executions_dir):
+            snapshot_file = os.path.join(executions_dir, execution_id, "workflow_snap.json")
+            try:
+                with open(snapshot_file, "r", encoding="utf-8") as f:
+                    metadata = json.load(f).get("execution_metadata", {})
+            except (OSError, ValueError):
+                continue
+            if metadata.get("id") and metadata.get("start_time"):
+                yield metadata
+
+
+def export_traffic(deployments_dir: str = "deployments", since: Optional[datetime] = None,
+                   until: Optional[datetime] = None, deployment_ids: Optional[List[str]] = None,
+                   sources: Optional[List[str]] = None, api_calls_only: bool = True) -> Dict[str, Any]:
+    """
+    Export executions that arrived within [since, until) as a replayable capture.
+
+    Args:
+        deployments_dir: Server's deployments directory
+        since, until: Arrival time window (None: unbounded)
+        deployment_ids: Only these deployments (None: all)
+        sources: Only these execution sources, e.g. ["external"] (None: all)
+        api_calls_only: Skip executions without api_call_info (스케줄 실행 등)
+
+    Returns:
+        {"version", "exported_at", "window", "profile", "requests": [...]} with requests sorted by arrival
+    """
+    requests = []
+    for metadata in _execution_records(deployments_dir):
+        if deployment_ids and metadata.get("deployment_id") not in deployment_ids:
+            continue
+        if sources and metadata.get("execution_source") not in sources:
+            continue
+        if api_calls_only and not metadata.get("api_call_info"):
+            continue
+        started = _parse_time(metadata["start_time"])
+        queue_wait = sum(
+            phase.get("duration_ms", 0.0) for phase in metadata.get("timing") or [] if phase.get("name") == "queue_wait"
+        )
+        arrival = started - timedelta(milliseconds=queue_wait)
+        if (since and arrival < since) or (until and arrival >= until):
+            continue
+        requests.append({
+            "source_execution_id": metadata["id"],
+            "deployment_id": metadata.get("deployment_id") or metadata.get("workflow_id"),
+            "version_id": metadata.get("version_id"),
+            "arrival_time": arrival.isoformat(),
+            "input": metadata.get("input"),
+            "status": metadata.get("status"),
+            "duration_ms": metadata.get("duration_ms"),
+            "output": response_output(metadata.get("output")),
+            "execution_source": metadata.get("execution_source"),
+            "api_call_info": _sanitize(metadata.get("api_call_info")),
+        })
+
+    requests.sort(key=lambda request: request["arrival_time"])
+    first = _parse_time(requests[0]["arrival_time"]) if requests else None
+    intervals = []
+    for request in requests:
+        offset = (_parse_time(request["arrival_time"]) - first).total_seconds()
+        request["offset_ms"] = round(offset * 1000, 3)
+        intervals.append((offset, offset + (request["duration_ms"] or 0) / 1000))
+    return {
+        "version": CAPTURE_VERSION,
+        "kind": "capture",
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "window": {"since": since.isoformat() if since else None, "until": until.isoformat() if until else None},
+        "deployments": sorted({request["deployment_id"] for request in requests}),
+        "profile": concurrency_profile(intervals),
+        "requests": requests,
+    }
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+class TrafficReplayer:
+    """
+    Replay a capture against a server with the captured arrival pattern.
+
+    Args:
+        base_url: Target server root URL
+        speed: Arrival speed-up (1: 원래 간격, 4: 4배 빠르게)
+        timeout: Per-request timeout in seconds
+        deployment_map: Source deployment ID -> deployment ID to run instead (배포 버전 비교용)
+        max_in_flight: Client-side cap on concurrent requests (넘으면 "dropped"로 기록)
+        label: Name stored in the results (e.g. build or version)
+    """
+
+    def __init__(self, base_url: str, speed: float = 1.0, timeout: float = 300.0,
+                 deployment_map: Optional[Dict[str, str]] = None, max_in_flight: int = 1024, label: str = ""):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.base_url = base_url.rstrip("/")
+        self.speed = speed
+        self.timeout = timeout
+        self.deployment_map = deployment_map or {}
+        self.max_in_flight = max_in_flight
+        self.label = label or self.base_url
+
+    def run(self, capture: Dict[str, Any]) -> Dict[str, Any]:
+        return asyncio.run(self.run_async(capture))
+
+    async def run_async(self, capture: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        samples: List[Dict[str, Any]] = []
+        tasks = set()
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            started = loop.time()
+            for request in capture["requests"]:
+                scheduled = started + request["offset_ms"] / 1000 / self.speed
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(tasks) >= self.max_in_flight:
+                    samples.append(self._sample(request, scheduled - started, "dropped", 0.0))
+                    continue
+                task = asyncio.ensure_future(self._send(client, request, scheduled, started, samples))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            elapsed = loop.time() - started
+        samples.sort(key=lambda sample: sample["offset_ms"])
+        return {
+            "version": CAPTURE_VERSION,
+            "kind": "replay",
+            "label": self.label,
+            "base_url": self.base_url,
+            "speed": self.speed,
+            "captured_profile": capture.get("profile"),
+            "summary": summarize_replay(samples, elapsed),
+            "samples": samples,
+        }
+
+    def _sample(self, request: Dict[str, Any], offset: float, status: str, latency_ms: float) -> Dict[str, Any]:
+        return {
+            "source_execution_id": request["source_execution_id"],
+            "deployment_id": self.deployment_map.get(request["deployment_id"], request["deployment_id"]),
+            "offset_ms": round(offset * 1000, 3),
+            "status": status,
+            "latency_ms": round(latency_ms, 3),
+            "outcome": f"http_{status}" if status.isdigit() else status,
+            "execution_id": None,
+            "server_duration_ms": None,
+            "output": None,
+        }
+
+    async def _send(self, client: httpx.AsyncClient, request: Dict[str, Any], scheduled: float, started: float,
+                    samples: List[Dict[str, Any]]) -> None:
+        loop = asyncio.get_running_loop()
+        deployment_id = self.deployment_map.get(request["deployment_id"], request["deployment_id"])
+        payload = None
+        try:
+            response = await client.post(
+                f"/api/deployment/{deployment_id}/run",
+                json=request["input"],
+                headers={REPLAY_HEADER: request["source_execution_id"]},
+            )
+            status = str(response.status_code)
+            if response.is_success:
+                try:
+                    payload = response.json()
+                except ValueError:
+                    payload = None
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError:
+            status = "connection_error"
+        sample = self._sample(request, scheduled - started, status, (loop.time() - scheduled) * 1000)
+        if isinstance(payload, dict):
+            result = payload.get("result") or {}
+            summary = result.get("execution_summary") or {}
+            sample.update({
+                "outcome": summary.get("overall_status") or sample["outcome"],
+                "execution_id": payload.get("execution_id"),
+                "server_duration_ms": summary.get("duration_ms"),
+                "output": result.get("output"),
+            })
+        samples.append(sample)
+
+
+def summarize_replay(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Latency distribution, error rate and concurrency of one replay."""
+    answered = [sample for sample in samples if sample["status"] != "dropped"]
+    errors = [sample for sample in samples if sample["outcome"] != "succeeded"]
+    durations = [sample["server_duration_ms"] for sample in samples if sample["server_duration_ms"] is not None]
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[sample["status"]] = statuses.get(sample["status"], 0) + 1
+    return {
+        "requests": len(samples),
+        "elapsed_seconds": round(elapsed, 3),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "statuses": statuses,
+        "latency_ms": percentiles([sample["latency_ms"] for sample in answered]) if answered else None,
+        "server_duration_ms": percentiles(durations) if durations else None,
+        "profile": concurrency_profile(
+            (sample["offset_ms"] / 1000, (sample["offset_ms"] + sample["latency_ms"]) / 1000) for sample in answered
+        ),
+    }
+
+
+# ----------------------------------------------------------------------
+# Diff
+# ----------------------------------------------------------------------
+
+def _entries(document: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """원래 실행 ID -> 비교 항목 (캡처 파일은 클라이언트 지연 시간이 없음)"""
+    if document.get("kind") == "capture":
+        return {
+            request["source_execution_id"]: {
+                "outcome": request.get("status"),
+                "latency_ms": None,
+                "server_duration_ms": request.get("duration_ms"),
+                "output": request.get("output"),
+            }
+            for request in document.get("requests", [])
+        }
+    return {sample["source_execution_id"]: sample for sample in document.get("samples", [])}
+
+
+def _compare_distribution(baseline: List[float], candidate: List[float]) -> Optional[Dict[str, Any]]:
+    if not baseline or not candidate:
+        return None
+    before, after = percentiles(baseline), percentiles(candidate)
+    return {
+        "baseline": before,
+        "candidate": after,
+        "change": {
+            name: round((after[name] - before[name]) / before[name], 4) if before[name] else None
+            for name in ("p50", "p95", "p99", "mean")
+        },
+    }
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def diff_results(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare two replays (or a capture and a replay) request by request.
+
+    Returns:
+        {"matched", "only_in_baseline", "only_in_candidate", "latency_ms", "server_duration_ms",
+         "outcome_changes", "output_mismatches", "output_mismatch_count", "slowest_regressions"}
+    """
+    before, after = _entries(baseline), _entries(candidate)
+    matched = sorted(set(before) & set(after))
+
+    def values(field: str) -> Tuple[List[float], List[float]]:
+        pairs = [(before[key][field], after[key][field]) for key in matched]
+        pairs = [(a, b) for a, b in pairs if a is not None and b is not None]
+        return [a for a, _ in pairs], [b for _, b in pairs]
+
+    outcome_changes = [
+        {"source_execution_id": key, "baseline": before[key]["outcome"], "candidate": after[key]["outcome"]}
+        for key in matched if before[key]["outcome"] != after[key]["outcome"]
+    ]
+    mismatches = [
+        {"source_execution_id": key, "baseline": before[key]["output"], "candidate": after[key]["output"]}
+        for key in matched
+        if before[key]["outcome"] == after[key]["outcome"] == "succeeded"
+        and _canonical(before[key]["output"]) != _canonical(after[key]["output"])
+    ]
+    regressions = sorted(
+        (
+            {"source_execution_id": key, "baseline_ms": before[key]["latency_ms"],
+             "candidate_ms": after[key]["latency_ms"],
+             "delta_ms": round(after[key]["latency_ms"] - before[key]["latency_ms"], 3)}
+            for key in matched
+            if before[key]["latency_ms"] is not None and after[key]["latency_ms"] is not None
+        ),
+        key=lambda row: row["delta_ms"],
+        reverse=True,
+    )
+    return {
+        "baseline": baseline.get("label") or baseline.get("kind"),
+        "candidate": candidate.get("label") or candidate.get("kind"),
+        "matched": len(matched),
+        "only_in_baseline": sorted(set(before) - set(after)),
+        "only_in_candidate": sorted(set(after) - set(before)),
+        "latency_ms": _compare_distribution(*values("latency_ms")),
+        "server_duration_ms": _compare_distribution(*values("server_duration_ms")),
+        "outcome_changes": outcome_changes[:MAX_LISTED_DIFFERENCES],
+        "outcome_change_count": len(outcome_changes),
+        "output_mismatches": mismatches[:MAX_LISTED_DIFFERENCES],
+        "output_mismatch_count": len(mismatches),
+        "slowest_regressions": [row for row in regressions if row["delta_ms"] > 0][:MAX_LISTED_DIFFERENCES],
+    }
+
+
+def format_diff(diff: Dict[str, Any]) -> str:
+    lines = [f"{diff['baseline']} -> {diff['candidate']}: {diff['matched']} matched requests"]
+    for field in ("latency_ms", "server_duration_ms"):
+        comparison = diff[field]
+        if comparison is None:
+            continue
+        lines.append(f"{field}:")
+        for name in ("p50", "p95", "p99"):
+            change = comparison["change"][name]
+            change_text = f"{change:+.1%}" if change is not None else "n/a"
+            lines.append(f"  {name:<4}{comparison['baseline'][name]:>10.1f}{comparison['candidate'][name]:>10.1f}"
+                         f"{change_text:>9}")
+    lines.append(f"outcome changes: {diff['outcome_change_count']}, output mismatches: {diff['output_mismatch_count']}")
+    if diff["only_in_baseline"] or diff["only_in_candidate"]:
+        lines.append(f"unmatched: {len(diff['only_in_baseline'])} baseline, {len(diff['only_in_candidate'])} candidate")
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+
+def _parse_map(value: Optional[str]) -> Dict[str, str]:
+    """"old=new,old2=new2" -> {"old": "new", "old2": "new2"}"""
+    mapping = {}
+    for entry in _split(value) or []:
+        source, _, target = entry.partition("=")
+        mapping[source] = target
+    return mapping
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m server.benchmarks.traffic_replay",
+                                     description="Capture and replay deployment run traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export executions in a time window")
+    export.add_argument("--deployments-dir", default="deployments")
+    export.add_argument("--since", default=None, help="ISO time (default: unbounded)")
+    export.add_argument("--until", default=None, help="ISO time (default: unbounded)")
+    export.add_argument("--deployments", default=None, help="comma separated deployment IDs")
+    export.add_argument("--sources", default=None, help="comma separated execution sources (internal,external)")
+    export.add_argument("--all-executions", action="store_true", help="include executions without api_call_info")
+    export.add_argument("--output", default="capture.json")
+
+    replay = commands.add_parser("replay", help="replay a capture against a server")
+    replay.add_argument("capture")
+    replay.add_argument("--url", required=True)
+    replay.add_argument("--speed", type=float, default=1.0, help="arrival speed-up factor")
+    replay.add_argument("--timeout", type=float, default=300.0)
+    replay.add_argument("--max-in-flight", type=int, default=1024)
+    replay.add_argument("--deployment-map", default=None, help="source=target deployment IDs, comma separated")
+    replay.add_argument("--label", default="")
+    replay.add_argument("--output", default="replay-results.json")
+
+    diff = commands.add_parser("diff", help="compare two replay results (or a capture and a replay)")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        capture = export_traffic(args.deployments_dir, _parse_time(args.since), _parse_time(args.until),
+                                 _split(args.deployments), _split(args.sources), not args.all_executions)
+        save_results(capture, os.path.abspath(args.output))
+        print(f"exported {len(capture['requests'])} requests "
+              f"(peak concurrency {capture['profile']['peak']}): {args.output}", file=sys.stderr)
+        return 0
+
+    if args.command == "replay":
+        capture = load_results(args.capture)
+        replayer = TrafficReplayer(args.url, speed=args.speed, timeout=args.timeout,
+                                   deployment_map=_parse_map(args.deployment_map),
+                                   max_in_flight=args.max_in_flight, label=args.label)
+        print(f"replaying {len(capture['requests'])} requests at {args.speed}x against {args.url}", file=sys.stderr)
+        results = replayer.run(capture)
+        save_results(results, os.path.abspath(args.output))
+        print(json.dumps(results["summary"], indent=2))
+        return 0
+
+    comparison = diff_results(load_results(args.baseline), load_results(args.candidate))
+    if args.output:
+        save_results(comparison, os.path.abspath(args.output))
+    print(format_diff(comparison))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Synthetic workflow definitions for benchmarks.
+
+에디터가 저장하는 것과 같은 형식(nodes/edges)의 워크플로우를 모양과 크기별로 만듭니다.
+    - linear: Start -> Step_1 -> ... -> Step_n -> End (함수 노드 n개)
+    - fan_out: Start -> Branch_1..n (병렬) -> Merge -> End
+    - conditions: Start -> Seed -> (Check_i -> Even_i | Odd_i) x n -> End (조건 노드 n개, 콜라츠 분기)
+    - agent_tools: Start -> Agent_1 -> ... -> Agent_n -> End (에이전트마다 도구 tools개, OpenAI 호환 모델)
+"""
+
+from typing import Any, Dict, List, Optional
+
+SHAPES = ("linear", "fan_out", "conditions", "agent_tools")
+
+START_LABEL = "Start"
+
+
+def _node(node_id: str, node_type: str, label: str, config: Optional[Dict[str, Any]] = None,
+          code: Optional[str] = None, x: int = 0, y: int = 0) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"label": label, "config": config or {}}
+    if code is not None:
+        data["code"] = code
+    return {"id": node_id, "type": node_type, "position": {"x": x, "y": y}, "data": data}
+
+
+def _start() -> Dict[str, Any]:
+    return _node("start", "startNode", START_LABEL, {
+        "variables": [
+            {"name": "question", "type": "str", "defaultValue": ""},
+            {"name": "value", "type": "int", "defaultValue": "0"},
+        ]
+    })
+
+
+def _end(x: int) -> Dict[str, Any]:
+    return _node("end", "endNode", "End", {"receiveKey": ""}, x=x)
+
+
+def _function(node_id: str, label: str, body: str, x: int, y: int = 0) -> Dict[str, Any]:
+    function_name = label.lower()
+    code = f"def {function_name}(data):\n{body}    return data\n"
+    return _node(node_id, "functionNode", label, code=code, x=x, y=y)
+
+
+def _edge(source: str, target: str) -> Dict[str, str]:
+    return {"id": f"{source}->{target}", "source": source, "target": target}
+
+
+def _linear(size: int) -> Dict[str, Any]:
+    nodes = [_start()]
+    edges = []
+    previous = "start"
+    for index in range(1, size + 1):
+        node_id = f"step_{index}"
+        nodes.append(_function(node_id, f"Step_{index}", (
+            "    data['value'] = data.get('value', 0) + 1\n"
+            f"    data['path'] = data.get('path', '') + '{index},'\n"
+        ), x=index * 200))
+        edges.append(_edge(previous, node_id))
+        previous = node_id
+    nodes.append(_end((size + 1) * 200))
+    edges.append(_edge(previous, "end"))
+    return {"nodes": nodes, "edges": edges}
+
+
+def _fan_out(size: int) -> Dict[str, Any]:
+    nodes = [_start()]
+    edges = []
+    mappings = []
+    for index in range(1, size + 1):
+        node_id = f"branch_{index}"
+        nodes.append(_function(node_id, f"Branch_{index}", (
+            f"    data['value'] = data.get('value', 0) * {index} + {index}\n"
+        ), x=200, y=index * 100))
+        edges.append(_edge("start", node_id))
+        edges.append(_edge(node_id, "merge"))
+        mappings.append({"outputKey": f"branch_{index}", "sourceNodeId": node_id, "sourceNodeKey": "value"})
+    nodes.append(_node("merge", "mergeNode", "Merge", {"mergeMappings": mappings}, x=400))
+    nodes.append(_end(600))
+    edges.append(_edge("merge", "end"))
+    return {"nodes": nodes, "edges": edges}
+
+
+def _conditions(size: int) -> Dict[str, Any]:
+    nodes = [_start(), _function("seed", "Seed", "    data['value'] = int(data.get('value') or 27)\n", x=200)]
+    edges = [_edge("start", "seed")]
+    previous: List[str] = ["seed"]
+    for index in range(1, size + 1):
+        check, even, odd = f"check_{index}", f"even_{index}", f"odd_{index}"
+        x = (index * 2 + 1) * 200
+        nodes.append(_node(check, "conditionNode", f"Check_{index}", {"conditions": [
+            {"targetNodeId": even, "targetNodeLabel": f"Even_{index}",
+             "condition": "if data['value'] % 2 == 0", "description": "even"},
+            {"targetNodeId": odd, "targetNodeLabel": f"Odd_{index}", "condition": "else", "description": "odd"},
+        ]}, x=x))
+        nodes.append(_function(even, f"Even_{index}", "    data['value'] = data['value'] // 2\n", x=x + 200, y=-100))
+        nodes.append(_function(odd, f"Odd_{index}", "    data['value'] = data['value'] * 3 + 1\n", x=x + 200, y=100))
+        edges.extend(_edge(source, check) for source in previous)
+        edges.append(_edge(check, even))
+        edges.append(_edge(check, odd))
+        previous = [even, odd]
+    nodes.append(_end((size * 2 + 3) * 200))
+    edges.extend(_edge(source, "end") for source in previous)
+    return {"nodes": nodes, "edges": edges}
+
+
+def _tool(agent_index: int, tool_index: int) -> Dict[str, Any]:
+    name = f"lookup_{agent_index}_{tool_index}"
+    return {
+        "description": f"Look up benchmark record {tool_index} for a query",
+        "code": (
+            f"def {name}(query: str) -> str:\n"
+            f"    \"\"\"Look up benchmark record {tool_index}.\"\"\"\n"
+            f"    return 'record-{agent_index}-{tool_index}:' + query\n"
+        ),
+    }
+
+
+def _agent_tools(size: int, tools: int, model: str) -> Dict[str, Any]:
+    nodes = [_start()]
+    edges = []
+    previous = "start"
+    for index in range(1, size + 1):
+        node_id = f"agent_{index}"
+        nodes.append(_node(node_id, "agentNode", f"Agent_{index}", {
+            "model": {"providerName": "openai", "modelName": model, "apiKey": "sk-benchmark"},
+            "systemPromptInputKey": "'You are a benchmark agent.'",
+            "userPromptInputKey": "question",
+            "agentOutputVariable": f"answer_{index}",
+            "temperature": 0,
+            "maxTokens": 64,
+            "topK": 0,
+            "topP": 1,
+            "tools": [_tool(index, tool_index) for tool_index in range(1, tools + 1)],
+        }, x=index * 200))
+        edges.append(_edge(previous, node_id))
+        previous = node_id
+    nodes.append(_end((size + 1) * 200))
+    edges.append(_edge(previous, "end"))
+    return {"nodes": nodes, "edges": edges}
+
+
+def build_workflow(shape: str, size: int, tools: int = 2, model: str = "gpt-4o-mini") -> Dict[str, Any]:
+    """
+    Build a synthetic workflow in the editor's JSON format.
+
+    Args:
+        shape: One of SHAPES
+        size: Chain length (linear, conditions, agent_tools) or branch count (fan_out)
+        tools: Tools per agent node (agent_tools만, 0이면 도구 없는 에이전트)
+        model: OpenAI model name for agent nodes (가짜 프로바이더가 응답)
+
+    Raises:
+        ValueError: If the shape is unknown or size < 1
+    """
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    if shape == "linear":
+        workflow = _linear(size)
+    elif shape == "fan_out":
+        workflow = _fan_out(size)
+    elif shape == "conditions":
+        workflow = _conditions(size)
+    elif shape == "agent_tools":
+        workflow = _agent_tools(size, tools, model)
+    else:
+        raise ValueError(f"Unknown workflow shape: {shape} (expected one of {', '.join(SHAPES)})")
+    return {
+        "projectName": f"bench_{shape}_{size}",
+        "viewport": {"x": 0, "y": 0, "zoom": 1},
+        **workflow,
+    }
+
+
+def workflow_input(iteration: int) -> Dict[str, Any]:
+    """Input for one execution (반복마다 달라서 응답 캐시가 켜져 있어도 적중하지 않음)."""
+    return {START_LABEL: {"question": f"benchmark question {iteration}", "value": iteration + 1}}
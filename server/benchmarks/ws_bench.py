@@ -0,0 +1,652 @@
+"""
+Scale benchmark for the collaboration WebSocket endpoint (/ws/collaboration/{workflow_id}).
+
+    python -m server.benchmarks.ws_bench --workflows 100 --clients-per-workflow 20 --duration 30
+    python -m server.benchmarks.ws_bench --url http://staging:8000 --workflows 10 --mix cursor=1,ping=1
+
+--url이 없으면 협업 라우터만 올린 벤치마크 앱을 자식 프로세스(serve 하위 명령)로 띄웁니다
+(server.app은 협업 라우터를 포함하지 않음). 서버를 별도 프로세스로 두어야 수천 개 클라이언트의 메모리와 CPU가
+서버 측 측정값에 섞이지 않습니다. 자식 프로세스의 MongoDB는 메모리 저장소이고, 워크플로우 bench-wf-N
+(노드 node-0, node-1, ...)이 미리 만들어져 있습니다. 외부 서버에서 변경(change) 메시지를 보내려면 같은 ID의
+워크플로우가 있어야 합니다.
+
+클라이언트는 워크플로우마다 --clients-per-workflow개씩 접속한 뒤, 각자 --message-rate(초당 평균, 포아송)로
+커서/뷰포트/락/변경/ping 메시지를 섞어 보냅니다 (서버 레이트 리미트는 사용자당 10/s).
+  - 팬아웃 지연: 보낸 시각부터 각 수신자가 받은 시각까지 (전달 단위, 브로드캐스트별 마지막 수신자 기준)
+  - 초당 송신/전달 메시지 수와 전달률 (접속자 수로 계산한 기대 수신 대비)
+  - 연결당 메모리: 접속 전후 서버 RSS 증가량(--tracemalloc이면 Python 힙 증가량도) / 연결 수
+  - 이벤트 루프 지연: 서버와 클라이언트 루프에서 일정 간격으로 잠들었다 깨어난 시각이 늦은 정도
+클라이언트 루프 지연이 크면 벤치마크 프로세스 자체가 병목이므로 서버 수치를 그대로 믿으면 안 됩니다.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+import httpx
+import websockets
+
+from server.benchmarks.loadtest import _parse_mix
+from server.benchmarks.runner import _quiet, percentiles, save_results
+
+# 클라이언트 메시지 종류별 비율 (합이 1일 필요는 없음)
+DEFAULT_MIX = {
+    "cursor": 0.6,
+    "viewport": 0.15,
+    "lock": 0.1,
+    "change": 0.1,
+    "ping": 0.05,
+}
+
+DEFAULT_WORKFLOWS = 50
+DEFAULT_CLIENTS_PER_WORKFLOW = 20
+DEFAULT_NODES = 20
+DEFAULT_MESSAGE_RATE = 1.0
+WORKFLOW_PREFIX = "bench-wf-"
+LOOP_LAG_INTERVAL = 0.05
+SERVER_START_TIMEOUT = 60.0
+
+_CHANGE_ERRORS = {"CHANGE_APPLY_FAILED", "CHANGE_ERROR"}
+
+
+class LoopLagMonitor:
+    """
+    Measure event-loop lag by sleeping for a fixed interval and recording how late each wake-up is.
+
+    Args:
+        interval: Sleep interval in seconds
+        max_samples: Number of most recent samples kept
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, max_samples: int = 100_000):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (loop.time() - started - self.interval) * 1000))
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"samples": len(self.samples), **percentiles(list(self.samples))}
+
+
+def workflow_ids(count: int, prefix: str = WORKFLOW_PREFIX) -> List[str]:
+    return [f"{prefix}{index}" for index in range(count)]
+
+
+def _raise_fd_limit() -> None:
+    """열린 파일 수 soft 제한을 hard 제한까지 올린다 (연결마다 소켓 하나, POSIX만)"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+# ----------------------------------------------------------------------
+# Benchmark server (serve 하위 명령)
+# ----------------------------------------------------------------------
+
+def collaboration_app(workflows: int, nodes: int = DEFAULT_NODES, prefix: str = WORKFLOW_PREFIX) -> Any:
+    """
+    Build an app with the collaboration router and a /bench/stats endpoint.
+
+    전역 MongoDB 연결이 메모리 저장소를 가리키는 동안 호출해야 합니다 (워크플로우를 미리 만들고,
+    협업 라우터의 sync_service를 그 저장소로 다시 만든다).
+    """
+    from fastapi import FastAPI
+
+    from server.config.database import get_workflows_collection
+    from server.routes import collaboration
+    from server.services.sync_service import SyncService
+    from server.utils.memory_diagnostics import _process_rss_bytes
+
+    collection = get_workflows_collection()
+    for workflow_id in workflow_ids(workflows, prefix):
+        collection.insert_one({
+            "projectId": workflow_id,
+            "nodes": [{"id": f"node-{index}", "type": "custom", "position": {"x": index * 200.0, "y": 0.0},
+                       "data": {"label": f"Node {index}"}} for index in range(nodes)],
+            "edges": [],
+        })
+    collaboration.sync_service = SyncService()
+    monitor = LoopLagMonitor()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(monitor.run())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(collaboration.router)
+
+    @app.get("/bench/stats")
+    def stats(reset_lag: bool = False):
+        gc.collect()
+        result = {
+            "connections": collaboration.websocket_manager.get_connection_count(),
+            "rss_bytes": _process_rss_bytes(),
+            "traced_bytes": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            "loop_lag_ms": monitor.summary(),
+        }
+        if reset_lag:
+            monitor.reset()
+        return result
+
+    return app
+
+
+def serve(port: int, workflows: int, nodes: int = DEFAULT_NODES, trace_memory: bool = False) -> None:
+    """Run the benchmark server on 127.0.0.1:port until terminated."""
+    import uvicorn
+
+    from server.testing.memory_mongo import use_memory_mongo
+
+    _raise_fd_limit()
+    if trace_memory:
+        tracemalloc.start()
+    # 협업 라우터 import가 SyncService를 만들며 MongoDB에 접속하므로 메모리 저장소로 먼저 바꾼다
+    with use_memory_mongo():
+        app = collaboration_app(workflows, nodes)
+        uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                      access_log=False, ws_ping_interval=None)).run()
+
+
+@contextmanager
+def local_server(workflows: int, nodes: int = DEFAULT_NODES, trace_memory: bool = False,
+                 verbose: bool = False) -> Iterator[str]:
+    """Start the benchmark server in a child process and yield its base URL."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+    command = [sys.executable, "-m", "server.benchmarks.ws_bench", "serve", "--port", str(port),
+               "--workflows", str(workflows), "--nodes", str(nodes)]
+    if trace_memory:
+        command.append("--tracemalloc")
+    if verbose:
+        command.append("--verbose")
+    output = None if verbose else subprocess.DEVNULL
+    process = subprocess.Popen(command, env=env, stdout=output, stderr=output)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server failed to start")
+            try:
+                httpx.get(f"{base_url}/bench/stats", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# ----------------------------------------------------------------------
+# Simulated clients
+# ----------------------------------------------------------------------
+
+@dataclass
+class _Broadcast:
+    """A message sent during the measurement window and the receipts it produced."""
+    kind: str
+    sent_at: float
+    expected: int
+    delivered: int = 0
+    last_ms: float = 0.0
+
+
+class _Client:
+    """One simulated collaborator (WebSocket connection plus protocol state)."""
+
+    def __init__(self, workflow_id: str, user_id: str):
+        self.workflow_id = workflow_id
+        self.user_id = user_id
+        self.websocket: Any = None
+        self.reader: Optional[asyncio.Task] = None
+        self.welcomed = asyncio.Event()
+        self.seq = 0
+        self.held_lock: Optional[str] = None
+        self.lock_requested_at: Optional[float] = None
+        self.pending_changes: Deque[Tuple[str, str]] = deque()
+        self.pings: Deque[float] = deque()
+
+
+def format_ws_report(report: Dict[str, Any]) -> str:
+    setup = report["setup"]
+    lines = [
+        f"{report['connections']['connected']}/{setup['workflows'] * setup['clients_per_workflow']} clients connected "
+        f"({setup['workflows']} workflows x {setup['clients_per_workflow']}), "
+        f"connect p95 {report['connections']['latency_ms']['p95']:.0f}ms",
+        f"sent {report['throughput']['sent_per_second']:.1f} msg/s, "
+        f"delivered {report['throughput']['delivered_per_second']:.1f} msg/s, "
+        f"received {report['throughput']['received_per_second']:.1f} msg/s",
+        f"{'kind':>10}{'sent':>8}{'delivered':>11}{'ratio':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'last p95':>10}",
+    ]
+    for kind, row in report["fan_out"].items():
+        lines.append(
+            f"{kind:>10}{row['broadcasts']:>8}{row['delivered']:>11}{row['delivery_ratio']:>8.3f}"
+            f"{row['latency_ms']['p50']:>9.1f}{row['latency_ms']['p95']:>9.1f}{row['latency_ms']['p99']:>9.1f}"
+            f"{row['completion_ms']['p95']:>10.1f}"
+        )
+    memory = report["memory"]
+    if memory["rss_per_connection_bytes"] is not None:
+        traced = memory["traced_per_connection_bytes"]
+        lines.append(f"server memory per connection: {memory['rss_per_connection_bytes'] / 1024:.1f} KiB RSS"
+                     + (f", {traced / 1024:.1f} KiB Python heap" if traced is not None else ""))
+    lag = report["loop_lag_ms"]
+    if lag["server"]:
+        lines.append(f"server loop lag p95 {lag['server']['p95']:.1f}ms, max {lag['server']['max']:.1f}ms")
+    lines.append(f"client loop lag p95 {lag['client']['p95']:.1f}ms, max {lag['client']['max']:.1f}ms")
+    if report["errors"]:
+        lines.append("errors: " + ", ".join(f"{code}={count}" for code, count in sorted(report["errors"].items())))
+    return "\n".join(lines)
+
+
+class CollaborationBenchmark:
+    """
+    Many simulated collaborators against a running server.
+
+    Args:
+        base_url: Server root URL (http(s):// 또는 ws(s)://)
+        workflows: Number of workflows (bench-wf-0 ...)
+        clients_per_workflow: Connections per workflow
+        nodes: Seeded nodes per workflow (락/변경 대상 node-0 ...)
+        message_rate: Average messages per second per client (포아송 도착)
+        mix: Relative weights of DEFAULT_MIX kinds
+        connect_concurrency: Concurrent WebSocket handshakes while connecting
+        timeout: Handshake/welcome timeout in seconds
+        seed: Random seed for message choice and timing
+        prefix: Workflow ID prefix
+    """
+
+    def __init__(self, base_url: str, workflows: int = DEFAULT_WORKFLOWS,
+                 clients_per_workflow: int = DEFAULT_CLIENTS_PER_WORKFLOW, nodes: int = DEFAULT_NODES,
+                 message_rate: float = DEFAULT_MESSAGE_RATE, mix: Optional[Dict[str, float]] = None,
+                 connect_concurrency: int = 50, timeout: float = 30.0, seed: int = 0,
+                 prefix: str = WORKFLOW_PREFIX):
+        self.http_url = base_url.rstrip("/").replace("ws://", "http://", 1).replace("wss://", "https://", 1)
+        self.ws_url = self.http_url.replace("http://", "ws://", 1).replace("https://", "wss://", 1)
+        self.workflows = workflows
+        self.clients_per_workflow = clients_per_workflow
+        self.nodes = nodes
+        self.message_rate = message_rate
+        self.mix = {kind: weight for kind, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+        unknown = set(self.mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise ValueError(f"Unknown message kinds: {sorted(unknown)}")
+        self.connect_concurrency = connect_concurrency
+        self.timeout = timeout
+        self.seed = seed
+        self.prefix = prefix
+        self._reset()
+
+    def _reset(self) -> None:
+        self._random = random.Random(self.seed)
+        self._measuring = False
+        self._broadcasts: Dict[Tuple, _Broadcast] = {}
+        self._latencies: Dict[str, List[float]] = {kind: [] for kind in self.mix if kind != "ping"}
+        self._connect_ms: List[float] = []
+        self._lock_ms: List[float] = []
+        self._round_trip_ms: List[float] = []
+        self._sent: Counter = Counter()
+        self._received: Counter = Counter()
+        self._errors: Counter = Counter()
+
+    def run(self, duration: float, drain: float = 2.0) -> Dict[str, Any]:
+        return asyncio.run(self.run_async(duration, drain))
+
+    async def run_async(self, duration: float, drain: float = 2.0) -> Dict[str, Any]:
+        self._reset()
+        _raise_fd_limit()
+        client_lag = LoopLagMonitor()
+        lag_task = asyncio.create_task(client_lag.run())
+        async with httpx.AsyncClient(timeout=self.timeout) as http:
+            # 첫 연결에서만 생기는 할당(지연 import 등)이 연결당 메모리에 섞이지 않도록 한 번 접속했다 끊는다
+            warm_up = _Client(workflow_ids(1, self.prefix)[0], "bench-warm-up")
+            await self._connect(warm_up, asyncio.Semaphore(1))
+            await self._close(warm_up)
+            self._connect_ms.clear()
+            before = await self._server_stats(http)
+
+            # 1. 접속 (워크플로우마다 clients_per_workflow개, welcome을 받을 때까지)
+            clients = [_Client(workflow_id, f"{workflow_id}-user-{index}")
+                       for workflow_id in workflow_ids(self.workflows, self.prefix)
+                       for index in range(self.clients_per_workflow)]
+            semaphore = asyncio.Semaphore(self.connect_concurrency)
+            connect_started = time.perf_counter()
+            await asyncio.gather(*(self._connect(client, semaphore) for client in clients))
+            connect_seconds = time.perf_counter() - connect_started
+            connected = [client for client in clients if client.welcomed.is_set()]
+            members = Counter(client.workflow_id for client in connected)
+            # 접속 알림(user_joined) 브로드캐스트가 끝나길 기다린다
+            await asyncio.sleep(0.5)
+            after_connect = await self._server_stats(http, reset_lag=True)
+
+            # 2. 측정 구간: 클라이언트마다 open-loop로 메시지를 보낸다
+            client_lag.reset()
+            self._measuring = True
+            started = time.perf_counter()
+            await asyncio.gather(*(self._drive(client, started + duration, members[client.workflow_id])
+                                   for client in connected))
+            elapsed = time.perf_counter() - started
+            await self._drain(drain)
+            self._measuring = False
+            during = await self._server_stats(http)
+            client_lag_summary = client_lag.summary()
+
+            # 3. 정리
+            await asyncio.gather(*(self._close(client) for client in clients))
+        lag_task.cancel()
+        return self._report(len(connected), connect_seconds, elapsed, before, after_connect, during,
+                            client_lag_summary)
+
+    async def _server_stats(self, http: httpx.AsyncClient, reset_lag: bool = False) -> Optional[Dict[str, Any]]:
+        """벤치마크 서버의 /bench/stats (외부 서버에 없으면 None)"""
+        try:
+            response = await http.get(f"{self.http_url}/bench/stats", params={"reset_lag": reset_lag})
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    async def _connect(self, client: _Client, semaphore: asyncio.Semaphore) -> None:
+        query = urlencode({"user_id": client.user_id, "user_name": client.user_id})
+        url = f"{self.ws_url}/ws/collaboration/{quote(client.workflow_id)}?{query}"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                client.websocket = await websockets.connect(url, open_timeout=self.timeout, ping_interval=None,
+                                                            max_size=None)
+                client.reader = asyncio.create_task(self._read(client))
+                await asyncio.wait_for(client.welcomed.wait(), self.timeout)
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                self._errors[f"connect:{type(e).__name__}"] += 1
+                return
+            self._connect_ms.append((time.perf_counter() - started) * 1000)
+
+    async def _close(self, client: _Client) -> None:
+        if client.websocket is not None:
+            try:
+                await client.websocket.close()
+            except (OSError, websockets.WebSocketException):
+                pass
+        if client.reader is not None:
+            client.reader.cancel()
+
+    async def _drain(self, limit: float) -> None:
+        """측정 구간에 보낸 브로드캐스트가 모두 전달되거나 limit초가 지날 때까지 기다린다"""
+        deadline = time.perf_counter() + limit
+        while time.perf_counter() < deadline:
+            if all(broadcast.delivered >= broadcast.expected for broadcast in self._broadcasts.values()):
+                return
+            await asyncio.sleep(0.05)
+
+    async def _read(self, client: _Client) -> None:
+        try:
+            async for raw in client.websocket:
+                self._on_message(client, json.loads(raw), time.perf_counter())
+        except websockets.ConnectionClosed:
+            if self._measuring:
+                self._errors["disconnected"] += 1
+
+    def _on_message(self, client: _Client, message: Dict[str, Any], now: float) -> None:
+        kind = message.get("type")
+        if self._measuring:
+            self._received[kind] += 1
+        key: Optional[Tuple] = None
+        if kind == "welcome":
+            client.welcomed.set()
+        elif kind == "cursor_moved":
+            key = ("cursor", message["user_id"], message["position"]["x"])
+        elif kind == "viewport_changed":
+            key = ("viewport", message["user_id"], message["viewport"]["x"])
+        elif kind == "change_applied":
+            key = ("change", message["change"]["id"])
+            if message["change"]["user_id"] == client.user_id and key in client.pending_changes:
+                client.pending_changes.remove(key)
+        elif kind == "lock_acquired":
+            key = ("lock", message["lock"]["owner_id"], message["node_id"])
+            if message["lock"]["owner_id"] == client.user_id:
+                client.held_lock = message["node_id"]
+                self._lock_reply(client, now)
+        elif kind == "lock_released":
+            key = ("unlock", client.workflow_id, message["node_id"])
+        elif kind == "lock_failed":
+            # 다른 사용자가 잡고 있는 노드: 보낸 사람에게만 응답하므로 브로드캐스트에서 뺀다
+            self._broadcasts.pop(("lock", client.user_id, message["node_id"]), None)
+            self._lock_reply(client, now)
+        elif kind == "pong" and client.pings:
+            self._round_trip_ms.append((now - client.pings.popleft()) * 1000)
+        elif kind == "error":
+            code = message.get("code", "unknown")
+            self._errors[code] += 1
+            # 클라이언트 메시지는 연결마다 순서대로 처리되므로 가장 오래된 변경이 실패한 것
+            if code in _CHANGE_ERRORS and client.pending_changes:
+                self._broadcasts.pop(client.pending_changes.popleft(), None)
+        if key is not None:
+            broadcast = self._broadcasts.get(key)
+            if broadcast is not None:
+                latency = (now - broadcast.sent_at) * 1000
+                broadcast.delivered += 1
+                broadcast.last_ms = max(broadcast.last_ms, latency)
+                self._latencies[broadcast.kind].append(latency)
+
+    def _lock_reply(self, client: _Client, now: float) -> None:
+        if client.lock_requested_at is not None:
+            self._lock_ms.append((now - client.lock_requested_at) * 1000)
+            client.lock_requested_at = None
+
+    async def _drive(self, client: _Client, deadline: float, members: int) -> None:
+        kinds, weights = list(self.mix), list(self.mix.values())
+        next_at = time.perf_counter() + self._random.expovariate(self.message_rate)
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            message = self._message(client, self._random.choices(kinds, weights)[0], members)
+            try:
+                await client.websocket.send(json.dumps(message))
+            except websockets.ConnectionClosed:
+                return
+            self._sent[message["type"]] += 1
+            next_at += self._random.expovariate(self.message_rate)
+
+    def _message(self, client: _Client, kind: str, members: int) -> Dict[str, Any]:
+        """다음 메시지를 만들고 수신 쪽에서 짝지을 수 있도록 보낸 시각을 기록한다"""
+        client.seq += 1
+        now = time.perf_counter()
+        rng = self._random
+        if kind == "lock" and client.held_lock is not None:
+            node_id, client.held_lock = client.held_lock, None
+            self._track(("unlock", client.workflow_id, node_id), "lock", now, members)
+            return {"type": "lock_release", "node_id": node_id}
+        if kind == "lock" and client.lock_requested_at is None:
+            node_id = f"node-{rng.randrange(self.nodes)}"
+            client.lock_requested_at = now
+            self._track(("lock", client.user_id, node_id), "lock", now, members)
+            return {"type": "lock_request", "node_id": node_id}
+        if kind == "change":
+            node_id = f"node-{rng.randrange(self.nodes)}"
+            position = {"x": round(rng.uniform(0, 2000), 2), "y": round(rng.uniform(0, 2000), 2)}
+            change_type = "node_move" if rng.random() < 0.8 else "node_update"
+            data = {"id": node_id, "position": position}
+            if change_type == "node_update":
+                data.update({"type": "custom", "data": {"label": f"Node {node_id} v{client.seq}"}})
+            key = ("change", f"{client.user_id}-{client.seq}")
+            client.pending_changes.append(key)
+            self._track(key, "change", now, members)
+            return {"type": "change", "change": {
+                "id": key[1], "type": change_type, "workflow_id": client.workflow_id, "user_id": client.user_id,
+                "timestamp": time.time() * 1000, "data": data,
+            }}
+        if kind == "ping":
+            client.pings.append(now)
+            return {"type": "ping"}
+        # 커서/뷰포트는 보낸 사람을 뺀 나머지에게, 락/변경은 보낸 사람을 포함한 전체에게 브로드캐스트된다
+        if kind == "viewport":
+            self._track(("viewport", client.user_id, float(client.seq)), "viewport", now, members - 1)
+            return {"type": "viewport_update",
+                    "viewport": {"x": client.seq, "y": round(rng.uniform(-500, 500), 2),
+                                 "zoom": round(rng.uniform(0.5, 2), 2)}}
+        # 커서 (락 요청이 응답을 기다리는 중일 때도 커서를 보낸다)
+        self._track(("cursor", client.user_id, float(client.seq)), "cursor", now, members - 1)
+        return {"type": "cursor_update", "position": {"x": client.seq, "y": round(rng.uniform(0, 2000), 2)}}
+
+    def _track(self, key: Tuple, kind: str, sent_at: float, expected: int) -> None:
+        self._latencies.setdefault(kind, [])
+        self._broadcasts[key] = _Broadcast(kind, sent_at, expected)
+
+    def _report(self, connected: int, connect_seconds: float, elapsed: float, before: Optional[Dict[str, Any]],
+                after_connect: Optional[Dict[str, Any]], during: Optional[Dict[str, Any]],
+                client_lag: Dict[str, Any]) -> Dict[str, Any]:
+        fan_out = {}
+        for kind, latencies in self._latencies.items():
+            broadcasts = [broadcast for broadcast in self._broadcasts.values() if broadcast.kind == kind]
+            expected = sum(broadcast.expected for broadcast in broadcasts)
+            delivered = sum(min(broadcast.delivered, broadcast.expected) for broadcast in broadcasts)
+            fan_out[kind] = {
+                "broadcasts": len(broadcasts),
+                "expected": expected,
+                "delivered": delivered,
+                "delivery_ratio": round(delivered / expected, 4) if expected else 1.0,
+                "latency_ms": percentiles(latencies),
+                "completion_ms": percentiles([broadcast.last_ms for broadcast in broadcasts
+                                              if broadcast.expected and broadcast.delivered >= broadcast.expected]),
+            }
+        delivered_total = sum(row["delivered"] for row in fan_out.values())
+
+        def per_connection(field: str) -> Optional[float]:
+            if not before or not after_connect or before.get(field) is None or not connected:
+                return None
+            return round((after_connect[field] - before[field]) / connected, 1)
+
+        return {
+            "kind": "ws_bench",
+            "setup": {
+                "url": self.ws_url, "workflows": self.workflows, "clients_per_workflow": self.clients_per_workflow,
+                "nodes": self.nodes, "message_rate": self.message_rate, "mix": self.mix, "seed": self.seed,
+                "duration_seconds": round(elapsed, 3),
+            },
+            "connections": {
+                "connected": connected,
+                "seconds": round(connect_seconds, 3),
+                "latency_ms": percentiles(self._connect_ms),
+                "server_count": after_connect["connections"] if after_connect else None,
+            },
+            "throughput": {
+                "sent": dict(self._sent),
+                "received": dict(self._received),
+                "sent_per_second": round(sum(self._sent.values()) / elapsed, 2) if elapsed else 0.0,
+                "delivered_per_second": round(delivered_total / elapsed, 2) if elapsed else 0.0,
+                "received_per_second": round(sum(self._received.values()) / elapsed, 2) if elapsed else 0.0,
+            },
+            "fan_out": fan_out,
+            "lock_round_trip_ms": percentiles(self._lock_ms),
+            "ping_round_trip_ms": percentiles(self._round_trip_ms),
+            "memory": {
+                "rss_before_bytes": before["rss_bytes"] if before else None,
+                "rss_connected_bytes": after_connect["rss_bytes"] if after_connect else None,
+                "rss_per_connection_bytes": per_connection("rss_bytes"),
+                "traced_per_connection_bytes": per_connection("traced_bytes"),
+            },
+            "loop_lag_ms": {"server": during["loop_lag_ms"] if during else None, "client": client_lag},
+            "errors": dict(self._errors),
+        }
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["serve"]:
+        parser = argparse.ArgumentParser(prog="python -m server.benchmarks.ws_bench serve",
+                                         description="Collaboration benchmark server (in-memory MongoDB)")
+        parser.add_argument("--port", type=int, required=True)
+        parser.add_argument("--workflows", type=int, default=DEFAULT_WORKFLOWS)
+        parser.add_argument("--nodes", type=int, default=DEFAULT_NODES)
+        parser.add_argument("--tracemalloc", action="store_true", help="report Python heap per connection")
+        parser.add_argument("--verbose", action="store_true", help="keep server logs")
+        args = parser.parse_args(argv[1:])
+        with nullcontext() if args.verbose else _quiet():
+            serve(args.port, args.workflows, args.nodes, trace_memory=args.tracemalloc)
+        return 0
+
+    parser = argparse.ArgumentParser(prog="python -m server.benchmarks.ws_bench",
+                                     description="Collaboration WebSocket scale benchmark")
+    parser.add_argument("--url", default=None, help="target server (default: start a benchmark server)")
+    parser.add_argument("--workflows", type=int, default=DEFAULT_WORKFLOWS)
+    parser.add_argument("--clients-per-workflow", type=int, default=DEFAULT_CLIENTS_PER_WORKFLOW)
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="seeded nodes per workflow")
+    parser.add_argument("--message-rate", type=float, default=DEFAULT_MESSAGE_RATE,
+                        help="messages/second per client (server limit is 10)")
+    parser.add_argument("--duration", type=float, default=20.0, help="measurement seconds")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for in-flight broadcasts")
+    parser.add_argument("--mix", default=None, help="message weights, e.g. cursor=6,change=1")
+    parser.add_argument("--connect-concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also measure server Python heap per connection")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="ws-bench-results.json")
+    parser.add_argument("--verbose", action="store_true", help="keep server logs")
+    args = parser.parse_args(argv)
+
+    def run(base_url: str) -> Dict[str, Any]:
+        benchmark = CollaborationBenchmark(
+            base_url, workflows=args.workflows, clients_per_workflow=args.clients_per_workflow, nodes=args.nodes,
+            message_rate=args.message_rate, mix=_parse_mix(args.mix), connect_concurrency=args.connect_concurrency,
+            timeout=args.timeout, seed=args.seed,
+        )
+        print(f"benchmarking {base_url}: {args.workflows} workflows x {args.clients_per_workflow} clients, "
+              f"{args.duration}s", file=sys.stderr)
+        return benchmark.run(args.duration, args.drain)
+
+    output = os.path.abspath(args.output)
+    if args.url:
+        report = run(args.url)
+    else:
+        with local_server(args.workflows, args.nodes, trace_memory=args.tracemalloc,
+                          verbose=args.verbose) as base_url:
+            report = run(base_url)
+    save_results(report, output)
+    print(format_ws_report(report))
+    print(f"results: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ from enum import Enum
 from datetime import datetime
 
 class ExecutionStatus(str, Enum):
+    QUEUED = "queued"
     RUNNING = "running"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
@@ -14,6 +15,12 @@ class ExecutionType(str, Enum):
     STANDARD = "standard"
     EXPRESS = "express"
 
+class ExecutionPriority(str, Enum):
+    """실행 큐 우선순위 레인"""
+    INTERACTIVE = "interactive"  # 에디터/API 요청
+    SCHEDULED = "scheduled"  # 스케줄러 트리거
+    BATCH = "batch"  # 대량 일괄 실행
+
 class Execution(BaseModel):
     id: str
     name: str
@@ -40,6 +47,21 @@ class Execution(BaseModel):
     # 외부 API 호출 정보
     api_call_info: Optional[Dict[str, Any]] = None  # API 호출 관련 정보 (IP, User-Agent, 요청 헤더 등)
     execution_source: str = "internal"  # "internal" (프론트엔드), "external" (외부 API), "scheduled" (스케줄러)
+    # 실행 큐 정보
+    priority: ExecutionPriority = ExecutionPriority.INTERACTIVE
+    queue_wait_ms: Optional[int] = None  # 큐에서 대기한 시간
+    # 비동기 실행 완료 콜백
+    callback_url: Optional[str] = None  # 완료 시 결과를 POST할 URL
+    callback_status: Optional[str] = None  # "delivered", "failed", "rejected" (허용되지 않는 주소)
+    # 실행 제한 (초과 시 TIMED_OUT)
+    timeout_seconds: Optional[float] = None  # 실행 제한 시간 (접수 시점부터)
+    max_supersteps: Optional[int] = None  # 최대 superstep 수
+    supersteps: Optional[int] = None  # 실제 실행된 superstep 수
+    # LLM 토큰 사용량과 예상 비용 (노드 사용량 합계, 모델별)
+    usage: Optional[Dict[str, Any]] = None
+    # 요청/추적 ID와 단계별 소요 시간 (배포 조회, 모듈 로드, 그래프 실행, 로그 집계, 스냅샷 저장 등)
+    trace_id: Optional[str] = None
+    timing: Optional[List[Dict[str, Any]]] = None
 
 class ExecutionHistory(BaseModel):
     id: str
@@ -60,6 +82,10 @@ class StartExecutionRequest(BaseModel):
     input: Dict[str, Any] = {}
     version: Optional[str] = None
     alias: Optional[str] = None
+    priority: ExecutionPriority = ExecutionPriority.INTERACTIVE
+    callback_url: Optional[str] = None
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+    max_supersteps: Optional[int] = Field(None, ge=1)
 
 class StartExecutionResponse(BaseModel):
     success: bool
@@ -85,6 +111,12 @@ class DescribeExecutionResponse(BaseModel):
     history: List[ExecutionHistory]
     message: str
 
+class WaitExecutionResponse(BaseModel):
+    success: bool
+    completed: bool
+    execution: Execution
+    message: str
+
 class StopExecutionRequest(BaseModel):
     error: Optional[str] = None
     cause: Optional[str] = None
@@ -92,4 +124,9 @@ class StopExecutionRequest(BaseModel):
 class StopExecutionResponse(BaseModel):
     success: bool
     execution: Execution
-    message: str 
\ No newline at end of file
+    message: str
+
+class QueueStatsResponse(BaseModel):
+    success: bool
+    stats: Dict[str, Any]
+    message: str
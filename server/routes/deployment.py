@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Body, Request
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Body, Header, Request, Query
 from server.models.deployment import (
     CreateDeploymentRequest, CreateDeploymentResponse,
     DeploymentsResponse, UpdateDeploymentStatusRequest,
@@ -6,7 +7,12 @@ from server.models.deployment import (
     DeploymentStatusResponse, RollbackDeploymentRequest
 )
 from server.services.deployment_service import deployment_service
+from server.services.execution_queue import execution_queue, QueueFullError
+from server.services.deployment_workers import deployment_workers
 from server.models.deployment import DeploymentStatus
+from server.models.execution import ExecutionPriority
+from server.utils.profiler import ProfilerBusyError, use_profiling
+from server.utils.security import check_admin_token, redact_headers
 import logging
 
 logger = logging.getLogger(__name__)
@@ -56,6 +62,24 @@ def get_deployments():
         logger.error(f"Error fetching deployments: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/deployment-workers/stats')
+def get_deployment_worker_stats():
+    """배포별 워커 프로세스 풀 상태와 대기/실행 시간을 반환합니다."""
+    try:
+        return {"success": True, "stats": deployment_workers.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting deployment worker stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/deployment/{deployment_id}/usage')
+def get_deployment_usage(deployment_id: str):
+    """배포의 LLM 토큰 사용량과 예상 비용을 버전/모델별로 반환합니다."""
+    try:
+        return {"success": True, "usage": deployment_service.get_deployment_usage(deployment_id)}
+    except Exception as e:
+        logger.error(f"Error getting deployment usage: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get('/deployment/{deployment_id}', response_model=DeploymentStatusResponse)
 def get_deployment_status(deployment_id: str):
     """특정 배포의 상태와 버전 정보를 반환합니다."""
@@ -276,10 +300,22 @@ def deactivate_deployment(deployment_id: str):
         raise HTTPException(status_code=500, detail=str(e)) 
 
 @router.post('/deployment/{deployment_id}/run')
-def run_deployment(deployment_id: str, msg: dict = Body(...), request: Request = None):
-    """배포를 실행합니다."""
+def run_deployment(
+    deployment_id: str,
+    msg: dict = Body(...),
+    request: Request = None,
+    priority: ExecutionPriority = Query(ExecutionPriority.INTERACTIVE),
+    profile: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """배포를 실행합니다. profile=true(관리자 토큰 필요)이면 실행을 cProfile로 측정해 결과에 포함합니다.
+    
+    cProfile 측정은 프로세스 전역으로 한 번에 하나만 가능하므로, 다른 실행을 측정하는 중이면 409를 반환합니다.
+    """
     try:
         logger.info(f"Running deployment {deployment_id}")
+        if profile:
+            check_admin_token(x_admin_token)
         
         # msg는 이미 프론트엔드에서 올바른 구조 {start_node_name: {question_variable_name: message}}로 전달됨
         input_data = msg
@@ -300,7 +336,8 @@ def run_deployment(deployment_id: str, msg: dict = Body(...), request: Request =
                 "accept": request.headers.get("accept"),
                 "request_method": request.method,
                 "request_url": str(request.url),
-                "headers": dict(request.headers)
+                # 자격 증명 헤더(관리자 토큰, Authorization 등)는 실행 기록에 남기지 않는다
+                "headers": redact_headers(request.headers)
             }
         
         # 실행 소스 판단 (Referer나 Origin으로 내부/외부 구분)
@@ -312,13 +349,38 @@ def run_deployment(deployment_id: str, msg: dict = Body(...), request: Request =
             else:
                 execution_source = "external"
         
-        result = deployment_service.run_deployment(deployment_id, input_data, api_call_info, execution_source)
+        # 실행 큐를 거쳐 실행 (요청 스레드는 결과를 기다린다, 프로파일링 요청은 큐 작업의 컨텍스트로 전달)
+        with use_profiling(profile):
+            job = execution_queue.submit(
+                "deployment_run",
+                {
+                    "deployment_id": deployment_id,
+                    "input_data": input_data,
+                    "api_call_info": api_call_info,
+                    "execution_source": execution_source
+                },
+                lane=priority,
+                durable=False
+            )
+        # 큐 대기 시간(queue_wait)은 실행 큐가 요청 타이머에 기록한다 (실행 기록 timing, Server-Timing)
+        job = execution_queue.wait(job.id)
+        if job.error is not None:
+            raise job.error
+        result = job.result
         
         logger.info(f"Successfully executed deployment {deployment_id}")
         
         # deployment_service에서 이미 완전한 응답 구조를 반환하므로 그대로 전달
         return result
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        logger.warning(f"Execution queue full for deployment {deployment_id}: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ProfilerBusyError as e:
+        logger.warning(f"Profiling rejected for deployment {deployment_id}: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         logger.error(f"Deployment not found or not active: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,110 @@
+"""
+Admin-only diagnostics endpoints (X-Admin-Token: LANGSTAR_ADMIN_TOKEN).
+"""
+
+import logging
+import os
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+
+from server.utils.memory_diagnostics import DEFAULT_TRACEMALLOC_FRAMES, memory_diagnostics
+from server.utils.profiler import (
+    MAX_DURATION_SECONDS, PROFILE_FILE_NAME, ProfilerBusyError, collapsed, sampling_profiler
+)
+from server.utils.security import require_admin
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get('/diagnostics/profile')
+def sample_profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_DURATION_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    include_idle: bool = Query(False)
+):
+    """
+    서버 프로세스의 모든 스레드를 지정한 시간 동안 샘플링합니다.
+
+    format=collapsed: flamegraph.pl / speedscope용 collapsed stack 파일, format=json: 스레드별 샘플 수 포함 JSON
+    """
+    try:
+        logger.info(f"Sampling profile for {seconds}s (interval {interval_ms}ms)")
+        result = sampling_profiler.sample(seconds, interval_ms / 1000, include_idle=include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error sampling profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if format == "json":
+        return {"success": True, "profile": result}
+    filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    return Response(
+        content=collapsed(result["stacks"]),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(result["samples"])
+        }
+    )
+
+
+@router.get('/diagnostics/deployments/{deployment_id}/executions/{execution_id}/profile')
+def download_execution_profile(deployment_id: str, execution_id: str):
+    """profile=true로 실행한 배포 실행의 cProfile 결과(pstats 파일)를 내려받습니다."""
+    path = os.path.join("deployments", deployment_id, "executions", execution_id, PROFILE_FILE_NAME)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"No profile recorded for execution {execution_id}")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{execution_id}.pstats")
+
+
+@router.get('/diagnostics/memory')
+def memory_summary(include_objects: bool = Query(True), limit: int = Query(20, ge=1, le=500)):
+    """
+    프로세스 메모리 요약: RSS, 추적 대상 구조체(MEMORY_STORE, 체크포인트, 레이트 리미터 등)의 항목 수와 크기,
+    시작 이후 추가된 모듈, gc 객체 타입별 개수
+    """
+    try:
+        return {"success": True, "memory": memory_diagnostics.summary(include_objects=include_objects, limit=limit)}
+    except Exception as e:
+        logger.error(f"Error collecting memory diagnostics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post('/diagnostics/memory/tracemalloc/start')
+def start_tracemalloc(frames: int = Query(DEFAULT_TRACEMALLOC_FRAMES, ge=1, le=100)):
+    """tracemalloc을 켜고 기준 스냅샷을 찍습니다 (이미 켜져 있으면 기준 스냅샷만 새로 찍음)."""
+    logger.info(f"Starting tracemalloc ({frames} frames)")
+    return {"success": True, "tracemalloc": memory_diagnostics.start_tracing(frames)}
+
+
+@router.post('/diagnostics/memory/tracemalloc/stop')
+def stop_tracemalloc():
+    """tracemalloc을 끄고 저장된 스냅샷을 버립니다."""
+    logger.info("Stopping tracemalloc")
+    return {"success": True, "tracemalloc": memory_diagnostics.stop_tracing()}
+
+
+@router.get('/diagnostics/memory/allocations')
+def memory_allocations(
+    compare: str = Query("baseline", pattern="^(baseline|previous|none)$"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(20, ge=1, le=500)
+):
+    """
+    현재 스냅샷의 상위 할당 위치와 기준(baseline) 또는 직전(previous) 스냅샷 대비 증가량
+
+    tracemalloc이 꺼져 있으면 409를 반환합니다.
+    """
+    try:
+        return {"success": True, "allocations": memory_diagnostics.allocations(compare, group_by, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error taking allocation snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
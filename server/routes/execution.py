@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from server.models.execution import (
     Execution, ExecutionHistory, ExecutionStatus, ExecutionType,
     StartExecutionRequest, StartExecutionResponse,
     ListExecutionsRequest, ListExecutionsResponse,
-    DescribeExecutionResponse, StopExecutionRequest, StopExecutionResponse
+    DescribeExecutionResponse, StopExecutionRequest, StopExecutionResponse,
+    QueueStatsResponse, WaitExecutionResponse
 )
 from server.services.execution_service import execution_service
+from server.services.execution_queue import execution_queue, QueueFullError
 from server.services.deployment_service import deployment_service
+from server.services.execution_analysis import DEFAULT_WINDOW, MAX_WINDOW, execution_analysis_service
+from server.utils.security import UnsafeURLError
 from server.utils.execution_logger import execution_logger
 import logging
 import os
@@ -28,13 +32,35 @@ def start_execution(workflow_id: str, request: StartExecutionRequest):
         return StartExecutionResponse(
             success=True,
             execution=execution,
-            message=f"Execution '{execution.name}' started successfully"
+            message=f"Execution '{execution.name}' queued successfully"
         )
         
+    except QueueFullError as e:
+        logger.warning(f"Execution queue full: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except UnsafeURLError as e:
+        logger.warning(f"Rejected callback URL: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Deployment not found: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error starting execution: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/execution-queue/stats', response_model=QueueStatsResponse)
+def get_execution_queue_stats():
+    """실행 큐의 레인별 대기열 길이와 대기 시간을 반환합니다."""
+    try:
+        return QueueStatsResponse(
+            success=True,
+            stats=execution_queue.get_stats(),
+            message="Execution queue stats retrieved successfully"
+        )
+    except Exception as e:
+        logger.error(f"Error getting execution queue stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get('/workflows/{workflow_id}/executions', response_model=ListExecutionsResponse)
 def list_executions(
     workflow_id: str,
@@ -96,6 +122,36 @@ def describe_execution(execution_id: str):
         logger.error(f"Error describing execution: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/executions/{execution_id}/wait', response_model=WaitExecutionResponse)
+async def wait_execution(
+    execution_id: str,
+    response: Response,
+    timeout: float = Query(30.0, ge=0, le=300)
+):
+    """실행이 끝날 때까지 최대 timeout초 동안 기다립니다 (롱 폴링).
+    
+    완료되면 200, 아직 대기/실행 중이면 202와 현재 상태를 반환합니다.
+    """
+    try:
+        execution, completed = await execution_service.wait_for_execution(execution_id, timeout)
+        
+        if not completed:
+            response.status_code = 202
+        
+        return WaitExecutionResponse(
+            success=True,
+            completed=completed,
+            execution=execution,
+            message=f"Execution '{execution.name}' is {execution.status.value}"
+        )
+        
+    except ValueError as e:
+        logger.error(f"Execution not found: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error waiting for execution: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post('/executions/{execution_id}/stop', response_model=StopExecutionResponse)
 def stop_execution(execution_id: str, request: StopExecutionRequest):
     """실행을 중지합니다."""
@@ -293,7 +349,8 @@ def get_detailed_execution_logs(deployment_id: str, execution_id: str):
                 "error_message": log.error_message,
                 "error_traceback": log.error_traceback,
                 "position": log.position,
-                "metadata": log.metadata
+                "metadata": log.metadata,
+                "usage": log.usage
             }
             logs_data.append(log_dict)
         
@@ -314,6 +371,34 @@ def get_detailed_execution_logs(deployment_id: str, execution_id: str):
         logger.error(f"Error getting detailed execution logs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/deployments/{deployment_id}/executions/{execution_id}/critical-path')
+def get_execution_critical_path(deployment_id: str, execution_id: str):
+    """실행의 임계 경로와 노드별 자체/대기 시간, 합류 노드의 지배 분기를 반환합니다."""
+    try:
+        return {"success": True, "analysis": execution_analysis_service.analyze_execution(deployment_id, execution_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error analyzing execution critical path: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/deployments/{deployment_id}/critical-path')
+def get_deployment_critical_path(
+    deployment_id: str,
+    limit: int = Query(DEFAULT_WINDOW, ge=1, le=MAX_WINDOW),
+    version_id: str = Query(None),
+    include_failed: bool = Query(False)
+):
+    """최근 실행들의 임계 경로를 모아 노드/분기별 p50/p95와 먼저 최적화할 노드를 반환합니다."""
+    try:
+        analysis = execution_analysis_service.analyze_deployment(deployment_id, limit, version_id, include_failed)
+        return {"success": True, "analysis": analysis}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error analyzing deployment critical path: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get('/deployments/{deployment_id}/versions/{version_id}/execution-logs')
 def get_deployment_version_logs(deployment_id: str, version_id: str):
     """배포 버전의 모든 실행 로그를 반환합니다."""
@@ -345,7 +430,8 @@ def get_deployment_version_logs(deployment_id: str, version_id: str):
                     "input_data": log.input_data,
                     "output_data": log.output_data,
                     "error_message": log.error_message,
-                    "position": log.position
+                    "position": log.position,
+                    "usage": log.usage
                 }
                 logs_data.append(log_dict)
             
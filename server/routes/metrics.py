@@ -3,7 +3,10 @@ Metrics endpoint for Prometheus scraping.
 """
 
 from fastapi import APIRouter, Response
+from prometheus_client import generate_latest
 from server.services.monitoring_service import monitoring_service
+from server.services.llm_cache import llm_registry
+from server.services.execution_metrics import execution_registry
 
 router = APIRouter()
 
@@ -14,7 +17,9 @@ async def get_metrics():
     Prometheus metrics endpoint.
     
     Returns:
-        Metrics in Prometheus text format
+        Metrics in Prometheus text format (collaboration, execution engine and LLM metrics)
     """
     metrics_text = monitoring_service.get_metrics_text()
+    for registry in (execution_registry, llm_registry):
+        metrics_text += generate_latest(registry).decode('utf-8')
     return Response(content=metrics_text, media_type="text/plain")
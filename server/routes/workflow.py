@@ -2,6 +2,14 @@ from fastapi import APIRouter, Body, HTTPException
 from server.models.workflow import PromptNodeInput
 from server.services.workflow_service import WorkflowService
 from server.services.deployment_service import deployment_service
+from server.services.code_sandbox import sandbox_pool
+from server.services.llm_cache import llm_cache
+from server.services.llm_cassette import current_cassette
+from server.services.llm_resilience import llm_resilience
+from server.services.llm_router import llm_router
+from server.services.llm_scheduler import llm_scheduler
+from server.services.semantic_cache import semantic_cache
+from server.services.tool_runtime import tool_result_cache
 from server.models.deployment import DeploymentFormData, DeploymentStatus, DeploymentEnvironment
 import logging
 import traceback
@@ -49,6 +57,78 @@ def user_node(msg: dict = Body(...)):
         logger.error(f"Error in user node endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/workflow/sandbox/stats')
+def sandbox_stats():
+    """샌드박스 워커 풀 상태와 대기/실행 시간 통계 조회"""
+    try:
+        return {"success": True, "stats": sandbox_pool.get_stats()}
+    except Exception as e:
+        logger.error(f"Error in sandbox stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/workflow/llm-cache/stats')
+def llm_cache_stats():
+    """LLM 응답/시맨틱/도구 결과 캐시 적중/미스 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "stats": llm_cache.get_stats(),
+            "semantic": semantic_cache.get_stats(),
+            "tools": tool_result_cache.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error in llm cache stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete('/workflow/llm-cache')
+def clear_llm_cache():
+    """LLM 응답 캐시 비우기"""
+    try:
+        llm_cache.clear()
+        semantic_cache.clear()
+        tool_result_cache.clear()
+        return {"success": True, "message": "LLM cache cleared"}
+    except Exception as e:
+        logger.error(f"Error clearing llm cache: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/workflow/llm-scheduler/stats')
+def llm_scheduler_stats():
+    """API 키/모델별 LLM 호출 대기열, 속도 제한, 429 재시도 통계 조회"""
+    try:
+        return {"success": True, "limiters": llm_scheduler.get_stats()}
+    except Exception as e:
+        logger.error(f"Error in llm scheduler stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/workflow/llm-resilience/stats')
+def llm_resilience_stats():
+    """프로바이더/모델별 서킷 브레이커 상태, 지연 분포, 재시도/헤징 통계 조회"""
+    try:
+        return {"success": True, "stats": llm_resilience.get_stats()}
+    except Exception as e:
+        logger.error(f"Error in llm resilience stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/workflow/llm-router/stats')
+def llm_router_stats():
+    """프로바이더/모델 경로별 최근 오류율, 지연, 선택 횟수 조회"""
+    try:
+        return {"success": True, "routes": llm_router.get_stats()}
+    except Exception as e:
+        logger.error(f"Error in llm router stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get('/workflow/llm-cassette/stats')
+def llm_cassette_stats():
+    """LLM 카세트 녹화/재생 상태와 녹화, 재생, 미스 횟수 조회 (카세트가 꺼져 있으면 null)"""
+    try:
+        cassette = current_cassette()
+        return {"success": True, "cassette": cassette.get_stats() if cassette is not None else None}
+    except Exception as e:
+        logger.error(f"Error in llm cassette stats endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 
 
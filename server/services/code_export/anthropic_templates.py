@@ -1,3 +1,4 @@
+from server.services.code_export.utile import source_namespace
 import ast
 import textwrap
 
@@ -60,7 +61,7 @@ def node_{node_name}( state ) :
     ])
 
     chain = prompt | llm
-    response = chain.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(chain, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else str(response)
 
     return_value = node_input.copy()
@@ -153,7 +154,7 @@ def node_{node_name}( state ) :
     ])
 
     chain = prompt | llm
-    response = chain.invoke({{"user_prompt": user_prompt, "history": memory.chat_memory.messages}})
+    response = invoke_llm(chain, {{"user_prompt": user_prompt, "history": memory.chat_memory.messages}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else str(response)
 
     return_value = node_input.copy()
@@ -177,6 +178,9 @@ def get_tool_list(node) :
         func_def = next((node for node in parsed.body if isinstance(node, ast.FunctionDef)), None)
         function_name = func_def.name  
         tool_description = tool_info["description"] 
+        # 도구 결과 캐시 정책 (코드가 바뀌면 이전 결과를 쓰지 않도록 코드 해시로 구분)
+        tool_cache = tool_info.get("cache")
+        tool_namespace = source_namespace(tool_info['code'])
         tmp_code = f"""
 {indented_code}
 
@@ -186,6 +190,7 @@ def get_tool_list(node) :
                                                             description=('''{tool_description}''') 
                                                         )
 
+    _{function_name}_tool = memoize_tool(_{function_name}_tool, {tool_cache!r}, "{tool_namespace}")
     tool_list.append( _{function_name}_tool )         
 """     
         token_tool_code_list.append( tmp_code ) 
@@ -264,7 +269,7 @@ def node_{node_name}( state ) :
 
     
     # Anthropic 모델 응답 처리
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     if isinstance(response, dict) and "output" in response:
         output = response["output"]
         if isinstance(output, list) and len(output) > 0:
@@ -452,7 +457,7 @@ def node_{node_name}( state ) :
 
     
     # Anthropic 모델 응답 처리
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     if isinstance(response, dict) and "output" in response:
         output = response["output"]
         if isinstance(output, list) and len(output) > 0:
@@ -1,3 +1,4 @@
+from server.services.code_export.utile import source_namespace
 import ast
 import textwrap
 
@@ -67,14 +68,10 @@ def node_{node_name}( state ) :
         ("human", "{{user_prompt}}")
     ])
 
-    llm_chian = LLMChain(
-        llm=llm,
-        prompt=prompt
-    )
-
+    chain = prompt | llm
 
     # 도구 없이 LLM 직접 호출
-    response = llm_chian.predict( **{{ "user_prompt" : user_prompt }}  )
+    response = invoke_llm(chain, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else response
 
     return_value = node_input.copy()
@@ -174,15 +171,10 @@ def node_{node_name}( state ) :
         ("human", "{{user_prompt}}")
     ])
 
-    llm_chian = LLMChain(
-        llm=llm,
-        prompt=prompt,
-        memory=memory
-    )
-
+    chain = prompt | llm
 
     # 도구 없이 LLM 직접 호출
-    response = llm_chian.predict( **{{ "user_prompt" : user_prompt }}  )
+    response = invoke_llm(chain, {{"user_prompt": user_prompt, "history": memory.chat_memory.messages}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else response
 
     return_value = node_input.copy()
@@ -206,6 +198,9 @@ def get_tool_list(node) :
         func_def = next((node for node in parsed.body if isinstance(node, ast.FunctionDef)), None)
         function_name = func_def.name  
         tool_description = tool_info["description"] 
+        # 도구 결과 캐시 정책 (코드가 바뀌면 이전 결과를 쓰지 않도록 코드 해시로 구분)
+        tool_cache = tool_info.get("cache")
+        tool_namespace = source_namespace(tool_info['code'])
         tmp_code = f"""
 {indented_code}
 
@@ -215,6 +210,7 @@ def get_tool_list(node) :
                                                             description=('''{tool_description}''') 
                                                         )
 
+    _{function_name}_tool = memoize_tool(_{function_name}_tool, {tool_cache!r}, "{tool_namespace}")
     tool_list.append( _{function_name}_tool )         
 """     
         token_tool_code_list.append( tmp_code ) 
@@ -302,8 +298,8 @@ def node_{node_name}( state ) :
 
     
     # 도구 없이 LLM 직접 호출
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
-    node_input[output_value] = response["output"][0]['text'].split( "</thinking>" )[1]
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
+    node_input[output_value] = agent_output_text(response["output"])
 
     return_value = node_input.copy()
 
@@ -485,8 +481,8 @@ def node_{node_name}( state ) :
 
     
     # 도구 없이 LLM 직접 호출
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
-    node_input[output_value] = response["output"][0]['text'].split( "</thinking>" )[1]
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
+    node_input[output_value] = agent_output_text(response["output"])
 
     return_value = node_input.copy()
 
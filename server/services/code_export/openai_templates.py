@@ -1,3 +1,4 @@
+from server.services.code_export.utile import source_namespace
 import ast
 import textwrap
 
@@ -58,7 +59,7 @@ def node_{node_name}( state ) :
     ])
 
     chain = prompt | llm
-    response = chain.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(chain, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     return_value = node_input.copy()
@@ -149,7 +150,7 @@ def node_{node_name}( state ) :
     ])
 
     chain = prompt | llm
-    response = chain.invoke({{"user_prompt": user_prompt, "history": memory.chat_memory.messages}})
+    response = invoke_llm(chain, {{"user_prompt": user_prompt, "history": memory.chat_memory.messages}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     node_input[output_value] = response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     return_value = node_input.copy()
@@ -173,6 +174,9 @@ def get_tool_list(node) :
         func_def = next((node for node in parsed.body if isinstance(node, ast.FunctionDef)), None)
         function_name = func_def.name  
         tool_description = tool_info["description"] 
+        # 도구 결과 캐시 정책 (코드가 바뀌면 이전 결과를 쓰지 않도록 코드 해시로 구분)
+        tool_cache = tool_info.get("cache")
+        tool_namespace = source_namespace(tool_info['code'])
         tmp_code = f"""
 {indented_code}
 
@@ -182,6 +186,7 @@ def get_tool_list(node) :
                                                             description=('''{tool_description}''') 
                                                         )
 
+    _{function_name}_tool = memoize_tool(_{function_name}_tool, {tool_cache!r}, "{tool_namespace}")
     tool_list.append( _{function_name}_tool )         
 """     
         token_tool_code_list.append( tmp_code ) 
@@ -258,7 +263,7 @@ def node_{node_name}( state ) :
 
     
     # 도구와 함께 LLM 호출
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     
     # OpenAI 응답 파싱
     if isinstance(response, dict) and "output" in response:
@@ -444,7 +449,7 @@ def node_{node_name}( state ) :
 
     
     # 도구와 메모리 함께 LLM 호출
-    response = agent_executor.invoke({{"user_prompt": user_prompt}})
+    response = invoke_llm(agent_executor, {{"user_prompt": user_prompt}}, cache=node_config.get('cache'), resilience=node_config.get('resilience'), routing=node_config.get('routing'))
     
     # OpenAI 응답 파싱
     if isinstance(response, dict) and "output" in response:
@@ -38,6 +38,8 @@ def log_node_execution(node_id: str, node_name: str, node_type: str):
             # 노드 실행 시작 로깅
             start_time = datetime.utcnow()
             node_name_display = func.__name__
+            pop_routing_decisions()  # 이전 노드에서 남은 라우팅 결정/사용량 제거
+            pop_node_usage()
             
             # LangGraph 노드는 보통 첫 번째 인자로 'state'를 받습니다.
             state = kwargs.get('state', args[0] if args else {{}})
@@ -122,8 +124,9 @@ def log_node_execution(node_id: str, node_name: str, node_type: str):
                 logger.info("[" + node_name_display + "] Node started. Input state (partial): " + input_log_str)
             
             try:
-                # 원본 노드 함수 실행
-                result = func(*args, **kwargs)
+                # 원본 노드 함수 실행 (실행 트레이스의 노드 스팬)
+                with start_span("node " + node_name, node_span_attributes(node_id, node_name, node_type, os.environ.get("CURRENT_EXECUTION_ID"))):
+                    result = func(*args, **kwargs)
                 
                 # 실행 완료 시간 계산
                 end_time = datetime.utcnow()
@@ -171,6 +174,10 @@ def log_node_execution(node_id: str, node_name: str, node_type: str):
                         "module": "generated_code"
                     }}
                 }}
+                routing_decisions = pop_routing_decisions()
+                if routing_decisions:
+                    success_log["metadata"]["llm_routing"] = routing_decisions
+                success_log["usage"] = pop_node_usage() or None
                 
                 # 성공 로그 저장
                 try:
@@ -238,6 +245,10 @@ def log_node_execution(node_id: str, node_name: str, node_type: str):
                         "module": "generated_code"
                     }}
                 }}
+                routing_decisions = pop_routing_decisions()
+                if routing_decisions:
+                    error_log["metadata"]["llm_routing"] = routing_decisions
+                error_log["usage"] = pop_node_usage() or None
                 
                 # 에러 로그 저장
                 try:
@@ -336,6 +347,59 @@ from langchain_core.tools import StructuredTool
 from langgraph.checkpoint.memory import InMemorySaver 
 import re
 
+# LangStar 서버에서 실행될 때는 게이트웨이를 통해 LLM을 호출한다 (중지/제한 시간 지원)
+try:
+    from server.services.llm_gateway import invoke_llm
+except ImportError:
+    def invoke_llm(runnable, inputs, config=None, cache=None, resilience=None, routing=None):
+        return runnable.invoke(inputs, config)
+
+# 대체 모델 라우팅 결정과 토큰 사용량/비용 (노드 실행 로그 metadata.llm_routing / usage에 기록)
+try:
+    from server.services.llm_router import agent_output_text, pop_routing_decisions
+    from server.services.llm_usage import pop_node_usage
+except ImportError:
+    def pop_routing_decisions():
+        return []
+
+    def pop_node_usage():
+        return {{}}
+
+    # 에이전트 출력(문자열 또는 content 블록)에서 <thinking> 이후의 답변만 추출
+    def agent_output_text(output):
+        if isinstance(output, list):
+            output = "".join(block if isinstance(block, str) else str(block.get("text", ""))
+                             for block in output
+                             if isinstance(block, str) or (isinstance(block, dict) and block.get("type", "text") == "text"))
+        text = "" if output is None else str(output)
+        return text.split("</thinking>", 1)[1] if "</thinking>" in text else text
+
+# 실행 트레이스의 노드 스팬 (LangStar 서버에서 트레이스 내보내기가 켜져 있을 때만 기록)
+try:
+    from server.utils.tracing import node_span_attributes, start_span
+except ImportError:
+    from contextlib import nullcontext
+
+    def node_span_attributes(node_id, node_name, node_type, execution_id=None):
+        return {{}}
+
+    def start_span(name, attributes=None, kind=1):
+        return nullcontext()
+
+# 함수/사용자 노드는 샌드박스 모드일 때 워커 프로세스에서 실행한다
+try:
+    from server.services.code_sandbox import run_user_function
+except ImportError:
+    def run_user_function(source, function_name, func, /, *args, **kwargs):
+        return func(*args, **kwargs)
+
+# 도구 결과 캐시 (정책이 있는 도구만)
+try:
+    from server.services.tool_runtime import memoize_tool
+except ImportError:
+    def memoize_tool(tool, policy=None, namespace=""):
+        return tool
+
 {init_log_code()}
 
 class MyState(BaseModel):
@@ -676,7 +740,7 @@ def node_{node_name}(state):
         print("No inputs received yet, waiting...")
         return {{}}
 
-    result = {function_name}( input_param ) 
+    result = run_user_function({py_code!r}, "{function_name}", {function_name}, input_param)
     
     node_config = state_dict[node_config_key]
 
@@ -804,7 +868,7 @@ def node_{node_name}(state):
 
 
 
-    user_result = {function_name}( **func_args ) 
+    user_result = run_user_function({py_code!r}, "{function_name}", {function_name}, **func_args)
 
     return_value = input_param.copy() 
     return_value.update( {{ output_value : user_result }} ) 
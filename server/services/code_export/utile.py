@@ -1,3 +1,12 @@
+# 도구 결과 캐시 네임스페이스 (tool_runtime.memoize_tool과 같은 규칙, 서버 밖에서 코드를 만들 때만 대체 구현 사용)
+try:
+    from server.services.tool_runtime import source_namespace
+except ImportError:
+    import hashlib
+
+    def source_namespace(code):
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+
 
 
 # 노드 id를 라벨로 변환합니다. 
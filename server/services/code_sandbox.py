@@ -0,0 +1,479 @@
+"""
+Process-pool sandbox for user python / function nodes.
+
+사용자 코드(functionNode, userNode)를 서버 프로세스의 exec 대신 미리 띄워 둔 워커 프로세스에서
+실행합니다. 호출마다 벽시계 제한 시간과 RLIMIT_CPU를 적용하고, 워커 시작 시 RLIMIT_AS로
+메모리를 제한합니다. 컴파일된 함수는 워커별로 캐시하며, 큰 입력은 pickle한 뒤 파이프 대신
+공유 메모리에 복사해 전달합니다.
+
+활성화: LANGSTAR_SANDBOX_MODE=process (또는 노드 요청의 "sandbox": true)
+요청의 "sandbox": false로 운영자가 켠 process 모드를 끌 수는 없습니다.
+"""
+
+import hashlib
+import itertools
+import logging
+import math
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+from server.utils.execution_context import current_token
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_MODE = os.getenv("LANGSTAR_SANDBOX_MODE", "inline")  # "inline" | "process"
+SANDBOX_WORKERS = int(os.getenv("LANGSTAR_SANDBOX_WORKERS", str(min(4, os.cpu_count() or 1))))
+SANDBOX_TIMEOUT_SECONDS = float(os.getenv("LANGSTAR_SANDBOX_TIMEOUT_SECONDS", "30"))
+SANDBOX_CPU_SECONDS = int(os.getenv("LANGSTAR_SANDBOX_CPU_SECONDS", "10"))
+SANDBOX_MEMORY_MB = int(os.getenv("LANGSTAR_SANDBOX_MEMORY_MB", "1024"))
+# 이 크기(바이트)를 넘는 입력은 파이프 대신 공유 메모리로 전달
+SANDBOX_SHM_THRESHOLD = int(os.getenv("LANGSTAR_SANDBOX_SHM_THRESHOLD", str(1024 * 1024)))
+# 워커에 미리 import 해 둘 모듈 (쉼표 구분)
+SANDBOX_PRELOAD = [
+    name.strip() for name in os.getenv(
+        "LANGSTAR_SANDBOX_PRELOAD", "json,math,re,datetime,collections,itertools,functools"
+    ).split(",") if name.strip()
+]
+
+
+class SandboxError(Exception):
+    """Base error for sandboxed user code."""
+
+
+class SandboxTimeout(SandboxError):
+    """Raised when a call exceeds its wall-clock timeout (the worker is replaced)."""
+
+
+class SandboxResourceLimit(SandboxError):
+    """Raised when a call exceeds its CPU or memory limit."""
+
+
+class SandboxExecutionError(SandboxError):
+    """Raised when user code raises inside the sandbox."""
+
+    def __init__(self, message: str, remote_traceback: str = ""):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+@dataclass
+class SandboxTiming:
+    """Timing of one sandboxed call."""
+    queue_ms: float
+    exec_ms: float
+    total_ms: float
+    transfer: str  # "pipe" | "shm"
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+class _CpuLimitExceeded(BaseException):
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuLimitExceeded()
+
+
+def _cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _set_cpu_limit(seconds: Optional[int]) -> None:
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    soft = int(math.ceil(_cpu_time())) + max(1, int(seconds))
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _load_function(cache: Dict[str, Any], source: str, function_name: str):
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest() + ":" + function_name
+    func = cache.get(key)
+    if func is None:
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, f"<user_node:{function_name}>", "exec"), namespace)
+        func = namespace[function_name]
+        cache[key] = func
+    return func
+
+
+def _worker_main(conn, memory_mb: int, preload: List[str]) -> None:
+    """Worker loop: receive a call, run it under limits, send back the result."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        if memory_mb > 0:
+            limit = memory_mb * 1024 * 1024
+            try:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            except (ValueError, OSError):
+                pass
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+    for name in preload:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+    cache: Dict[str, Any] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        call_id, source, function_name, payload, shm_name, shm_size, cpu_seconds = message
+        started = time.perf_counter()
+        try:
+            if shm_name:
+                segment = shared_memory.SharedMemory(name=shm_name)
+                try:
+                    args, kwargs = pickle.loads(segment.buf[:shm_size])
+                finally:
+                    segment.close()
+            else:
+                args, kwargs = pickle.loads(payload)
+
+            func = _load_function(cache, source, function_name)
+            _set_cpu_limit(cpu_seconds)
+            try:
+                reply = ("ok", func(*args, **kwargs))
+            finally:
+                _set_cpu_limit(None)
+        except _CpuLimitExceeded:
+            _set_cpu_limit(None)
+            reply = ("cpu_limit", f"CPU time limit exceeded ({cpu_seconds}s)")
+        except MemoryError:
+            reply = ("memory_limit", f"Memory limit exceeded ({memory_mb}MB)")
+        except BaseException as e:
+            reply = ("error", f"{type(e).__name__}: {e}", traceback.format_exc())
+
+        exec_ms = (time.perf_counter() - started) * 1000
+        try:
+            conn.send((call_id, reply, exec_ms))
+        except Exception as e:
+            conn.send((call_id, ("error", f"Result is not picklable: {e}", ""), exec_ms))
+
+
+# ----------------------------------------------------------------------
+# Pool
+# ----------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.calls = 0
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["server.services.code_sandbox"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class SandboxPool:
+    """
+    Pool of pre-started worker processes that run user functions.
+
+    Args:
+        size: Number of worker processes
+        timeout: Default wall-clock timeout per call in seconds
+        cpu_seconds: Default CPU time limit per call (RLIMIT_CPU)
+        memory_mb: Address-space limit per worker (RLIMIT_AS), 0 to disable
+        shm_threshold: Pickled inputs larger than this many bytes are copied into shared memory instead of the pipe
+        preload: Modules imported by each worker at start
+    """
+
+    def __init__(
+        self,
+        size: int = SANDBOX_WORKERS,
+        timeout: float = SANDBOX_TIMEOUT_SECONDS,
+        cpu_seconds: int = SANDBOX_CPU_SECONDS,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        shm_threshold: int = SANDBOX_SHM_THRESHOLD,
+        preload: Optional[List[str]] = None,
+        sample_size: int = 1000,
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.shm_threshold = shm_threshold
+        self.preload = SANDBOX_PRELOAD if preload is None else preload
+
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._context = None
+        self._started = False
+        self._call_ids = itertools.count(1)
+
+        self._queue_samples: Deque[float] = deque(maxlen=sample_size)
+        self._exec_samples: Deque[float] = deque(maxlen=sample_size)
+        self._counters = {"calls": 0, "errors": 0, "timeouts": 0, "resource_limits": 0, "restarts": 0, "shm_transfers": 0}
+
+    # -- lifecycle ------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the worker processes (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._context = _mp_context()
+            for _ in range(self.size):
+                worker = self._spawn()
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._started = True
+        logger.info(f"Sandbox pool started with {self.size} workers")
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            if not self._started:
+                return
+            for worker in self._workers:
+                try:
+                    worker.conn.send(None)
+                except Exception:
+                    pass
+            for worker in self._workers:
+                worker.process.join(timeout=1)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                worker.conn.close()
+            self._workers = []
+            self._idle = queue.Queue()
+            self._started = False
+        logger.info("Sandbox pool stopped")
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_mb, self.preload),
+            daemon=True,
+            name="langstar-sandbox",
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a broken or timed-out worker and start a fresh one."""
+        try:
+            worker.process.kill()
+            worker.process.join(timeout=1)
+        except Exception:
+            pass
+        worker.conn.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if not self._started:
+                return
+            replacement = self._spawn()
+            self._workers.append(replacement)
+            self._counters["restarts"] += 1
+        self._idle.put(replacement)
+
+    # -- calls ----------------------------------------------------------
+
+    def run(
+        self,
+        source: str,
+        function_name: str,
+        args: Tuple[Any, ...] = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        cpu_seconds: Optional[int] = None,
+    ) -> Tuple[Any, SandboxTiming]:
+        """
+        Run ``function_name`` defined in ``source`` inside a worker process.
+
+        Args:
+            source: Python source that defines the function
+            function_name: Name of the function to call
+            args: Positional arguments (must be picklable)
+            kwargs: Keyword arguments (must be picklable)
+            timeout: Wall-clock timeout in seconds (including queueing)
+            cpu_seconds: CPU time limit for the call
+
+        Returns:
+            (result, timing)
+
+        Raises:
+            SandboxTimeout: If the call does not finish in time
+            SandboxResourceLimit: If the call exceeds its CPU or memory limit
+            SandboxExecutionError: If the user function raises
+        """
+        if not self._started:
+            self.start()
+
+        timeout = self.timeout if timeout is None else timeout
+        cpu_seconds = self.cpu_seconds if cpu_seconds is None else cpu_seconds
+        token = current_token()
+        enqueued = time.perf_counter()
+        deadline = time.monotonic() + timeout
+
+        # 1. 유휴 워커 확보 (대기 시간 = queue_ms)
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            self._counters["timeouts"] += 1
+            raise SandboxTimeout(f"No sandbox worker available within {timeout}s")
+        queue_ms = (time.perf_counter() - enqueued) * 1000
+
+        # 2. 입력 직렬화 (큰 입력은 공유 메모리로)
+        payload = pickle.dumps((tuple(args), kwargs or {}), protocol=pickle.HIGHEST_PROTOCOL)
+        segment = None
+        transfer = "pipe"
+        if len(payload) > self.shm_threshold:
+            segment = shared_memory.SharedMemory(create=True, size=len(payload))
+            segment.buf[:len(payload)] = payload
+            message_payload, shm_name, shm_size = None, segment.name, len(payload)
+            transfer = "shm"
+            self._counters["shm_transfers"] += 1
+        else:
+            message_payload, shm_name, shm_size = payload, None, 0
+
+        call_id = next(self._call_ids)
+        healthy = True
+        try:
+            worker.conn.send((call_id, source, function_name, message_payload, shm_name, shm_size, cpu_seconds))
+
+            # 3. 결과 대기 (실행 취소 토큰과 제한 시간을 주기적으로 확인)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    healthy = False
+                    self._counters["timeouts"] += 1
+                    raise SandboxTimeout(f"User function '{function_name}' exceeded {timeout}s")
+                if worker.conn.poll(min(remaining, 0.1)):
+                    break
+                if token is not None and (token.cancelled or token.expired()):
+                    healthy = False
+                    token.check()
+                if not worker.process.is_alive():
+                    healthy = False
+                    self._counters["resource_limits"] += 1
+                    raise SandboxResourceLimit(
+                        f"Sandbox worker died while running '{function_name}' (exit code {worker.process.exitcode})"
+                    )
+
+            try:
+                reply_id, reply, exec_ms = worker.conn.recv()
+            except (EOFError, OSError):
+                healthy = False
+                self._counters["resource_limits"] += 1
+                raise SandboxResourceLimit(f"Sandbox worker died while running '{function_name}'")
+        finally:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+            worker.calls += 1
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+
+        timing = SandboxTiming(
+            queue_ms=round(queue_ms, 3),
+            exec_ms=round(exec_ms, 3),
+            total_ms=round((time.perf_counter() - enqueued) * 1000, 3),
+            transfer=transfer,
+        )
+        self._counters["calls"] += 1
+        self._queue_samples.append(timing.queue_ms)
+        self._exec_samples.append(timing.exec_ms)
+
+        status = reply[0]
+        if status == "ok":
+            return reply[1], timing
+        self._counters["errors"] += 1
+        if status in ("cpu_limit", "memory_limit"):
+            self._counters["resource_limits"] += 1
+            raise SandboxResourceLimit(reply[1])
+        raise SandboxExecutionError(reply[1], reply[2] if len(reply) > 2 else "")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool size, counters and queue/exec time statistics."""
+        def summary(samples):
+            values = sorted(samples)
+            if not values:
+                return {"avg": 0.0, "p50": 0.0, "p95": 0.0}
+            return {
+                "avg": round(sum(values) / len(values), 3),
+                "p50": values[int(0.50 * (len(values) - 1))],
+                "p95": values[int(0.95 * (len(values) - 1))],
+            }
+
+        return {
+            "mode": SANDBOX_MODE,
+            "started": self._started,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize(),
+            "queue_ms": summary(self._queue_samples),
+            "exec_ms": summary(self._exec_samples),
+            **self._counters,
+        }
+
+
+def sandbox_enabled(flag: Optional[bool] = None) -> bool:
+    """
+    Whether user code should run in the process sandbox.
+
+    A per-request flag can only opt in; it never overrides LANGSTAR_SANDBOX_MODE=process.
+    """
+    return flag is True or SANDBOX_MODE == "process"
+
+
+def run_user_function(source: str, function_name: str, func: Any, /, *args, **kwargs) -> Any:
+    """
+    Call a user function, in the sandbox when enabled or in-process otherwise.
+
+    Generated deployment code calls this with the function's source and the
+    locally defined function object used for the in-process fallback.
+    """
+    if not sandbox_enabled():
+        return func(*args, **kwargs)
+    result, timing = sandbox_pool.run(source, function_name, args, kwargs)
+    logger.info(
+        f"[Sandbox] {function_name}: queue {timing.queue_ms}ms, exec {timing.exec_ms}ms ({timing.transfer})"
+    )
+    return result
+
+
+# Global sandbox pool (워커는 첫 호출 시 시작)
+sandbox_pool = SandboxPool()
@@ -11,6 +11,16 @@ from server.models.deployment import (
 from server.services.workflow_service import WorkflowService
 from server.services.code_excute import flower_manager
 from server.utils.execution_logger import create_langgraph_with_logging, execution_logger
+from server.services.llm_usage import merge_usage, record_execution_usage
+from server.services.execution_metrics import observe_execution
+from server.utils.timing import PhaseTimer, current_timer, phase, use_timer
+from server.utils.profiler import deterministic_profile, profiling_requested, save_profile
+from server.utils.tracing import STATUS_ERROR, current_span, start_span, usage_attributes
+from server.services.execution_queue import execution_queue
+from server.services.deployment_workers import deployment_workers
+from server.utils.execution_context import (
+    CancelToken, ExecutionCancelled, ExecutionTimedOut, invoke_graph, use_tenant
+)
 from server.config.database import (
     get_deployments_collection,
     get_deployment_versions_collection
@@ -25,6 +35,7 @@ class DeploymentService:
     def __init__(self):
         self.deployments_dir = "deployments"
         self._ensure_deployments_directory()
+        execution_queue.register_handler("deployment_run", self._run_queued_deployment)
     
     def _ensure_deployments_directory(self):
         """배포 디렉토리가 존재하는지 확인하고 없으면 생성"""
@@ -153,11 +164,40 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
             logger.error(f"Error saving deployment code: {str(e)}")
             raise
     
-    def run_deployment(self, deployment_id: str, input_data: Dict[str, Any], api_call_info: Optional[Dict[str, Any]] = None, execution_source: str = "internal") -> Dict[str, Any]:
-        """배포를 실행합니다."""
+    def _run_queued_deployment(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """실행 큐 워커에서 호출되는 배포 실행"""
+        return self.run_deployment(**payload)
+    
+    def run_deployment(self, deployment_id: str, input_data: Dict[str, Any], api_call_info: Optional[Dict[str, Any]] = None, execution_source: str = "internal", execution_id: Optional[str] = None, cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """배포를 실행합니다.
+        
+        cancel_token이 주어지면 superstep 단위로 실행하면서 중지 요청/제한 시간을 확인하고,
+        중단된 경우 실행 기록을 aborted/timed_out으로 저장한 뒤 예외를 다시 발생시킵니다.
+        use_profiling(True) 컨텍스트에서 제출된 실행은 cProfile 요약을 result.profile에 포함합니다.
+        """
+        # LLM 스케줄러가 배포별로 공정하게 대기열을 나누도록 실행 컨텍스트에 배포 ID를 연결하고,
+        # 요청에서 넘어온 단계별 타이머가 없으면 (스케줄 실행 등) 새 추적 ID로 시간을 잰다.
+        # 실행 전체를 트레이스의 루트 스팬으로 기록한다 (노드/LLM/도구 스팬이 아래에 붙음)
+        with use_tenant(deployment_id), use_timer(current_timer() or PhaseTimer()), start_span(
+            "workflow_execution", {"langstar.deployment.id": deployment_id, "langstar.execution.source": execution_source}
+        ):
+            if not profiling_requested():
+                return self._run_deployment(deployment_id, input_data, api_call_info, execution_source, execution_id, cancel_token)
+            
+            # 관리자가 요청한 실행은 cProfile로 측정해 실행 디렉토리에 pstats 파일을 남긴다
+            with deterministic_profile() as profile:
+                result = self._run_deployment(deployment_id, input_data, api_call_info, execution_source, execution_id, cancel_token)
+            result["result"]["profile"] = save_profile(
+                profile, os.path.join("deployments", deployment_id, "executions", result["execution_id"])
+            )
+            return result
+
+    def _run_deployment(self, deployment_id: str, input_data: Dict[str, Any], api_call_info: Optional[Dict[str, Any]], execution_source: str, execution_id: Optional[str], cancel_token: Optional[CancelToken]) -> Dict[str, Any]:
+        """run_deployment 본문"""
         try:
             # 1. 배포 존재 확인
-            deployment = self.get_deployment_by_id(deployment_id)
+            with phase("deployment_lookup"):
+                deployment = self.get_deployment_by_id(deployment_id)
             if not deployment:
                 raise ValueError(f"Deployment {deployment_id} not found")
             
@@ -172,14 +212,15 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
             if deployment.status != DeploymentStatus.ACTIVE:
                 raise ValueError(f"Deployment {deployment_id} is not active (status: {deployment.status})")
             
-            # 3. 실행 기록 생성
-            execution_id = str(uuid.uuid4())
+            # 3. 실행 기록 생성 (실행 큐에서 넘어온 경우 기존 실행 ID 사용)
+            execution_id = execution_id or str(uuid.uuid4())
             execution_name = f"{deployment.name}_execution_{int(datetime.now(timezone.utc).timestamp())}"
             start_time = datetime.now(timezone.utc).isoformat()
             
             # 4. 워크플로우 스냅샷에서 노드 정보 추출
             workflow_snapshot = None
-            versions = self.get_deployment_versions(deployment_id)
+            with phase("version_lookup"):
+                versions = self.get_deployment_versions(deployment_id)
             if versions:
                 workflow_snapshot = versions[0].workflowSnapshot
             
@@ -203,6 +244,8 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                     node_execution_history.append(node_history)
             
             # 6. 실제 LangGraph 실행 (로깅 포함)
+            result = None
+            interrupted = None
             try:
                 if workflow_snapshot:
                     # 환경 변수 설정 (로깅을 위해) - 더 일찍 설정
@@ -221,19 +264,41 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                     # 실제 생성된 deployment 코드 실행
                     deployment_code_path = os.path.join(self.deployments_dir, deployment_id, "deployment_code.py")
                     
-                    if os.path.exists(deployment_code_path):
+                    if os.path.exists(deployment_code_path) and deployment_workers.enabled:
+                        # 배포 전용 워커 프로세스에서 실행 (그래프는 워커에 미리 로드됨)
+                        with phase("graph_invoke"):
+                            result = deployment_workers.run(
+                                deployment_id,
+                                deployment_code_path,
+                                input_data,
+                                execution_id=execution_id,
+                                version_id=versions[0].id,
+                                cancel_token=cancel_token
+                            )
+                    elif os.path.exists(deployment_code_path):
                         # deployment 코드를 동적으로 로드하고 실행
                         import importlib.util
-                        spec = importlib.util.spec_from_file_location(f"deployment_{deployment_id}", deployment_code_path)
-                        deployment_module = importlib.util.module_from_spec(spec)
-                        spec.loader.exec_module(deployment_module)
+                        with phase("module_load"):
+                            spec = importlib.util.spec_from_file_location(f"deployment_{deployment_id}", deployment_code_path)
+                            deployment_module = importlib.util.module_from_spec(spec)
+                            spec.loader.exec_module(deployment_module)
                         
                         # 실행 함수 호출
                         run_function_name = f"run_deployment_{deployment_id.replace('-', '_')}"
-                        if hasattr(deployment_module, run_function_name):
+                        if cancel_token is not None and hasattr(deployment_module, "app"):
+                            # 중지/제한 시간을 확인하며 superstep 단위로 실행
+                            with phase("graph_invoke"):
+                                result = invoke_graph(
+                                    deployment_module.app,
+                                    input_data,
+                                    {"configurable": {"thread_id": 1}},
+                                    cancel_token
+                                )
+                        elif hasattr(deployment_module, run_function_name):
                             run_function = getattr(deployment_module, run_function_name)
                             logger.info(f"[DeploymentService] Executing {run_function_name} with input_data: {input_data}")
-                            result = run_function(input_data)
+                            with phase("graph_invoke"):
+                                result = run_function(input_data)
                             logger.info(f"[DeploymentService] Execution result: {result}")
                             
                             if isinstance(result, dict) and result.get("success"):
@@ -242,22 +307,26 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                                 result = result
                         else:
                             # 실행 함수가 없으면 기본 LangGraph 실행
+                            with phase("graph_build"):
+                                app = create_langgraph_with_logging(
+                                    workflow_snapshot.dict(),
+                                    execution_id,
+                                    deployment_id,
+                                    versions[0].id
+                                )
+                            with phase("graph_invoke"):
+                                result = invoke_graph(app, input_data, None, cancel_token) if cancel_token else app.invoke(input_data)
+                    else:
+                        # deployment 코드가 없으면 기본 LangGraph 실행
+                        with phase("graph_build"):
                             app = create_langgraph_with_logging(
                                 workflow_snapshot.dict(),
                                 execution_id,
                                 deployment_id,
                                 versions[0].id
                             )
-                            result = app.invoke(input_data)
-                    else:
-                        # deployment 코드가 없으면 기본 LangGraph 실행
-                        app = create_langgraph_with_logging(
-                            workflow_snapshot.dict(),
-                            execution_id,
-                            deployment_id,
-                            versions[0].id
-                        )
-                        result = app.invoke(input_data)
+                        with phase("graph_invoke"):
+                            result = invoke_graph(app, input_data, None, cancel_token) if cancel_token else app.invoke(input_data)
                     
                     # 실행 완료 시간 기록
                     end_time = datetime.now(timezone.utc).isoformat()
@@ -302,7 +371,8 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                             "input": node_input,
                             "output": node_output,
                             "error_message": log.error_message,
-                            "position": log.position
+                            "position": log.position,
+                            "usage": log.usage
                         }
                         node_execution_history.append(node_history)
                     
@@ -322,7 +392,9 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                     duration_ms = 0
                     
             except Exception as e:
-                # 에러 발생 시
+                # 에러 발생 시 (중지/제한 시간 초과 포함)
+                if isinstance(e, (ExecutionCancelled, ExecutionTimedOut)):
+                    interrupted = e
                 end_time = datetime.now(timezone.utc).isoformat()
                 duration_ms = int((datetime.now(timezone.utc) - datetime.fromisoformat(start_time)).total_seconds() * 1000)
                 
@@ -366,7 +438,8 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                             "input": node_input,
                             "output": node_output,
                             "error_message": log.error_message,
-                            "position": log.position
+                            "position": log.position,
+                            "usage": log.usage
                         }
                         node_execution_history.append(node_history)
                 except Exception as log_error:
@@ -389,6 +462,14 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                  output_result.get("result", {}).get("success", True))
             )
             
+            # 최종 상태 (중단된 실행은 aborted/timed_out)
+            if isinstance(interrupted, ExecutionCancelled):
+                final_status = "aborted"
+            elif isinstance(interrupted, ExecutionTimedOut):
+                final_status = "timed_out"
+            else:
+                final_status = "succeeded" if is_execution_successful else "failed"
+            
             # 상태 전이 정보 생성
             state_transitions = [
                 {
@@ -400,13 +481,39 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                 },
                 {
                     "timestamp": end_time,
-                    "state": "succeeded" if is_execution_successful else "failed",
+                    "state": final_status,
                     "node_id": "workflow",
                     "node_name": "Workflow",
                     "output": result
                 }
             ]
             
+            # LLM 토큰 사용량/비용 합산과 실행/노드 시간 기록 (Prometheus)
+            with phase("usage_accounting"):
+                usage = record_execution_usage(
+                    deployment_id,
+                    versions[0].id if versions else "unknown",
+                    [node.get("usage") for node in node_execution_history]
+                )
+                observe_execution(
+                    deployment_id,
+                    final_status,
+                    duration_ms,
+                    cancel_token.supersteps if cancel_token else None,
+                    node_execution_history
+                )
+            
+            span = current_span()
+            span.set_attributes({
+                "langstar.execution.id": execution_id,
+                "langstar.version.id": versions[0].id if versions else None,
+                "langstar.execution.status": final_status,
+                "langstar.execution.supersteps": cancel_token.supersteps if cancel_token else None,
+                **usage_attributes(usage),
+            })
+            if final_status != "succeeded":
+                span.set_status(STATUS_ERROR, output_result.get("error") or final_status)
+            
             # 6. 실행 기록 생성
             execution_record = {
                 "id": execution_id,
@@ -416,7 +523,7 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                 "workflow_name": deployment.name,
                 "deployment_id": deployment_id,
                 "version_id": versions[0].id,
-                "status": "succeeded" if is_execution_successful else "failed",
+                "status": final_status,
                 "start_time": start_time,
                 "end_time": end_time,
                 "duration_ms": duration_ms,
@@ -429,15 +536,27 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                 "state_transitions": len(state_transitions),  # 상태 전이 개수
                 "state_transitions_list": state_transitions,  # 상태 전이 상세 정보
                 "api_call_info": api_call_info,
-                "execution_source": execution_source
+                "execution_source": execution_source,
+                "supersteps": cancel_token.supersteps if cancel_token else None,
+                "usage": usage or None
             }
             
             # 8. 워크플로우 스냅샷을 별도 파일로 저장
             if workflow_snapshot:
-                self._save_workflow_snapshot(deployment_id, execution_id, workflow_snapshot)
+                with phase("snapshot_write"):
+                    self._save_workflow_snapshot(deployment_id, execution_id, workflow_snapshot)
+            
+            # 9. workflow_snap.json의 실행 메타데이터 업데이트 (이 시점까지의 단계별 시간과 추적 ID 포함)
+            timer = current_timer()
+            if timer is not None:
+                execution_record["trace_id"] = timer.trace_id
+                execution_record["timing"] = timer.phases()
+            with phase("snapshot_metadata_write"):
+                self._update_workflow_snap_metadata(deployment_id, execution_id, execution_record)
             
-            # 9. workflow_snap.json의 실행 메타데이터 업데이트
-            self._update_workflow_snap_metadata(deployment_id, execution_id, execution_record)
+            # 중단된 실행은 기록을 남긴 뒤 호출자에게 알린다
+            if interrupted is not None:
+                raise interrupted
             
             # 7. 응답 반환 (노드 실행 결과 전체 포함)
             # output 추출 - result가 dict이고 result 키가 있으면 그것을 사용, 아니면 result 자체를 사용
@@ -469,7 +588,10 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
                         "total_nodes": len(node_execution_history),
                         "successful_nodes": len([n for n in node_execution_history if n["status"] == "success"]),
                         "failed_nodes": len([n for n in node_execution_history if n["status"] == "failed"]),
-                        "overall_status": "succeeded" if is_execution_successful else "failed"
+                        "overall_status": "succeeded" if is_execution_successful else "failed",
+                        "usage": usage or None,
+                        "trace_id": execution_record.get("trace_id"),
+                        "timing": execution_record.get("timing")
                     },
                     # "node_execution_history": node_execution_history,
                     "state_transitions": state_transitions,
@@ -596,6 +718,11 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
             
             self._save_deployment_to_db(deployment)
             
+            # 워커 프로세스 모드에서는 활성화 시 워커를 미리 띄워 그래프를 로드해 둔다
+            code_path = os.path.join(self.deployments_dir, deployment_id, "deployment_code.py")
+            if status == DeploymentStatus.ACTIVE and deployment_workers.enabled and os.path.exists(code_path):
+                deployment_workers.warm(deployment_id, code_path)
+            
             logger.info(f"Updated deployment {deployment_id} status to {status}")
             return deployment
             
@@ -803,6 +930,41 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
             logger.error(f"Error deleting deployment {deployment_id}: {str(e)}")
             raise
 
+    def get_deployment_usage(self, deployment_id: str) -> Dict[str, Any]:
+        """배포의 실행 기록에서 LLM 토큰 사용량과 예상 비용을 버전별로 합산합니다."""
+        try:
+            executions_dir = os.path.join("deployments", deployment_id, "executions")
+            by_version: Dict[str, List[Dict[str, Any]]] = {}
+            executions = 0
+            if os.path.exists(executions_dir):
+                for execution_id in os.listdir(executions_dir):
+                    snapshot_file = os.path.join(executions_dir, execution_id, "workflow_snap.json")
+                    if not os.path.exists(snapshot_file):
+                        continue
+                    try:
+                        with open(snapshot_file, 'r', encoding='utf-8') as f:
+                            metadata = json.load(f).get("execution_metadata", {})
+                    except Exception as e:
+                        logger.warning(f"Error reading execution usage from {snapshot_file}: {str(e)}")
+                        continue
+                    if not metadata.get("id"):
+                        continue
+                    executions += 1
+                    version_id = metadata.get("version_id") or "unknown"
+                    by_version.setdefault(version_id, []).append(metadata.get("usage"))
+            
+            versions = {version_id: merge_usage(usages) for version_id, usages in by_version.items()}
+            return {
+                "deployment_id": deployment_id,
+                "executions": executions,
+                "total": merge_usage(versions.values()),
+                "versions": versions
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting deployment usage {deployment_id}: {str(e)}")
+            raise
+
 
 
     def _save_workflow_snapshot(self, deployment_id: str, execution_id: str, workflow_snapshot: WorkflowSnapshot):
@@ -887,6 +1049,9 @@ def run_deployment_{deployment_id.replace('-', '_')}(input_data):
             data["execution_metadata"]["state_transitions_list"] = execution_record["state_transitions_list"]
             data["execution_metadata"]["api_call_info"] = execution_record["api_call_info"]
             data["execution_metadata"]["execution_source"] = execution_record["execution_source"]
+            data["execution_metadata"]["usage"] = execution_record.get("usage")
+            data["execution_metadata"]["trace_id"] = execution_record.get("trace_id")
+            data["execution_metadata"]["timing"] = execution_record.get("timing")
 
             # HumanMessage, AIMessage 객체를 JSON 직렬화 가능한 형태로 변환
             def convert_messages_to_dict(obj):
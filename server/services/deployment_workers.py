@@ -0,0 +1,542 @@
+"""
+Per-deployment worker processes.
+
+배포 실행을 서버 프로세스 대신 배포(또는 배포 그룹)별 전용 워커 프로세스에서 처리합니다.
+워커는 미리 띄워 두며 LangChain/LangGraph를 import하고 배포 코드(컴파일된 그래프)를
+로드해 둔 상태로 대기합니다. 풀은 min~max 사이에서 자동으로 늘고 줄며, 주기적으로
+유휴 워커의 상태를 확인해 죽었거나 응답하지 않는 워커를 교체합니다.
+
+활성화: LANGSTAR_DEPLOYMENT_RUNTIME=process
+배포 그룹: LANGSTAR_DEPLOYMENT_GROUPS="group-a:dep1,dep2;group-b:dep3"
+트레이스: 요청에 실행 루트 스팬의 traceparent를 담아 보내 워커의 노드/LLM 스팬이 같은 트레이스에 붙게 합니다.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import multiprocessing
+
+from server.utils.execution_context import (
+    CancelToken, ExecutionCancelled, ExecutionTimedOut, invoke_graph, use_tenant
+)
+from server.utils.tracing import current_traceparent, parse_traceparent, tracer, use_span
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENT_RUNTIME_MODE = os.getenv("LANGSTAR_DEPLOYMENT_RUNTIME", "inline")  # "inline" | "process"
+MIN_WORKERS = int(os.getenv("LANGSTAR_DEPLOYMENT_MIN_WORKERS", "1"))
+MAX_WORKERS = int(os.getenv("LANGSTAR_DEPLOYMENT_MAX_WORKERS", "4"))
+IDLE_TIMEOUT_SECONDS = float(os.getenv("LANGSTAR_DEPLOYMENT_IDLE_TIMEOUT", "300"))
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("LANGSTAR_DEPLOYMENT_HEALTH_INTERVAL", "30"))
+HEALTH_CHECK_TIMEOUT_SECONDS = 5.0
+# 워커가 시작할 때 미리 import 하는 모듈
+WARM_MODULES = ["langgraph.graph", "langchain_core.runnables", "langchain_core.prompts", "pydantic"]
+
+
+class DeploymentWorkerError(Exception):
+    """Raised when a deployment run fails inside a worker process."""
+
+    def __init__(self, message: str, remote_traceback: str = ""):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+def _parse_groups(spec: str) -> Dict[str, str]:
+    """'group:dep1,dep2;group2:dep3' -> {deployment_id: group}"""
+    groups: Dict[str, str] = {}
+    for entry in spec.split(";"):
+        if ":" not in entry:
+            continue
+        group, deployment_ids = entry.split(":", 1)
+        for deployment_id in deployment_ids.split(","):
+            if deployment_id.strip():
+                groups[deployment_id.strip()] = group.strip()
+    return groups
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+def _load_module(cache: Dict[str, Tuple[float, Any]], deployment_id: str, code_path: str):
+    """배포 코드를 로드하고 파일이 바뀌지 않았으면 캐시된 모듈을 재사용"""
+    import importlib.util
+
+    mtime = os.path.getmtime(code_path)
+    cached = cache.get(code_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    spec = importlib.util.spec_from_file_location(f"deployment_{deployment_id}", code_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    cache[code_path] = (mtime, module)
+    return module
+
+
+def _run_module(module: Any, deployment_id: str, input_data: Dict[str, Any], token: Optional[CancelToken],
+                execution_id: str) -> Any:
+    """
+    인라인 실행(DeploymentService.run_deployment)과 같은 방식으로 그래프 실행
+
+    워커는 모듈(과 모듈 전역 InMemorySaver 체크포인터)을 여러 실행에 재사용하므로, 실행마다
+    execution_id를 thread_id로 써서 이전 실행(다른 호출자일 수 있음)의 상태를 이어받지 않게 하고
+    끝나면 그 스레드의 체크포인트를 지운다.
+    """
+    app = getattr(module, "app", None)
+    if app is None:
+        run_function = getattr(module, f"run_deployment_{deployment_id.replace('-', '_')}")
+        result = run_function(input_data)
+        if isinstance(result, dict) and result.get("success"):
+            return result.get("result", result)
+        return result
+
+    config = {"configurable": {"thread_id": execution_id}}
+    try:
+        if token is not None:
+            return invoke_graph(app, input_data, config, token)
+        return app.invoke(input_data, config)
+    finally:
+        checkpointer = getattr(app, "checkpointer", None)
+        if checkpointer is not None and hasattr(checkpointer, "delete_thread"):
+            checkpointer.delete_thread(execution_id)
+
+
+def _worker_main(conn, preload: List[Tuple[str, str]]) -> None:
+    """Worker loop: serve run/ping requests for one deployment pool."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name in WARM_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+    modules: Dict[str, Tuple[float, Any]] = {}
+    for deployment_id, code_path in preload:
+        try:
+            _load_module(modules, deployment_id, code_path)
+        except Exception:
+            pass
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        if message[0] == "ping":
+            conn.send(("pong", os.getpid()))
+            continue
+
+        _, call_id, request = message
+        started = time.perf_counter()
+        token = None
+        if request.get("deadline") is not None or request.get("max_supersteps") is not None:
+            token = CancelToken(deadline=request.get("deadline"), max_supersteps=request.get("max_supersteps"))
+
+        # 로깅 데코레이터가 사용하는 실행 컨텍스트 (워커는 한 번에 한 실행만 처리)
+        os.environ["CURRENT_EXECUTION_ID"] = request["execution_id"]
+        os.environ["CURRENT_DEPLOYMENT_ID"] = request["deployment_id"]
+        os.environ["CURRENT_VERSION_ID"] = request.get("version_id") or ""
+        try:
+            module = _load_module(modules, request["deployment_id"], request["code_path"])
+            with use_tenant(request["deployment_id"]), use_span(parse_traceparent(request.get("traceparent"))):
+                result = _run_module(module, request["deployment_id"], request["input_data"], token,
+                                     request["execution_id"])
+            reply = ("ok", result)
+        except ExecutionCancelled as e:
+            reply = ("cancelled", str(e))
+        except ExecutionTimedOut as e:
+            reply = ("timed_out", str(e))
+        except BaseException as e:
+            reply = ("error", f"{type(e).__name__}: {e}", traceback.format_exc())
+
+        exec_ms = (time.perf_counter() - started) * 1000
+        supersteps = token.supersteps if token else None
+        try:
+            conn.send((call_id, reply, exec_ms, supersteps))
+        except Exception as e:
+            conn.send((call_id, ("error", f"Result is not picklable: {e}", ""), exec_ms, supersteps))
+        # 응답을 보낸 뒤 이 실행의 스팬을 내보낸다 (워커가 교체되어도 스팬을 잃지 않도록)
+        if tracer.enabled:
+            tracer.flush()
+
+
+# ----------------------------------------------------------------------
+# Pools
+# ----------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.runs = 0
+        self.last_used = time.monotonic()
+
+
+class DeploymentWorkerPool:
+    """
+    Auto-scaling pool of worker processes serving one deployment (or group).
+
+    Args:
+        key: Deployment ID or group name
+        min_workers: Workers kept alive even when idle
+        max_workers: Upper bound on concurrent workers
+        idle_timeout: Seconds an extra (above min) worker may stay idle
+    """
+
+    def __init__(self, key: str, context, min_workers: int = MIN_WORKERS, max_workers: int = MAX_WORKERS,
+                 idle_timeout: float = IDLE_TIMEOUT_SECONDS, sample_size: int = 1000):
+        self.key = key
+        self.min_workers = max(0, min_workers)
+        self.max_workers = max(1, max_workers, self.min_workers)
+        self.idle_timeout = idle_timeout
+        self._context = context
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._spawning = 0
+        self._waiting = 0
+        self._preload: Dict[str, str] = {}
+        self._closed = False
+        self._call_ids = itertools.count(1)
+        self._queue_samples: Deque[float] = deque(maxlen=sample_size)
+        self._exec_samples: Deque[float] = deque(maxlen=sample_size)
+        self._counters = {"runs": 0, "errors": 0, "cancelled": 0, "timed_out": 0,
+                          "spawned": 0, "retired": 0, "restarts": 0, "health_failures": 0}
+
+    # -- scaling ---------------------------------------------------------
+
+    def warm(self, deployment_id: str, code_path: str) -> None:
+        """Remember a deployment to preload and start the minimum number of workers."""
+        self._preload[deployment_id] = code_path
+        with self._lock:
+            missing = self.min_workers - len(self._workers) - self._spawning
+        for _ in range(max(0, missing)):
+            self._spawn_async()
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, list(self._preload.items())),
+            daemon=True,
+            name=f"langstar-deployment-{self.key}",
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _spawn_async(self) -> None:
+        """새 워커를 백그라운드에서 시작해 준비되면 유휴 큐에 넣는다"""
+        with self._lock:
+            if self._closed or len(self._workers) + self._spawning >= self.max_workers:
+                return
+            self._spawning += 1
+
+        def start():
+            try:
+                worker = self._spawn()
+                with self._lock:
+                    self._spawning -= 1
+                    if self._closed:
+                        worker.process.kill()
+                        return
+                    self._workers.append(worker)
+                    self._counters["spawned"] += 1
+                self._idle.put(worker)
+            except Exception as e:
+                with self._lock:
+                    self._spawning -= 1
+                logger.error(f"Failed to start deployment worker for {self.key}: {str(e)}")
+
+        threading.Thread(target=start, daemon=True).start()
+
+    def _discard(self, worker: _Worker, replace: bool) -> None:
+        try:
+            worker.process.kill()
+            worker.process.join(timeout=1)
+        except Exception:
+            pass
+        worker.conn.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if replace:
+            self._counters["restarts"] += 1
+            self._spawn_async()
+
+    def _acquire(self, timeout: Optional[float]) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        # 유휴 워커가 없으면 (시작 중인 워커로 부족할 때만) max까지 확장하고 먼저 비는 워커를 사용
+        with self._lock:
+            self._waiting += 1
+            scale_up = self._waiting > self._spawning
+        if scale_up:
+            self._spawn_async()
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ExecutionTimedOut(f"No deployment worker available for {self.key} within {timeout}s")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def maintain(self) -> None:
+        """Health-check idle workers and retire workers idle for longer than idle_timeout."""
+        checked: List[_Worker] = []
+        while True:
+            try:
+                checked.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        now = time.monotonic()
+        for worker in checked:
+            with self._lock:
+                above_min = len(self._workers) > self.min_workers
+            if above_min and now - worker.last_used > self.idle_timeout:
+                self._counters["retired"] += 1
+                self._stop_worker(worker)
+                continue
+            if not self._ping(worker):
+                self._counters["health_failures"] += 1
+                logger.warning(f"Deployment worker {worker.process.pid} for {self.key} failed health check")
+                self._discard(worker, replace=True)
+                continue
+            self._idle.put(worker)
+
+        with self._lock:
+            missing = self.min_workers - len(self._workers) - self._spawning
+        for _ in range(max(0, missing)):
+            self._spawn_async()
+
+    def _ping(self, worker: _Worker) -> bool:
+        if not worker.process.is_alive():
+            return False
+        try:
+            worker.conn.send(("ping",))
+            if not worker.conn.poll(HEALTH_CHECK_TIMEOUT_SECONDS):
+                return False
+            return worker.conn.recv()[0] == "pong"
+        except (EOFError, OSError):
+            return False
+
+    def _stop_worker(self, worker: _Worker) -> None:
+        try:
+            worker.conn.send(None)
+            worker.process.join(timeout=1)
+        except Exception:
+            pass
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.conn.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            self._stop_worker(worker)
+
+    # -- runs ------------------------------------------------------------
+
+    def run(self, request: Dict[str, Any], cancel_token: Optional[CancelToken], acquire_timeout: Optional[float]) -> Any:
+        enqueued = time.perf_counter()
+        worker = self._acquire(acquire_timeout)
+        queue_ms = (time.perf_counter() - enqueued) * 1000
+
+        call_id = next(self._call_ids)
+        healthy = True
+        try:
+            worker.conn.send(("run", call_id, request))
+            while not worker.conn.poll(0.1):
+                if cancel_token is not None and cancel_token.cancelled:
+                    # 워커 안의 그래프는 중지 요청을 알 수 없으므로 프로세스를 종료한다
+                    healthy = False
+                    self._counters["cancelled"] += 1
+                    cancel_token.check()
+                if cancel_token is not None and cancel_token.expired():
+                    # 협조적 제한 시간 확인에 응답하지 않는 경우를 대비한 강제 종료 (1초 유예)
+                    if time.time() > cancel_token.deadline + 1.0:
+                        healthy = False
+                        self._counters["timed_out"] += 1
+                        raise ExecutionTimedOut("Execution deadline exceeded")
+                if not worker.process.is_alive():
+                    healthy = False
+                    self._counters["errors"] += 1
+                    raise DeploymentWorkerError(
+                        f"Deployment worker exited unexpectedly (exit code {worker.process.exitcode})"
+                    )
+            try:
+                _, reply, exec_ms, supersteps = worker.conn.recv()
+            except (EOFError, OSError):
+                healthy = False
+                self._counters["errors"] += 1
+                raise DeploymentWorkerError("Deployment worker connection lost")
+        finally:
+            worker.runs += 1
+            worker.last_used = time.monotonic()
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._discard(worker, replace=True)
+
+        self._counters["runs"] += 1
+        self._queue_samples.append(round(queue_ms, 3))
+        self._exec_samples.append(round(exec_ms, 3))
+        if cancel_token is not None and supersteps is not None:
+            cancel_token.supersteps = supersteps
+
+        status = reply[0]
+        if status == "ok":
+            return reply[1]
+        if status == "cancelled":
+            self._counters["cancelled"] += 1
+            raise ExecutionCancelled(reply[1])
+        if status == "timed_out":
+            self._counters["timed_out"] += 1
+            raise ExecutionTimedOut(reply[1])
+        self._counters["errors"] += 1
+        raise DeploymentWorkerError(reply[1], reply[2] if len(reply) > 2 else "")
+
+    def get_stats(self) -> Dict[str, Any]:
+        def summary(samples):
+            values = sorted(samples)
+            if not values:
+                return {"avg": 0.0, "p95": 0.0}
+            return {"avg": round(sum(values) / len(values), 3), "p95": values[int(0.95 * (len(values) - 1))]}
+
+        with self._lock:
+            workers = [
+                {"pid": w.process.pid, "alive": w.process.is_alive(), "runs": w.runs}
+                for w in self._workers
+            ]
+            spawning = self._spawning
+        return {
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "workers": workers,
+            "idle": self._idle.qsize(),
+            "spawning": spawning,
+            "deployments": sorted(self._preload),
+            "queue_ms": summary(self._queue_samples),
+            "exec_ms": summary(self._exec_samples),
+            **self._counters,
+        }
+
+
+class DeploymentWorkerManager:
+    """
+    Routes deployment runs to per-deployment (or per-group) worker pools.
+
+    Args:
+        mode: "process" to run deployments in worker processes, "inline" otherwise
+        groups: Mapping of deployment ID to group name (deployments in a group share a pool)
+    """
+
+    def __init__(self, mode: str = DEPLOYMENT_RUNTIME_MODE, groups: Optional[Dict[str, str]] = None,
+                 min_workers: int = MIN_WORKERS, max_workers: int = MAX_WORKERS,
+                 idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+                 health_interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        self.mode = mode
+        self.groups = _parse_groups(os.getenv("LANGSTAR_DEPLOYMENT_GROUPS", "")) if groups is None else groups
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self._pools: Dict[str, DeploymentWorkerPool] = {}
+        self._lock = threading.Lock()
+        self._context = None
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "process"
+
+    def _pool_for(self, deployment_id: str, code_path: str) -> DeploymentWorkerPool:
+        key = self.groups.get(deployment_id, deployment_id)
+        with self._lock:
+            if self._context is None:
+                methods = multiprocessing.get_all_start_methods()
+                self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = DeploymentWorkerPool(key, self._context, self.min_workers, self.max_workers, self.idle_timeout)
+                self._pools[key] = pool
+                logger.info(f"Created deployment worker pool: {key}")
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._monitor_loop, daemon=True, name="deployment-workers-monitor")
+                self._monitor.start()
+        if deployment_id not in pool._preload:
+            pool.warm(deployment_id, code_path)
+        return pool
+
+    def warm(self, deployment_id: str, code_path: str) -> None:
+        """Start workers for a deployment ahead of its first run."""
+        self._pool_for(deployment_id, os.path.abspath(code_path))
+
+    def run(self, deployment_id: str, code_path: str, input_data: Dict[str, Any], execution_id: str,
+            version_id: Optional[str] = None, cancel_token: Optional[CancelToken] = None) -> Any:
+        """
+        Run a deployment in its worker pool and return the final graph state.
+
+        Raises:
+            ExecutionCancelled: If the token was cancelled (the worker is replaced)
+            ExecutionTimedOut: If the deadline or superstep budget was exceeded
+            DeploymentWorkerError: If the graph raised or the worker died
+        """
+        code_path = os.path.abspath(code_path)
+        pool = self._pool_for(deployment_id, code_path)
+        request = {
+            "deployment_id": deployment_id,
+            "version_id": version_id,
+            "execution_id": execution_id,
+            "code_path": code_path,
+            "input_data": input_data,
+            "deadline": cancel_token.deadline if cancel_token else None,
+            "max_supersteps": cancel_token.max_supersteps if cancel_token else None,
+            "traceparent": current_traceparent(),
+        }
+        return pool.run(request, cancel_token, cancel_token.remaining() if cancel_token else None)
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            for pool in list(self._pools.values()):
+                try:
+                    pool.maintain()
+                except Exception as e:
+                    logger.error(f"Deployment worker health check failed for {pool.key}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pools": {key: pool.get_stats() for key, pool in list(self._pools.items())},
+        }
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            pool.close()
+
+
+# Global deployment worker manager
+deployment_workers = DeploymentWorkerManager()
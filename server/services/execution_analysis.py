@@ -0,0 +1,340 @@
+"""
+Critical-path and bottleneck analysis of deployment executions.
+
+노드 실행 로그(시작/종료 시각)와 워크플로우 스냅샷의 엣지(WorkflowSnapshot.edges)로 실행마다 임계 경로를 계산합니다.
+가장 늦게 끝난 노드에서 시작해 "가장 늦게 끝난 선행 노드"를 거꾸로 따라가며, 이 경로가 실행 전체 시간을 결정합니다.
+
+노드별 지표:
+    self_ms: 노드 함수 자체의 실행 시간 (반복 실행된 노드는 합산)
+    wait_ms: 선행 노드가 모두 끝난 뒤 노드가 시작되기까지 기다린 시간 (superstep 경계, 스케줄링 지연)
+분기 지표: 여러 선행 노드를 기다리는 합류 노드마다 어느 분기가 마지막에 도착했는지(지배 분기)와
+나머지 분기의 여유 시간(slack_ms)을 기록합니다.
+
+배포 단위 분석은 최근 실행들을 모아 노드별 p50/p95, 임계 경로 비율, 경로별 빈도를 계산하고
+먼저 최적화(또는 병렬화)할 노드를 임계 경로 기여도 순으로 제안합니다.
+"""
+
+import heapq
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from server.utils.execution_logger import NodeExecutionLog, NodeStatus, execution_logger
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 50
+MAX_WINDOW = 500
+# 로그 시각은 밀리초 단위로 잘리므로 선행 노드 종료와 다음 노드 시작 비교에 허용 오차를 둔다
+TIME_TOLERANCE_MS = 1.0
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95 and mean of samples."""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return float(ordered[min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))])
+
+    return {"p50": round(rank(0.5), 3), "p95": round(rank(0.95), 3), "mean": round(sum(ordered) / len(ordered), 3)}
+
+
+def _node_spans(logs: Iterable[NodeExecutionLog]) -> Dict[str, Dict[str, Any]]:
+    """Collapse finished node logs into one (start, end, self time) entry per node."""
+    spans: Dict[str, Dict[str, Any]] = {}
+    for log in logs:
+        if log.status not in (NodeStatus.SUCCEEDED, NodeStatus.FAILED) or log.end_time is None:
+            continue
+        self_ms = log.duration_ms if log.duration_ms is not None else (log.end_time - log.start_time).total_seconds() * 1000
+        span = spans.get(log.node_id)
+        if span is None:
+            spans[log.node_id] = {
+                "node_name": log.node_name,
+                "node_type": log.node_type,
+                "start": log.start_time,
+                "end": log.end_time,
+                "self_ms": float(self_ms),
+                "runs": 1,
+                "failed": log.status == NodeStatus.FAILED,
+            }
+            continue
+        span["start"] = min(span["start"], log.start_time)
+        span["end"] = max(span["end"], log.end_time)
+        span["self_ms"] += float(self_ms)
+        span["runs"] += 1
+        span["failed"] = span["failed"] or log.status == NodeStatus.FAILED
+    return spans
+
+
+def _predecessors(edges: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    predecessors: Dict[str, List[str]] = {}
+    for edge in edges:
+        source, target = edge.get("source"), edge.get("target")
+        if source and target and source != target:
+            predecessors.setdefault(target, []).append(source)
+    return predecessors
+
+
+def analyze_run(logs: Iterable[NodeExecutionLog], edges: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute the critical path, self/wait times and branch dominance of one execution.
+
+    Args:
+        logs: Node execution logs of the execution
+        edges: Workflow snapshot edges ({"source": node_id, "target": node_id})
+
+    Returns:
+        {"duration_ms", "critical_path", "critical_path_ms", "nodes": {node_id: {...}}, "joins": [...]}
+    """
+    spans = _node_spans(logs)
+    if not spans:
+        return {"duration_ms": 0.0, "critical_path": [], "critical_path_ms": 0.0, "nodes": {}, "joins": []}
+
+    run_start = min(span["start"] for span in spans.values())
+
+    def offset(moment: datetime) -> float:
+        return (moment - run_start).total_seconds() * 1000
+
+    predecessors = {
+        node_id: [source for source in sources if source in spans]
+        for node_id, sources in _predecessors(edges).items()
+    }
+
+    # 1. 노드별 대기 시간: 실행된 선행 노드 중 가장 늦게 끝난 시각부터 노드 시작까지
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for node_id, span in spans.items():
+        start, end = offset(span["start"]), offset(span["end"])
+        ready = [offset(spans[source]["end"]) for source in predecessors.get(node_id, [])
+                 if offset(spans[source]["end"]) <= start + TIME_TOLERANCE_MS]
+        nodes[node_id] = {
+            "node_name": span["node_name"],
+            "node_type": span["node_type"],
+            "start_offset_ms": round(start, 3),
+            "end_offset_ms": round(end, 3),
+            "self_ms": round(span["self_ms"], 3),
+            "wait_ms": round(max(0.0, start - max(ready)) if ready else start, 3),
+            "runs": span["runs"],
+            "failed": span["failed"],
+            "critical": False,
+        }
+
+    # 2. 임계 경로: 가장 늦게 끝난 노드에서 마지막에 도착한 선행 노드를 거꾸로 따라간다
+    current = max(nodes, key=lambda node_id: nodes[node_id]["end_offset_ms"])
+    path = [current]
+    visited = {current}
+    while True:
+        start = nodes[current]["start_offset_ms"]
+        candidates = [source for source in predecessors.get(current, [])
+                      if source not in visited and nodes[source]["end_offset_ms"] <= start + TIME_TOLERANCE_MS]
+        if not candidates:
+            break
+        current = max(candidates, key=lambda node_id: nodes[node_id]["end_offset_ms"])
+        path.append(current)
+        visited.add(current)
+    path.reverse()
+    for node_id in path:
+        nodes[node_id]["critical"] = True
+
+    # 3. 합류 노드: 어느 분기가 마지막에 도착해 합류를 늦췄는지
+    joins = []
+    for node_id, sources in predecessors.items():
+        if node_id not in nodes or len(sources) < 2:
+            continue
+        arrivals = {source: nodes[source]["end_offset_ms"] for source in sources}
+        dominant = max(arrivals, key=arrivals.get)
+        joins.append({
+            "node_id": node_id,
+            "dominant": dominant,
+            "inputs": {
+                source: {"end_offset_ms": arrival, "slack_ms": round(arrivals[dominant] - arrival, 3)}
+                for source, arrival in arrivals.items()
+            },
+        })
+
+    return {
+        "duration_ms": round(max(node["end_offset_ms"] for node in nodes.values()), 3),
+        "critical_path": path,
+        "critical_path_ms": round(sum(nodes[node_id]["self_ms"] + nodes[node_id]["wait_ms"] for node_id in path), 3),
+        "nodes": nodes,
+        "joins": joins,
+    }
+
+
+def aggregate_runs(runs: List[Dict[str, Any]], top: int = 3) -> Dict[str, Any]:
+    """
+    Aggregate per-run analyses into p50/p95 node, path and branch statistics.
+
+    Args:
+        runs: Results of analyze_run (빈 실행은 제외)
+        top: Number of nodes suggested in ``optimize_first``
+    """
+    runs = [run for run in runs if run["nodes"]]
+    total_ms = sum(run["duration_ms"] for run in runs) or 1.0
+
+    samples: Dict[str, Dict[str, Any]] = {}
+    for run in runs:
+        for node_id, node in run["nodes"].items():
+            entry = samples.setdefault(node_id, {
+                "node_name": node["node_name"], "node_type": node["node_type"],
+                "self": [], "wait": [], "critical": [], "critical_runs": 0,
+            })
+            entry["self"].append(node["self_ms"])
+            entry["wait"].append(node["wait_ms"])
+            if node["critical"]:
+                entry["critical_runs"] += 1
+                entry["critical"].append(node["self_ms"] + node["wait_ms"])
+
+    nodes = []
+    for node_id, entry in samples.items():
+        nodes.append({
+            "node_id": node_id,
+            "node_name": entry["node_name"],
+            "node_type": entry["node_type"],
+            "executions": len(entry["self"]),
+            "self_ms": _percentiles(entry["self"]),
+            "wait_ms": _percentiles(entry["wait"]),
+            "critical_share": round(entry["critical_runs"] / len(runs), 4),
+            # 임계 경로 위에서 보낸 시간(자체+대기)이 전체 실행 시간에서 차지하는 비율
+            "critical_time_share": round(sum(entry["critical"]) / total_ms, 4),
+        })
+    nodes.sort(key=lambda node: node["critical_time_share"], reverse=True)
+
+    paths: Dict[Tuple[str, ...], List[float]] = {}
+    for run in runs:
+        paths.setdefault(tuple(run["critical_path"]), []).append(run["duration_ms"])
+    critical_paths = sorted(
+        ({"path": list(path), "runs": len(durations), "share": round(len(durations) / len(runs), 4),
+          "duration_ms": _percentiles(durations)} for path, durations in paths.items()),
+        key=lambda entry: entry["runs"], reverse=True,
+    )
+
+    join_samples: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for run in runs:
+        for join in run["joins"]:
+            inputs = join_samples.setdefault(join["node_id"], {})
+            for source, arrival in join["inputs"].items():
+                entry = inputs.setdefault(source, {"dominant": 0, "slack": []})
+                entry["dominant"] += 1 if source == join["dominant"] else 0
+                entry["slack"].append(arrival["slack_ms"])
+    branches = []
+    for node_id, inputs in join_samples.items():
+        observed = max(len(entry["slack"]) for entry in inputs.values())
+        branch_inputs = sorted(
+            ({"node_id": source, "dominant_share": round(entry["dominant"] / observed, 4),
+              "slack_ms": _percentiles(entry["slack"])} for source, entry in inputs.items()),
+            key=lambda entry: entry["dominant_share"], reverse=True,
+        )
+        branches.append({"join_node_id": node_id, "runs": observed, "dominant": branch_inputs[0]["node_id"],
+                         "inputs": branch_inputs})
+
+    return {
+        "runs": len(runs),
+        "duration_ms": _percentiles([run["duration_ms"] for run in runs]),
+        "nodes": nodes,
+        "critical_paths": critical_paths,
+        "branches": branches,
+        "optimize_first": [node["node_id"] for node in nodes[:top] if node["critical_time_share"] > 0],
+    }
+
+
+class ExecutionAnalysisService:
+    """Reads execution logs and workflow snapshots of deployments and analyzes them."""
+
+    def __init__(self, deployments_dir: str = "deployments"):
+        self.deployments_dir = deployments_dir
+
+    def _executions_dir(self, deployment_id: str) -> str:
+        return os.path.join(self.deployments_dir, deployment_id, "executions")
+
+    def _load_snapshot(self, deployment_id: str, execution_id: str) -> Optional[Dict[str, Any]]:
+        snapshot_file = os.path.join(self._executions_dir(deployment_id), execution_id, "workflow_snap.json")
+        if not os.path.exists(snapshot_file):
+            return None
+        with open(snapshot_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _analyze(self, deployment_id: str, execution_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = data.get("execution_metadata", {})
+        edges = data.get("workflow_snapshot", {}).get("edges", [])
+        logs = execution_logger.get_execution_logs(deployment_id, metadata.get("version_id"), execution_id)
+        return {
+            "execution_id": execution_id,
+            "version_id": metadata.get("version_id"),
+            "status": metadata.get("status"),
+            "start_time": metadata.get("start_time"),
+            **analyze_run(logs, edges),
+        }
+
+    def analyze_execution(self, deployment_id: str, execution_id: str) -> Dict[str, Any]:
+        """Critical path of one execution (ValueError if it does not exist)."""
+        try:
+            data = self._load_snapshot(deployment_id, execution_id)
+            if data is None:
+                raise ValueError(f"Execution {execution_id} not found for deployment {deployment_id}")
+            return {"deployment_id": deployment_id, **self._analyze(deployment_id, execution_id, data)}
+
+        except Exception as e:
+            logger.error(f"Error analyzing execution {execution_id}: {str(e)}")
+            raise
+
+    def _scan(self, deployment_id: str, version_id: Optional[str],
+              include_failed: bool) -> Iterator[Tuple[str, str]]:
+        """Yield (start_time, execution_id) of the executions matching the filters."""
+        executions_dir = self._executions_dir(deployment_id)
+        for execution_id in os.listdir(executions_dir):
+            try:
+                data = self._load_snapshot(deployment_id, execution_id)
+            except Exception as e:
+                logger.warning(f"Error reading execution snapshot {execution_id}: {str(e)}")
+                continue
+            metadata = (data or {}).get("execution_metadata", {})
+            if not metadata.get("id"):
+                continue
+            if version_id and metadata.get("version_id") != version_id:
+                continue
+            if not include_failed and metadata.get("status") != "succeeded":
+                continue
+            yield metadata.get("start_time") or "", execution_id
+
+    def analyze_deployment(self, deployment_id: str, limit: int = DEFAULT_WINDOW, version_id: Optional[str] = None,
+                           include_failed: bool = False) -> Dict[str, Any]:
+        """
+        Aggregate the critical paths of the deployment's most recent executions.
+
+        Args:
+            deployment_id: Deployment ID
+            limit: Number of most recent executions to analyze (최대 MAX_WINDOW)
+            version_id: Only analyze executions of this version
+            include_failed: Include failed/aborted executions (기본: 성공한 실행만)
+        """
+        try:
+            executions_dir = self._executions_dir(deployment_id)
+            if not os.path.isdir(executions_dir):
+                raise ValueError(f"No executions found for deployment {deployment_id}")
+
+            # 스냅샷은 하나씩 읽어 (시작 시각, 실행 ID)만 남기고, 분석할 구간의 스냅샷만 다시 읽는다
+            size = max(1, min(limit, MAX_WINDOW))
+            window = heapq.nlargest(size, self._scan(deployment_id, version_id, include_failed))
+            runs = []
+            for _, execution_id in window:
+                data = self._load_snapshot(deployment_id, execution_id)
+                if data is not None:
+                    runs.append(self._analyze(deployment_id, execution_id, data))
+            return {
+                "deployment_id": deployment_id,
+                "version_id": version_id,
+                "execution_ids": [run["execution_id"] for run in runs],
+                **aggregate_runs(runs),
+            }
+
+        except Exception as e:
+            logger.error(f"Error analyzing deployment executions {deployment_id}: {str(e)}")
+            raise
+
+
+# Global execution analysis service
+execution_analysis_service = ExecutionAnalysisService()
@@ -0,0 +1,126 @@
+"""
+Prometheus metrics for the workflow execution engine.
+
+배포 실행 시간, 노드 타입별 실행 시간, superstep 수, 실행 큐 대기 시간, 프로바이더/모델별 LLM 호출 지연,
+도구 결과 캐시 조회를 기록합니다 (LLM 응답/시맨틱 캐시 카운터는 llm_registry에 있음).
+모두 /metrics 엔드포인트에서 함께 노출됩니다.
+
+배포 라벨은 처음 본 순서대로 LANGSTAR_METRICS_MAX_DEPLOYMENTS(기본 100)개까지만 그대로 쓰고,
+이후 배포는 "other"로 묶어 시계열 수가 무한히 늘지 않게 합니다 (버전 라벨도 같은 방식).
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+MAX_DEPLOYMENT_LABELS = int(os.getenv("LANGSTAR_METRICS_MAX_DEPLOYMENTS", "100"))
+MAX_VERSION_LABELS = int(os.getenv("LANGSTAR_METRICS_MAX_VERSIONS", "500"))
+OVERFLOW_LABEL = "other"
+
+# 초 단위 버킷 (노드/LLM 호출은 수십 ms ~ 수 분, 실행은 그보다 길다)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+EXECUTION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SUPERSTEP_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+execution_registry = CollectorRegistry()
+
+execution_duration_seconds = Histogram(
+    'langstar_execution_duration_seconds',
+    'Deployment execution duration',
+    ['deployment', 'status'],
+    buckets=EXECUTION_BUCKETS,
+    registry=execution_registry
+)
+
+execution_supersteps = Histogram(
+    'langstar_execution_supersteps',
+    'LangGraph supersteps per deployment execution',
+    ['deployment'],
+    buckets=SUPERSTEP_BUCKETS,
+    registry=execution_registry
+)
+
+node_duration_seconds = Histogram(
+    'langstar_node_duration_seconds',
+    'Workflow node duration',
+    ['node_type', 'deployment', 'status'],
+    buckets=LATENCY_BUCKETS,
+    registry=execution_registry
+)
+
+queue_wait_seconds = Histogram(
+    'langstar_execution_queue_wait_seconds',
+    'Time jobs spend in the execution queue before a worker picks them up',
+    ['lane'],
+    buckets=LATENCY_BUCKETS,
+    registry=execution_registry
+)
+
+llm_call_duration_seconds = Histogram(
+    'langstar_llm_call_duration_seconds',
+    'Latency of individual chat model calls',
+    ['provider', 'model', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+    registry=execution_registry
+)
+
+tool_cache_requests_total = Counter(
+    'langstar_tool_cache_requests_total',
+    'Agent tool result cache lookups',
+    ['result'],
+    registry=execution_registry
+)
+
+
+class BoundedLabel:
+    """Keeps the first ``limit`` distinct label values and maps the rest to "other"."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: Optional[str]) -> str:
+        value = value or "unknown"
+        with self._lock:
+            if value in self._seen:
+                return value
+            if len(self._seen) < self.limit:
+                self._seen.add(value)
+                return value
+        return OVERFLOW_LABEL
+
+
+deployment_label = BoundedLabel(MAX_DEPLOYMENT_LABELS)
+_version_labels = BoundedLabel(MAX_VERSION_LABELS)
+
+
+def version_label(deployment_id: str, version_id: Optional[str]) -> str:
+    """Bounded version label (a version of an "other" deployment is also "other")."""
+    if deployment_label(deployment_id) == OVERFLOW_LABEL:
+        return OVERFLOW_LABEL
+    label = _version_labels(f"{deployment_id}:{version_id or 'unknown'}")
+    return OVERFLOW_LABEL if label == OVERFLOW_LABEL else (version_id or "unknown")
+
+
+def observe_execution(deployment_id: str, status: str, duration_ms: Optional[int], supersteps: Optional[int],
+                      node_history: Iterable[Dict[str, Any]]) -> None:
+    """
+    Record a finished deployment execution and its node durations.
+
+    노드 실행 시간은 실행 로그에서 읽으므로 배포 워커 프로세스에서 실행된 노드도 포함됩니다.
+    """
+    deployment = deployment_label(deployment_id)
+    if duration_ms is not None:
+        execution_duration_seconds.labels(deployment, status).observe(duration_ms / 1000)
+    if supersteps is not None:
+        execution_supersteps.labels(deployment).observe(supersteps)
+    for node in node_history:
+        # 시작 로그(duration 없음)는 건너뛰고 완료/실패 로그만 기록
+        if node.get("duration_ms") is None or node.get("status") not in ("succeeded", "failed"):
+            continue
+        node_duration_seconds.labels(
+            node.get("node_type") or "unknown", deployment, node["status"]
+        ).observe(node["duration_ms"] / 1000)
@@ -0,0 +1,523 @@
+"""
+Execution Queue for LangStar workflow runs.
+
+SQLite 기반 로컬 실행 큐입니다. 우선순위 레인(interactive / scheduled / batch)별로
+전용 워커 풀을 두어 스케줄 버스트가 에디터/API 요청을 굶기지 않도록 하고,
+레인별 최대 대기열 길이를 넘으면 QueueFullError로 백프레셔를 겁니다.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from server.models.execution import ExecutionPriority
+from server.services.execution_metrics import queue_wait_seconds
+from server.utils.timing import PhaseTimer, add_phase, current_timer, use_timer
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DB_PATH = os.getenv("LANGSTAR_QUEUE_DB", os.path.join("executions", "queue.db"))
+
+# 레인별 워커 수 / 최대 대기열 길이 (환경 변수로 조정)
+DEFAULT_LANE_WORKERS = {
+    ExecutionPriority.INTERACTIVE: int(os.getenv("LANGSTAR_QUEUE_WORKERS_INTERACTIVE", "4")),
+    ExecutionPriority.SCHEDULED: int(os.getenv("LANGSTAR_QUEUE_WORKERS_SCHEDULED", "2")),
+    ExecutionPriority.BATCH: int(os.getenv("LANGSTAR_QUEUE_WORKERS_BATCH", "1")),
+}
+DEFAULT_MAX_DEPTH = {
+    ExecutionPriority.INTERACTIVE: int(os.getenv("LANGSTAR_QUEUE_MAX_DEPTH_INTERACTIVE", "100")),
+    ExecutionPriority.SCHEDULED: int(os.getenv("LANGSTAR_QUEUE_MAX_DEPTH_SCHEDULED", "200")),
+    ExecutionPriority.BATCH: int(os.getenv("LANGSTAR_QUEUE_MAX_DEPTH_BATCH", "500")),
+}
+
+# 레인 우선순위 (높은 것 먼저)
+LANE_ORDER = [ExecutionPriority.INTERACTIVE, ExecutionPriority.SCHEDULED, ExecutionPriority.BATCH]
+
+# 재시작 복구 시 최대 시도 횟수 (실행 도중 프로세스가 죽은 작업이 무한 반복되지 않도록)
+MAX_ATTEMPTS = 3
+
+
+class QueueFullError(Exception):
+    """Raised when a lane is at its maximum depth."""
+
+    def __init__(self, lane: ExecutionPriority, depth: int, max_depth: int, retry_after: int = 1):
+        self.lane = lane
+        self.depth = depth
+        self.max_depth = max_depth
+        self.retry_after = retry_after
+        super().__init__(
+            f"Execution queue lane '{lane.value}' is full ({depth}/{max_depth}), retry after {retry_after}s"
+        )
+
+
+@dataclass
+class QueuedJob:
+    """A unit of work in the execution queue."""
+    id: str
+    kind: str
+    lane: ExecutionPriority
+    payload: Dict[str, Any]
+    durable: bool = True
+    status: str = "queued"  # queued, running, succeeded, failed
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    # 제출한 요청의 실행 컨텍스트 (추적 ID, 단계별 시간). 재시작 후 복구된 작업에는 없음
+    context: Optional[contextvars.Context] = field(default=None, repr=False)
+
+    @property
+    def wait_ms(self) -> Optional[int]:
+        if self.started_at is None:
+            return None
+        return int((self.started_at - self.enqueued_at) * 1000)
+
+    @property
+    def run_ms(self) -> Optional[int]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return int((self.finished_at - self.started_at) * 1000)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return float(ordered[index])
+
+
+class ExecutionQueue:
+    """
+    Priority-laned worker pool with SQLite persistence.
+
+    Each lane has dedicated workers so a backlog in one lane never blocks
+    another. Scheduled and batch workers drain their own lane first and
+    then help higher-priority lanes; interactive workers only serve the
+    interactive lane.
+    """
+
+    def __init__(
+        self,
+        db_path: str = QUEUE_DB_PATH,
+        lane_workers: Optional[Dict[ExecutionPriority, int]] = None,
+        max_depth: Optional[Dict[ExecutionPriority, int]] = None,
+        sample_size: int = 1000,
+        retain_finished: int = 1000,
+    ):
+        """
+        Initialize execution queue.
+
+        Args:
+            db_path: SQLite file used to persist durable jobs
+            lane_workers: Number of worker threads per lane
+            max_depth: Maximum number of pending jobs per lane
+            sample_size: Number of wait/run time samples kept per lane
+            retain_finished: Number of finished jobs kept for wait() lookups
+        """
+        self.db_path = db_path
+        self.lane_workers = {**DEFAULT_LANE_WORKERS, **(lane_workers or {})}
+        self.max_depth = {**DEFAULT_MAX_DEPTH, **(max_depth or {})}
+        self.retain_finished = retain_finished
+
+        self._cond = threading.Condition()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._pending: Dict[ExecutionPriority, Deque[QueuedJob]] = {lane: deque() for lane in LANE_ORDER}
+        self._running: Dict[ExecutionPriority, int] = {lane: 0 for lane in LANE_ORDER}
+        self._jobs: Dict[str, QueuedJob] = {}
+        self._finished: "OrderedDict[str, QueuedJob]" = OrderedDict()
+        self._wait_samples: Dict[ExecutionPriority, Deque[int]] = {
+            lane: deque(maxlen=sample_size) for lane in LANE_ORDER
+        }
+        self._run_samples: Dict[ExecutionPriority, Deque[int]] = {
+            lane: deque(maxlen=sample_size) for lane in LANE_ORDER
+        }
+        self._counters: Dict[ExecutionPriority, Dict[str, int]] = {
+            lane: {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0} for lane in LANE_ORDER
+        }
+
+        self._workers: List[threading.Thread] = []
+        self._started = False
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def register_handler(self, kind: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        Register the function that processes jobs of a given kind.
+
+        Args:
+            kind: Job kind (e.g. "execution", "scheduled")
+            handler: Callable receiving the job payload
+        """
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        """Open the database, recover persisted jobs and spawn workers."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            self._stopping = False
+
+        self._init_db()
+        self._recover_jobs()
+
+        for lane in LANE_ORDER:
+            for index in range(max(0, self.lane_workers.get(lane, 0))):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(lane,),
+                    name=f"execution-queue-{lane.value}-{index}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+        workers = {lane.value: count for lane, count in self.lane_workers.items()}
+        logger.info(f"Execution queue started: workers={workers}")
+
+    def shutdown(self, wait: bool = True, timeout: float = 5.0) -> None:
+        """
+        Stop workers. Pending durable jobs stay in SQLite for the next start.
+
+        Args:
+            wait: Whether to join worker threads
+            timeout: Join timeout per worker in seconds
+        """
+        with self._cond:
+            if not self._started:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+
+        if wait:
+            for worker in self._workers:
+                worker.join(timeout=timeout)
+        self._workers = []
+
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        with self._cond:
+            self._started = False
+        logger.info("Execution queue stopped")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        lane: ExecutionPriority = ExecutionPriority.INTERACTIVE,
+        durable: bool = True,
+        job_id: Optional[str] = None,
+    ) -> QueuedJob:
+        """
+        Enqueue a job.
+
+        Args:
+            kind: Registered handler kind
+            payload: JSON-serializable payload passed to the handler
+            lane: Priority lane
+            durable: Persist the job so it survives a restart
+            job_id: Optional job id (defaults to a new UUID)
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the lane is at its maximum depth
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if not self._started:
+            self.start()
+
+        lane = ExecutionPriority(lane)
+        job = QueuedJob(
+            id=job_id or str(uuid.uuid4()),
+            kind=kind,
+            lane=lane,
+            payload=payload,
+            durable=durable,
+            context=contextvars.copy_context(),
+        )
+
+        with self._cond:
+            depth = len(self._pending[lane])
+            max_depth = self.max_depth.get(lane, 0)
+            if depth >= max_depth:
+                self._counters[lane]["rejected"] += 1
+                raise QueueFullError(lane, depth, max_depth, self._estimate_retry_after(lane, depth))
+
+            if durable:
+                self._persist(job)
+            self._pending[lane].append(job)
+            self._jobs[job.id] = job
+            self._counters[lane]["submitted"] += 1
+            self._cond.notify_all()
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[QueuedJob]:
+        """Return an in-flight or recently finished job."""
+        with self._cond:
+            return self._jobs.get(job_id) or self._finished.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[QueuedJob]:
+        """
+        Block until a job finishes.
+
+        Args:
+            job_id: Job id returned by submit()
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            The job (check ``job.done.is_set()`` when a timeout is given),
+            or None if the job is unknown
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        job.done.wait(timeout)
+        return job
+
+    def get_depth(self, lane: Optional[ExecutionPriority] = None) -> int:
+        """Return the number of pending jobs in a lane, or across all lanes."""
+        with self._cond:
+            if lane is not None:
+                return len(self._pending[ExecutionPriority(lane)])
+            return sum(len(q) for q in self._pending.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth, running jobs and wait-time statistics per lane.
+
+        Returns:
+            Dictionary with per-lane statistics
+        """
+        now = time.time()
+        lanes = {}
+        with self._cond:
+            for lane in LANE_ORDER:
+                pending = self._pending[lane]
+                waits = list(self._wait_samples[lane])
+                runs = list(self._run_samples[lane])
+                lanes[lane.value] = {
+                    "depth": len(pending),
+                    "max_depth": self.max_depth.get(lane, 0),
+                    "running": self._running[lane],
+                    "workers": self.lane_workers.get(lane, 0),
+                    "oldest_wait_ms": int((now - pending[0].enqueued_at) * 1000) if pending else 0,
+                    "wait_ms": {
+                        "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                        "p50": _percentile(waits, 0.50),
+                        "p95": _percentile(waits, 0.95),
+                        "max": float(max(waits)) if waits else 0.0,
+                    },
+                    "run_ms": {
+                        "avg": round(sum(runs) / len(runs), 2) if runs else 0.0,
+                        "p95": _percentile(runs, 0.95),
+                    },
+                    **self._counters[lane],
+                }
+            return {
+                "started": self._started,
+                "total_depth": sum(v["depth"] for v in lanes.values()),
+                "total_running": sum(v["running"] for v in lanes.values()),
+                "lanes": lanes,
+            }
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _lanes_for_worker(self, lane: ExecutionPriority) -> List[ExecutionPriority]:
+        """자기 레인을 먼저, 그 다음 더 높은 우선순위 레인을 처리"""
+        higher = LANE_ORDER[:LANE_ORDER.index(lane)]
+        return [lane] + higher
+
+    def _next_job(self, lanes: List[ExecutionPriority]) -> Optional[QueuedJob]:
+        for candidate in lanes:
+            if self._pending[candidate]:
+                return self._pending[candidate].popleft()
+        return None
+
+    def _worker_loop(self, lane: ExecutionPriority) -> None:
+        lanes = self._lanes_for_worker(lane)
+        while True:
+            with self._cond:
+                job = self._next_job(lanes)
+                while job is None and not self._stopping:
+                    self._cond.wait()
+                    job = self._next_job(lanes)
+                if self._stopping:
+                    if job is not None:
+                        # 종료 중에 꺼낸 작업은 다시 대기열로 (durable 작업은 DB에 남아 있음)
+                        self._pending[job.lane].appendleft(job)
+                    return
+                job.status = "running"
+                job.attempts += 1
+                job.started_at = time.time()
+                self._running[job.lane] += 1
+                self._wait_samples[job.lane].append(job.wait_ms)
+                queue_wait_seconds.labels(job.lane.value).observe(job.wait_ms / 1000)
+
+            self._run_job(job)
+
+    def _run_job(self, job: QueuedJob) -> None:
+        if job.durable:
+            self._mark_running(job)
+
+        handler = self._handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job.kind}'")
+            job.result = job.context.run(self._call_handler, job, handler) if job.context is not None else self._call_handler(job, handler)
+            job.status = "succeeded"
+        except BaseException as e:
+            job.error = e
+            job.status = "failed"
+            logger.error(f"Queued job {job.id} ({job.kind}) failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+            if job.durable:
+                self._delete(job.id)
+            with self._cond:
+                self._running[job.lane] -= 1
+                self._run_samples[job.lane].append(job.run_ms)
+                self._counters[job.lane][job.status] += 1
+                self._jobs.pop(job.id, None)
+                self._finished[job.id] = job
+                while len(self._finished) > self.retain_finished:
+                    self._finished.popitem(last=False)
+            job.done.set()
+
+    @staticmethod
+    def _call_handler(job: QueuedJob, handler: Callable[[Dict[str, Any]], Any]) -> Any:
+        """핸들러 호출 (대기 시간을 제출한 요청의 타이머에 먼저 기록해 실행 기록의 timing에 남긴다)"""
+        # 요청 타이머가 없는 작업(스케줄 실행, 재시작 후 복구된 작업)은 새 타이머에 기록
+        with use_timer(current_timer() or PhaseTimer()):
+            if job.wait_ms is not None:
+                add_phase("queue_wait", job.wait_ms / 1000)
+            return handler(job.payload)
+
+    def _estimate_retry_after(self, lane: ExecutionPriority, depth: int) -> int:
+        """대기열이 비워질 때까지 걸릴 예상 시간(초)"""
+        runs = self._run_samples[lane]
+        avg_run_s = (sum(runs) / len(runs) / 1000) if runs else 1.0
+        workers = max(1, self.lane_workers.get(lane, 1))
+        return max(1, int(avg_run_s * depth / workers))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _init_db(self) -> None:
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._db_lock:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS execution_queue (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    lane TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def _persist(self, job: QueuedJob) -> None:
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO execution_queue (id, kind, lane, payload, status, attempts, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.lane.value, json.dumps(job.payload, default=str),
+                 job.status, job.attempts, job.enqueued_at),
+            )
+            self._conn.commit()
+
+    def _mark_running(self, job: QueuedJob) -> None:
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "UPDATE execution_queue SET status = ?, attempts = ? WHERE id = ?",
+                ("running", job.attempts, job.id),
+            )
+            self._conn.commit()
+
+    def _delete(self, job_id: str) -> None:
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.execute("DELETE FROM execution_queue WHERE id = ?", (job_id,))
+            self._conn.commit()
+
+    def _recover_jobs(self) -> None:
+        """이전 프로세스에서 남은 작업을 대기열로 복구"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, lane, payload, status, attempts, enqueued_at "
+                "FROM execution_queue ORDER BY enqueued_at"
+            ).fetchall()
+
+        recovered = 0
+        for job_id, kind, lane, payload, status, attempts, enqueued_at in rows:
+            if attempts >= MAX_ATTEMPTS:
+                logger.warning(f"Dropping queued job {job_id} after {attempts} attempts")
+                self._delete(job_id)
+                continue
+            if job_id in self._jobs:
+                continue
+            job = QueuedJob(
+                id=job_id,
+                kind=kind,
+                lane=ExecutionPriority(lane),
+                payload=json.loads(payload),
+                attempts=attempts,
+                enqueued_at=enqueued_at,
+            )
+            with self._cond:
+                self._pending[job.lane].append(job)
+                self._jobs[job.id] = job
+            recovered += 1
+
+        if recovered:
+            logger.info(f"Recovered {recovered} queued jobs from {self.db_path}")
+
+
+# Global execution queue instance
+execution_queue = ExecutionQueue()
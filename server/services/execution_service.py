@@ -1,21 +1,36 @@
 import os
 import json
+import time
 import uuid
+import asyncio
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import httpx
 from server.models.execution import (
     Execution, ExecutionHistory, ExecutionStatus, ExecutionType,
     StartExecutionRequest, ListExecutionsRequest
 )
 from server.services.deployment_service import deployment_service
 from server.services.workflow_service import WorkflowService
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from server.services.execution_queue import execution_queue, QueueFullError
+from server.utils.execution_context import CancelToken, ExecutionCancelled, ExecutionTimedOut
+from server.utils.security import UnsafeURLError, check_callback_url
+from server.utils.timing import PhaseTimer, current_timer, phase, use_timer
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
+# 완료 콜백 설정
+CALLBACK_MAX_ATTEMPTS = 3
+CALLBACK_TIMEOUT_SECONDS = 10.0
+CALLBACK_BACKOFF_SECONDS = 1.0
+
+# 롱 폴링 간격 (점진적으로 늘림)
+WAIT_POLL_MIN_SECONDS = 0.1
+WAIT_POLL_MAX_SECONDS = 1.0
+
 class ExecutionService:
     """실행 관리 서비스"""
     
@@ -23,8 +38,9 @@ class ExecutionService:
         self.executions_dir = "executions"
         self.active_executions: Dict[str, Execution] = {}
         self.execution_history: Dict[str, List[ExecutionHistory]] = {}
+        self.cancel_tokens: Dict[str, CancelToken] = {}
         self._ensure_executions_directory()
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        execution_queue.register_handler("execution", self._run_queued_execution)
     
     def _ensure_executions_directory(self):
         """실행 디렉토리가 존재하는지 확인하고 없으면 생성"""
@@ -32,13 +48,17 @@ class ExecutionService:
             os.makedirs(self.executions_dir)
     
     def start_execution(self, workflow_id: str, request: StartExecutionRequest) -> Execution:
-        """워크플로우 실행을 시작합니다."""
+        """워크플로우 실행을 실행 큐에 등록합니다."""
         try:
             # 1. 배포 정보 가져오기
             deployment = deployment_service.get_deployment_by_id(workflow_id)
             if not deployment:
                 raise ValueError(f"Deployment {workflow_id} not found")
             
+            # 콜백 주소가 내부망(루프백, 사설, 메타데이터 주소 등)을 가리키면 접수하지 않는다
+            if request.callback_url:
+                check_callback_url(request.callback_url)
+            
             # 2. 실행 ID 생성
             execution_id = str(uuid.uuid4())
             execution_name = request.name or f"execution-{execution_id[:8]}"
@@ -46,81 +66,250 @@ class ExecutionService:
             # 3. ARN 생성
             arn = f"langstar:ap-northeast-2:123456789012:execution:{deployment.name}:{execution_name}"
             
-            # 4. 실행 객체 생성
+            # 4. 실행 객체 생성 (큐 대기 상태)
             execution = Execution(
                 id=execution_id,
                 name=execution_name,
                 arn=arn,
                 workflow_id=workflow_id,
                 workflow_name=deployment.name,
-                status=ExecutionStatus.RUNNING,
+                status=ExecutionStatus.QUEUED,
                 start_time=datetime.utcnow(),
                 input=request.input,
                 version=request.version,
                 alias=request.alias,
+                priority=request.priority,
+                callback_url=request.callback_url,
+                timeout_seconds=request.timeout_seconds,
+                max_supersteps=request.max_supersteps,
                 executed_by="current_user"  # TODO: 실제 사용자 ID로 변경
             )
             
-            # 5. 활성 실행 목록에 추가
+            # 5. 활성 실행 목록에 추가 (제한 시간은 접수 시점부터 계산)
+            token = CancelToken.with_timeout(request.timeout_seconds, request.max_supersteps)
             self.active_executions[execution_id] = execution
+            self.cancel_tokens[execution_id] = token
             
-            # 6. 파일에 저장
+            # 6. 파일에 저장 (재시작 시 큐 복구에 사용)
             self._save_execution(execution)
             
-            # 7. 비동기로 실행 시작
-            asyncio.create_task(self._execute_workflow_async(execution))
+            # 7. 실행 큐에 등록 (대기열이 가득 차면 QueueFullError)
+            try:
+                execution_queue.submit(
+                    "execution",
+                    {
+                        "execution_id": execution_id,
+                        "workflow_id": workflow_id,
+                        "deadline": token.deadline,
+                        "max_supersteps": token.max_supersteps
+                    },
+                    lane=request.priority,
+                    job_id=execution_id
+                )
+            except QueueFullError:
+                self.active_executions.pop(execution_id, None)
+                self.cancel_tokens.pop(execution_id, None)
+                self._delete_execution_file(execution)
+                raise
             
-            logger.info(f"Started execution: {execution_id}")
+            logger.info(f"Queued execution: {execution_id} (lane: {request.priority.value})")
             return execution
             
         except Exception as e:
             logger.error(f"Error starting execution: {str(e)}")
             raise
     
-    async def _execute_workflow_async(self, execution: Execution):
-        """워크플로우를 비동기로 실행합니다."""
+    def _run_queued_execution(self, payload: Dict[str, Any]) -> Optional[Execution]:
+        """실행 큐 워커에서 호출되어 워크플로우를 실행합니다."""
+        execution_id = payload["execution_id"]
+        execution = self.active_executions.get(execution_id)
+        if execution is None:
+            # 서버 재시작 후 복구된 작업은 파일에서 실행 정보를 읽어온다
+            execution = self._load_execution(payload["workflow_id"], execution_id)
+            if execution is None:
+                logger.warning(f"Queued execution {execution_id} not found, skipping")
+                return None
+            self.active_executions[execution_id] = execution
+        
+        # 대기 중에 중지된 실행은 건너뛴다
+        if execution.status not in (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING):
+            self.active_executions.pop(execution_id, None)
+            self.cancel_tokens.pop(execution_id, None)
+            return execution
+        
+        token = self.cancel_tokens.get(execution_id)
+        if token is None:
+            token = CancelToken(deadline=payload.get("deadline"), max_supersteps=payload.get("max_supersteps"))
+            self.cancel_tokens[execution_id] = token
+        
+        now = datetime.utcnow()
+        execution.queue_wait_ms = int((now - execution.start_time).total_seconds() * 1000)
+        execution.start_time = now
+        execution.status = ExecutionStatus.RUNNING
+        
+        # 시작 요청의 추적 ID를 이어받는다 (큐 대기 시간은 실행 큐가 같은 타이머에 이미 기록함)
+        with use_timer(current_timer() or PhaseTimer()):
+            self._save_execution(execution)
+            self._execute_workflow(execution, token)
+        return execution
+    
+    def _execute_workflow(self, execution: Execution, token: CancelToken):
+        """워크플로우를 실행하고 결과를 기록합니다."""
         try:
+            # 0. 큐에서 기다리는 동안 제한 시간이 지났는지 확인
+            token.check()
+            
             # 1. 배포 정보 가져오기
             deployment = deployment_service.get_deployment_by_id(execution.workflow_id)
+            if not deployment:
+                raise ValueError(f"Deployment {execution.workflow_id} not found")
             
             # 2. 워크플로우 실행
-            result = await self._run_workflow(deployment, execution.input)
+            result = self._run_workflow(deployment, execution, token)
             
-            # 3. 실행 완료 처리
-            execution.status = ExecutionStatus.SUCCEEDED
+            # 3. 실행 완료 처리 (run_deployment는 노드 에러를 결과에 담아 반환한다)
+            run_result = result.get("result", {}) if isinstance(result, dict) else {}
+            overall_status = run_result.get("execution_summary", {}).get("overall_status")
+            if token.cancelled:
+                # 마지막 superstep 도중 중지 요청이 들어온 경우
+                execution.status = ExecutionStatus.ABORTED
+                execution.error_message = token.reason
+            elif overall_status == "failed":
+                execution.status = ExecutionStatus.FAILED
+                execution.error_message = run_result.get("error")
+            else:
+                execution.status = ExecutionStatus.SUCCEEDED
             execution.end_time = datetime.utcnow()
             execution.output = result
+            execution.usage = run_result.get("execution_summary", {}).get("usage")
+            execution.trace_id = run_result.get("execution_summary", {}).get("trace_id")
+            execution.timing = run_result.get("execution_summary", {}).get("timing")
             execution.duration_ms = int((execution.end_time - execution.start_time).total_seconds() * 1000)
             
-            # 4. 활성 실행 목록에서 제거
-            self.active_executions.pop(execution.id, None)
+            logger.info(f"Execution completed: {execution.id} ({execution.status.value})")
             
-            # 5. 파일 업데이트
-            self._save_execution(execution)
+        except ExecutionCancelled as e:
+            execution.status = ExecutionStatus.ABORTED
+            execution.end_time = datetime.utcnow()
+            execution.error_message = str(e)
+            execution.duration_ms = int((execution.end_time - execution.start_time).total_seconds() * 1000)
             
-            logger.info(f"Execution completed: {execution.id}")
+            logger.info(f"Execution aborted: {execution.id}")
             
-        except Exception as e:
-            # 6. 에러 처리
-            execution.status = ExecutionStatus.FAILED
+        except ExecutionTimedOut as e:
+            execution.status = ExecutionStatus.TIMED_OUT
             execution.end_time = datetime.utcnow()
             execution.error_message = str(e)
             execution.duration_ms = int((execution.end_time - execution.start_time).total_seconds() * 1000)
             
-            # 7. 활성 실행 목록에서 제거
-            self.active_executions.pop(execution.id, None)
+            logger.warning(f"Execution timed out: {execution.id}, reason: {str(e)}")
             
-            # 8. 파일 업데이트
-            self._save_execution(execution)
+        except Exception as e:
+            # 4. 에러 처리
+            execution.status = ExecutionStatus.FAILED
+            execution.end_time = datetime.utcnow()
+            execution.error_message = str(e)
+            execution.duration_ms = int((execution.end_time - execution.start_time).total_seconds() * 1000)
             
             logger.error(f"Execution failed: {execution.id}, error: {str(e)}")
+        
+        # 5. 파일 업데이트 후 활성 실행 목록에서 제거 (wait 요청이 저장된 결과를 읽도록)
+        execution.supersteps = token.supersteps
+        self._save_execution(execution)
+        self.active_executions.pop(execution.id, None)
+        self.cancel_tokens.pop(execution.id, None)
+        
+        # 6. 완료 콜백 전송 (재시도가 워커를 붙잡지 않도록 별도 스레드)
+        if execution.callback_url:
+            threading.Thread(
+                target=self._deliver_callback,
+                args=(execution,),
+                name=f"execution-callback-{execution.id[:8]}",
+                daemon=True
+            ).start()
+    
+    def _deliver_callback(self, execution: Execution):
+        """실행 결과를 callback_url로 POST합니다. 실패 시 지수 백오프로 재시도합니다."""
+        payload = {
+            "execution_id": execution.id,
+            "workflow_id": execution.workflow_id,
+            "name": execution.name,
+            "status": execution.status.value,
+            "start_time": execution.start_time.isoformat(),
+            "end_time": execution.end_time.isoformat() if execution.end_time else None,
+            "duration_ms": execution.duration_ms,
+            "output": execution.output,
+            "error_message": execution.error_message
+        }
+        body = json.dumps(payload, default=str)
+        
+        for attempt in range(CALLBACK_MAX_ATTEMPTS):
+            try:
+                # DNS 응답이 접수 이후 바뀌었을 수 있으므로 보내기 직전에 다시 검사 (리다이렉트는 따라가지 않음)
+                check_callback_url(execution.callback_url)
+                response = httpx.post(
+                    execution.callback_url,
+                    content=body,
+                    headers={"Content-Type": "application/json", "X-LangStar-Execution-Id": execution.id},
+                    timeout=CALLBACK_TIMEOUT_SECONDS
+                )
+                if response.status_code < 400:
+                    execution.callback_status = "delivered"
+                    break
+                logger.warning(f"Callback for {execution.id} returned {response.status_code} (attempt {attempt + 1})")
+            except UnsafeURLError as e:
+                logger.error(f"Refusing callback for {execution.id}: {str(e)}")
+                execution.callback_status = "rejected"
+                break
+            except httpx.HTTPError as e:
+                logger.warning(f"Callback for {execution.id} failed (attempt {attempt + 1}): {str(e)}")
+            if attempt < CALLBACK_MAX_ATTEMPTS - 1:
+                time.sleep(CALLBACK_BACKOFF_SECONDS * (2 ** attempt))
+        else:
+            execution.callback_status = "failed"
+            logger.error(f"Giving up callback for execution {execution.id} to {execution.callback_url}")
+        
+        self._save_execution(execution)
     
-    async def _run_workflow(self, deployment: Any, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _is_pending(self, execution_id: str) -> bool:
+        """실행이 아직 큐에 있거나 실행 중인지 확인합니다."""
+        if execution_id in self.active_executions:
+            return True
+        # 재시작 후 복구되어 아직 워커가 집어가지 않은 작업
+        job = execution_queue.get_job(execution_id)
+        return job is not None and not job.done.is_set()
+    
+    async def wait_for_execution(self, execution_id: str, timeout: float) -> Tuple[Execution, bool]:
+        """실행이 끝날 때까지 최대 timeout초 동안 기다립니다 (롱 폴링).
+        
+        Returns:
+            (실행 정보, 완료 여부)
+        """
+        deadline = time.monotonic() + timeout
+        interval = WAIT_POLL_MIN_SECONDS
+        while self._is_pending(execution_id):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return self.active_executions.get(execution_id) or self.describe_execution(execution_id), False
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, WAIT_POLL_MAX_SECONDS)
+        
+        execution = self.describe_execution(execution_id)
+        return execution, execution.status not in (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING)
+    
+    def _run_workflow(self, deployment: Any, execution: Execution, token: CancelToken) -> Dict[str, Any]:
         """실제 워크플로우를 실행합니다."""
         try:
-            # deployment_service의 run_deployment 메서드 사용
-            result = deployment_service.run_deployment(deployment.id, input_data)
+            # deployment_service의 run_deployment 메서드 사용 (실행 ID와 취소 토큰 전달)
+            result = deployment_service.run_deployment(
+                deployment.id,
+                execution.input,
+                execution_id=execution.id,
+                cancel_token=token
+            )
             return result
+        except (ExecutionCancelled, ExecutionTimedOut):
+            raise
         except Exception as e:
             logger.error(f"Error running workflow: {str(e)}")
             raise
@@ -199,7 +388,10 @@ class ExecutionService:
                                 node_execution_history=execution_metadata.get('node_execution_history'),
                                 state_transitions_list=execution_metadata.get('state_transitions_list', []),
                                 api_call_info=execution_metadata.get('api_call_info'),
-                                execution_source=execution_metadata.get('execution_source', 'internal')
+                                execution_source=execution_metadata.get('execution_source', 'internal'),
+                                usage=execution_metadata.get('usage'),
+                                trace_id=execution_metadata.get('trace_id'),
+                                timing=execution_metadata.get('timing')
                             )
                             
                             # 필터 적용
@@ -274,8 +466,26 @@ class ExecutionService:
                                                 'state_transitions_list': execution_metadata.get('state_transitions_list', []),
                                                 'workflow_snapshot': integrated_data.get('workflow_snapshot'),
                                                 'api_call_info': execution_metadata.get('api_call_info'),
-                                                'execution_source': execution_metadata.get('execution_source', 'internal')
+                                                'execution_source': execution_metadata.get('execution_source', 'internal'),
+                                                'supersteps': execution_metadata.get('supersteps'),
+                                                'usage': execution_metadata.get('usage'),
+                                                'trace_id': execution_metadata.get('trace_id'),
+                                                'timing': execution_metadata.get('timing')
                                             }
+                                            # 실행 큐를 거친 실행이면 큐/콜백 정보 병합
+                                            saved = self._load_execution(execution_metadata.get('workflow_id'), execution_id)
+                                            if saved:
+                                                execution_data.update({
+                                                    'name': saved.name,
+                                                    'arn': saved.arn,
+                                                    'priority': saved.priority,
+                                                    'queue_wait_ms': saved.queue_wait_ms,
+                                                    'callback_url': saved.callback_url,
+                                                    'callback_status': saved.callback_status,
+                                                    'timeout_seconds': saved.timeout_seconds,
+                                                    'max_supersteps': saved.max_supersteps,
+                                                    'executed_by': saved.executed_by
+                                                })
                                             return Execution(**execution_data)
                                 except Exception as e:
                                     logger.warning(f"Error reading workflow snapshot: {str(e)}")
@@ -340,7 +550,12 @@ class ExecutionService:
     def stop_execution(self, execution_id: str, error: Optional[str] = None, cause: Optional[str] = None) -> Execution:
         """실행을 중지합니다."""
         try:
-            # 1. 활성 실행에서 찾기
+            # 1. 실행 중인 그래프에 중지 요청 (superstep 사이와 LLM/도구 호출 중에 확인됨)
+            token = self.cancel_tokens.get(execution_id)
+            if token is not None:
+                token.cancel(error or "Execution stopped by user")
+            
+            # 2. 활성 실행에서 찾기 (큐 대기 중인 실행은 워커가 건너뛴다)
             if execution_id in self.active_executions:
                 execution = self.active_executions[execution_id]
                 execution.status = ExecutionStatus.ABORTED
@@ -348,10 +563,10 @@ class ExecutionService:
                 execution.error_message = error or "Execution stopped by user"
                 execution.duration_ms = int((execution.end_time - execution.start_time).total_seconds() * 1000)
                 
-                # 2. 활성 실행 목록에서 제거
+                # 3. 활성 실행 목록에서 제거
                 self.active_executions.pop(execution_id)
                 
-                # 3. 파일 업데이트
+                # 4. 파일 업데이트
                 self._save_execution(execution)
                 
                 logger.info(f"Stopped execution: {execution_id}")
@@ -505,12 +720,28 @@ class ExecutionService:
                 os.makedirs(workflow_dir)
             
             file_path = os.path.join(workflow_dir, f"{execution.id}.json")
-            with open(file_path, 'w') as f:
+            with phase("execution_save"), open(file_path, 'w') as f:
                 json.dump(execution.dict(), f, default=str, indent=2)
                 
         except Exception as e:
             logger.error(f"Error saving execution: {str(e)}")
             raise
+    
+    def _load_execution(self, workflow_id: Optional[str], execution_id: str) -> Optional[Execution]:
+        """파일에서 실행 정보를 읽어옵니다."""
+        if not workflow_id:
+            return None
+        file_path = os.path.join(self.executions_dir, workflow_id, f"{execution_id}.json")
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r') as f:
+            return Execution(**json.load(f))
+    
+    def _delete_execution_file(self, execution: Execution):
+        """실행 정보 파일을 삭제합니다."""
+        file_path = os.path.join(self.executions_dir, execution.workflow_id, f"{execution.id}.json")
+        if os.path.exists(file_path):
+            os.remove(file_path)
 
 # 전역 인스턴스
 execution_service = ExecutionService() 
\ No newline at end of file
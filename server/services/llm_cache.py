@@ -0,0 +1,441 @@
+"""
+Exact-match response cache for agent node LLM calls.
+
+프로바이더, 모델, 샘플링 파라미터, 자격 증명 지문, 렌더링된 메시지, 도구 스키마로 키를 만들어
+같은 요청이면 LLM을 다시 호출하지 않고 저장된 응답을 반환합니다.
+메모리 LRU(1차)와 SQLite(2차, 최대 행 수와 주기적 만료 삭제로 크기 제한) 두 단계로 저장하며, 키에는 sha256 해시만 사용합니다.
+자격 증명(API 키, 엔드포인트)이 다른 배포끼리는 응답을 공유하지 않습니다.
+
+활성화: 노드 설정의 cache({"enabled": true, "ttlSeconds": 3600, "force": false, "semantic": false}) 또는
+LANGSTAR_LLM_CACHE=on. temperature > 0 인 호출은 force가 아니면 캐시하지 않습니다.
+"""
+
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LANGSTAR_LLM_CACHE", "off").lower() in ("1", "true", "on")
+# 작업 디렉터리와 관계없이 server/executions 아래에 저장
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_CACHE_DB_PATH = os.getenv("LANGSTAR_LLM_CACHE_DB", os.path.join(SERVER_DIR, "executions", "llm_cache.db"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LANGSTAR_LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LANGSTAR_LLM_CACHE_MAX_DISK_ENTRIES", "100000"))
+LLM_CACHE_PURGE_SECONDS = float(os.getenv("LANGSTAR_LLM_CACHE_PURGE_SECONDS", "300"))
+LLM_CACHE_DEFAULT_TTL = float(os.getenv("LANGSTAR_LLM_CACHE_TTL_SECONDS", "86400"))
+PROMPT_CACHE_ENABLED = os.getenv("LANGSTAR_PROMPT_CACHE", "off").lower() in ("1", "true", "on")
+
+# 키에 포함하는 모델 속성 (API 키 등 비밀 값은 제외)
+MODEL_PARAM_FIELDS = (
+    "model", "model_name", "model_id", "temperature", "max_tokens", "max_completion_tokens",
+    "max_output_tokens", "top_p", "top_k", "stop", "region_name",
+)
+SECRET_MARKERS = ("key", "secret", "token", "credential", "password")
+# 자격 증명 지문에 함께 넣는 엔드포인트 속성 (같은 키라도 다른 서버면 다른 응답)
+ENDPOINT_MARKERS = ("api_base", "base_url", "api_url", "endpoint")
+
+llm_registry = CollectorRegistry()
+
+llm_cache_requests_total = Counter(
+    'langstar_llm_cache_requests_total',
+    'LLM response cache lookups',
+    ['result', 'tier'],
+    registry=llm_registry
+)
+
+_cache_options: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "langstar_llm_cache_options", default=None
+)
+
+
+@contextmanager
+def use_cache_options(options: Any) -> Iterator[None]:
+    """Bind node cache options to the current context (에디터 실행용)."""
+    reset = _cache_options.set(options)
+    try:
+        yield
+    finally:
+        _cache_options.reset(reset)
+
+
+def resolve_options(options: Any = None) -> Dict[str, Any]:
+    """
+    Normalise node cache options.
+
+    Args:
+        options: None, a bool, or a dict with enabled / ttlSeconds / force / semantic / promptCache
+
+    Returns:
+        {"enabled", "ttl", "force", "semantic", "threshold", "prompt_cache"}
+    """
+    if options is None:
+        options = _cache_options.get()
+    if isinstance(options, bool):
+        options = {"enabled": options}
+    options = options or {}
+    return {
+        "enabled": bool(options.get("enabled", LLM_CACHE_ENABLED)),
+        "ttl": float(options.get("ttlSeconds", options.get("ttl", LLM_CACHE_DEFAULT_TTL))),
+        "force": bool(options.get("force", False)),
+        "semantic": bool(options.get("semantic", False)),
+        "threshold": options.get("similarityThreshold", options.get("threshold")),
+        # 프로바이더 프롬프트 캐시 (Anthropic/Bedrock 캐시 표시, 응답 캐시와 별개)
+        "prompt_cache": bool(options.get("promptCache", PROMPT_CACHE_ENABLED)),
+    }
+
+
+# ----------------------------------------------------------------------
+# Key construction
+# ----------------------------------------------------------------------
+
+def _collect(runnable: Any, found: Dict[str, Any]) -> None:
+    """체인/에이전트를 따라가며 prompt, llm, 도구 스키마를 찾는다"""
+    if runnable is None:
+        return
+    if hasattr(runnable, "agent") and hasattr(runnable, "tools"):
+        # AgentExecutor
+        found["tools"].extend(
+            {"name": tool.name, "description": tool.description, "args": getattr(tool, "args", {})}
+            for tool in runnable.tools
+        )
+        _collect(getattr(runnable.agent, "runnable", None), found)
+        return
+    steps = getattr(runnable, "steps", None)
+    if steps:
+        for step in steps:
+            _collect(step, found)
+        return
+    bound = getattr(runnable, "bound", None)
+    if bound is not None:
+        kwargs = getattr(runnable, "kwargs", {}) or {}
+        if "tools" in kwargs:
+            found["bound_tools"] = kwargs["tools"]
+        _collect(bound, found)
+        return
+    if hasattr(runnable, "format_prompt") and hasattr(runnable, "input_variables"):
+        found["prompt"] = runnable
+    elif hasattr(runnable, "_llm_type"):
+        found["llm"] = runnable
+
+
+def _model_params(llm: Any) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    try:
+        params.update(llm._identifying_params)
+    except Exception:
+        pass
+    for field in MODEL_PARAM_FIELDS:
+        value = getattr(llm, field, None)
+        if value is not None:
+            params[field] = value
+    return {
+        name: value for name, value in params.items()
+        if not any(marker in name.lower() for marker in SECRET_MARKERS) or name.startswith("max_")
+    }
+
+
+def credential_fingerprint(llm: Any) -> str:
+    """
+    sha256 of the model's credentials and endpoint (원문은 키에도 로그에도 남기지 않음).
+
+    같은 프롬프트라도 다른 계정/배포의 자격 증명으로 호출한 응답은 서로 다른 캐시 항목이 됩니다.
+    """
+    values = {}
+    for name in getattr(type(llm), "model_fields", {}):
+        lowered = name.lower()
+        if lowered.startswith("max_") or not any(marker in lowered for marker in SECRET_MARKERS + ENDPOINT_MARKERS):
+            continue
+        value = getattr(llm, name, None)
+        if hasattr(value, "get_secret_value"):
+            value = value.get_secret_value()
+        if isinstance(value, str) and value:
+            values[name] = value
+    encoded = json.dumps(values, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def describe_runnable(runnable: Any) -> Dict[str, Any]:
+    """
+    Find the prompt, chat model, model params and tool schema of a chain or AgentExecutor.
+
+    Returns:
+        {"llm", "params", "prompt", "tools", "bound_tools"} (llm is None if no model was found)
+    """
+    found: Dict[str, Any] = {"tools": [], "prompt": None, "llm": None}
+    _collect(runnable, found)
+    found["params"] = _model_params(found["llm"]) if found["llm"] is not None else {}
+    return found
+
+
+def _render_messages(prompt: Any, inputs: Dict[str, Any]) -> Any:
+    from langchain_core.messages import messages_to_dict
+
+    variables = {name: [] for name in prompt.input_variables}
+    variables.update(inputs)
+    return messages_to_dict(prompt.invoke(variables).to_messages())
+
+
+def build_cache_key(runnable: Any, inputs: Dict[str, Any], force: bool = False, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+    """
+    Build the cache key for a chain or AgentExecutor call.
+
+    Args:
+        exclude: Input names left out of the key (시맨틱 캐시는 user_prompt를 제외한 나머지로 구획을 나눈다)
+
+    Returns:
+        sha256 hex key, or None if the call must not be cached
+        (no model found, or temperature > 0 without force)
+    """
+    found = describe_runnable(runnable)
+    llm = found["llm"]
+    if llm is None:
+        return None
+
+    params = found["params"]
+    temperature = params.get("temperature")
+    if not force and (temperature is None or float(temperature) > 0):
+        return None
+
+    render_inputs = {name: (f"{{{name}}}" if name in exclude else value) for name, value in inputs.items()}
+    memory = getattr(runnable, "memory", None)
+    if memory is not None:
+        render_inputs.update(memory.load_memory_variables({}))
+
+    if found["prompt"] is not None:
+        messages = _render_messages(found["prompt"], render_inputs)
+    else:
+        messages = render_inputs
+
+    material = {
+        "provider": llm._llm_type,
+        "params": params,
+        "credentials": credential_fingerprint(llm),
+        "messages": messages,
+        "tools": found["tools"],
+        "bound_tools": found.get("bound_tools"),
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Storage
+# ----------------------------------------------------------------------
+
+def _serialize(value: Any) -> str:
+    from langchain_core.load import dumps
+    return dumps(value)
+
+
+def _deserialize(text: str) -> Any:
+    from langchain_core.load import loads
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return loads(text)
+
+
+class LLMCache:
+    """
+    Two-tier (memory LRU + SQLite) cache of LLM responses.
+
+    메모리 계층과 디스크 계층은 잠금을 따로 써서 메모리 적중이 디스크 쓰기(commit)를 기다리지 않습니다.
+    디스크 계층은 max_disk_entries를 넘으면 가장 오래 저장된 행부터 지우고,
+    만료된 행은 purge_seconds마다 한 번에 지웁니다.
+
+    Args:
+        db_path: SQLite file for the disk tier (None to disable it)
+        max_entries: Maximum entries kept in the memory tier
+        max_disk_entries: Maximum rows kept in the disk tier
+        purge_seconds: Interval between deletions of expired disk rows
+    """
+
+    def __init__(self, db_path: Optional[str] = LLM_CACHE_DB_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES, purge_seconds: float = LLM_CACHE_PURGE_SECONDS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.purge_seconds = purge_seconds
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_rows = 0
+        self._next_purge = 0.0
+        self._counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expired": 0, "disk_evictions": 0,
+        }
+
+    def _count(self, event: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[event] += amount
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier (call with ``_db_lock`` held)."""
+        if self.db_path is None:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 모드에서는 commit마다 fsync하지 않아도 손상되지 않음 (정전 시 마지막 몇 건만 유실)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+            self._conn.commit()
+            self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return self._conn
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a key in memory, then on disk. Returns (hit, value)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    llm_cache_requests_total.labels(result="hit", tier="memory").inc()
+                    return True, copy.deepcopy(entry[1])
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+        row = None
+        with self._db_lock:
+            conn = self._db()
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] <= now:
+                    self._disk_rows -= conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,)).rowcount
+                    conn.commit()
+                    self._count("expired")
+                    row = None
+
+        if row is None:
+            self._count("misses")
+            llm_cache_requests_total.labels(result="miss", tier="none").inc()
+            return False, None
+
+        value = _deserialize(row[0])
+        with self._lock:
+            self._remember(key, row[1], value)
+            self._counters["disk_hits"] += 1
+        llm_cache_requests_total.labels(result="hit", tier="disk").inc()
+        return True, copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float = LLM_CACHE_DEFAULT_TTL) -> None:
+        """Store a response in both tiers."""
+        now = time.time()
+        expires_at = now + ttl
+        try:
+            text = _serialize(value)
+        except Exception as e:
+            logger.warning(f"LLM response is not cacheable: {str(e)}")
+            return
+        with self._lock:
+            self._remember(key, expires_at, copy.deepcopy(value))
+            self._counters["stores"] += 1
+
+        with self._db_lock:
+            conn = self._db()
+            if conn is None:
+                return
+            exists = conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone() is not None
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, text, now, expires_at)
+            )
+            if not exists:
+                self._disk_rows += 1
+            self._prune(conn, now)
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete expired rows periodically and the oldest rows above max_disk_entries (``_db_lock`` held)."""
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_seconds
+            expired = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+            if expired:
+                self._disk_rows -= expired
+                self._count("expired", expired)
+        excess = self._disk_rows - self.max_disk_entries
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY created_at LIMIT ?)", (excess,)
+            ).rowcount
+            self._disk_rows -= evicted
+            self._count("disk_evictions", evicted)
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def record_bypass(self) -> None:
+        self._count("bypassed")
+        llm_cache_requests_total.labels(result="bypass", tier="none").inc()
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+                self._disk_rows = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+        with self._db_lock:
+            disk_entries = self._disk_rows if self._conn is not None else None
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries,
+            "max_disk_entries": self.max_disk_entries,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def replay_memory(runnable: Any, inputs: Dict[str, Any], value: Any) -> None:
+    """캐시 적중 시에도 AgentExecutor에 연결된 대화 메모리에 이번 턴을 기록"""
+    memory = getattr(runnable, "memory", None)
+    if memory is not None and isinstance(value, dict) and "output" in value:
+        memory.save_context(inputs, {"output": value["output"]})
+
+
+# Global LLM response cache
+llm_cache = LLMCache()
@@ -0,0 +1,399 @@
+"""
+Record and replay of agent-node LLM and tool interactions.
+
+녹화 모드에서는 게이트웨이(invoke_llm)를 지나는 모든 모델 호출과 에이전트 도구 호출의 요청/응답/지연 시간을
+카세트 파일(JSONL, 한 줄에 상호작용 하나)에 추가하고, 재생 모드에서는 프로바이더와 도구를 호출하지 않고
+녹화된 응답을 돌려줍니다. run_* 함수와 생성 코드 모두 게이트웨이를 지나므로 둘 다 적용됩니다.
+
+- 모델 호출은 LangChain 채팅 모델의 캐시 확장 지점(BaseCache)으로 가로챕니다. 키는 렌더링된 메시지와
+  모델 설정(파라미터, 바인딩된 도구 스키마)의 해시이며, API 키 같은 비밀 값은 들어가지 않습니다.
+  캐시 경로를 타도록 카세트가 켜진 호출은 스트리밍을 끕니다.
+- 같은 키가 여러 번 녹화되면 녹화 순서대로 돌려주고, 끝나면 처음부터 반복합니다.
+- 재생 시 응답마다 녹화된 지연 시간 x latency_scale 만큼 기다립니다 (0이면 즉시 응답).
+- 재생 중 녹화되지 않은 요청은 CassetteMissError로 실패합니다 (오프라인 실행이 프로바이더를 호출하지 않도록).
+- 녹화 중에는 응답/시맨틱 캐시를 건너뛰어 모든 호출이 카세트에 남습니다.
+
+활성화: use_cassette(Cassette(path, "replay")) 또는
+LANGSTAR_LLM_CASSETTE=record|replay, LANGSTAR_LLM_CASSETTE_PATH, LANGSTAR_LLM_REPLAY_LATENCY_SCALE
+(배포 워커 프로세스는 환경 변수를 그대로 물려받음)
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.tools import BaseTool, StructuredTool
+
+from server.services.llm_cache import describe_runnable
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("record", "replay")
+CASSETTE_VERSION = 1
+
+LLM_CASSETTE_MODE = os.getenv("LANGSTAR_LLM_CASSETTE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LANGSTAR_LLM_CASSETTE_PATH", os.path.join("executions", "cassettes", "default.jsonl"))
+LLM_REPLAY_LATENCY_SCALE = float(os.getenv("LANGSTAR_LLM_REPLAY_LATENCY_SCALE", "1.0"))
+
+# 키에서 제외하는 메시지 필드 (녹화 때마다 달라지는 ID와 응답 메타데이터)
+VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+# 키에서 제외하는 모델 설정 (엔드포인트, 전송 설정 - 다른 환경에서 재생해도 같은 키가 되도록)
+TRANSPORT_FIELDS = (
+    "openai_api_base", "base_url", "openai_proxy", "anthropic_api_url", "endpoint_url", "azure_endpoint",
+    "max_retries", "request_timeout", "timeout", "default_headers", "http_client",
+)
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            name: _strip_volatile(item) for name, item in value.items()
+            if name not in VOLATILE_MESSAGE_FIELDS
+        }
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def _messages(prompt: str) -> Any:
+    try:
+        return _strip_volatile(json.loads(prompt))
+    except ValueError:
+        return prompt
+
+
+def _model_settings(llm_string: str) -> str:
+    """llm_string("<직렬화된 모델>---<호출 파라미터>")에서 엔드포인트와 비밀 값 참조를 뺀다"""
+    serialized, separator, params = llm_string.partition("---")
+    try:
+        model = json.loads(serialized)
+    except ValueError:
+        return llm_string
+    if isinstance(model, dict) and isinstance(model.get("kwargs"), dict):
+        model["kwargs"] = {
+            name: value for name, value in model["kwargs"].items()
+            if name not in TRANSPORT_FIELDS and not (isinstance(value, dict) and value.get("type") == "secret")
+        }
+    return json.dumps(model, sort_keys=True) + separator + params
+
+
+def llm_key(prompt: str, llm_string: str) -> str:
+    """Cassette key of a chat model call (prompt: serialized messages, llm_string: model settings)."""
+    return _hash("llm", _model_settings(llm_string), json.dumps(_messages(prompt), sort_keys=True, ensure_ascii=False))
+
+
+def tool_key(name: str, arguments: Dict[str, Any]) -> str:
+    """Cassette key of a tool call."""
+    return _hash("tool", name, json.dumps(arguments, sort_keys=True, default=str, ensure_ascii=False))
+
+
+def _dump(value: Any) -> Any:
+    from langchain_core.load import dumpd
+    return dumpd(value)
+
+
+def _load(value: Any) -> Any:
+    from langchain_core.load import load
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return load(value)
+
+
+class Cassette:
+    """
+    One cassette file of recorded interactions.
+
+    Args:
+        path: JSONL file (녹화 시 없으면 생성, 있으면 이어서 추가)
+        mode: "record" or "replay"
+        latency_scale: Replay delay as a multiple of the recorded latency (0: no delay)
+
+    Raises:
+        ValueError: If the mode is unknown
+        FileNotFoundError: If a replay cassette does not exist
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = LLM_REPLAY_LATENCY_SCALE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(CASSETTE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = max(0.0, float(latency_scale))
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._pending: Dict[str, Deque[float]] = defaultdict(deque)
+        self._counters = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == "replay":
+            self._read()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _read(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction)
+        logger.info(f"Loaded cassette {self.path}: {sum(len(v) for v in self._interactions.values())} interactions")
+
+    def _append(self, interaction: Dict[str, Any]) -> None:
+        line = json.dumps(interaction, ensure_ascii=False, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._interactions[interaction["key"]].append(interaction)
+            self._counters["recorded"] += 1
+
+    def _next(self, key: str, kind: str) -> Dict[str, Any]:
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                self._counters["misses"] += 1
+                raise CassetteMissError(f"No recorded {kind} interaction for key {key[:16]} in {self.path}")
+            interaction = recorded[self._cursors[key] % len(recorded)]
+            self._cursors[key] += 1
+            self._counters["replayed"] += 1
+        return interaction
+
+    def _delay(self, interaction: Dict[str, Any]) -> float:
+        return interaction.get("latency_ms", 0.0) * self.latency_scale / 1000
+
+    # ------------------------------------------------------------------
+    # Chat model calls (BaseCache에서 호출)
+    # ------------------------------------------------------------------
+
+    def replay_llm(self, prompt: str, llm_string: str) -> Tuple[float, Any]:
+        """Recorded generations and the delay to wait before returning them."""
+        interaction = self._next(llm_key(prompt, llm_string), "llm")
+        return self._delay(interaction), [_load(generation) for generation in interaction["response"]]
+
+    def start_llm(self, prompt: str, llm_string: str) -> None:
+        """Note the start of a provider call (녹화 시 지연 시간 측정용)."""
+        with self._lock:
+            self._pending[llm_key(prompt, llm_string)].append(time.perf_counter())
+
+    def record_llm(self, prompt: str, llm_string: str, generations: Any) -> None:
+        key = llm_key(prompt, llm_string)
+        with self._lock:
+            pending = self._pending.get(key)
+            started = pending.popleft() if pending else None
+        latency = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        self._append({
+            "version": CASSETTE_VERSION,
+            "type": "llm",
+            "key": key,
+            "request": {"messages": _messages(prompt)},
+            "response": [_dump(generation) for generation in generations],
+            "latency_ms": round(latency, 3),
+            "recorded_at": time.time(),
+        })
+
+    # ------------------------------------------------------------------
+    # Tool calls
+    # ------------------------------------------------------------------
+
+    def replay_tool(self, name: str, arguments: Dict[str, Any]) -> Tuple[float, Any]:
+        interaction = self._next(tool_key(name, arguments), "tool")
+        return self._delay(interaction), interaction["output"]
+
+    def record_tool(self, name: str, arguments: Dict[str, Any], output: Any, latency: float) -> None:
+        self._append({
+            "version": CASSETTE_VERSION,
+            "type": "tool",
+            "key": tool_key(name, arguments),
+            "request": {"tool": name, "arguments": arguments},
+            "output": output,
+            "latency_ms": round(latency * 1000, 3),
+            "recorded_at": time.time(),
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "mode": self.mode,
+                "latency_scale": self.latency_scale,
+                "interactions": sum(len(recorded) for recorded in self._interactions.values()),
+                **self._counters,
+            }
+
+
+# 바인딩하지 않은 상태와 use_cassette(None)으로 끈 상태를 구분한다
+_UNBOUND: Any = object()
+
+_current_cassette: contextvars.ContextVar[Any] = contextvars.ContextVar("langstar_llm_cassette", default=_UNBOUND)
+_default_cassette: Optional[Cassette] = None
+_default_lock = threading.Lock()
+
+
+@contextmanager
+def use_cassette(cassette: Optional[Cassette]) -> Iterator[Optional[Cassette]]:
+    """Bind a cassette to the current context (None이면 환경 변수 설정도 끈다)."""
+    reset = _current_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _current_cassette.reset(reset)
+
+
+def _env_cassette() -> Optional[Cassette]:
+    global _default_cassette
+    if LLM_CASSETTE_MODE not in CASSETTE_MODES:
+        return None
+    with _default_lock:
+        if _default_cassette is None:
+            _default_cassette = Cassette(LLM_CASSETTE_PATH, LLM_CASSETTE_MODE, LLM_REPLAY_LATENCY_SCALE)
+        return _default_cassette
+
+
+def current_cassette() -> Optional[Cassette]:
+    """Cassette bound to this context, else the one configured by environment variables."""
+    cassette = _current_cassette.get()
+    if cassette is not _UNBOUND:
+        return cassette
+    return _env_cassette()
+
+
+def is_recording() -> bool:
+    cassette = current_cassette()
+    return cassette is not None and cassette.recording
+
+
+# ----------------------------------------------------------------------
+# LangChain hooks
+# ----------------------------------------------------------------------
+
+class CassetteModelCache(BaseCache):
+    """Chat model cache that records to / replays from the current cassette."""
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Any]:
+        cassette = current_cassette()
+        if cassette is None:
+            return None
+        if cassette.recording:
+            cassette.start_llm(prompt, llm_string)
+            return None
+        delay, generations = cassette.replay_llm(prompt, llm_string)
+        if delay > 0:
+            time.sleep(delay)
+        return generations
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Any]:
+        cassette = current_cassette()
+        if cassette is None:
+            return None
+        if cassette.recording:
+            cassette.start_llm(prompt, llm_string)
+            return None
+        delay, generations = cassette.replay_llm(prompt, llm_string)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Any) -> None:
+        cassette = current_cassette()
+        if cassette is not None and cassette.recording:
+            cassette.record_llm(prompt, llm_string, return_val)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Any) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+
+def _cassette_tool(tool: BaseTool) -> BaseTool:
+    """도구 호출을 녹화하거나 녹화된 결과로 대신하는 도구로 감싼다"""
+    name = tool.name
+
+    def call(**arguments):
+        cassette = current_cassette()
+        if cassette is None:
+            return tool.invoke(arguments)
+        if not cassette.recording:
+            delay, output = cassette.replay_tool(name, arguments)
+            if delay > 0:
+                time.sleep(delay)
+            return output
+        started = time.perf_counter()
+        output = tool.invoke(arguments)
+        cassette.record_tool(name, arguments, output, time.perf_counter() - started)
+        return output
+
+    async def acall(**arguments):
+        cassette = current_cassette()
+        if cassette is None:
+            return await tool.ainvoke(arguments)
+        if not cassette.recording:
+            delay, output = cassette.replay_tool(name, arguments)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return output
+        started = time.perf_counter()
+        output = await tool.ainvoke(arguments)
+        cassette.record_tool(name, arguments, output, time.perf_counter() - started)
+        return output
+
+    return StructuredTool.from_function(
+        func=call,
+        coroutine=acall,
+        name=name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        return_direct=tool.return_direct,
+    )
+
+
+def apply_cassette(runnable: Any) -> Any:
+    """
+    Route a chain's or AgentExecutor's model and tool calls through the current cassette.
+
+    에이전트 노드는 호출마다 모델을 새로 만들므로 모델 인스턴스에 캐시를 직접 붙이고,
+    AgentExecutor는 도구를 감싼 복사본을 반환합니다.
+
+    Returns:
+        The runnable to invoke (카세트가 없으면 그대로)
+    """
+    if current_cassette() is None:
+        return runnable
+    llm = describe_runnable(runnable)["llm"]
+    if llm is not None and hasattr(llm, "disable_streaming"):
+        llm.cache = cassette_model_cache
+        llm.disable_streaming = True
+    tools = getattr(runnable, "tools", None)
+    if hasattr(runnable, "agent") and tools:
+        wrapped = [_cassette_tool(tool) if tool.args_schema is not None else tool for tool in tools]
+        runnable = runnable.model_copy(update={"tools": wrapped})
+    return runnable
+
+
+# Global chat model cache hook
+cassette_model_cache = CassetteModelCache()
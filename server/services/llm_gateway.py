@@ -0,0 +1,166 @@
+"""
+LLM Gateway for agent nodes.
+
+에이전트 노드(생성 코드와 에디터 실행 모두)의 LLM/에이전트 호출이 지나가는 단일 진입점입니다.
+실행 중인 워크플로우에 CancelToken이 있으면 비동기(ainvoke)로 호출해 중지 요청이나
+제한 시간 초과 시 진행 중인 HTTP 요청과 도구 호출을 즉시 취소합니다.
+도구가 있는 AgentExecutor도 비동기 경로로 실행해 한 턴의 여러 도구 호출을 동시에 처리하며,
+노드 캐시 설정이 켜져 있으면 정확히 같은 요청은 응답 캐시에서, 비슷한 질문은 시맨틱 캐시에서 바로 반환합니다.
+실제 프로바이더 호출은 노드의 복원력 정책(시도별 제한 시간, 재시도, 헤징, 서킷 브레이커)을 적용하고
+(도구가 있는 에이전트는 도구가 다시 실행되지 않도록 실패한 모델 요청만 재시도),
+각 시도(도구가 있는 에이전트는 각 모델 요청)는 LLM 스케줄러를 거쳐 API 키/모델별 속도 제한과 동시 실행 수를 지킵니다.
+promptCache가 켜진 Anthropic/Bedrock 호출에는 프롬프트 캐시 표시를 붙이고, 응답의 토큰 사용량(캐시 읽기/쓰기 포함)은
+노드 단위로 모아 실행 로그에 기록합니다.
+노드에 대체 모델이 설정되어 있으면 LLM 라우터가 지연/오류 통계에 따라 모델을 고르고 프로바이더 오류 시 다음 모델로 넘깁니다
+(도구가 이미 실행된 에이전트는 넘기지 않음).
+트레이스 내보내기가 켜져 있으면 호출마다 게이트웨이 스팬(캐시 결과)과 그 아래 모델/도구 호출 스팬을 남깁니다.
+LLM 카세트가 켜져 있으면 모델/도구 호출을 카세트 파일에 녹화하거나 녹화된 응답으로 재생합니다 (녹화 중에는 응답 캐시를 건너뜀).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from server.services.llm_cache import llm_cache, build_cache_key, replay_memory, resolve_options
+from server.services.llm_cassette import apply_cassette, is_recording
+from server.services.llm_resilience import llm_resilience, runs_tools
+from server.services.llm_router import llm_router, resolve_routing
+from server.services.llm_scheduler import llm_scheduler
+from server.services.llm_usage import UsageCollector, record_node_usage, with_collector
+from server.services.prompt_cache import apply_prompt_cache
+from server.services.semantic_cache import semantic_cache
+from server.services.tool_runtime import runs_tools_in_parallel
+from server.utils.execution_context import (
+    CancelToken, ExecutionCancelled, ExecutionTimedOut, current_token
+)
+from server.utils.tracing import Span, TraceCallbackHandler, start_span, tracing_enabled
+
+logger = logging.getLogger(__name__)
+
+# 시맨틱 캐시에서 임베딩하는 입력 (에이전트 노드 템플릿의 사용자 프롬프트)
+SEMANTIC_TEXT_KEY = "user_prompt"
+
+
+def _has_running_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+async def _ainvoke_cancellable(runnable: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]], token: CancelToken) -> Any:
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(runnable.ainvoke(inputs, config))
+    remove = token.add_callback(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        return await asyncio.wait_for(task, timeout=token.remaining())
+    except asyncio.CancelledError:
+        token.check()
+        raise ExecutionCancelled(token.reason or "Execution cancelled")
+    except asyncio.TimeoutError:
+        raise ExecutionTimedOut("Execution deadline exceeded during LLM call")
+    finally:
+        remove()
+
+
+def _invoke(runnable: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]]) -> Any:
+    token = current_token()
+    if _has_running_loop():
+        return runnable.invoke(inputs, config)
+    if token is not None:
+        token.check()
+        return asyncio.run(_ainvoke_cancellable(runnable, inputs, config, token))
+    if runs_tools_in_parallel(runnable):
+        # AgentExecutor의 비동기 경로는 한 턴의 여러 도구 호출을 동시에 실행한다
+        return asyncio.run(runnable.ainvoke(inputs, config))
+    return runnable.invoke(inputs, config)
+
+
+def _call_provider(runnable: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]], resilience: Any,
+                   prompt_cache: bool = False) -> Any:
+    if prompt_cache:
+        runnable = apply_prompt_cache(runnable)
+    runnable = apply_cassette(runnable)
+    collector = UsageCollector()
+    config = with_collector(config, collector)
+    if tracing_enabled():
+        config = with_collector(config, TraceCallbackHandler())
+    if runs_tools(runnable):
+        # 도구가 있는 에이전트는 모델 요청마다 스케줄러를 거치고 실패한 모델 요청만 재시도한다
+        # (실행 전체를 다시 돌리면 도구도 다시 실행되고, 실행 전체로 슬롯을 잡으면 턴 수가 한도에 반영되지 않음)
+        runnable = llm_resilience.retry_model_calls(runnable, resilience, llm_scheduler)
+        call = lambda: _invoke(runnable, inputs, config)
+    else:
+        call = lambda: llm_scheduler.run(runnable, inputs, lambda: _invoke(runnable, inputs, config))
+    try:
+        return llm_resilience.call(runnable, call, resilience)
+    finally:
+        record_node_usage(collector.summary())
+
+
+def invoke_llm(runnable: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None, cache: Any = None,
+               resilience: Any = None, routing: Any = None) -> Any:
+    """
+    Invoke an LLM chain or AgentExecutor, honouring the current execution's cancel token.
+
+    Args:
+        runnable: LangChain runnable (``prompt | llm`` chain or AgentExecutor)
+        inputs: Runnable input
+        config: Optional runnable config
+        cache: Node cache options ({"enabled", "ttlSeconds", "force", "semantic", "similarityThreshold", "promptCache"});
+            defaults to the bound options
+        resilience: Node resilience options ({"timeoutSeconds", "maxRetries", "hedge", "hedgeAfterMs",
+            "circuitBreaker"}); defaults to the bound options
+        routing: Node fallback routing options ({"fallbacks", "strategy", "splitPercent"}); defaults to the bound options
+
+    Returns:
+        The runnable output
+    """
+    with start_span("llm_gateway") as span:
+        return _invoke_llm(runnable, inputs, config, cache, resilience, routing, span)
+
+
+def _invoke_llm(runnable: Any, inputs: Dict[str, Any], config: Optional[Dict[str, Any]], cache: Any, resilience: Any,
+                routing: Any, span: Span) -> Any:
+    options = resolve_options(cache)
+    key = partition = None
+    # 녹화 중에는 캐시 적중으로 빠지는 호출 없이 모두 카세트에 남긴다
+    if options["enabled"] and not is_recording():
+        try:
+            key = build_cache_key(runnable, inputs, force=options["force"])
+            if key is not None and options["semantic"] and isinstance(inputs.get(SEMANTIC_TEXT_KEY), str):
+                partition = build_cache_key(runnable, inputs, force=options["force"], exclude=(SEMANTIC_TEXT_KEY,))
+        except Exception as e:
+            logger.warning(f"Failed to build LLM cache key: {str(e)}")
+        if key is None:
+            llm_cache.record_bypass()
+            span.set_attribute("langstar.cache.result", "bypass")
+        else:
+            hit, value = llm_cache.get(key)
+            result = "exact" if hit else "miss"
+            if not hit and partition is not None:
+                # 정확히 같은 요청이 없으면 비슷한 질문의 답변을 찾는다
+                hit, value, _ = semantic_cache.lookup(partition, inputs[SEMANTIC_TEXT_KEY], options["threshold"])
+                result = "semantic" if hit else "miss"
+            span.set_attribute("langstar.cache.result", result)
+            if hit:
+                replay_memory(runnable, inputs, value)
+                return value
+
+    route = resolve_routing(routing)
+    span.set_attribute("langstar.llm.routed", route is not None)
+    if route is not None:
+        response = llm_router.invoke(
+            runnable, route,
+            lambda target, tracker: _call_provider(
+                target, inputs, with_collector(config, tracker), resilience, options["prompt_cache"]
+            ),
+        )
+    else:
+        response = _call_provider(runnable, inputs, config, resilience, options["prompt_cache"])
+    if key is not None:
+        llm_cache.set(key, response, options["ttl"])
+    if partition is not None:
+        semantic_cache.store(partition, inputs[SEMANTIC_TEXT_KEY], response, options["ttl"])
+    return response
@@ -0,0 +1,630 @@
+"""
+Resilience policies for agent-node LLM calls.
+
+invoke_llm이 프로바이더를 호출할 때 노드별 정책에 따라 다음을 적용합니다.
+- 시도별 제한 시간: 시도마다 하위 CancelToken을 만들어 제한 시간이 지나면 진행 중인 HTTP 요청을 취소
+- 재시도: 일시적 오류(타임아웃, 연결 오류, 5xx)만 decorrelated jitter 백오프로 재시도.
+  도구가 있는 에이전트는 실행 전체를 다시 돌리면 이미 실행한 도구가 다시 실행되므로,
+  실패한 모델 요청만 재시도 (retry_model_calls, 스케줄러 슬롯과 429 처리도 모델 요청 단위)
+- 헤징: 응답이 프로바이더/모델의 p95 지연(또는 지정한 시간)보다 늦으면 같은 요청을 한 번 더 보내고
+  먼저 도착한 응답을 사용 (나머지 요청은 취소). 도구가 있는 에이전트는 부작용 때문에 헤징하지 않음
+- 서킷 브레이커: 프로바이더/모델별로 연속 실패가 임계값을 넘으면 일정 시간 동안 바로 실패
+
+노드 설정 예: resilience({"timeoutSeconds": 30, "maxRetries": 2, "hedge": true, "hedgeAfterMs": 1500})
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables.base import RunnableBinding
+from prometheus_client import Counter
+
+from server.services.llm_cache import llm_registry
+from server.services.llm_scheduler import error_headers, is_rate_limit_error, model_identity, retry_after_seconds
+from server.utils.execution_context import (
+    CancelToken, ExecutionCancelled, ExecutionTimedOut, current_tenant, current_token, use_token
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LANGSTAR_LLM_TIMEOUT_SECONDS", "0"))  # 0 = 제한 없음
+DEFAULT_MAX_RETRIES = int(os.getenv("LANGSTAR_LLM_MAX_RETRIES", "0"))
+CIRCUIT_BREAKER_ENABLED = os.getenv("LANGSTAR_LLM_CIRCUIT_BREAKER", "on").lower() in ("1", "true", "on")
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LANGSTAR_LLM_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("LANGSTAR_LLM_CIRCUIT_RESET_SECONDS", "30"))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WORKERS = int(os.getenv("LANGSTAR_LLM_HEDGE_WORKERS", "32"))
+
+TRANSIENT_ERROR_NAMES = ("Timeout", "Connection", "ServiceUnavailable", "InternalServer", "Overloaded", "BadGateway")
+TRANSIENT_STATUS_CODES = (408, 409, 500, 502, 503, 504, 529)
+
+llm_resilience_events_total = Counter(
+    'langstar_llm_resilience_events_total',
+    'LLM call retries, hedges, timeouts and circuit breaker short-circuits',
+    ['event'],
+    registry=llm_registry
+)
+
+
+class LLMCallTimeout(TimeoutError):
+    """Raised when a single LLM call attempt exceeds the node timeout."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+@dataclass
+class ResiliencePolicy:
+    """Resilience settings for one agent node."""
+    timeout_seconds: Optional[float] = None
+    max_retries: int = 0
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 10.0
+    hedge: bool = False
+    hedge_after_seconds: Optional[float] = None  # None이면 관측된 p95 지연 사용
+    circuit_breaker: bool = CIRCUIT_BREAKER_ENABLED
+
+    @classmethod
+    def from_config(cls, config: Any) -> "ResiliencePolicy":
+        """Build a policy from node config ({"timeoutSeconds", "maxRetries", "hedge", "hedgeAfterMs", ...})."""
+        config = config if isinstance(config, dict) else {}
+        timeout = config.get("timeoutSeconds", DEFAULT_TIMEOUT_SECONDS)
+        hedge_after = config.get("hedgeAfterMs")
+        return cls(
+            timeout_seconds=float(timeout) if timeout else None,
+            max_retries=int(config.get("maxRetries", DEFAULT_MAX_RETRIES)),
+            retry_base_delay=float(config.get("retryBaseDelay", 0.5)),
+            retry_max_delay=float(config.get("retryMaxDelay", 10.0)),
+            hedge=bool(config.get("hedge", False)),
+            hedge_after_seconds=float(hedge_after) / 1000 if hedge_after is not None else None,
+            circuit_breaker=bool(config.get("circuitBreaker", CIRCUIT_BREAKER_ENABLED)),
+        )
+
+
+_resilience_options: contextvars.ContextVar[Any] = contextvars.ContextVar(
+    "langstar_llm_resilience_options", default=None
+)
+
+
+@contextmanager
+def use_resilience_options(options: Any) -> Iterator[None]:
+    """Bind node resilience options to the current context (에디터 실행용)."""
+    reset = _resilience_options.set(options)
+    try:
+        yield
+    finally:
+        _resilience_options.reset(reset)
+
+
+def resolve_policy(options: Any = None) -> ResiliencePolicy:
+    if isinstance(options, ResiliencePolicy):
+        return options
+    if options is None:
+        options = _resilience_options.get()
+    return ResiliencePolicy.from_config(options)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """재시도하면 성공할 수 있는 오류인지 판별 (429는 LLM 스케줄러가 처리)"""
+    if isinstance(error, LLMCallTimeout):
+        return True
+    if isinstance(error, (CircuitOpenError, ExecutionCancelled, ExecutionTimedOut)) or is_rate_limit_error(error):
+        return False
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    return any(name in type(error).__name__ for name in TRANSIENT_ERROR_NAMES)
+
+
+def runs_tools(runnable: Any) -> bool:
+    """도구가 있는 AgentExecutor인지 (다시 실행하면 도구 부작용이 반복되므로 헤징/전체 재시도 금지)"""
+    return hasattr(runnable, "agent") and bool(getattr(runnable, "tools", None))
+
+
+class ModelCallRetry(RunnableBinding):
+    """
+    Chat-model step that retries only its own provider request.
+
+    retry_delay(error, attempt, previous_delay)가 대기 시간을 돌려주면 다시 요청하고, None이면 오류를 전달합니다.
+    limiter가 있으면 요청마다 슬롯과 요청/토큰 한도를 잡고 응답을 받으면 바로 반환합니다 (도구 실행 중에는 잡지 않음).
+    스트리밍은 첫 청크를 받기 전에 실패한 경우만 재시도합니다.
+    """
+    retry_delay: Callable[[BaseException, int, float], Optional[float]]
+    sleep: Callable[[float], None] = time.sleep
+    limiter: Optional[Any] = None
+    estimate_tokens: Optional[Callable[[Any], float]] = None
+
+    def _admit(self, input: Any) -> float:
+        """Take a limiter slot for one model request. Returns the token estimate to settle on release."""
+        if self.limiter is None:
+            return 0.0
+        estimated = self.estimate_tokens(input) if self.estimate_tokens and self.limiter.tokens is not None else 0.0
+        self.limiter.acquire(current_tenant() or "default", estimated, current_token())
+        return estimated
+
+    async def _aadmit(self, input: Any) -> float:
+        if self.limiter is None:
+            return 0.0
+        admitted = asyncio.ensure_future(asyncio.to_thread(self._admit, input))
+        try:
+            return await asyncio.shield(admitted)
+        except asyncio.CancelledError:
+            # 취소된 뒤에 슬롯을 얻으면 바로 반환한다
+            admitted.add_done_callback(
+                lambda future: future.cancelled() or future.exception() is not None or self.limiter.release(False)
+            )
+            raise
+
+    def _release(self, estimated: float, ok: bool, response: Any = None) -> None:
+        if self.limiter is None:
+            return
+        if ok:
+            self.limiter.release_response(response, estimated)
+        else:
+            self.limiter.release(False)
+
+    def _call(self, input: Any, config: Any, kwargs: Dict[str, Any]) -> Any:
+        estimated = self._admit(input)
+        try:
+            response = self.bound.invoke(input, self._merge_configs(config), **{**self.kwargs, **kwargs})
+        except BaseException:
+            self._release(estimated, False)
+            raise
+        self._release(estimated, True, response)
+        return response
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        attempt, delay = 0, 0.0
+        while True:
+            try:
+                return self._call(input, config, kwargs)
+            except Exception as e:
+                delay = self.retry_delay(e, attempt, delay)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                attempt += 1
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        attempt, delay = 0, 0.0
+        while True:
+            estimated = await self._aadmit(input)
+            try:
+                response = await self.bound.ainvoke(input, self._merge_configs(config), **{**self.kwargs, **kwargs})
+            except BaseException as e:
+                self._release(estimated, False)
+                delay = self.retry_delay(e, attempt, delay) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._release(estimated, True, response)
+            return response
+
+    def transform(self, input: Iterator[Any], config: Any = None, **kwargs: Any) -> Iterator[Any]:
+        items = list(input)
+        attempt, delay = 0, 0.0
+        while True:
+            started = ok = False
+            estimated = self._admit(items)
+            try:
+                for chunk in self.bound.transform(iter(items), self._merge_configs(config), **{**self.kwargs, **kwargs}):
+                    started = True
+                    yield chunk
+                ok = True
+                return
+            except Exception as e:
+                delay = None if started else self.retry_delay(e, attempt, delay)
+                if delay is None:
+                    raise
+            finally:
+                self._release(estimated, ok)
+            self.sleep(delay)
+            attempt += 1
+
+    async def atransform(self, input: AsyncIterator[Any], config: Any = None, **kwargs: Any) -> AsyncIterator[Any]:
+        items = [item async for item in input]
+
+        async def replay() -> AsyncIterator[Any]:
+            for item in items:
+                yield item
+
+        attempt, delay = 0, 0.0
+        while True:
+            started = ok = False
+            estimated = await self._aadmit(items)
+            try:
+                async for chunk in self.bound.atransform(replay(), self._merge_configs(config), **{**self.kwargs, **kwargs}):
+                    started = True
+                    yield chunk
+                ok = True
+                return
+            except Exception as e:
+                delay = None if started else self.retry_delay(e, attempt, delay)
+                if delay is None:
+                    raise
+            finally:
+                self._release(estimated, ok)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, input: Any, config: Any = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.transform(iter([input]), config, **kwargs)
+
+    async def astream(self, input: Any, config: Any = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async def single() -> AsyncIterator[Any]:
+            yield input
+
+        async for chunk in self.atransform(single(), config, **kwargs):
+            yield chunk
+
+
+def _wrap_model_step(runnable: Any, wrap: Callable[[Any], Any]) -> Any:
+    """체인/에이전트 안의 채팅 모델 단계(도구 바인딩 포함)만 wrap으로 바꾼 사본"""
+    if hasattr(runnable, "agent") and hasattr(runnable, "tools"):
+        agent = runnable.agent
+        inner = _wrap_model_step(getattr(agent, "runnable", None), wrap)
+        return runnable.model_copy(update={"agent": agent.model_copy(update={"runnable": inner})})
+    steps = getattr(runnable, "steps", None)
+    if steps:
+        return RunnableSequence(*[_wrap_model_step(step, wrap) for step in steps])
+    bound = getattr(runnable, "bound", None)
+    if (bound is not None and hasattr(bound, "_llm_type")) or hasattr(runnable, "_llm_type"):
+        return wrap(runnable)
+    return runnable
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with a single half-open probe.
+
+    Args:
+        key: provider:model
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Time the circuit stays open before a probe is allowed
+    """
+
+    def __init__(self, key: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"[LLMResilience] circuit opened for {self.key} after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.time()
+            self._probing = False
+
+    def record_neutral(self) -> None:
+        """프로바이더 상태와 무관한 결과 (잘못된 요청, 취소 등)"""
+        with self._lock:
+            self._probing = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            opened_for = max(0.0, self.reset_seconds - (time.time() - self.opened_at)) if self.state == "open" else 0.0
+            return {"state": self.state, "failures": self.failures, "open_for_s": round(opened_for, 3)}
+
+
+class LatencyTracker:
+    """Rolling latency samples of successful attempts per provider:model."""
+
+    def __init__(self, sample_size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[int(q * (len(samples) - 1))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "samples": len(self._samples),
+            "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 3) if p95 is not None else None,
+        }
+
+
+def _child_token(parent: Optional[CancelToken], timeout: Optional[float]) -> CancelToken:
+    """시도별 하위 토큰: 시도 제한 시간과 실행 전체 deadline 중 빠른 쪽"""
+    deadline = time.time() + timeout if timeout else None
+    if parent is not None and parent.deadline is not None:
+        deadline = min(deadline, parent.deadline) if deadline else parent.deadline
+    return CancelToken(deadline=deadline)
+
+
+def _link(parent: Optional[CancelToken], child: CancelToken) -> Callable[[], None]:
+    """부모 토큰의 취소를 하위 토큰으로 전파 (반환값으로 연결 해제)"""
+    if parent is None:
+        return lambda: None
+    return parent.add_callback(lambda: child.cancel(parent.reason or "Execution cancelled"))
+
+
+class LLMResilience:
+    """
+    Applies resilience policies around provider calls and keeps per-model health.
+
+    Args:
+        failure_threshold: Consecutive failures that open a circuit
+        reset_seconds: Open circuit duration
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0, "short_circuits": 0}
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            self._counters[event] += 1
+        llm_resilience_events_total.labels(event=event).inc()
+
+    def _state_for(self, key: str) -> Tuple[CircuitBreaker, LatencyTracker]:
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(key, self.failure_threshold, self.reset_seconds)
+                self._latency[key] = LatencyTracker()
+            return self._breakers[key], self._latency[key]
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        return self._state_for(key)[0]
+
+    def latency(self, key: str) -> LatencyTracker:
+        return self._state_for(key)[1]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def call(self, runnable: Any, call: Callable[[], Any], policy: Any = None) -> Any:
+        """
+        Run ``call`` under the node's resilience policy.
+
+        Args:
+            runnable: Chain or AgentExecutor (identifies the provider/model)
+            call: Function performing one provider call
+            policy: ResiliencePolicy, node resilience config dict, or None for the bound options
+
+        Returns:
+            The first successful response
+
+        Raises:
+            CircuitOpenError: If the provider/model circuit is open
+            LLMCallTimeout: If the last attempt timed out
+        """
+        policy = resolve_policy(policy)
+        identity = model_identity(runnable)
+        key = f"{identity[0]}:{identity[1]}" if identity else "unknown"
+        breaker, latency = self._state_for(key)
+        parent = current_token()
+        # 도구가 있는 에이전트는 헤징하지 않고, 재시도는 모델 요청 단위로만 (retry_model_calls)
+        tools = runs_tools(runnable)
+        hedge = policy.hedge and not tools
+        max_retries = 0 if tools else policy.max_retries
+        self._count("calls")
+
+        delay = policy.retry_base_delay
+        attempt = 0
+        while True:
+            if policy.circuit_breaker and not breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpenError(f"Circuit open for {key}; failing fast")
+            started = time.perf_counter()
+            try:
+                if hedge:
+                    response = self._hedged(call, policy, breaker, latency, parent)
+                else:
+                    response = self._attempt(call, policy.timeout_seconds, parent)
+            except Exception as e:
+                transient = is_transient_error(e)
+                if transient:
+                    breaker.record_failure()
+                else:
+                    breaker.record_neutral()
+                if not transient or attempt >= max_retries:
+                    raise
+                # decorrelated jitter: min(cap, uniform(base, 이전 지연 * 3))
+                delay = min(policy.retry_max_delay, random.uniform(policy.retry_base_delay, delay * 3))
+                logger.warning(f"[LLMResilience] {key} attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                self._count("retries")
+                self._sleep(delay, parent)
+                attempt += 1
+                continue
+
+            breaker.record_success()
+            latency.observe(time.perf_counter() - started)
+            return response
+
+    def retry_model_calls(self, runnable: Any, policy: Any = None, scheduler: Any = None) -> Any:
+        """
+        Return a copy whose chat-model requests are scheduled and retried on their own (도구는 다시 실행되지 않음).
+
+        모델 요청마다 스케줄러의 limiter에서 슬롯과 요청/토큰 한도를 잡으므로, 여러 턴을 도는 에이전트도
+        턴 수만큼 분당 요청 수에 반영되고 도구 실행 중에는 동시 실행 슬롯을 차지하지 않습니다.
+        일시적 오류는 노드 정책의 maxRetries만큼 decorrelated jitter로, 429는 스케줄러의 재시도 횟수만큼
+        프로바이더 힌트(retry-after 등)에 따라 해당 키를 늦추며 재시도합니다.
+
+        Args:
+            runnable: Chain or AgentExecutor
+            policy: ResiliencePolicy, node resilience config dict, or None for the bound options
+            scheduler: LLMScheduler whose limiter and retry budget handle rate-limit errors
+        """
+        policy = resolve_policy(policy)
+        limiter = scheduler.limiter_for(runnable) if scheduler is not None else None
+        rate_limit_retries = scheduler.max_retries if limiter is not None else 0
+        parent = current_token()
+
+        def retry_delay(error: BaseException, attempt: int, previous: float) -> Optional[float]:
+            if is_rate_limit_error(error):
+                if attempt >= rate_limit_retries:
+                    return None
+                delay = limiter.on_rate_limited(retry_after_seconds(error_headers(error)), attempt)
+                logger.warning(f"[LLMResilience] {limiter.key} model request rate limited, retrying in {delay:.2f}s")
+            else:
+                if not is_transient_error(error) or attempt >= policy.max_retries:
+                    return None
+                delay = min(policy.retry_max_delay, random.uniform(policy.retry_base_delay, max(previous, policy.retry_base_delay) * 3))
+                logger.warning(f"[LLMResilience] model request failed ({type(error).__name__}), retrying in {delay:.2f}s")
+            self._count("retries")
+            return delay
+
+        def wrap(step: Any) -> Any:
+            return ModelCallRetry(
+                bound=step, retry_delay=retry_delay, sleep=lambda delay: self._sleep(delay, parent), limiter=limiter,
+                estimate_tokens=lambda input: scheduler.estimate_tokens(step, input),
+            )
+
+        return _wrap_model_step(runnable, wrap)
+
+    def _attempt(self, call: Callable[[], Any], timeout: Optional[float], parent: Optional[CancelToken],
+                 token: Optional[CancelToken] = None) -> Any:
+        if not timeout and token is None:
+            return call()
+        unlink = None
+        if token is None:
+            token = _child_token(parent, timeout)
+            unlink = _link(parent, token)
+        try:
+            with use_token(token):
+                return call()
+        except ExecutionTimedOut:
+            if parent is not None:
+                parent.check()  # 실행 전체 제한 시간이면 그대로 전달
+            self._count("timeouts")
+            raise LLMCallTimeout(f"LLM call exceeded {timeout}s timeout")
+        finally:
+            if unlink is not None:
+                unlink()
+
+    def _hedged(self, call: Callable[[], Any], policy: ResiliencePolicy, breaker: CircuitBreaker,
+                latency: LatencyTracker, parent: Optional[CancelToken]) -> Any:
+        hedge_after = policy.hedge_after_seconds
+        if hedge_after is None:
+            hedge_after = latency.percentile(0.95, HEDGE_MIN_SAMPLES)
+        if hedge_after is None:
+            return self._attempt(call, policy.timeout_seconds, parent)
+
+        attempts: List[Tuple[Future, CancelToken, Callable[[], None]]] = []
+
+        def launch() -> None:
+            token = _child_token(parent, policy.timeout_seconds)
+            unlink = _link(parent, token)
+            context = contextvars.copy_context()
+            future = self._pool().submit(context.run, self._attempt, call, policy.timeout_seconds, parent, token)
+            attempts.append((future, token, unlink))
+
+        launch()
+        done, _ = wait([attempts[0][0]], timeout=hedge_after)
+        if not done and breaker.allow():
+            self._count("hedges")
+            launch()
+
+        try:
+            pending = {future for future, _, _ in attempts}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                if parent is not None:
+                    parent.check()
+                for future in done:
+                    if future.exception() is None:
+                        if len(attempts) > 1 and future is attempts[1][0]:
+                            self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            # 먼저 끝난 응답을 사용하고 나머지 요청은 취소
+            for future, token, unlink in attempts:
+                if not future.done():
+                    token.cancel("Hedged request superseded")
+                unlink()
+
+    @staticmethod
+    def _sleep(delay: float, parent: Optional[CancelToken]) -> None:
+        if parent is None:
+            time.sleep(delay)
+            return
+        woke = threading.Event()
+        remove = parent.add_callback(woke.set)
+        try:
+            woke.wait(delay)
+        finally:
+            remove()
+        parent.check()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = list(self._breakers)
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "models": {
+                key: {**self._breakers[key].get_stats(), "latency": self._latency[key].get_stats()}
+                for key in keys
+            },
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global LLM resilience policies
+llm_resilience = LLMResilience()
@@ -0,0 +1,363 @@
+"""
+Latency-based multi-provider fallback routing for agent nodes.
+
+노드 설정의 routing에 대체 모델 목록이 있으면 invoke_llm이 기본 모델과 대체 모델을 후보로 두고,
+프로바이더/모델별 최근 지연과 오류율에 따라 호출 순서를 정합니다. 프로바이더 오류로 실패하면
+(타임아웃, 429 재시도 소진, 서킷 열림, 5xx 등) 같은 프롬프트/도구/메모리로 다음 후보를 호출합니다.
+도구 오류, 출력 파싱 오류, 4xx 요청 오류는 다른 모델로 바꿔도 같으므로 그대로 전달하고,
+도구가 있는 에이전트는 도구가 한 번이라도 실행된 뒤에는 다음 후보로 넘기지 않습니다
+(에이전트 전체를 다시 실행하면 도구 부작용이 반복되므로).
+
+- failover(기본): 기본 모델 → 대체 모델 순서, 비정상 후보는 뒤로
+- fastest: 정상 후보를 p50 지연 순으로
+- splitPercent: 해당 비율의 요청을 가장 빠른 정상 후보로 먼저 보냄
+
+라우팅 결정은 서버 로그와 실행 로그(노드 metadata.llm_routing)에 기록됩니다.
+
+노드 설정 예:
+    routing({"strategy": "failover", "splitPercent": 10, "fallbacks": [
+        {"providerName": "aws", "modelName": "anthropic.claude-3-5-sonnet-20240620-v1:0",
+         "accessKeyId": "...", "secretAccessKey": "...", "region": "us-east-1"},
+        {"providerName": "openai", "modelName": "gpt-4o", "apiKey": "..."}]})
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from server.services.llm_cache import describe_runnable
+from server.services.llm_resilience import CircuitOpenError, LLMCallTimeout, is_transient_error
+from server.services.llm_scheduler import is_rate_limit_error, model_identity
+from server.utils.execution_context import ExecutionCancelled, ExecutionTimedOut
+
+logger = logging.getLogger(__name__)
+
+ROUTE_WINDOW = 50
+MIN_HEALTH_SAMPLES = 5
+UNHEALTHY_ERROR_RATE = 0.5
+
+_routing_options: contextvars.ContextVar[Any] = contextvars.ContextVar("langstar_llm_routing_options", default=None)
+_routing_decisions: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "langstar_llm_routing_decisions", default=None
+)
+
+
+@contextmanager
+def use_routing_options(options: Any) -> Iterator[None]:
+    """Bind node routing options to the current context (에디터 실행용)."""
+    reset = _routing_options.set(options)
+    try:
+        yield
+    finally:
+        _routing_options.reset(reset)
+
+
+def resolve_routing(options: Any = None) -> Optional[Dict[str, Any]]:
+    """
+    Normalise node routing options.
+
+    Returns:
+        {"fallbacks", "strategy", "split"}, or None when the node has no fallbacks
+    """
+    if options is None:
+        options = _routing_options.get()
+    if isinstance(options, list):
+        options = {"fallbacks": options}
+    if not isinstance(options, dict) or not options.get("fallbacks"):
+        return None
+    return {
+        "fallbacks": [model for model in options["fallbacks"] if isinstance(model, dict) and model.get("providerName")],
+        "strategy": options.get("strategy", "failover"),
+        "split": float(options.get("splitPercent", 0)) / 100,
+    }
+
+
+def pop_routing_decisions() -> List[Dict[str, Any]]:
+    """Return and clear the routing decisions recorded in the current context (실행 로그 기록용)."""
+    decisions = _routing_decisions.get()
+    _routing_decisions.set(None)
+    return decisions or []
+
+
+def _record_decision(decision: Dict[str, Any]) -> None:
+    decisions = _routing_decisions.get()
+    if decisions is None:
+        decisions = []
+        _routing_decisions.set(decisions)
+    decisions.append(decision)
+
+
+def build_chat_model(model: Dict[str, Any], temperature: Any = None, max_tokens: Any = None) -> Any:
+    """
+    Create a chat model from an agent-node model config (providerName, modelName, credentials).
+
+    Raises:
+        ValueError: If the provider is unknown or credentials are missing
+    """
+    provider = model.get("providerName")
+    name = model.get("modelName")
+    options: Dict[str, Any] = {"model": name}
+    if temperature is not None:
+        options["temperature"] = temperature
+
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        if not model.get("apiKey"):
+            raise ValueError("OpenAI API key is required")
+        if model.get("baseUrl"):
+            options["base_url"] = model["baseUrl"]
+        if max_tokens is not None:
+            options["max_completion_tokens"] = max_tokens
+        return ChatOpenAI(openai_api_key=model["apiKey"], **options)
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+        if not model.get("apiKey"):
+            raise ValueError("Anthropic API key is required")
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        return ChatAnthropic(anthropic_api_key=model["apiKey"], **options)
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        if not model.get("apiKey"):
+            raise ValueError("Google API key is required")
+        if max_tokens is not None:
+            options["max_output_tokens"] = max_tokens
+        return ChatGoogleGenerativeAI(google_api_key=model["apiKey"], **options)
+    if provider == "aws":
+        from langchain_aws import ChatBedrockConverse
+        if not (model.get("accessKeyId") and model.get("secretAccessKey") and model.get("region")):
+            raise ValueError("AWS Access Key ID, Secret Access Key and Region are required for AWS Bedrock models")
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        return ChatBedrockConverse(
+            aws_access_key_id=model["accessKeyId"],
+            aws_secret_access_key=model["secretAccessKey"],
+            region_name=model["region"],
+            **options
+        )
+    raise ValueError(f"Unsupported provider: {provider}")
+
+
+def with_chat_model(runnable: Any, llm: Any, tools: Optional[List[Any]] = None) -> Any:
+    """
+    Return a copy of a chain or AgentExecutor whose chat model is replaced by ``llm``.
+
+    프롬프트, 출력 파서, 도구, 메모리는 그대로 두고 모델만 바꾼다 (도구는 새 모델 형식으로 다시 바인딩).
+    """
+    from langchain_core.runnables import RunnableSequence
+
+    if hasattr(runnable, "agent") and hasattr(runnable, "tools"):
+        agent = runnable.agent
+        inner = with_chat_model(getattr(agent, "runnable", None), llm, list(runnable.tools))
+        updates = {"runnable": inner}
+        if hasattr(agent, "stream_runnable"):
+            updates["stream_runnable"] = inner
+        return runnable.model_copy(update={"agent": agent.model_copy(update=updates)})
+    steps = getattr(runnable, "steps", None)
+    if steps:
+        return RunnableSequence(*[with_chat_model(step, llm, tools) for step in steps])
+    bound = getattr(runnable, "bound", None)
+    if bound is not None and hasattr(bound, "_llm_type"):
+        kwargs = getattr(runnable, "kwargs", {}) or {}
+        return llm.bind_tools(tools) if "tools" in kwargs and tools else llm
+    if hasattr(runnable, "_llm_type"):
+        return llm
+    return runnable
+
+
+def agent_output_text(output: Any) -> str:
+    """
+    Extract the answer text from an agent output, whichever provider produced it.
+
+    Bedrock(Claude) 에이전트는 content 블록 리스트와 <thinking> 태그를 돌려주고, 대체 모델(OpenAI 등)은
+    문자열을 돌려주므로 두 형식을 모두 받아 <thinking> 이후의 답변만 남긴다.
+    """
+    if isinstance(output, list):
+        output = "".join(
+            block if isinstance(block, str) else str(block.get("text", ""))
+            for block in output
+            if isinstance(block, str) or (isinstance(block, dict) and block.get("type", "text") == "text")
+        )
+    text = "" if output is None else str(output)
+    if "</thinking>" in text:
+        text = text.split("</thinking>", 1)[1]
+    return text
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """다른 모델로 넘겨 볼 만한 프로바이더 오류인지 (타임아웃, 429, 서킷 열림, 5xx/연결 오류)"""
+    if isinstance(error, (CircuitOpenError, LLMCallTimeout)):
+        return True
+    return is_rate_limit_error(error) or is_transient_error(error)
+
+
+class ToolRunTracker(BaseCallbackHandler):
+    """Callback handler counting tool runs of one routed attempt."""
+
+    def __init__(self):
+        self.tool_runs = 0
+        self._lock = threading.Lock()
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        with self._lock:
+            self.tool_runs += 1
+
+
+class RouteStats:
+    """Rolling outcome window for one provider:model route."""
+
+    def __init__(self, window: int = ROUTE_WINDOW):
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.selected = 0
+
+    def observe(self, ok: bool, seconds: float) -> None:
+        self._outcomes.append((ok, seconds))
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for ok, _ in self._outcomes if not ok) / len(self._outcomes)
+
+    @property
+    def healthy(self) -> bool:
+        return len(self._outcomes) < MIN_HEALTH_SAMPLES or self.error_rate < UNHEALTHY_ERROR_RATE
+
+    @property
+    def p50(self) -> Optional[float]:
+        latencies = sorted(seconds for ok, seconds in self._outcomes if ok)
+        return latencies[len(latencies) // 2] if latencies else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.p50
+        return {
+            "samples": len(self._outcomes),
+            "error_rate": round(self.error_rate, 4),
+            "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "healthy": self.healthy,
+            "selected": self.selected,
+        }
+
+
+class LLMRouter:
+    """Orders primary and fallback models by rolling health and falls back on failure."""
+
+    def __init__(self):
+        self._routes: Dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, key: str) -> RouteStats:
+        with self._lock:
+            if key not in self._routes:
+                self._routes[key] = RouteStats()
+            return self._routes[key]
+
+    def order(self, keys: List[str], strategy: str = "failover", split: float = 0.0) -> Tuple[List[str], bool]:
+        """
+        Order candidate routes (the first key is the node's own model).
+
+        Returns:
+            (ordered keys, whether the request was split to the fastest route)
+        """
+        with self._lock:
+            stats = {key: self._routes.get(key) for key in keys}
+        healthy = [key for key in keys if stats[key] is None or stats[key].healthy]
+        unhealthy = [key for key in keys if key not in healthy]
+
+        def latency(key: str) -> float:
+            p50 = stats[key].p50 if stats[key] is not None else None
+            return p50 if p50 is not None else float("inf")
+
+        fastest = sorted(healthy, key=lambda key: (latency(key), keys.index(key)))
+        if strategy == "fastest":
+            return fastest + unhealthy, False
+        if split > 0 and fastest and latency(fastest[0]) < float("inf") and random.random() < split:
+            ordered = [fastest[0]] + [key for key in healthy if key != fastest[0]]
+            return ordered + unhealthy, fastest[0] != keys[0]
+        return healthy + unhealthy, False
+
+    def invoke(self, runnable: Any, routing: Dict[str, Any], call: Callable[[Any, ToolRunTracker], Any]) -> Any:
+        """
+        Call the best route for this request, falling back to the next candidate on provider failure.
+
+        Args:
+            runnable: The node's chain or AgentExecutor (primary model)
+            routing: Resolved routing options (see ``resolve_routing``)
+            call: Function invoking one candidate runnable with the tracker added to its callbacks
+
+        Returns:
+            The first successful response
+        """
+        identity = model_identity(runnable)
+        primary = f"{identity[0]}:{identity[1]}" if identity else "primary"
+        candidates: Dict[str, Optional[Dict[str, Any]]] = {primary: None}
+        for model in routing["fallbacks"]:
+            candidates.setdefault(f"{model['providerName']}:{model.get('modelName')}", model)
+
+        keys, split = self.order(list(candidates), routing["strategy"], routing["split"])
+        decision: Dict[str, Any] = {
+            "strategy": routing["strategy"],
+            "order": keys,
+            "split": split,
+            "selected": None,
+            "attempts": [],
+        }
+        params = describe_runnable(runnable)["params"]
+        max_tokens = params.get("max_tokens") or params.get("max_completion_tokens") or params.get("max_output_tokens")
+
+        error: Optional[BaseException] = None
+        try:
+            for key in keys:
+                started = time.perf_counter()
+                tracker = ToolRunTracker()
+                try:
+                    model = candidates[key]
+                    target = runnable if model is None else with_chat_model(
+                        runnable, build_chat_model(model, params.get("temperature"), max_tokens)
+                    )
+                    response = call(target, tracker)
+                except (ExecutionCancelled, ExecutionTimedOut):
+                    raise
+                except Exception as e:
+                    elapsed = time.perf_counter() - started
+                    provider_failure = is_provider_failure(e)
+                    if provider_failure:
+                        self._stats(key).observe(False, elapsed)
+                    decision["attempts"].append({
+                        "route": key, "outcome": "error", "error": f"{type(e).__name__}: {str(e)[:200]}",
+                        "latency_ms": round(elapsed * 1000, 3), "tool_runs": tracker.tool_runs,
+                    })
+                    if not provider_failure or tracker.tool_runs:
+                        # 요청 자체의 오류이거나 이미 도구가 실행되었으면 다른 모델로 다시 실행하지 않는다
+                        raise
+                    logger.warning(f"[LLMRouter] {key} failed ({type(e).__name__}), trying next route")
+                    error = e
+                    continue
+
+                elapsed = time.perf_counter() - started
+                stats = self._stats(key)
+                stats.observe(True, elapsed)
+                with self._lock:
+                    stats.selected += 1
+                decision["selected"] = key
+                decision["attempts"].append({"route": key, "outcome": "ok", "latency_ms": round(elapsed * 1000, 3)})
+                return response
+            raise error
+        finally:
+            logger.info(f"[LLMRouter] routed to {decision['selected']} (order={decision['order']}, split={split})")
+            _record_decision(decision)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self._routes.items()}
+
+
+# Global LLM router
+llm_router = LLMRouter()
@@ -0,0 +1,431 @@
+"""
+Provider-aware rate limiting and concurrency scheduler for LLM calls.
+
+모든 에이전트 노드 LLM 호출(run_* 함수와 생성 코드)은 invoke_llm을 거쳐 이 스케줄러를 지납니다.
+API 키 + 모델 단위로 토큰 버킷(분당 요청 수, 분당 토큰 수)과 동시 실행 수를 제한하고,
+대기 중인 호출은 배포(tenant)별 대기열에서 라운드 로빈으로 꺼내 한 배포의 버스트가
+다른 배포를 굶기지 않게 합니다. 도구가 있는 에이전트는 실행 전체가 아니라 모델 요청마다
+슬롯과 요청/토큰 한도를 차지합니다 (도구 실행 중에는 슬롯을 반환, llm_resilience.retry_model_calls).
+429 응답을 받으면 프로바이더의 rate-limit 헤더(retry-after, x-ratelimit-*)에 따라
+해당 키를 잠시 막고 처리율을 낮춘 뒤 재시도합니다.
+
+제한 설정 (LANGSTAR_LLM_RATE_LIMITS, JSON):
+    {"openai:gpt-4o": {"rpm": 500, "tpm": 200000, "concurrency": 16},
+     "anthropic:*": {"rpm": 50}, "*": {"concurrency": 32}}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from server.services.llm_cache import describe_runnable
+from server.utils.execution_context import CancelToken, current_tenant, current_token
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITS: Dict[str, Dict[str, float]] = json.loads(os.getenv("LANGSTAR_LLM_RATE_LIMITS", "{}") or "{}")
+DEFAULT_LIMITS = {
+    "rpm": float(os.getenv("LANGSTAR_LLM_DEFAULT_RPM", "0")),  # 0 = 제한 없음
+    "tpm": float(os.getenv("LANGSTAR_LLM_DEFAULT_TPM", "0")),
+    "concurrency": int(os.getenv("LANGSTAR_LLM_DEFAULT_CONCURRENCY", "16")),
+}
+MAX_RATE_LIMIT_RETRIES = int(os.getenv("LANGSTAR_LLM_RATE_LIMIT_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# 429 이후 처리율 조정 (곱셈 감소 / 덧셈 증가)
+MIN_RATE_SCALE = 0.1
+RATE_SCALE_RECOVERY = 0.05
+WAIT_SLICE_SECONDS = 0.25
+
+API_KEY_FIELDS = ("openai_api_key", "anthropic_api_key", "google_api_key", "api_key", "aws_access_key_id")
+RATE_LIMIT_ERROR_NAMES = ("RateLimit", "Throttl", "ResourceExhausted", "TooManyRequests")
+RATE_LIMIT_ERROR_CODES = ("ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException")
+
+
+# ----------------------------------------------------------------------
+# Rate-limit signals
+# ----------------------------------------------------------------------
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429 / throttling 오류인지 판별 (OpenAI, Anthropic, Google, Bedrock)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    if isinstance(response, dict) and response.get("Error", {}).get("Code") in RATE_LIMIT_ERROR_CODES:
+        return True
+    return any(name in type(error).__name__ for name in RATE_LIMIT_ERROR_NAMES)
+
+
+def error_headers(error: BaseException) -> Mapping[str, str]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    return headers if headers is not None else {}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """'1.5', '20ms', '6m0s', '1s' -> seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, matched = 0.0, False
+    for amount, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Read the provider's retry hint from rate-limit headers."""
+    if not headers:
+        return None
+    lower = {str(k).lower(): str(v) for k, v in headers.items()}
+    if "retry-after-ms" in lower:
+        parsed = _parse_duration(lower["retry-after-ms"])
+        if parsed is not None:
+            return parsed / 1000
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        if name in lower:
+            parsed = _parse_duration(lower[name])
+            if parsed is not None:
+                return parsed
+    return None
+
+
+# ----------------------------------------------------------------------
+# Limiter
+# ----------------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    Args:
+        per_minute: Sustained rate per minute
+        burst: Bucket capacity (default: one minute worth)
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst) if burst else float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float, scale: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * scale)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float, scale: float = 1.0) -> float:
+        self._refill(now, scale)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.rate * scale)
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Give back (positive) or take (negative) tokens after the actual usage is known."""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+    def drain(self, remaining: float) -> None:
+        self.tokens = min(self.tokens, remaining)
+
+
+class ProviderLimiter:
+    """
+    Limits for one API key + model, with per-tenant round-robin queueing.
+
+    Args:
+        key: Limiter key (provider:model:key-id)
+        rpm: Requests per minute (0 = unlimited)
+        tpm: Tokens per minute (0 = unlimited)
+        concurrency: Maximum in-flight calls
+        burst: Optional request bucket capacity
+    """
+
+    def __init__(self, key: str, rpm: float = 0, tpm: float = 0, concurrency: int = 16, burst: Optional[float] = None,
+                 sample_size: int = 1000):
+        self.key = key
+        self.requests = TokenBucket(rpm, burst) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = max(1, int(concurrency))
+        self.blocked_until = 0.0
+        self.scale = 1.0
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[str, Deque[object]]" = OrderedDict()
+        self._in_flight = 0
+        self._wait_samples: Deque[float] = deque(maxlen=sample_size)
+        self._counters = {"requests": 0, "rate_limited": 0, "retries": 0, "errors": 0}
+
+    def _is_next(self, ticket: object) -> bool:
+        for queue in self._queues.values():
+            return queue[0] is ticket
+        return False
+
+    def _wait_needed(self, tokens: float, now: float) -> Optional[float]:
+        """0이면 바로 실행 가능, None이면 슬롯 반환을 기다려야 함"""
+        if self._in_flight >= self.concurrency:
+            return None
+        monotonic_now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, monotonic_now, self.scale))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, monotonic_now, self.scale))
+        return wait
+
+    def acquire(self, tenant: str, tokens: float = 0, cancel_token: Optional[CancelToken] = None) -> float:
+        """
+        Wait for this tenant's turn and for capacity, then take a slot.
+
+        Returns:
+            Seconds spent waiting
+        """
+        ticket = object()
+        started = time.time()
+        with self._cond:
+            self._queues.setdefault(tenant, deque()).append(ticket)
+            try:
+                while True:
+                    if cancel_token is not None:
+                        cancel_token.check()
+                    wait = None
+                    if self._is_next(ticket):
+                        wait = self._wait_needed(tokens, time.time())
+                        if wait == 0:
+                            self._grant(tenant, tokens)
+                            ticket = None
+                            waited = time.time() - started
+                            self._wait_samples.append(waited * 1000)
+                            return waited
+                    self._cond.wait(min(wait, WAIT_SLICE_SECONDS) if wait else WAIT_SLICE_SECONDS)
+            finally:
+                if ticket is not None:
+                    queue = self._queues.get(tenant)
+                    if queue is not None and ticket in queue:
+                        queue.remove(ticket)
+                        if not queue:
+                            del self._queues[tenant]
+                    self._cond.notify_all()
+
+    def _grant(self, tenant: str, tokens: float) -> None:
+        queue = self._queues[tenant]
+        queue.popleft()
+        # 라운드 로빈: 방금 처리한 배포는 대기열 맨 뒤로
+        del self._queues[tenant]
+        if queue:
+            self._queues[tenant] = queue
+        if self.requests is not None:
+            self.requests.consume(1)
+        if self.tokens is not None:
+            self.tokens.consume(tokens)
+        self._in_flight += 1
+        self._counters["requests"] += 1
+        self._cond.notify_all()
+
+    def release(self, success: bool, estimated_tokens: float = 0, actual_tokens: Optional[float] = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if success:
+                self.scale = min(1.0, self.scale + RATE_SCALE_RECOVERY)
+                if self.tokens is not None and actual_tokens is not None:
+                    self.tokens.adjust(estimated_tokens - actual_tokens)
+            else:
+                self._counters["errors"] += 1
+            self._cond.notify_all()
+
+    def release_response(self, response: Any, estimated_tokens: float = 0) -> None:
+        """Release a slot after a successful call, correcting the token estimate and pacing from the response."""
+        usage = getattr(response, "usage_metadata", None) or {}
+        self.release(True, estimated_tokens, usage.get("total_tokens"))
+        self.apply_headers((getattr(response, "response_metadata", None) or {}).get("headers") or {})
+
+    def on_rate_limited(self, retry_after: Optional[float], attempt: int) -> float:
+        """Block this key after a 429 and lower its rate. Returns the backoff delay."""
+        if retry_after is None:
+            retry_after = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+            self.scale = max(MIN_RATE_SCALE, self.scale * 0.5)
+            self._counters["rate_limited"] += 1
+            self._counters["retries"] += 1
+            self._cond.notify_all()
+        return retry_after
+
+    def apply_headers(self, headers: Mapping[str, str]) -> None:
+        """Use x-ratelimit-remaining-* headers from a successful response to pace ahead of a 429."""
+        if not headers:
+            return
+        lower = {str(k).lower(): str(v) for k, v in headers.items()}
+        with self._cond:
+            remaining_requests = lower.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and remaining_requests.strip() == "0":
+                reset = _parse_duration(lower.get("x-ratelimit-reset-requests", "")) or BACKOFF_BASE_SECONDS
+                self.blocked_until = max(self.blocked_until, time.time() + reset)
+            remaining_tokens = lower.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None and self.tokens is not None:
+                try:
+                    self.tokens.drain(float(remaining_tokens))
+                except ValueError:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            samples = sorted(self._wait_samples)
+            return {
+                "in_flight": self._in_flight,
+                "concurrency": self.concurrency,
+                "queued": {tenant: len(queue) for tenant, queue in self._queues.items()},
+                "rate_scale": round(self.scale, 3),
+                "blocked_for_s": round(max(0.0, self.blocked_until - time.time()), 3),
+                "wait_ms": {
+                    "avg": round(sum(samples) / len(samples), 3) if samples else 0.0,
+                    "p95": round(samples[int(0.95 * (len(samples) - 1))], 3) if samples else 0.0,
+                },
+                **self._counters,
+            }
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+def provider_name(llm: Any) -> str:
+    llm_type = str(getattr(llm, "_llm_type", "unknown")).lower()
+    for marker, name in (("openai", "openai"), ("anthropic", "anthropic"), ("bedrock", "aws"), ("google", "google")):
+        if marker in llm_type:
+            return name
+    return llm_type
+
+
+def _api_key_id(llm: Any) -> str:
+    """API 키별로 한도를 나누되 키 값은 해시로만 보관"""
+    for field in API_KEY_FIELDS:
+        value = getattr(llm, field, None)
+        if value:
+            secret = value.get_secret_value() if hasattr(value, "get_secret_value") else str(value)
+            return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+    return "default"
+
+
+def model_identity(runnable: Any) -> Optional[Tuple[str, str, str]]:
+    """
+    Identify the model behind a chain or AgentExecutor.
+
+    Returns:
+        (provider, model, api_key_id), or None if no chat model is found
+    """
+    described = describe_runnable(runnable)
+    llm = described["llm"]
+    if llm is None:
+        return None
+    params = described["params"]
+    model = str(params.get("model") or params.get("model_name") or params.get("model_id") or "default")
+    return provider_name(llm), model, _api_key_id(llm)
+
+
+class LLMScheduler:
+    """
+    Shared scheduler in front of every agent-node LLM call.
+
+    Args:
+        limits: Limits by "provider:model", "provider:*" or "*"
+        default_limits: Limits used when no pattern matches
+        max_retries: Retries after a rate-limit error
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_limits: Optional[Dict[str, float]] = None, max_retries: int = MAX_RATE_LIMIT_RETRIES):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.default_limits = {**DEFAULT_LIMITS, **(default_limits or {})}
+        self.max_retries = max_retries
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, provider: str, model: str) -> Dict[str, float]:
+        for pattern in (f"{provider}:{model}", f"{provider}:*", "*"):
+            if pattern in self.limits:
+                return {**self.default_limits, **self.limits[pattern]}
+        return self.default_limits
+
+    def limiter_for(self, runnable: Any) -> Optional[ProviderLimiter]:
+        """Return the limiter for the model behind a chain or AgentExecutor."""
+        identity = model_identity(runnable)
+        if identity is None:
+            return None
+        provider, model, key_id = identity
+        key = f"{provider}:{model}:{key_id}"
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limits = self._limits_for(provider, model)
+                limiter = ProviderLimiter(
+                    key,
+                    rpm=limits.get("rpm", 0),
+                    tpm=limits.get("tpm", 0),
+                    concurrency=limits.get("concurrency", 16),
+                    burst=limits.get("burst"),
+                )
+                self._limiters[key] = limiter
+        return limiter
+
+    @staticmethod
+    def estimate_tokens(runnable: Any, inputs: Any) -> float:
+        """대략적인 토큰 수: 입력 문자 수 / 4 + 최대 출력 토큰"""
+        params = describe_runnable(runnable)["params"]
+        completion = params.get("max_tokens") or params.get("max_completion_tokens") or params.get("max_output_tokens") or 0
+        return len(json.dumps(inputs, default=str, ensure_ascii=False)) / 4 + float(completion or 0)
+
+    def run(self, runnable: Any, inputs: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        """
+        Run ``call`` once the model's limiter admits it, retrying on rate-limit errors.
+
+        Args:
+            runnable: Chain being invoked (used to pick the limiter)
+            inputs: Runnable input (used for the token estimate)
+            call: Function that performs the actual invocation
+        """
+        limiter = self.limiter_for(runnable)
+        if limiter is None:
+            return call()
+
+        tenant = current_tenant() or "default"
+        estimated = self.estimate_tokens(runnable, inputs) if limiter.tokens is not None else 0
+        attempt = 0
+        while True:
+            limiter.acquire(tenant, estimated, current_token())
+            try:
+                response = call()
+            except Exception as e:
+                limiter.release(False)
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = limiter.on_rate_limited(retry_after_seconds(error_headers(e)), attempt)
+                logger.warning(f"[LLMScheduler] {limiter.key} rate limited, retrying in {delay:.2f}s (attempt {attempt + 1})")
+                attempt += 1
+                continue
+
+            limiter.release_response(response, estimated)
+            return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.get_stats() for key, limiter in limiters.items()}
+
+
+# Global LLM scheduler
+llm_scheduler = LLMScheduler()
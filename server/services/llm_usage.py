@@ -0,0 +1,287 @@
+"""
+Token usage collection for agent-node LLM calls.
+
+게이트웨이를 지나는 모든 LLM 호출에 콜백을 붙여 응답의 usage_metadata(입력/출력 토큰,
+프롬프트 캐시 읽기/쓰기 토큰)를 모으고, 현재 노드 실행 단위로 모델별로 합산합니다.
+같은 콜백에서 모델 호출마다 지연 시간을 프로바이더/모델별 히스토그램에 기록합니다.
+에이전트(AgentExecutor)의 여러 모델 호출도 모두 포함되며,
+생성 코드의 노드 실행 로그에는 usage 필드로 기록됩니다.
+
+가격표(100만 토큰당 USD)로 모델별 비용을 계산하고, 배포 실행이 끝나면 노드 사용량을 합산해
+실행 기록(usage)과 Prometheus 카운터(배포/버전/모델별 토큰, 비용)에 반영합니다.
+가격표 변경: LANGSTAR_LLM_PRICES='{"gpt-4o": {"input": 2.5, "output": 10, "cache_read": 1.25}}'
+(키는 모델 이름의 일부, 가장 길게 일치하는 항목 사용)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter
+
+from server.services.execution_metrics import deployment_label, llm_call_duration_seconds, version_label
+from server.services.llm_cache import llm_registry
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "total_tokens", "cache_read_tokens", "cache_write_tokens")
+
+# 100만 토큰당 USD (cache_read / cache_write가 없으면 input 가격 사용)
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-4o-mini": {"input": 0.15, "output": 0.6, "cache_read": 0.075},
+    "gpt-4o": {"input": 2.5, "output": 10.0, "cache_read": 1.25},
+    "gpt-4.1-nano": {"input": 0.1, "output": 0.4, "cache_read": 0.025},
+    "gpt-4.1-mini": {"input": 0.4, "output": 1.6, "cache_read": 0.1},
+    "gpt-4.1": {"input": 2.0, "output": 8.0, "cache_read": 0.5},
+    "o3-mini": {"input": 1.1, "output": 4.4, "cache_read": 0.55},
+    "claude-3-haiku": {"input": 0.25, "output": 1.25, "cache_read": 0.03, "cache_write": 0.3},
+    "claude-3-5-haiku": {"input": 0.8, "output": 4.0, "cache_read": 0.08, "cache_write": 1.0},
+    "haiku": {"input": 1.0, "output": 5.0, "cache_read": 0.1, "cache_write": 1.25},
+    "sonnet": {"input": 3.0, "output": 15.0, "cache_read": 0.3, "cache_write": 3.75},
+    "opus": {"input": 15.0, "output": 75.0, "cache_read": 1.5, "cache_write": 18.75},
+    "gemini-1.5-flash": {"input": 0.075, "output": 0.3},
+    "gemini-1.5-pro": {"input": 1.25, "output": 5.0},
+    "gemini-2.0-flash": {"input": 0.1, "output": 0.4},
+}
+
+
+def _load_prices() -> Dict[str, Dict[str, float]]:
+    prices = dict(DEFAULT_PRICES)
+    raw = os.getenv("LANGSTAR_LLM_PRICES")
+    if raw:
+        try:
+            prices.update(json.loads(raw))
+        except ValueError as e:
+            logger.warning(f"Invalid LANGSTAR_LLM_PRICES, using defaults: {str(e)}")
+    return prices
+
+
+LLM_PRICES = _load_prices()
+
+llm_tokens_total = Counter(
+    'langstar_llm_tokens_total',
+    'LLM tokens used by deployment executions',
+    ['deployment', 'version', 'model', 'type'],
+    registry=llm_registry
+)
+
+llm_cost_usd_total = Counter(
+    'langstar_llm_cost_usd_total',
+    'Estimated LLM cost of deployment executions in USD',
+    ['deployment', 'version', 'model'],
+    registry=llm_registry
+)
+
+_node_usage: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "langstar_node_llm_usage", default=None
+)
+
+
+def normalize_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Convert LangChain usage_metadata into flat token counts.
+
+    Anthropic은 input_token_details(cache_read / cache_creation),
+    Bedrock Converse는 cache_read_input_tokens / cache_write_input_tokens로 캐시 토큰을 보고합니다.
+    """
+    details = usage.get("input_token_details") or {}
+    input_tokens = int(usage.get("input_tokens") or 0)
+    output_tokens = int(usage.get("output_tokens") or 0)
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": int(usage.get("total_tokens") or input_tokens + output_tokens),
+        "cache_read_tokens": int(details.get("cache_read") or usage.get("cache_read_input_tokens") or 0),
+        "cache_write_tokens": int(details.get("cache_creation") or usage.get("cache_write_input_tokens") or 0),
+    }
+
+
+def _model_name(message: Any, llm_output: Optional[Dict[str, Any]], started: Optional[str]) -> str:
+    metadata = getattr(message, "response_metadata", None) or {}
+    return str(
+        metadata.get("model_name") or metadata.get("model") or metadata.get("model_id")
+        or (llm_output or {}).get("model_name") or (llm_output or {}).get("model") or started or "unknown"
+    )
+
+
+def _add(target: Dict[str, Any], usage: Dict[str, int], calls: int = 1) -> None:
+    for field in USAGE_FIELDS:
+        target[field] = target.get(field, 0) + usage.get(field, 0)
+    target["calls"] = target.get("calls", 0) + calls
+
+
+def model_price(model: str, prices: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[Dict[str, float]]:
+    """Return the price entry whose key is the longest substring of ``model``."""
+    prices = LLM_PRICES if prices is None else prices
+    matches = [key for key in prices if key in model]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: str, usage: Dict[str, Any], prices: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[float]:
+    """
+    Estimate the USD cost of one model's usage.
+
+    input_tokens에는 캐시 읽기/쓰기 토큰이 포함되어 있으므로 나머지만 기본 입력 가격으로 계산합니다.
+
+    Returns:
+        Cost in USD, or None when the model has no price entry
+    """
+    price = model_price(model, prices)
+    if price is None:
+        return None
+    cache_read = usage.get("cache_read_tokens", 0)
+    cache_write = usage.get("cache_write_tokens", 0)
+    uncached = max(usage.get("input_tokens", 0) - cache_read - cache_write, 0)
+    cost = (
+        uncached * price["input"]
+        + cache_read * price.get("cache_read", price["input"])
+        + cache_write * price.get("cache_write", price["input"])
+        + usage.get("output_tokens", 0) * price["output"]
+    ) / 1_000_000
+    return round(cost, 8)
+
+
+def with_cost(usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Add cost_usd to each model entry and to the totals (unpriced models are left out of the total)."""
+    total = 0.0
+    for model, counts in usage.get("models", {}).items():
+        counts["cost_usd"] = estimate_cost(model, counts)
+        total += counts["cost_usd"] or 0.0
+    usage["cost_usd"] = round(total, 8)
+    return usage
+
+
+def merge_usage(usages: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Sum node/execution usage dicts (with their per-model breakdown) and recompute costs.
+
+    Returns:
+        Combined usage, or {} when nothing was recorded
+    """
+    merged: Dict[str, Any] = {}
+    for usage in usages:
+        if not usage:
+            continue
+        _add(merged, usage, usage.get("calls", 0))
+        models = merged.setdefault("models", {})
+        for model, counts in usage.get("models", {}).items():
+            _add(models.setdefault(model, {}), counts, counts.get("calls", 0))
+    return with_cost(merged) if merged else {}
+
+
+def record_execution_usage(deployment_id: str, version_id: str, node_usages: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Total a deployment execution's node usage and add it to the Prometheus counters.
+
+    배포 워커 프로세스에서 실행된 노드도 로그 파일을 통해 서버 프로세스에서 합산됩니다.
+
+    Returns:
+        The execution's usage ({} when the workflow made no LLM calls)
+    """
+    usage = merge_usage(node_usages)
+    deployment, version = deployment_label(deployment_id), version_label(deployment_id, version_id)
+    for model, counts in usage.get("models", {}).items():
+        for field in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens"):
+            if counts.get(field):
+                llm_tokens_total.labels(deployment, version, model, field[:-len("_tokens")]).inc(counts[field])
+        if counts.get("cost_usd"):
+            llm_cost_usd_total.labels(deployment, version, model).inc(counts["cost_usd"])
+    return usage
+
+
+class UsageCollector(BaseCallbackHandler):
+    """Callback handler that records usage_metadata of every chat model response in a run."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._started: Dict[UUID, Tuple[float, Optional[str], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        # Bedrock 응답에는 모델 이름이 없어서 호출 시작 시의 모델 이름을 기억한다
+        metadata = metadata or {}
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), metadata.get("ls_provider"), metadata.get("ls_model_name"))
+
+    def _finish(self, run_id: UUID, outcome: str) -> Optional[str]:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        started_at, provider, model = started
+        llm_call_duration_seconds.labels(provider or "unknown", model or "unknown", outcome).observe(
+            time.perf_counter() - started_at
+        )
+        return model
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._finish(run_id, "ok")
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                with self._lock:
+                    self.calls.append({"model": _model_name(message, response.llm_output, started), **normalize_usage(usage)})
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals plus a per-model breakdown ({"input_tokens", ..., "calls", "models": {...}})."""
+        totals: Dict[str, Any] = {}
+        models: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            _add(totals, call)
+            _add(models.setdefault(call["model"], {}), call)
+        if calls:
+            totals["models"] = models
+        return totals
+
+
+def with_collector(config: Optional[Dict[str, Any]], collector: BaseCallbackHandler) -> Dict[str, Any]:
+    """Return a runnable config with ``collector`` (or another callback handler) added to its callbacks."""
+    config = dict(config or {})
+    callbacks = config.get("callbacks")
+    if callbacks is None:
+        config["callbacks"] = [collector]
+    elif isinstance(callbacks, list):
+        config["callbacks"] = callbacks + [collector]
+    else:
+        manager = callbacks.copy()
+        manager.add_handler(collector, inherit=True)
+        config["callbacks"] = manager
+    return config
+
+
+def record_node_usage(summary: Dict[str, Any]) -> None:
+    """Add one LLM call's usage to the current node's totals."""
+    if not summary:
+        return
+    usage = _node_usage.get()
+    if usage is None:
+        usage = {}
+        _node_usage.set(usage)
+    _add(usage, summary, summary.get("calls", 0))
+    models = usage.setdefault("models", {})
+    for model, counts in summary.get("models", {}).items():
+        _add(models.setdefault(model, {}), counts, counts.get("calls", 0))
+
+
+def pop_node_usage() -> Dict[str, Any]:
+    """Return and clear the current node's LLM usage with estimated cost (실행 로그 기록용)."""
+    usage = _node_usage.get()
+    _node_usage.set(None)
+    return with_cost(usage) if usage else {}
@@ -0,0 +1,143 @@
+"""
+Provider prompt-prefix caching for agent nodes.
+
+Anthropic과 Bedrock 에이전트 노드는 매 호출마다 같은 시스템 프롬프트와 도구 정의를 보냅니다.
+노드 캐시 설정에 promptCache가 켜져 있으면 게이트웨이가 호출 직전에 다음 위치에 캐시 표시를 붙여
+프로바이더의 프롬프트 캐시가 적용되게 합니다 (Anthropic: cache_control, Bedrock: cachePoint).
+- 시스템 프롬프트
+- 도구 정의 (마지막 도구)
+- 대화 기록의 끝 (마지막 사용자 메시지 직전 메시지)
+
+활성화: 노드 설정의 cache({"promptCache": true}) 또는 LANGSTAR_PROMPT_CACHE=on
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda, RunnableSequence
+
+from server.services.llm_cache import describe_runnable
+from server.services.llm_scheduler import provider_name
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+BEDROCK_CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+
+def _with_marker(message: BaseMessage, provider: str) -> BaseMessage:
+    content = message.content
+    blocks: List[Any] = [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+    if not blocks:
+        return message
+    if provider == "aws":
+        blocks.append(dict(BEDROCK_CACHE_POINT))
+    else:
+        last = blocks[-1]
+        if isinstance(last, str):
+            last = {"type": "text", "text": last}
+        if not isinstance(last, dict) or last.get("type") not in ("text", "image", "tool_use", "tool_result", "document"):
+            return message
+        blocks[-1] = {**last, "cache_control": dict(ANTHROPIC_CACHE_CONTROL)}
+    return message.model_copy(update={"content": blocks})
+
+
+def mark_cacheable_messages(messages: List[BaseMessage], provider: str) -> List[BaseMessage]:
+    """
+    Mark the system prompt and the end of the stable history prefix as cacheable.
+
+    Args:
+        messages: Rendered prompt messages
+        provider: "anthropic" or "aws"
+
+    Returns:
+        New message list (the input is not modified)
+    """
+    messages = list(messages)
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=None)
+    marked = set()
+    for index, message in enumerate(messages):
+        if isinstance(message, SystemMessage):
+            marked.add(index)
+    if last_human is not None and last_human > 0 and not isinstance(messages[last_human - 1], SystemMessage):
+        marked.add(last_human - 1)
+    for index in marked:
+        messages[index] = _with_marker(messages[index], provider)
+    return messages
+
+
+def _bedrock_tool_config(tools: List[Dict[str, Any]], tool_choice: Any = None) -> Dict[str, Any]:
+    specs = []
+    for tool in tools:
+        if "toolSpec" in tool:
+            specs.append(tool)
+            continue
+        function = tool.get("function", tool)
+        specs.append({"toolSpec": {
+            "name": function["name"],
+            "description": function.get("description") or function["name"],
+            "inputSchema": {"json": function.get("parameters", {})},
+        }})
+    config: Dict[str, Any] = {"tools": specs + [dict(BEDROCK_CACHE_POINT)]}
+    if tool_choice:
+        config["toolChoice"] = tool_choice
+    return config
+
+
+def _mark_tools(binding: Any, provider: str) -> Any:
+    kwargs = dict(getattr(binding, "kwargs", {}) or {})
+    tools = kwargs.get("tools")
+    if not tools:
+        return binding
+    if provider == "aws":
+        kwargs["toolConfig"] = _bedrock_tool_config(tools, kwargs.pop("tool_choice", None))
+        kwargs.pop("tools")
+    else:
+        kwargs["tools"] = list(tools[:-1]) + [{**tools[-1], "cache_control": dict(ANTHROPIC_CACHE_CONTROL)}]
+    return binding.bound.bind(**kwargs)
+
+
+def _rewrite(runnable: Any, provider: str) -> Any:
+    if hasattr(runnable, "agent") and hasattr(runnable, "tools"):
+        agent = runnable.agent
+        inner = _rewrite(getattr(agent, "runnable", None), provider)
+        updates = {"runnable": inner}
+        if hasattr(agent, "stream_runnable"):
+            updates["stream_runnable"] = inner
+        return runnable.model_copy(update={"agent": agent.model_copy(update=updates)})
+    steps = getattr(runnable, "steps", None)
+    if steps:
+        rewritten: List[Any] = []
+        for step in steps:
+            bound = getattr(step, "bound", None)
+            if hasattr(step, "_llm_type") or (bound is not None and hasattr(bound, "_llm_type")):
+                # 프롬프트가 만든 메시지에 캐시 표시를 붙인 뒤 모델로 전달
+                rewritten.append(RunnableLambda(
+                    lambda value: mark_cacheable_messages(value.to_messages() if hasattr(value, "to_messages") else value, provider),
+                    name="mark_prompt_cache",
+                ))
+                rewritten.append(_mark_tools(step, provider) if bound is not None else step)
+            else:
+                rewritten.append(_rewrite(step, provider))
+        return RunnableSequence(*rewritten)
+    return runnable
+
+
+def apply_prompt_cache(runnable: Any) -> Any:
+    """
+    Return a copy of an Anthropic/Bedrock chain or AgentExecutor with prompt cache markers.
+
+    Other providers are returned unchanged (OpenAI는 프리픽스 캐시를 자동으로 적용).
+    """
+    llm = describe_runnable(runnable)["llm"]
+    if llm is None:
+        return runnable
+    provider = provider_name(llm)
+    if provider not in ("anthropic", "aws"):
+        return runnable
+    try:
+        return _rewrite(runnable, provider)
+    except Exception as e:
+        logger.warning(f"Failed to apply prompt cache markers: {str(e)}")
+        return runnable
@@ -14,6 +14,8 @@ from server.models.schedule import (
     Schedule, ScheduleStatus, ScheduleType,
     CreateScheduleRequest, UpdateScheduleRequest
 )
+from server.models.execution import ExecutionPriority
+from server.services.execution_queue import execution_queue, QueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,7 @@ class ScheduleService:
         self.schedules_dir.mkdir(exist_ok=True)
         self.scheduler = BackgroundScheduler()
         self.scheduler.start()
+        execution_queue.register_handler("scheduled", self._run_scheduled_workflow)
         logger.info("APScheduler started")
         
     def _get_schedule_file_path(self, schedule_id: str) -> Path:
@@ -52,7 +55,33 @@ class ScheduleService:
             file_path.unlink()
     
     def _execute_scheduled_workflow(self, schedule_id: str, deployment_id: str, input_data: Dict[str, Any]) -> None:
-        """스케줄된 워크플로우 실행"""
+        """스케줄 트리거 시 실행 큐(scheduled 레인)에 워크플로우 실행을 등록"""
+        try:
+            execution_queue.submit(
+                "scheduled",
+                {
+                    "schedule_id": schedule_id,
+                    "deployment_id": deployment_id,
+                    "input_data": input_data or {}
+                },
+                lane=ExecutionPriority.SCHEDULED
+            )
+            logger.info(f"Queued scheduled workflow - Schedule: {schedule_id}, Deployment: {deployment_id}")
+        except QueueFullError as e:
+            # 대기열이 가득 차면 이번 실행은 건너뛰고 기록만 남긴다
+            logger.warning(f"Skipping scheduled run {schedule_id}: {str(e)}")
+            schedule = self._load_schedule(schedule_id)
+            if schedule:
+                schedule.lastRunTime = datetime.now().isoformat()
+                schedule.lastRunStatus = "rejected"
+                schedule.updatedAt = datetime.now().isoformat()
+                self._save_schedule(schedule)
+    
+    def _run_scheduled_workflow(self, payload: Dict[str, Any]) -> None:
+        """스케줄된 워크플로우 실행 (실행 큐 워커에서 호출)"""
+        schedule_id = payload["schedule_id"]
+        deployment_id = payload["deployment_id"]
+        input_data = payload.get("input_data") or {}
         try:
             logger.info(f"Executing scheduled workflow - Schedule: {schedule_id}, Deployment: {deployment_id}")
             
@@ -63,7 +92,8 @@ class ScheduleService:
                 from server.services.deployment_service import deployment_service
                 execution_result = deployment_service.run_deployment(
                     deployment_id=deployment_id,
-                    input_data=input_data or {}
+                    input_data=input_data,
+                    execution_source="scheduled"
                 )
                 
                 # 실행 결과에 따라 스케줄 업데이트
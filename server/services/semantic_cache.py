@@ -0,0 +1,252 @@
+"""
+Semantic response cache for agent nodes.
+
+사용자 프롬프트를 임베딩해 NumPy 코사인 인덱스에서 가장 비슷한 이전 질문을 찾고,
+유사도가 임계값 이상이면 저장된 답변을 반환합니다. 시스템 프롬프트, 모델, 파라미터,
+도구 스키마가 같은 요청끼리만 비교하도록 구획(partition) 키로 나눕니다.
+
+기본 임베더는 외부 호출 없이 동작하는 해싱 벡터라이저이며 set_embedder로 교체할 수 있습니다.
+활성화: 노드 설정의 cache({"enabled": true, "semantic": true, "similarityThreshold": 0.92})
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from server.services.llm_cache import llm_registry
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("LANGSTAR_SEMANTIC_CACHE_CAPACITY", "5000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LANGSTAR_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+HASHING_DIMENSIONS = int(os.getenv("LANGSTAR_SEMANTIC_CACHE_DIMENSIONS", "1024"))
+
+semantic_cache_requests_total = Counter(
+    'langstar_semantic_cache_requests_total',
+    'Semantic cache lookups',
+    ['result'],
+    registry=llm_registry
+)
+
+semantic_cache_similarity = Histogram(
+    'langstar_semantic_cache_best_similarity',
+    'Best cosine similarity found per semantic cache lookup',
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.95, 0.98, 1.0),
+    registry=llm_registry
+)
+
+
+class Embedder(Protocol):
+    """임베더 인터페이스: 텍스트 목록을 (n, dim) 벡터로 변환"""
+
+    dimensions: int
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder:
+    """
+    Offline embedder using the hashing trick over word unigrams/bigrams and character trigrams.
+
+    Args:
+        dimensions: Output vector size
+    """
+
+    _token_pattern = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = self._token_pattern.findall(text.lower())
+        features = [f"w:{word}" for word in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dimensions] += sign
+        return vectors
+
+
+class LangChainEmbedder:
+    """Adapter for LangChain ``Embeddings`` implementations (OpenAI, Bedrock 등)."""
+
+    def __init__(self, embeddings: Any, dimensions: int):
+        self.embeddings = embeddings
+        self.dimensions = dimensions
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SemanticCache:
+    """
+    Cosine-similarity cache over a preallocated NumPy matrix.
+
+    Args:
+        embedder: Embedder used for prompts (default: HashingEmbedder)
+        capacity: Maximum entries; the least recently used entry is evicted when full
+        threshold: Default similarity threshold for a hit
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None, capacity: int = SEMANTIC_CACHE_CAPACITY,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, sample_size: int = 1000):
+        self.capacity = max(1, capacity)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._similarities: Deque[float] = deque(maxlen=sample_size)
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._init_index(embedder or HashingEmbedder())
+
+    def _init_index(self, embedder: Embedder) -> None:
+        self.embedder = embedder
+        self._vectors = np.zeros((self.capacity, embedder.dimensions), dtype=np.float32)
+        self._partition_ids = np.full(self.capacity, -1, dtype=np.int64)
+        # 구획 이름 -> 번호 (구획의 마지막 항목이 밀려나면 제거, 번호는 재사용하지 않음)
+        self._partition_index: Dict[str, int] = {}
+        self._partition_names: Dict[int, str] = {}
+        self._next_partition_id = 0
+        self._texts: List[Optional[str]] = [None] * self.capacity
+        self._values: List[Any] = [None] * self.capacity
+        self._expires = np.zeros(self.capacity, dtype=np.float64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._size = 0
+
+    def set_embedder(self, embedder: Embedder) -> None:
+        """Swap the embedder (the index is cleared because vectors are not comparable)."""
+        with self._lock:
+            self._init_index(embedder)
+
+    def _embed(self, text: str) -> np.ndarray:
+        return _normalize(self.embedder.embed([text]))[0]
+
+    def lookup(self, partition: str, text: str, threshold: Optional[float] = None) -> Tuple[bool, Any, float]:
+        """
+        Find the most similar stored prompt in the same partition.
+
+        Returns:
+            (hit, value, best_similarity)
+        """
+        threshold = self.threshold if threshold is None else float(threshold)
+        query = self._embed(text)
+        now = time.time()
+        with self._lock:
+            best_index, best = -1, 0.0
+            partition_id = self._partition_index.get(partition)
+            if partition_id is not None:
+                mask = (self._partition_ids[:self._size] == partition_id) & (self._expires[:self._size] > now)
+                candidates = np.nonzero(mask)[0]
+                if len(candidates):
+                    scores = self._vectors[candidates] @ query
+                    position = int(np.argmax(scores))
+                    best_index, best = int(candidates[position]), float(scores[position])
+
+            self._similarities.append(best)
+            semantic_cache_similarity.observe(best)
+            if best_index >= 0 and best >= threshold:
+                self._last_used[best_index] = now
+                self._counters["hits"] += 1
+                semantic_cache_requests_total.labels(result="hit").inc()
+                return True, copy.deepcopy(self._values[best_index]), best
+
+            self._counters["misses"] += 1
+            semantic_cache_requests_total.labels(result="miss").inc()
+            return False, None, best
+
+    def store(self, partition: str, text: str, value: Any, ttl: float) -> None:
+        """Add a prompt/answer pair, evicting expired or least recently used entries when full."""
+        vector = self._embed(text)
+        now = time.time()
+        with self._lock:
+            if self._size < self.capacity:
+                index = self._size
+                self._size += 1
+            else:
+                expired = np.nonzero(self._expires <= now)[0]
+                if len(expired):
+                    index = int(expired[0])
+                    self._counters["expired"] += 1
+                else:
+                    index = int(np.argmin(self._last_used))
+                    self._counters["evictions"] += 1
+            self._release_partition(index)
+            self._vectors[index] = vector
+            self._partition_ids[index] = self._partition_id(partition)
+            self._texts[index] = text
+            self._values[index] = copy.deepcopy(value)
+            self._expires[index] = now + ttl
+            self._last_used[index] = now
+            self._counters["stores"] += 1
+
+    def _partition_id(self, partition: str) -> int:
+        partition_id = self._partition_index.get(partition)
+        if partition_id is None:
+            partition_id = self._partition_index[partition] = self._next_partition_id
+            self._partition_names[partition_id] = partition
+            self._next_partition_id += 1
+        return partition_id
+
+    def _release_partition(self, index: int) -> None:
+        """Drop the partition of a slot about to be overwritten from the index if it was its last entry."""
+        partition_id = int(self._partition_ids[index])
+        self._partition_ids[index] = -1
+        if partition_id >= 0 and not np.any(self._partition_ids[:self._size] == partition_id):
+            del self._partition_index[self._partition_names.pop(partition_id)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._init_index(self.embedder)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = self._size
+            partitions = len(self._partition_index)
+            samples = sorted(self._similarities)
+        lookups = counters["hits"] + counters["misses"]
+        similarity = {"avg": 0.0, "p50": 0.0, "p90": 0.0, "max": 0.0}
+        if samples:
+            similarity = {
+                "avg": round(sum(samples) / len(samples), 4),
+                "p50": round(samples[int(0.5 * (len(samples) - 1))], 4),
+                "p90": round(samples[int(0.9 * (len(samples) - 1))], 4),
+                "max": round(samples[-1], 4),
+            }
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": size,
+            "partitions": partitions,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "similarity": similarity,
+        }
+
+
+# Global semantic cache
+semantic_cache = SemanticCache()
@@ -9,8 +9,8 @@ from pymongo.collection import Collection
 import time
 import logging
 
-from models.collaboration import WorkflowChange, CollaborationUser, NodeLock
-from config.database import get_database, get_workflows_collection
+from server.models.collaboration import WorkflowChange, CollaborationUser, NodeLock
+from server.config.database import get_database, get_workflows_collection
 
 logger = logging.getLogger(__name__)
 
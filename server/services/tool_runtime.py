@@ -0,0 +1,159 @@
+"""
+Tool runtime for agent nodes.
+
+에이전트 도구 결과를 도구별 캐시 정책(TTL, 키로 사용할 인자)에 따라 재사용하고,
+AgentExecutor를 비동기 경로로 실행해 한 턴에서 모델이 요청한 여러 도구 호출을
+동시에 처리합니다 (동기 도구는 스레드 풀에서 실행).
+
+도구 캐시 정책 예: {"enabled": true, "ttlSeconds": 300, "keyArgs": ["query"], "maxEntries": 256}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from server.services.execution_metrics import tool_cache_requests_total
+from server.utils.tracing import set_tool_attribute
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_TOOLS_ENABLED = os.getenv("LANGSTAR_PARALLEL_TOOLS", "on").lower() in ("1", "true", "on")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("LANGSTAR_TOOL_CACHE_MAX_ENTRIES", "2048"))
+
+
+@dataclass
+class ToolCachePolicy:
+    """Caching policy for one tool."""
+    ttl_seconds: float = 300.0
+    key_args: Optional[List[str]] = None  # None이면 모든 인자를 키로 사용
+    max_entries: int = 256
+
+    @classmethod
+    def from_config(cls, config: Any) -> Optional["ToolCachePolicy"]:
+        """Build a policy from tool config ({"enabled", "ttlSeconds", "keyArgs", "maxEntries"})."""
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        if not isinstance(config, dict) or not config.get("enabled", True):
+            return None
+        return cls(
+            ttl_seconds=float(config.get("ttlSeconds", config.get("ttl", 300.0))),
+            key_args=config.get("keyArgs"),
+            max_entries=int(config.get("maxEntries", 256)),
+        )
+
+
+class ToolResultCache:
+    """Per-tool LRU caches of tool results with TTL."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            entries = self._entries.get(namespace)
+            entry = entries.get(key) if entries else None
+            if entry is not None and entry[0] > now:
+                entries.move_to_end(key)
+                stats["hits"] += 1
+                tool_cache_requests_total.labels("hit").inc()
+                return True, entry[1]
+            if entry is not None:
+                del entries[key]
+            stats["misses"] += 1
+            tool_cache_requests_total.labels("miss").inc()
+            return False, None
+
+    def set(self, namespace: str, key: str, value: Any, policy: ToolCachePolicy) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entries[key] = (time.time() + policy.ttl_seconds, value)
+            entries.move_to_end(key)
+            while len(entries) > min(policy.max_entries, self.max_entries):
+                entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                namespace: {**stats, "entries": len(self._entries.get(namespace, {}))}
+                for namespace, stats in self._stats.items()
+            }
+
+
+def _argument_key(kwargs: Dict[str, Any], key_args: Optional[List[str]]) -> str:
+    if key_args is not None:
+        kwargs = {name: kwargs.get(name) for name in key_args}
+    return json.dumps(kwargs, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def memoize_tool(tool: BaseTool, policy: Any = None, namespace: str = "") -> BaseTool:
+    """
+    Wrap a StructuredTool so its results are reused according to ``policy``.
+
+    Args:
+        tool: Tool created with StructuredTool.from_function
+        policy: ToolCachePolicy or tool cache config dict (None: no caching)
+        namespace: Extra cache namespace, e.g. a hash of the tool source
+
+    Returns:
+        The memoized tool, or the original tool when caching is off
+    """
+    if not isinstance(policy, ToolCachePolicy):
+        policy = ToolCachePolicy.from_config(policy)
+    if policy is None or not isinstance(tool, StructuredTool) or tool.func is None:
+        return tool
+
+    func = tool.func
+    cache_namespace = f"{tool.name}:{namespace}" if namespace else tool.name
+
+    def memoized(*args, **kwargs):
+        arguments = {**{f"_{index}": value for index, value in enumerate(args)}, **kwargs}
+        key = _argument_key(arguments, policy.key_args)
+        hit, value = tool_result_cache.get(cache_namespace, key)
+        set_tool_attribute("langstar.tool.cache_hit", hit)
+        if hit:
+            return value
+        value = func(*args, **kwargs)
+        tool_result_cache.set(cache_namespace, key, value, policy)
+        return value
+
+    return StructuredTool.from_function(
+        func=memoized,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        return_direct=tool.return_direct,
+    )
+
+
+def source_namespace(code: str) -> str:
+    """도구 코드가 바뀌면 이전 결과를 쓰지 않도록 코드 해시를 네임스페이스로 사용"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+
+
+def runs_tools_in_parallel(runnable: Any) -> bool:
+    """AgentExecutor(도구 포함)는 비동기 경로로 실행해 도구 호출을 동시에 처리한다"""
+    return PARALLEL_TOOLS_ENABLED and hasattr(runnable, "agent") and bool(getattr(runnable, "tools", None))
+
+
+# Global tool result cache
+tool_result_cache = ToolResultCache()
@@ -3,6 +3,7 @@ WebSocket Manager for handling WebSocket connections and message routing.
 Manages active connections and broadcasts messages to workflow participants.
 """
 
+import asyncio
 import json
 from typing import Dict, Optional, List
 from fastapi import WebSocket
@@ -13,6 +14,11 @@ from server.services.monitoring_service import monitoring_service
 logger = setup_logger()
 
 
+def serialize_message(message: dict) -> str:
+    """Serialize a message once to the JSON text sent on the wire (same format as WebSocket.send_json)."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
 class WebSocketManager:
     """Manages WebSocket connections and message routing"""
     
@@ -21,6 +27,8 @@ class WebSocketManager:
         self.active_connections: Dict[str, WebSocket] = {}
         # Map of user_id to session information
         self.user_sessions: Dict[str, SessionInfo] = {}
+        # Map of workflow_id to {user_id: WebSocket} (브로드캐스트 대상 인덱스)
+        self.workflow_connections: Dict[str, Dict[str, WebSocket]] = {}
     
     async def connect(self, websocket: WebSocket, user_id: str, workflow_id: str):
         """
@@ -32,11 +40,14 @@ class WebSocketManager:
             workflow_id: The workflow ID
         """
         await websocket.accept()
+        # 같은 user_id가 다른 워크플로우로 다시 접속하면 이전 워크플로우 인덱스에서 뺀다
+        self._remove_from_workflow(user_id)
         self.active_connections[user_id] = websocket
         self.user_sessions[user_id] = SessionInfo(
             user_id=user_id,
             workflow_id=workflow_id
         )
+        self.workflow_connections.setdefault(workflow_id, {})[user_id] = websocket
         
         logger.info(
             f"WebSocket connected: user={user_id}, workflow={workflow_id}, "
@@ -61,6 +72,7 @@ class WebSocketManager:
         
         if user_id in self.user_sessions:
             workflow_id = self.user_sessions[user_id].workflow_id
+            self._remove_from_workflow(user_id)
             del self.user_sessions[user_id]
             
             logger.info(
@@ -68,6 +80,17 @@ class WebSocketManager:
                 f"remaining_connections={len(self.active_connections)}"
             )
     
+    def _remove_from_workflow(self, user_id: str):
+        """Remove a user from the workflow index (빈 워크플로우 항목도 지운다)"""
+        session = self.user_sessions.get(user_id)
+        if session is None:
+            return
+        connections = self.workflow_connections.get(session.workflow_id)
+        if connections is not None:
+            connections.pop(user_id, None)
+            if not connections:
+                del self.workflow_connections[session.workflow_id]
+    
     async def send_personal_message(self, message: dict, user_id: str):
         """
         Send a message to a specific user.
@@ -80,12 +103,34 @@ class WebSocketManager:
             logger.warning(f"Cannot send message to user {user_id}: not connected")
             return
         
-        websocket = self.active_connections[user_id]
-        workflow_id = self.get_user_workflow(user_id)
-        message_type = message.get('type', 'unknown')
+        await self._send(
+            user_id,
+            self.active_connections[user_id],
+            serialize_message(message),
+            message.get('type', 'unknown'),
+            self.get_user_workflow(user_id)
+        )
+    
+    async def _send(
+        self,
+        user_id: str,
+        websocket: WebSocket,
+        payload: str,
+        message_type: str,
+        workflow_id: Optional[str]
+    ):
+        """
+        Send an already serialized message to one connection.
         
+        Args:
+            user_id: The target user ID
+            websocket: The target connection
+            payload: JSON text to send
+            message_type: Message type (for logging and metrics)
+            workflow_id: The user's workflow ID
+        """
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(payload)
             logger.debug(f"Sent message to user {user_id}: {message_type}")
             
             # Log message sent
@@ -94,7 +139,7 @@ class WebSocketManager:
                     message_type=message_type,
                     workflow_id=workflow_id,
                     user_id=user_id,
-                    message_size=len(json.dumps(message))
+                    message_size=len(payload)
                 )
         except Exception as e:
             logger.error(f"Error sending message to user {user_id}: {e}")
@@ -106,8 +151,9 @@ class WebSocketManager:
                     error_message=str(e),
                     user_id=user_id
                 )
-            # Connection might be broken, disconnect
-            await self.disconnect(user_id)
+            # Connection might be broken, disconnect (다시 접속한 새 연결은 끊지 않는다)
+            if self.active_connections.get(user_id) is websocket:
+                await self.disconnect(user_id)
     
     async def broadcast_to_workflow(
         self, 
@@ -118,30 +164,37 @@ class WebSocketManager:
         """
         Broadcast a message to all users in a workflow.
         
+        The message is serialized once and sent to all recipients concurrently,
+        so a slow connection does not delay the others.
+        
         Args:
             message: The message to broadcast (will be JSON serialized)
             workflow_id: The workflow ID
             exclude_user: Optional user ID to exclude from broadcast
         """
-        # Find all users in this workflow
-        target_users = [
-            user_id 
-            for user_id, session in self.user_sessions.items()
-            if session.workflow_id == workflow_id and user_id != exclude_user
+        # 워크플로우 인덱스에서 대상을 찾는다 (전송 중 접속/해제가 생겨도 안전하도록 복사)
+        connections = self.workflow_connections.get(workflow_id, {})
+        targets = [
+            (user_id, websocket)
+            for user_id, websocket in connections.items()
+            if user_id != exclude_user
         ]
         
-        if not target_users:
+        if not targets:
             logger.debug(f"No users to broadcast to in workflow {workflow_id}")
             return
         
+        message_type = message.get('type', 'unknown')
         logger.debug(
-            f"Broadcasting message to {len(target_users)} users in workflow {workflow_id}: "
-            f"{message.get('type', 'unknown')}"
+            f"Broadcasting message to {len(targets)} users in workflow {workflow_id}: {message_type}"
         )
         
-        # Send to all target users
-        for user_id in target_users:
-            await self.send_personal_message(message, user_id)
+        # Serialize once, send to all target users concurrently
+        payload = serialize_message(message)
+        await asyncio.gather(*(
+            self._send(user_id, websocket, payload, message_type, workflow_id)
+            for user_id, websocket in targets
+        ))
     
     def get_workflow_users(self, workflow_id: str) -> List[str]:
         """
@@ -153,11 +206,7 @@ class WebSocketManager:
         Returns:
             List of user IDs
         """
-        return [
-            user_id 
-            for user_id, session in self.user_sessions.items()
-            if session.workflow_id == workflow_id
-        ]
+        return list(self.workflow_connections.get(workflow_id, {}))
     
     def is_connected(self, user_id: str) -> bool:
         """
@@ -19,6 +19,12 @@ import traceback
 from typing import Dict, Any, Optional
 from langchain_core.tools import StructuredTool
 from server.services.code_export import templates, utile
+from server.services.llm_gateway import invoke_llm
+from server.services.llm_cache import use_cache_options
+from server.services.llm_resilience import use_resilience_options
+from server.services.llm_router import use_routing_options
+from server.services.tool_runtime import memoize_tool, source_namespace
+from server.services.code_sandbox import sandbox_enabled, sandbox_pool
 from server.services.code_excute import flower_manager
 from server.models import workflow
 from fastapi import HTTPException
@@ -61,7 +67,7 @@ def run_bedrock(modelName, temperature, max_token, system_prompt, user_prompt, m
         ])
        
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt})
+        response = invoke_llm(chain, {"user_prompt": user_prompt})
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     # 메모리 있어
@@ -73,7 +79,7 @@ def run_bedrock(modelName, temperature, max_token, system_prompt, user_prompt, m
         ])
         
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt, "history": memory.chat_memory.messages})
+        response = invoke_llm(chain, {"user_prompt": user_prompt, "history": memory.chat_memory.messages})
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     # 도구 있어
@@ -88,7 +94,7 @@ def run_bedrock(modelName, temperature, max_token, system_prompt, user_prompt, m
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
         
         # 안전한 response 파싱
         try:
@@ -120,7 +126,7 @@ def run_bedrock(modelName, temperature, max_token, system_prompt, user_prompt, m
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False, memory=memory)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
         
         # 안전한 response 파싱
         try:
@@ -159,7 +165,7 @@ def run_openai(modelName, temperature, max_token, system_prompt, user_prompt, me
         ])
        
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt})
+        response = invoke_llm(chain, {"user_prompt": user_prompt})
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     # 메모리 있어
@@ -171,7 +177,7 @@ def run_openai(modelName, temperature, max_token, system_prompt, user_prompt, me
         ])
         
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt, "history": memory.chat_memory.messages})
+        response = invoke_llm(chain, {"user_prompt": user_prompt, "history": memory.chat_memory.messages})
 
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
@@ -186,7 +192,7 @@ def run_openai(modelName, temperature, max_token, system_prompt, user_prompt, me
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
 
         # 안전한 response 파싱
         try:
@@ -218,7 +224,7 @@ def run_openai(modelName, temperature, max_token, system_prompt, user_prompt, me
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False, memory=memory)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
         
         # 안전한 response 파싱
         try:
@@ -257,7 +263,7 @@ def run_google(modelName, temperature, max_token, system_prompt, user_prompt, me
         ])
        
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt})
+        response = invoke_llm(chain, {"user_prompt": user_prompt})
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
     # 메모리 있어
@@ -269,7 +275,7 @@ def run_google(modelName, temperature, max_token, system_prompt, user_prompt, me
         ])
         
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt, "history": memory.chat_memory.messages})
+        response = invoke_llm(chain, {"user_prompt": user_prompt, "history": memory.chat_memory.messages})
 
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
@@ -284,7 +290,7 @@ def run_google(modelName, temperature, max_token, system_prompt, user_prompt, me
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
 
         # Google 모델 전용 응답 파싱
         try:
@@ -313,7 +319,7 @@ def run_google(modelName, temperature, max_token, system_prompt, user_prompt, me
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False, memory=memory)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
         
         # Google 모델 전용 응답 파싱
         try:
@@ -351,7 +357,7 @@ def run_anthropic(modelName, temperature, max_token, system_prompt, user_prompt,
         ])
 
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt})
+        response = invoke_llm(chain, {"user_prompt": user_prompt})
 
         
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
@@ -366,7 +372,7 @@ def run_anthropic(modelName, temperature, max_token, system_prompt, user_prompt,
         ])
         
         chain = prompt | llm
-        response = chain.invoke({"user_prompt": user_prompt, "history": memory.chat_memory.messages})
+        response = invoke_llm(chain, {"user_prompt": user_prompt, "history": memory.chat_memory.messages})
 
         return response.content if hasattr(response, 'content') else str(response).encode('utf-8', errors='ignore').decode('utf-8')
 
@@ -381,7 +387,7 @@ def run_anthropic(modelName, temperature, max_token, system_prompt, user_prompt,
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
 
         # Anthropic 모델 전용 응답 파싱
         try:
@@ -417,7 +423,7 @@ def run_anthropic(modelName, temperature, max_token, system_prompt, user_prompt,
         tools = [WorkflowService.create_tool_from_api(**tool) for tool in tool_info]
         agent = create_tool_calling_agent(llm, tools, prompt)
         agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False, memory=memory)
-        response = agent_executor.invoke( {'user_prompt' : user_prompt} )
+        response = invoke_llm(agent_executor, {'user_prompt': user_prompt})
 
         logger.info("--------------------------------")
         logger.info("--------------------------------")
@@ -520,11 +526,16 @@ class WorkflowService:
                 return {"error": error_msg}
 
             function_name = func_def.name
-            exec_globals = {}
-            
-            exec(python_code, exec_globals)
-            func = exec_globals[function_name]
-            result = func(**insert_pram)
+            if sandbox_enabled(msg.get("sandbox")):
+                # 워커 프로세스에서 실행 (제한 시간/CPU/메모리 제한)
+                result, timing = sandbox_pool.run(python_code, function_name, kwargs=insert_pram)
+                logger.info(f"User node sandboxed: queue {timing.queue_ms}ms, exec {timing.exec_ms}ms")
+            else:
+                exec_globals = {}
+
+                exec(python_code, exec_globals)
+                func = exec_globals[function_name]
+                result = func(**insert_pram)
             logger.info(f"Python node processed successfully with function: {function_name}")
             return result
         except Exception as e:
@@ -549,11 +560,16 @@ class WorkflowService:
                 return {"error": error_msg}
 
             function_name = func_def.name
-            exec_globals = {}
-            
-            exec(python_code, exec_globals)
-            func = exec_globals[function_name]
-            result = func(param)
+            if sandbox_enabled(msg.get("sandbox")):
+                # 워커 프로세스에서 실행 (제한 시간/CPU/메모리 제한)
+                result, timing = sandbox_pool.run(python_code, function_name, args=(param,))
+                logger.info(f"Python node sandboxed: queue {timing.queue_ms}ms, exec {timing.exec_ms}ms")
+            else:
+                exec_globals = {}
+
+                exec(python_code, exec_globals)
+                func = exec_globals[function_name]
+                result = func(param)
             logger.info(f"Python node processed successfully with function: {function_name}")
             return result
         except Exception as e:
@@ -611,8 +627,8 @@ class WorkflowService:
         return workflow.FlowerListResponse(available_flowers=flowers)
 
     @staticmethod
-    def create_tool_from_api(tool_name: str, tool_description: str, tool_code: str) -> Tool:
-        """Create LangChain Tool from API string"""
+    def create_tool_from_api(tool_name: str, tool_description: str, tool_code: str, tool_cache: Optional[Dict[str, Any]] = None) -> Tool:
+        """Create LangChain Tool from API string (tool_cache가 있으면 결과를 재사용)"""
         try:
             logger.info(f"Creating tool: {tool_name}")
             tool_namespace = {}
@@ -635,6 +651,7 @@ class WorkflowService:
                 description=tool_description,
                 func=tool_func
             )
+            tool = memoize_tool(tool, tool_cache, namespace=source_namespace(tool_code))
             logger.info(f"Tool {tool_name} created successfully")
             return tool
         except Exception as e:
@@ -855,56 +872,59 @@ def evaluate_condition({argument_name}):
 
                 
                 
-            if msg['model']['providerName'] == 'aws' : 
-                # AWS 자격 증명 정보 추출
-                aws_access_key_id = msg['model'].get('accessKeyId')
-                aws_secret_access_key = msg['model'].get('secretAccessKey')
-                aws_region = msg['model'].get('region')
+            # 노드 캐시 설정 (정확히 같은 요청은 응답 캐시에서 반환), 복원력 정책 (제한 시간, 재시도, 헤징), 대체 모델 라우팅
+            with use_cache_options(msg.get('cache')), use_resilience_options(msg.get('resilience')), \
+                    use_routing_options(msg.get('routing')):
+                if msg['model']['providerName'] == 'aws' : 
+                    # AWS 자격 증명 정보 추출
+                    aws_access_key_id = msg['model'].get('accessKeyId')
+                    aws_secret_access_key = msg['model'].get('secretAccessKey')
+                    aws_region = msg['model'].get('region')
                 
-                # AWS 자격 증명 검증
-                if not aws_access_key_id:
-                    raise ValueError("AWS Access Key ID is required for AWS Bedrock models")
-                if not aws_secret_access_key:
-                    raise ValueError("AWS Secret Access Key is required for AWS Bedrock models")
-                if not aws_region:
-                    raise ValueError("AWS Region is required for AWS Bedrock models")
+                    # AWS 자격 증명 검증
+                    if not aws_access_key_id:
+                        raise ValueError("AWS Access Key ID is required for AWS Bedrock models")
+                    if not aws_secret_access_key:
+                        raise ValueError("AWS Secret Access Key is required for AWS Bedrock models")
+                    if not aws_region:
+                        raise ValueError("AWS Region is required for AWS Bedrock models")
                 
-                return run_bedrock(
-                    modelName, temperature, max_token, 
-                    system_prompt, user_prompt, memory, tools,
-                    aws_access_key_id, aws_secret_access_key, aws_region
-                )
+                    return run_bedrock(
+                        modelName, temperature, max_token, 
+                        system_prompt, user_prompt, memory, tools,
+                        aws_access_key_id, aws_secret_access_key, aws_region
+                    )
                 
-            elif msg['model']['providerName'] == 'openai' : 
-                api_key = msg['model'].get('apiKey')
-                if not api_key:
-                    raise ValueError("OpenAI API key is required")
+                elif msg['model']['providerName'] == 'openai' : 
+                    api_key = msg['model'].get('apiKey')
+                    if not api_key:
+                        raise ValueError("OpenAI API key is required")
                 
-                return run_openai(
-                    modelName, temperature, max_token, 
-                    system_prompt, user_prompt, memory, tools, api_key
-                ) 
+                    return run_openai(
+                        modelName, temperature, max_token, 
+                        system_prompt, user_prompt, memory, tools, api_key
+                    ) 
 
 
-            elif msg['model']['providerName'] == 'google' : 
-                api_key = msg['model'].get('apiKey')
-                if not api_key:
-                    raise ValueError("Google API key is required")
+                elif msg['model']['providerName'] == 'google' : 
+                    api_key = msg['model'].get('apiKey')
+                    if not api_key:
+                        raise ValueError("Google API key is required")
                 
-                return run_google(
-                    modelName, temperature, max_token, 
-                    system_prompt, user_prompt, memory, tools, api_key
-                ) 
-
-            elif msg['model']['providerName'] == 'anthropic' : 
-                api_key = msg['model'].get('apiKey')
-                if not api_key:
-                    raise ValueError("Anthropic API key is required")
+                    return run_google(
+                        modelName, temperature, max_token, 
+                        system_prompt, user_prompt, memory, tools, api_key
+                    ) 
+
+                elif msg['model']['providerName'] == 'anthropic' : 
+                    api_key = msg['model'].get('apiKey')
+                    if not api_key:
+                        raise ValueError("Anthropic API key is required")
                 
-                return run_anthropic(
-                    modelName, temperature, max_token, 
-                    system_prompt, user_prompt, memory, tools, api_key
-                ) 
+                    return run_anthropic(
+                        modelName, temperature, max_token, 
+                        system_prompt, user_prompt, memory, tools, api_key
+                    ) 
 
         except Exception as e: 
             error_msg = f"Error in agent node processing: {str(e)}"
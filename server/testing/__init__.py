@@ -0,0 +1 @@
+# Testing helpers package 
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Local fake LLM provider for tests and load runs.
+
+OpenAI 호환 /v1/chat/completions, Anthropic /v1/messages, Bedrock /model/{modelId}/converse
+엔드포인트를 로컬 스레드 서버로 띄웁니다. 받은 요청 본문은 payloads에 남고, 캐시 표시
+(cache_control, cachePoint)가 있는 요청은 프리픽스 캐시 쓰기/읽기 토큰을 응답 usage에 보고합니다.
+응답 지연(요청 번호별 지정 가능), 분당 요청 한도, 처음 N개 요청에 대한 429 응답(retry-after 헤더 포함),
+5xx 오류를 설정할 수 있어 실제 API 키 없이 스케줄러, 재시도, 부하 테스트를 재현할 수 있습니다.
+OpenAI 스트리밍 요청(stream=true)에는 같은 응답을 SSE 청크로 보냅니다.
+tool_calls=True이면 OpenAI 요청에 도구가 있고 아직 도구 결과가 없을 때 첫 번째 도구를 호출하는
+응답(스키마의 필수 인자를 결정적인 값으로 채움)을 돌려주어 도구 에이전트 루프를 한 번 돌게 합니다.
+
+    with FakeProvider(latency=0.05, fail_first=2) as provider:
+        llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", max_retries=0)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+
+class FakeProvider:
+    """
+    Fake OpenAI / Anthropic / Bedrock Converse server on localhost.
+
+    Args:
+        latency: Seconds to wait before answering, or a function of the 1-based request number
+        rpm: Requests allowed per rolling minute (None = unlimited)
+        fail_first: Number of initial requests answered with 429
+        retry_after: Value of the retry-after header on 429 responses
+        errors: Number of upcoming requests answered with ``error_status``
+        error_status: HTTP status used for injected errors
+        tool_calls: Answer OpenAI requests that carry tools with a call to the first tool
+    """
+
+    def __init__(self, latency: Union[float, Callable[[int], float]] = 0.0, rpm: Optional[int] = None,
+                 fail_first: int = 0, retry_after: float = 1.0, errors: int = 0, error_status: int = 503,
+                 tool_calls: bool = False):
+        self.latency = latency
+        self.rpm = rpm
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.errors = errors
+        self.error_status = error_status
+        self.tool_calls = tool_calls
+        self.requests = 0
+        self.rate_limited = 0
+        self.active = 0
+        self.peak_concurrency = 0
+        self.payloads: List[Dict[str, Any]] = []
+        self._cached_prefixes: Set[str] = set()
+        self._accepted: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.root_url}/v1"
+
+    def start(self) -> "FakeProvider":
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload, headers = provider._handle(self.path, body)
+                if status == 200 and body.get("stream") and payload.get("object") == "chat.completion":
+                    # OpenAI 스트리밍 요청 (AgentExecutor 등): 같은 응답을 SSE 청크로 보낸다
+                    data = "".join(
+                        f"data: {json.dumps(chunk)}\n\n" for chunk in provider._stream_chunks(payload, body)
+                    ).encode("utf-8") + b"data: [DONE]\n\n"
+                    self.send_response(status)
+                    self.send_header("content-type", "text/event-stream")
+                    self.send_header("content-length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeProvider":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _admit(self) -> Tuple[Optional[int], int]:
+        """Return (error status or None to answer it, 1-based request number)."""
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+            if number <= self.fail_first:
+                self.rate_limited += 1
+                return 429, number
+            if self.errors > 0:
+                self.errors -= 1
+                return self.error_status, number
+            while self._accepted and now - self._accepted[0] >= 60:
+                self._accepted.popleft()
+            if self.rpm is not None and len(self._accepted) >= self.rpm:
+                self.rate_limited += 1
+                return 429, number
+            self._accepted.append(now)
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+            return None, number
+
+    def _cache_usage(self, body: Dict[str, Any]) -> Tuple[int, int]:
+        """캐시 표시가 있으면 마지막 사용자 메시지 앞까지를 프리픽스로 보고 (쓰기, 읽기) 토큰을 계산"""
+        serialized = json.dumps(body, sort_keys=True)
+        if "cache_control" not in serialized and "cachePoint" not in serialized:
+            return 0, 0
+        prefix = {key: value for key, value in body.items() if key not in ("messages", "max_tokens", "inferenceConfig")}
+        prefix["messages"] = (body.get("messages") or [])[:-1]
+        text = json.dumps(prefix, sort_keys=True)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        tokens = len(text) // 4 + 1
+        with self._lock:
+            if digest in self._cached_prefixes:
+                return 0, tokens
+            self._cached_prefixes.add(digest)
+        return tokens, 0
+
+    def _handle(self, path: str, body: Dict[str, Any]):
+        with self._lock:
+            self.payloads.append(body)
+        status, number = self._admit()
+        if status == 429:
+            headers = {
+                "retry-after": str(self.retry_after),
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": f"{self.retry_after}s",
+            }
+            error = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            return 429, error, headers
+        if status is not None:
+            return status, {"error": {"message": "Service unavailable", "type": "server_error"}}, {}
+
+        try:
+            time.sleep(self.latency(number) if callable(self.latency) else self.latency)
+            messages = body.get("messages") or [{}]
+            prompt = self._text(messages[-1].get("content", ""))
+            reply = f"echo: {prompt}"
+            prompt_tokens = len(json.dumps(body)) // 4 + 1
+            completion_tokens = len(reply) // 4 + 1
+            if path.startswith("/model/"):
+                return 200, self._bedrock_response(body, reply, prompt_tokens, completion_tokens), {}
+            if path.endswith("/messages"):
+                return 200, self._anthropic_response(body, reply, number, prompt_tokens, completion_tokens), {}
+            message: Dict[str, Any] = {"role": "assistant", "content": reply}
+            finish_reason = "stop"
+            tool_call = self._tool_call(body, number)
+            if tool_call is not None:
+                message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+                finish_reason = "tool_calls"
+            return 200, {
+                "id": f"chatcmpl-fake-{number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }, {}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    # 도구 스키마 타입별 결정적인 인자 값
+    _ARGUMENT_VALUES = {"string": "fake", "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+
+    def _tool_call(self, body: Dict[str, Any], number: int) -> Optional[Dict[str, Any]]:
+        """첫 번째 도구 호출 (도구가 없거나 이미 도구 결과를 받았으면 None)"""
+        tools = body.get("tools") or []
+        messages = body.get("messages") or []
+        if not self.tool_calls or not tools or any(message.get("role") == "tool" for message in messages):
+            return None
+        function = tools[0].get("function", {})
+        parameters = function.get("parameters") or {}
+        properties = parameters.get("properties") or {}
+        arguments = {
+            name: self._ARGUMENT_VALUES.get(properties.get(name, {}).get("type"), "fake")
+            for name in parameters.get("required") or []
+        }
+        return {
+            "id": f"call_fake_{number}",
+            "type": "function",
+            "function": {"name": function.get("name", "tool"), "arguments": json.dumps(arguments)},
+        }
+
+    @staticmethod
+    def _stream_chunks(payload: Dict[str, Any], body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split a chat completion into OpenAI stream chunks (내용/도구 호출, 종료 이유, 요청 시 usage)."""
+        choice = payload["choices"][0]
+        message = choice["message"]
+        delta: Dict[str, Any] = {"role": "assistant", "content": message.get("content") or ""}
+        if message.get("tool_calls"):
+            delta["tool_calls"] = [{"index": index, **call} for index, call in enumerate(message["tool_calls"])]
+        base = {key: payload[key] for key in ("id", "created", "model")}
+        chunks = [
+            {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+            {**base, "object": "chat.completion.chunk",
+             "choices": [{"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}]},
+        ]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": payload["usage"]})
+        return chunks
+
+    @staticmethod
+    def _text(content: Any) -> str:
+        if isinstance(content, str):
+            return content
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+    def _anthropic_response(self, body: Dict[str, Any], reply: str, number: int, prompt_tokens: int,
+                            completion_tokens: int) -> Dict[str, Any]:
+        cache_write, cache_read = self._cache_usage(body)
+        return {
+            "id": f"msg_fake_{number}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": reply}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": max(1, prompt_tokens - cache_write - cache_read),
+                "output_tokens": completion_tokens,
+                "cache_creation_input_tokens": cache_write,
+                "cache_read_input_tokens": cache_read,
+            },
+        }
+
+    def _bedrock_response(self, body: Dict[str, Any], reply: str, prompt_tokens: int,
+                          completion_tokens: int) -> Dict[str, Any]:
+        cache_write, cache_read = self._cache_usage(body)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": reply}]}},
+            "stopReason": "end_turn",
+            "usage": {
+                "inputTokens": prompt_tokens,
+                "outputTokens": completion_tokens,
+                "totalTokens": prompt_tokens + completion_tokens,
+                "cacheReadInputTokens": cache_read,
+                "cacheWriteInputTokens": cache_write,
+            },
+            "metrics": {"latencyMs": 1},
+        }
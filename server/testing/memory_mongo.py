@@ -0,0 +1,209 @@
+"""
+In-process MongoDB stand-in for tests and benchmarks.
+
+서버가 사용하는 pymongo 컬렉션 API의 일부(find/find_one/insert_one/update_one/replace_one/
+delete_one/delete_many, find().sort())만 구현합니다. 문서는 저장/조회 시 깊은 복사되므로
+실제 드라이버처럼 호출자가 받은 객체를 고쳐도 저장된 문서가 바뀌지 않습니다.
+필터는 동등 비교만 지원하며, 점 경로("nodes.id")는 배열 원소까지 펼쳐 비교합니다.
+update_one은 $set(위치 연산자 "nodes.$.position" 포함), $push, $pull을 지원합니다.
+
+    with use_memory_mongo() as db:
+        deployment_service.create_deployment(form, workflow)
+        db["deployments"].find_one({"id": ...})
+"""
+
+import copy
+import itertools
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from server.config.database import mongodb
+
+_ids = itertools.count(1)
+
+
+def _path_values(document: Any, path: str) -> List[Any]:
+    """점 경로가 가리키는 값들 (중간의 배열은 원소마다 펼친다)"""
+    values = [document]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            items = value if isinstance(value, list) else [value]
+            found.extend(item[part] for item in items if isinstance(item, dict) and part in item)
+        values = found
+    return values
+
+
+def _matches(document: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, value in (query or {}).items():
+        if "." not in key:
+            if document.get(key) != value:
+                return False
+        elif value not in _path_values(document, key):
+            return False
+    return True
+
+
+def _set_path(document: Dict[str, Any], path: str, value: Any, query: Dict[str, Any]) -> None:
+    """점 경로에 값을 쓴다 ("$"는 필터와 일치한 첫 배열 원소의 위치)"""
+    parts = path.split(".")
+    target: Any = document
+    for index, part in enumerate(parts):
+        if part == "$":
+            prefix = ".".join(parts[:index]) + "."
+            conditions = {key[len(prefix):]: expected for key, expected in query.items() if key.startswith(prefix)}
+            part = next(str(position) for position, item in enumerate(target)
+                        if all(expected in _path_values(item, key) for key, expected in conditions.items()))
+        last = index == len(parts) - 1
+        if isinstance(target, list):
+            if last:
+                target[int(part)] = value
+            else:
+                target = target[int(part)]
+        elif last:
+            target[part] = value
+        else:
+            target = target.setdefault(part, {})
+
+
+def _apply_update(document: Dict[str, Any], query: Dict[str, Any], update: Dict[str, Any]) -> None:
+    for path, value in update.get("$set", {}).items():
+        _set_path(document, path, copy.deepcopy(value), query)
+    for field, value in update.get("$push", {}).items():
+        document.setdefault(field, []).append(copy.deepcopy(value))
+    for field, condition in update.get("$pull", {}).items():
+        document[field] = [item for item in document.get(field, []) if not (
+            _matches(item, condition) if isinstance(condition, dict) and isinstance(item, dict) else item == condition)]
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    document = copy.deepcopy(document)
+    if not projection:
+        return document
+    excluded = [key for key, value in projection.items() if not value]
+    included = [key for key, value in projection.items() if value]
+    if included:
+        document = {key: document[key] for key in included + ["_id"] if key in document}
+    for key in excluded:
+        document.pop(key, None)
+    return document
+
+
+class MemoryCursor:
+    """Result of ``find`` (iterable, supports ``sort`` and ``limit``)."""
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+
+    def sort(self, key: str, direction: int = 1) -> "MemoryCursor":
+        self._documents.sort(key=lambda document: (document.get(key) is None, document.get(key)), reverse=direction < 0)
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._documents)
+
+
+class MemoryCollection:
+    """Thread-safe list of documents with the pymongo calls the services use."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> MemoryCursor:
+        with self._lock:
+            return MemoryCursor([_project(doc, projection) for doc in self.documents if _matches(doc, query)])
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None,
+                 projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            document = next((doc for doc in self.documents if _matches(doc, query)), None)
+            return _project(document, projection) if document is not None else None
+
+    def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        stored = copy.deepcopy(document)
+        stored.setdefault("_id", f"mem-{next(_ids)}")
+        with self._lock:
+            self.documents.append(stored)
+        return SimpleNamespace(inserted_id=stored["_id"], acknowledged=True)
+
+    def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> SimpleNamespace:
+        with self._lock:
+            document = next((doc for doc in self.documents if _matches(doc, query)), None)
+            if document is not None:
+                before = copy.deepcopy(document)
+                _apply_update(document, query, update)
+                # 실제 MongoDB처럼 값이 바뀌지 않은 갱신은 modified_count 0
+                return SimpleNamespace(matched_count=1, modified_count=int(document != before), upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        inserted = self.insert_one({**query, **copy.deepcopy(update.get("$set", {}))})
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=inserted.inserted_id)
+
+    def replace_one(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool = False) -> SimpleNamespace:
+        replacement = copy.deepcopy(document)
+        with self._lock:
+            for index, existing in enumerate(self.documents):
+                if _matches(existing, query):
+                    replacement.setdefault("_id", existing.get("_id"))
+                    self.documents[index] = replacement
+                    return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        inserted = self.insert_one(replacement)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=inserted.inserted_id)
+
+    def delete_one(self, query: Dict[str, Any]) -> SimpleNamespace:
+        with self._lock:
+            for index, existing in enumerate(self.documents):
+                if _matches(existing, query):
+                    del self.documents[index]
+                    return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def delete_many(self, query: Dict[str, Any]) -> SimpleNamespace:
+        with self._lock:
+            kept = [doc for doc in self.documents if not _matches(doc, query)]
+            deleted = len(self.documents) - len(kept)
+            self.documents = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    def count_documents(self, query: Optional[Dict[str, Any]] = None) -> int:
+        with self._lock:
+            return sum(1 for doc in self.documents if _matches(doc, query))
+
+    def create_index(self, keys: Any, **kwargs: Any) -> str:
+        """인덱스는 만들지 않는다 (init_database 호환용)"""
+        return str(keys)
+
+
+class MemoryDatabase:
+    """``db[name]`` returns (and creates) an in-memory collection."""
+
+    def __init__(self):
+        self.collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(name)
+        return self.collections[name]
+
+
+@contextmanager
+def use_memory_mongo(database: Optional[MemoryDatabase] = None) -> Iterator[MemoryDatabase]:
+    """Point the global MongoDB connection at an in-memory database for the enclosed block."""
+    database = database or MemoryDatabase()
+    previous = mongodb._db
+    mongodb._db = database
+    try:
+        yield database
+    finally:
+        mongodb._db = previous
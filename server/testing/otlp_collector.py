@@ -0,0 +1,126 @@
+"""
+Local OTLP/HTTP trace collector for tests.
+
+OpenTelemetry Collector의 OTLP/HTTP 수신 엔드포인트(POST /v1/traces, JSON 인코딩)를 로컬 스레드 서버로 띄웁니다.
+받은 스팬은 속성 값을 파이썬 값으로 풀어 spans에 남기므로 실제 수집기 없이 트레이스 내보내기를 검증할 수 있습니다.
+
+    with OTLPCollector() as collector:
+        tracer.configure([OTLPHttpExporter(collector.endpoint)])
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def _value(value: Dict[str, Any]) -> Any:
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "boolValue" in value:
+        return value["boolValue"]
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "arrayValue" in value:
+        return [_value(item) for item in value["arrayValue"].get("values", [])]
+    return None
+
+
+def _attributes(attributes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {attribute["key"]: _value(attribute["value"]) for attribute in attributes or []}
+
+
+class OTLPCollector:
+    """
+    Fake OTLP/HTTP receiver on localhost.
+
+    Args:
+        status: HTTP status returned for export requests (오류 응답 재현용)
+    """
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.requests = 0
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._received = threading.Condition(self._lock)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OTLPCollector":
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = self.rfile.read(length)
+                if self.path != "/v1/traces":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                collector._receive(json.loads(body or b"{}"))
+                self.send_response(collector.status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "OTLPCollector":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _receive(self, payload: Dict[str, Any]) -> None:
+        spans = []
+        for resource_spans in payload.get("resourceSpans", []):
+            resource = _attributes(resource_spans.get("resource", {}).get("attributes"))
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for span in scope_spans.get("spans", []):
+                    spans.append({
+                        **span,
+                        "attributes": _attributes(span.get("attributes")),
+                        "resource": resource,
+                    })
+        with self._received:
+            self.requests += 1
+            self.spans.extend(spans)
+            self._received.notify_all()
+
+    def wait_for(self, count: int, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """Wait until at least ``count`` spans arrived and return all received spans."""
+        deadline = time.monotonic() + timeout
+        with self._received:
+            while len(self.spans) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._received.wait(remaining)
+            return list(self.spans)
+
+    def by_name(self, name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [span for span in self.spans if span["name"] == name]
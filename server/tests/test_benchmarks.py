@@ -0,0 +1,88 @@
+"""
+Unit tests for the benchmark suite.
+Tests synthetic workflow shapes, the in-memory MongoDB stand-in, end-to-end benchmark runs against the fake provider and baseline comparison.
+"""
+
+import pytest
+
+from server.benchmarks.runner import BenchmarkCase, BenchmarkRunner, compare_results, format_report, percentiles
+from server.benchmarks.workflows import SHAPES, build_workflow
+from server.config.database import get_deployments_collection
+from server.services.workflow_service import WorkflowService
+from server.testing.memory_mongo import MemoryDatabase, use_memory_mongo
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_synthetic_workflows_generate_valid_code(shape):
+    """모든 모양의 합성 워크플로우는 컴파일 가능한 LangGraph 코드로 변환되어야 합니다."""
+    workflow = build_workflow(shape, 3)
+    code = WorkflowService.generate_langgraph_code(workflow)
+
+    compile(code, f"bench_{shape}", "exec")
+    assert "app = graph.compile(checkpointer=checkpointer)" in code
+    with pytest.raises(ValueError):
+        build_workflow("spiral", 3)
+
+
+def test_memory_mongo_supports_service_queries():
+    """메모리 MongoDB는 upsert, 정렬된 find, projection, 삭제를 지원하고 저장된 문서를 복사해 반환해야 합니다."""
+    with use_memory_mongo(MemoryDatabase()) as db:
+        collection = get_deployments_collection()
+        collection.update_one({"id": "a"}, {"$set": {"id": "a", "createdAt": "1", "tags": []}}, upsert=True)
+        collection.update_one({"id": "b"}, {"$set": {"id": "b", "createdAt": "2"}}, upsert=True)
+        collection.update_one({"id": "a"}, {"$set": {"status": "active"}})
+
+        newest = [doc["id"] for doc in collection.find({}).sort("createdAt", -1)]
+        document = collection.find_one({"id": "a"}, {"_id": 0})
+        document["tags"].append("mutated")
+
+        assert newest == ["b", "a"]
+        assert document["status"] == "active" and "_id" not in document
+        assert db["deployments"].find_one({"id": "a"})["tags"] == []
+        assert collection.delete_many({"id": "b"}).deleted_count == 1
+        assert collection.count_documents() == 1
+    assert get_deployments_collection() is not collection
+
+
+def test_benchmark_runs_every_stage(tmp_path):
+    """벤치마크는 코드 생성, 배포, 실행, 저장 단계를 모두 측정하고 에이전트 도구 호출을 가짜 모델로 처리해야 합니다."""
+    runner = BenchmarkRunner(str(tmp_path))
+    cases = [
+        BenchmarkCase("conditions", 2, iterations=2, warmup=0, allocation_samples=1),
+        BenchmarkCase("agent_tools", 1, iterations=2, warmup=0, allocation_samples=1, tools=1),
+    ]
+
+    results = runner.run(cases)
+
+    conditions, agent = results["cases"]["conditions-2"], results["cases"]["agent_tools-1"]
+    for case in (conditions, agent):
+        assert case["failures"] == 0
+        assert case["execution"]["latency_ms"]["p50"] > 0
+        assert case["persistence"]["disk_bytes_per_execution"] > 0
+        assert case["allocations"]["peak_bytes_per_execution"] > 0
+        assert "graph_invoke" in case["execution"]["phases_ms"]
+    # 도구 호출 응답 1번 + 최종 응답 1번
+    assert agent["llm_requests_per_execution"] == 2
+    assert (tmp_path / "deployments").is_dir()
+
+
+def test_compare_results_flags_regressions():
+    """허용 비율과 최소 변화량을 모두 넘어 나빠진 지표만 회귀로 보고해야 합니다."""
+    def document(p50, throughput, disk):
+        return {"cases": {"linear-4": {
+            "execution": {"latency_ms": percentiles([p50]), "throughput_per_second": throughput},
+            "persistence": {"latency_ms": percentiles([1.0]), "disk_bytes_per_execution": disk},
+            "allocations": {"peak_bytes_per_execution": 1000, "retained_bytes_per_execution": 0},
+            "codegen": {"latency_ms": percentiles([1.0])},
+        }}}
+
+    baseline = document(40.0, 25.0, 40_000)
+    report = compare_results(document(60.0, 16.0, 41_000), baseline, tolerance=0.25)
+    regressed = {row["metric"] for row in report["regressions"]}
+
+    assert "execution.latency_ms.p50" in regressed
+    assert "execution.throughput_per_second" in regressed
+    assert "persistence.disk_bytes_per_execution" not in regressed
+    assert compare_results(document(45.0, 24.0, 40_000), baseline)["regressions"] == []
+    assert compare_results({"cases": {"fan_out-8": {}}}, baseline)["missing"] == ["fan_out-8"]
+    assert "regressions" in format_report({"cases": {}}, report)
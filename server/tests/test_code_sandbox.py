@@ -0,0 +1,129 @@
+"""
+Unit tests for the process sandbox used by function and user nodes.
+Tests results, timeouts, CPU limits, shared-memory inputs and statistics.
+"""
+
+import os
+
+import pytest
+from server.services import code_sandbox, workflow_service
+from server.services.code_sandbox import (
+    SandboxExecutionError, SandboxPool, SandboxResourceLimit, SandboxTimeout, resource, sandbox_enabled
+)
+from server.services.workflow_service import WorkflowService
+
+ADD_CODE = """
+def add(a, b=0):
+    return a + b
+"""
+
+LOOP_CODE = """
+def spin(x):
+    while True:
+        x += 1
+"""
+
+SIZE_CODE = """
+def size(data):
+    return len(data["blob"])
+"""
+
+PID_CODE = """
+def pid(param):
+    import os
+    return os.getpid()
+"""
+
+FAIL_CODE = """
+def fail(x):
+    raise ValueError("bad input")
+"""
+
+
+@pytest.fixture
+def pool():
+    """Start a small sandbox pool"""
+    p = SandboxPool(size=1, timeout=5, cpu_seconds=5, memory_mb=0, shm_threshold=1024)
+    p.start()
+    yield p
+    p.shutdown()
+
+
+def test_run_returns_result_and_timing(pool):
+    """워커에서 실행한 결과와 대기/실행 시간이 반환되어야 합니다."""
+    result, timing = pool.run(ADD_CODE, "add", args=(1,), kwargs={"b": 2})
+
+    assert result == 3
+    assert timing.queue_ms >= 0
+    assert timing.exec_ms >= 0
+    assert timing.transfer == "pipe"
+
+
+def test_user_exception_is_reported(pool):
+    """사용자 함수 예외는 SandboxExecutionError로 전달되고 워커는 재사용되어야 합니다."""
+    with pytest.raises(SandboxExecutionError) as exc_info:
+        pool.run(FAIL_CODE, "fail", args=(1,))
+    assert "bad input" in str(exc_info.value)
+    assert "ValueError" in exc_info.value.remote_traceback
+
+    result, _ = pool.run(ADD_CODE, "add", args=(2, 2))
+    assert result == 4
+    assert pool.get_stats()["restarts"] == 0
+
+
+def test_infinite_loop_times_out_and_worker_is_replaced(pool):
+    """무한 루프는 제한 시간 후 중단되고 새 워커로 교체되어야 합니다."""
+    with pytest.raises(SandboxTimeout):
+        pool.run(LOOP_CODE, "spin", args=(0,), timeout=0.5)
+
+    result, _ = pool.run(ADD_CODE, "add", args=(1, 1))
+    assert result == 2
+    stats = pool.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["restarts"] == 1
+
+
+@pytest.mark.skipif(resource is None, reason="RLIMIT_CPU requires the resource module")
+def test_cpu_limit_stops_busy_function(pool):
+    """CPU 시간 제한을 넘기면 SandboxResourceLimit이 발생해야 합니다."""
+    with pytest.raises(SandboxResourceLimit):
+        pool.run(LOOP_CODE, "spin", args=(0,), timeout=10, cpu_seconds=1)
+
+    result, _ = pool.run(ADD_CODE, "add", args=(3, 4))
+    assert result == 7
+
+
+def test_large_input_uses_shared_memory(pool):
+    """임계값보다 큰 입력은 공유 메모리로 전달되어야 합니다."""
+    blob = b"x" * 100_000
+    result, timing = pool.run(SIZE_CODE, "size", args=({"blob": blob},))
+
+    assert result == len(blob)
+    assert timing.transfer == "shm"
+    assert pool.get_stats()["shm_transfers"] == 1
+
+
+def test_stats_report_queue_and_exec_time(pool):
+    """통계에 호출 수와 대기/실행 시간 요약이 포함되어야 합니다."""
+    for i in range(3):
+        pool.run(ADD_CODE, "add", args=(i,))
+
+    stats = pool.get_stats()
+    assert stats["calls"] == 3
+    assert stats["workers"] == 1
+    assert set(stats["queue_ms"]) == {"avg", "p50", "p95"}
+    assert set(stats["exec_ms"]) == {"avg", "p50", "p95"}
+
+
+def test_request_flag_cannot_disable_process_mode(pool, monkeypatch):
+    """운영자가 process 모드를 켜면 요청의 "sandbox": false로 서버 프로세스 실행을 강제할 수 없어야 합니다."""
+    monkeypatch.setattr(workflow_service, "sandbox_pool", pool)
+    monkeypatch.setattr(code_sandbox, "SANDBOX_MODE", "inline")
+    assert sandbox_enabled(True) and not sandbox_enabled(False) and not sandbox_enabled(None)
+
+    monkeypatch.setattr(code_sandbox, "SANDBOX_MODE", "process")
+    assert sandbox_enabled(False)
+    result = WorkflowService.process_python_node({"py_code": PID_CODE, "param": {}, "sandbox": False})
+
+    assert isinstance(result, int) and result != os.getpid()
+    assert pool.get_stats()["calls"] == 1
@@ -9,6 +9,7 @@ import json
 import asyncio
 from typing import List, Dict, Any
 import time
+from unittest.mock import AsyncMock
 
 from server.services.websocket_manager import WebSocketManager
 from server.services.session_manager import SessionManager
@@ -58,6 +59,7 @@ class TestCollaborationProperties:
         if hasattr(self, 'websocket_manager'):
             self.websocket_manager.active_connections.clear()
             self.websocket_manager.user_sessions.clear()
+            self.websocket_manager.workflow_connections.clear()
     
     @given(
         workflow_id=workflow_id_strategy(),
@@ -140,27 +142,16 @@ class TestCollaborationProperties:
         websocket_manager = WebSocketManager()
         session_manager = SessionManager()
         
-        # Create a session with all users and register them in the websocket manager
+        # Create a session with all users and connect them to the websocket manager
+        connections = {}
         for user in users:
             session_manager.create_or_join_session(workflow_id, user)
-            # Register user session in websocket manager (simulating connection)
-            from server.models.collaboration import SessionInfo
-            websocket_manager.user_sessions[user.user_id] = SessionInfo(
-                user_id=user.user_id,
-                workflow_id=workflow_id
-            )
+            connections[user.user_id] = AsyncMock()
+            await websocket_manager.connect(connections[user.user_id], user.user_id, workflow_id)
         
-        # Track which users should receive messages
-        received_messages = {user.user_id: [] for user in users}
-        
-        # Mock the send_personal_message to track messages
-        original_send = websocket_manager.send_personal_message
-        
-        async def mock_send(message: dict, user_id: str):
-            if user_id in received_messages:
-                received_messages[user_id].append(message)
-        
-        websocket_manager.send_personal_message = mock_send
+        # Track which users should receive messages (broadcasts are sent as JSON text)
+        def received_messages(user_id: str) -> list:
+            return [json.loads(call.args[0]) for call in connections[user_id].send_text.call_args_list]
         
         # Pick one user to make the change
         changing_user = users[0]
@@ -185,20 +176,17 @@ class TestCollaborationProperties:
         
         # Property: All other users should have received the message
         for user in other_users:
-            assert len(received_messages[user.user_id]) > 0, \
+            assert len(received_messages(user.user_id)) > 0, \
                 f"User {user.user_id} should have received a broadcast message"
             
             # Verify the message contains the change
-            message = received_messages[user.user_id][0]
+            message = received_messages(user.user_id)[0]
             assert message["type"] == "change_applied", \
                 f"Message type should be 'change_applied', got {message['type']}"
         
         # Property: The changing user should NOT have received the message (excluded)
-        assert len(received_messages[changing_user.user_id]) == 0, \
+        assert len(received_messages(changing_user.user_id)) == 0, \
             f"Changing user {changing_user.user_id} should not receive their own broadcast"
-        
-        # Restore original method
-        websocket_manager.send_personal_message = original_send
 
 
 if __name__ == "__main__":
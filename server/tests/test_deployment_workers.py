@@ -0,0 +1,199 @@
+"""
+Unit tests for per-deployment worker processes.
+Tests graph execution in workers, cancellation, superstep budgets, autoscaling and health checks.
+"""
+
+import threading
+import time
+
+import pytest
+from server.services.deployment_workers import DeploymentWorkerError, DeploymentWorkerManager
+from server.utils.execution_context import CancelToken, ExecutionCancelled, ExecutionTimedOut
+
+DEPLOYMENT_CODE = '''
+import os
+import time
+from typing import TypedDict
+from langgraph.graph import StateGraph, START, END
+
+
+class CounterState(TypedDict):
+    count: int
+    limit: int
+    pid: int
+    delay: float
+
+
+def increment(state):
+    time.sleep(state.get("delay", 0))
+    return {"count": state["count"] + 1, "pid": os.getpid()}
+
+
+def route(state):
+    if state["count"] < 0:
+        raise ValueError("negative count")
+    return "increment" if state["count"] < state["limit"] else END
+
+
+graph = StateGraph(CounterState)
+graph.add_node("increment", increment)
+graph.add_edge(START, "increment")
+graph.add_conditional_edges("increment", route)
+app = graph.compile()
+'''
+
+# 생성된 배포 코드처럼 모듈 전역 InMemorySaver로 컴파일한 그래프 (messages는 누적 리듀서)
+CHECKPOINTED_CODE = '''
+import operator
+import os
+from typing import Annotated, List, TypedDict
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class ChatState(TypedDict):
+    messages: Annotated[List[str], operator.add]
+    pid: int
+
+
+def reply(state):
+    return {"messages": ["reply to " + state["messages"][-1]], "pid": os.getpid()}
+
+
+graph = StateGraph(ChatState)
+graph.add_node("reply", reply)
+graph.add_edge(START, "reply")
+graph.add_edge("reply", END)
+checkpointer = InMemorySaver()
+app = graph.compile(checkpointer=checkpointer)
+'''
+
+
+@pytest.fixture
+def code_path(tmp_path, monkeypatch):
+    """Write a small deployment module into a temporary deployments directory"""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "deployments" / "dep-1" / "deployment_code.py"
+    path.parent.mkdir(parents=True)
+    path.write_text(DEPLOYMENT_CODE)
+    return str(path)
+
+
+@pytest.fixture
+def manager():
+    m = DeploymentWorkerManager(mode="process", groups={}, min_workers=1, max_workers=2, health_interval=3600)
+    yield m
+    m.shutdown()
+
+
+def _input(limit=3, delay=0.0, count=0):
+    return {"count": count, "limit": limit, "pid": 0, "delay": delay}
+
+
+def test_run_returns_final_state_from_worker(manager, code_path):
+    """워커 프로세스에서 실행한 그래프의 최종 상태가 반환되어야 합니다."""
+    first = manager.run("dep-1", code_path, _input(), execution_id="exec-1")
+    second = manager.run("dep-1", code_path, _input(limit=5), execution_id="exec-2")
+
+    assert first["count"] == 3
+    assert second["count"] == 5
+    assert first["pid"] == second["pid"], "Warm worker should be reused"
+    assert first["pid"] != threading.get_native_id()
+
+    stats = manager.get_stats()["pools"]["dep-1"]
+    assert stats["runs"] == 2
+    assert set(stats["queue_ms"]) == {"avg", "p95"}
+
+
+def test_checkpointed_runs_are_independent(manager, tmp_path):
+    """같은 워커에서 체크포인터가 있는 그래프를 두 번 실행해도 이전 실행의 상태를 이어받지 않아야 합니다."""
+    path = tmp_path / "deployments" / "dep-chat" / "deployment_code.py"
+    path.parent.mkdir(parents=True)
+    path.write_text(CHECKPOINTED_CODE)
+
+    first = manager.run("dep-chat", str(path), {"messages": ["alice"]}, execution_id="exec-a")
+    second = manager.run("dep-chat", str(path), {"messages": ["bob"]}, execution_id="exec-b",
+                         cancel_token=CancelToken(max_supersteps=10))
+
+    assert first["pid"] == second["pid"], "Warm worker should be reused"
+    assert first["messages"] == ["alice", "reply to alice"]
+    assert second["messages"] == ["bob", "reply to bob"]
+
+
+def test_graph_error_is_reported(manager, code_path):
+    """그래프 예외는 DeploymentWorkerError로 전달되어야 합니다."""
+    with pytest.raises(DeploymentWorkerError) as exc_info:
+        manager.run("dep-1", code_path, _input(count=-5), execution_id="exec-err")
+    assert "negative count" in str(exc_info.value)
+
+
+def test_superstep_budget_is_enforced_in_worker(manager, code_path):
+    """superstep 예산을 넘기면 ExecutionTimedOut이 발생하고 사용한 superstep 수가 반영되어야 합니다."""
+    token = CancelToken(max_supersteps=2)
+    with pytest.raises(ExecutionTimedOut):
+        manager.run("dep-1", code_path, _input(limit=10), execution_id="exec-budget", cancel_token=token)
+    assert token.supersteps == 3
+
+
+def test_cancel_kills_and_replaces_worker(manager, code_path):
+    """중지 요청 시 실행 중인 워커를 종료하고 새 워커로 교체해야 합니다."""
+    token = CancelToken()
+    threading.Timer(0.5, token.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(ExecutionCancelled):
+        manager.run("dep-1", code_path, _input(limit=100, delay=0.2), execution_id="exec-cancel", cancel_token=token)
+    assert time.monotonic() - started < 5
+
+    result = manager.run("dep-1", code_path, _input(), execution_id="exec-after")
+    assert result["count"] == 3
+    assert manager.get_stats()["pools"]["dep-1"]["restarts"] == 1
+
+
+def test_pool_scales_up_for_concurrent_runs(manager, code_path):
+    """동시 실행이 있으면 max_workers까지 워커를 늘려야 합니다."""
+    manager.run("dep-1", code_path, _input(limit=1), execution_id="warm")
+    pids = []
+
+    def run(i):
+        pids.append(manager.run("dep-1", code_path, _input(limit=2, delay=0.5), execution_id=f"exec-{i}")["pid"])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    assert len(pids) == 2
+    assert len(set(pids)) == 2
+    assert len(manager.get_stats()["pools"]["dep-1"]["workers"]) == 2
+
+
+def test_groups_share_a_pool(code_path, tmp_path):
+    """같은 그룹의 배포는 하나의 워커 풀을 공유해야 합니다."""
+    other = tmp_path / "deployments" / "dep-2" / "deployment_code.py"
+    other.parent.mkdir(parents=True)
+    other.write_text(DEPLOYMENT_CODE)
+
+    m = DeploymentWorkerManager(mode="process", groups={"dep-1": "team", "dep-2": "team"}, min_workers=1, max_workers=1)
+    try:
+        a = m.run("dep-1", code_path, _input(), execution_id="a")
+        b = m.run("dep-2", str(other), _input(), execution_id="b")
+        assert a["pid"] == b["pid"]
+        assert list(m.get_stats()["pools"]) == ["team"]
+    finally:
+        m.shutdown()
+
+
+def test_health_check_replaces_dead_worker(manager, code_path):
+    """상태 확인에서 죽은 워커를 발견하면 교체해야 합니다."""
+    first = manager.run("dep-1", code_path, _input(), execution_id="before")
+    pool = manager._pools["dep-1"]
+    pool._workers[0].process.kill()
+    pool._workers[0].process.join(5)
+
+    pool.maintain()
+    result = manager.run("dep-1", code_path, _input(), execution_id="after")
+
+    assert result["pid"] != first["pid"]
+    assert pool.get_stats()["health_failures"] == 1
@@ -0,0 +1,144 @@
+"""
+Unit tests for execution critical-path analysis.
+Tests critical path reconstruction, self/wait times, branch dominance, p50/p95 aggregation and the analysis endpoints.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.routes import execution
+from server.services.execution_analysis import ExecutionAnalysisService, aggregate_runs, analyze_run
+from server.utils.execution_logger import NodeExecutionLog, NodeStatus
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+EDGES = [
+    {"source": "start", "target": "a"},
+    {"source": "start", "target": "b"},
+    {"source": "a", "target": "join"},
+    {"source": "b", "target": "join"},
+    {"source": "join", "target": "end"},
+]
+
+
+def _log(node_id, start_ms, end_ms, execution_id="exec-1", status=NodeStatus.SUCCEEDED):
+    return NodeExecutionLog(
+        id=f"{execution_id}-{node_id}-{start_ms}", execution_id=execution_id, deployment_id="dep-cp", version_id="v1",
+        node_id=node_id, node_name=node_id, node_type="agentNode" if node_id in ("a", "b") else "functionNode",
+        status=status, start_time=BASE + timedelta(milliseconds=start_ms),
+        end_time=BASE + timedelta(milliseconds=end_ms), duration_ms=end_ms - start_ms,
+    )
+
+
+def _diamond(a_ms, b_ms, execution_id="exec-1"):
+    """start -> (a | b) -> join -> end, join은 느린 분기가 끝난 5ms 뒤에 시작"""
+    slowest = 10 + max(a_ms, b_ms)
+    return [
+        _log("start", 0, 10, execution_id),
+        _log("a", 10, 10 + a_ms, execution_id),
+        _log("b", 10, 10 + b_ms, execution_id),
+        _log("join", slowest + 5, slowest + 15, execution_id),
+        _log("end", slowest + 15, slowest + 16, execution_id),
+    ]
+
+
+def test_critical_path_follows_last_arriving_branch():
+    """임계 경로는 가장 늦게 도착한 분기를 따라가고 대기 시간과 분기 여유 시간을 계산해야 합니다."""
+    started = NodeExecutionLog(**{**_log("a", 10, 10).__dict__, "status": NodeStatus.STARTED, "end_time": None})
+    run = analyze_run([started] + _diamond(100, 30), EDGES)
+
+    assert run["critical_path"] == ["start", "a", "join", "end"]
+    assert run["duration_ms"] == 126.0
+    assert run["nodes"]["join"]["wait_ms"] == 5.0
+    assert run["nodes"]["a"]["self_ms"] == 100.0 and not run["nodes"]["b"]["critical"]
+    join = run["joins"][0]
+    assert join["node_id"] == "join" and join["dominant"] == "a"
+    assert join["inputs"]["b"]["slack_ms"] == 70.0
+    assert run["critical_path_ms"] == 126.0
+
+
+def test_repeated_node_runs_are_summed():
+    """루프로 여러 번 실행된 노드의 자체 시간은 합산해야 합니다."""
+    logs = [_log("start", 0, 10), _log("a", 10, 30), _log("a", 40, 70)]
+    run = analyze_run(logs, [{"source": "start", "target": "a"}, {"source": "a", "target": "a"}])
+
+    assert run["nodes"]["a"]["runs"] == 2
+    assert run["nodes"]["a"]["self_ms"] == 50.0
+    assert run["critical_path"] == ["start", "a"]
+
+
+def test_aggregate_reports_percentiles_and_dominant_branch():
+    """여러 실행을 모아 노드별 p50/p95, 지배 분기 비율, 먼저 최적화할 노드를 계산해야 합니다."""
+    runs = [analyze_run(_diamond(100, 30, f"exec-{i}"), EDGES) for i in range(3)]
+    runs.append(analyze_run(_diamond(20, 60, "exec-3"), EDGES))
+
+    summary = aggregate_runs(runs)
+
+    assert summary["runs"] == 4
+    assert summary["critical_paths"][0] == {
+        "path": ["start", "a", "join", "end"], "runs": 3, "share": 0.75,
+        "duration_ms": {"p50": 126.0, "p95": 126.0, "mean": 126.0},
+    }
+    branch = summary["branches"][0]
+    assert branch["join_node_id"] == "join" and branch["dominant"] == "a"
+    assert branch["inputs"][0]["dominant_share"] == 0.75
+    a = next(node for node in summary["nodes"] if node["node_id"] == "a")
+    assert a["self_ms"]["p50"] == 100.0 and a["self_ms"]["p95"] == 100.0
+    assert a["critical_share"] == 0.75
+    assert summary["optimize_first"][0] == "a"
+
+
+def _write_execution(execution_id, logs, status="succeeded", start_time="2025-01-01T12:00:00+00:00"):
+    execution_dir = os.path.join("deployments", "dep-cp", "executions", execution_id)
+    os.makedirs(execution_dir, exist_ok=True)
+    with open(os.path.join(execution_dir, "workflow_snap.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "workflow_snapshot": {"nodes": [], "edges": EDGES},
+            "execution_metadata": {"id": execution_id, "version_id": "v1", "status": status, "start_time": start_time},
+        }, f)
+    with open(os.path.join(execution_dir, "execution_log.json"), "w", encoding="utf-8") as f:
+        json.dump([{**log.__dict__, "status": str(log.status)} for log in logs], f, default=str)
+
+
+def test_critical_path_endpoints(tmp_path, monkeypatch):
+    """실행 단위/배포 단위 임계 경로 API는 저장된 실행 로그를 분석하고, 없는 실행은 404를 반환해야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    _write_execution("exec-1", _diamond(100, 30, "exec-1"), start_time="2025-01-01T12:00:00+00:00")
+    _write_execution("exec-2", _diamond(20, 60, "exec-2"), start_time="2025-01-01T12:01:00+00:00")
+    _write_execution("exec-3", _diamond(20, 60, "exec-3"), status="failed", start_time="2025-01-01T12:02:00+00:00")
+    app = FastAPI()
+    app.include_router(execution.router)
+    client = TestClient(app)
+
+    single = client.get("/deployments/dep-cp/executions/exec-1/critical-path").json()["analysis"]
+    window = client.get("/deployments/dep-cp/critical-path", params={"limit": 1}).json()["analysis"]
+    every = client.get("/deployments/dep-cp/critical-path", params={"include_failed": True}).json()["analysis"]
+
+    assert single["critical_path"] == ["start", "a", "join", "end"]
+    assert window["execution_ids"] == ["exec-2"]
+    assert window["branches"][0]["dominant"] == "b"
+    assert every["runs"] == 3
+    assert client.get("/deployments/dep-cp/executions/missing/critical-path").status_code == 404
+    assert client.get("/deployments/unknown/critical-path").status_code == 404
+
+
+def test_deployment_window_keeps_only_selected_snapshots(tmp_path, monkeypatch):
+    """배포 단위 분석은 실행 기록을 훑을 때 스냅샷을 보관하지 않고, 분석할 구간의 스냅샷만 다시 읽어야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    for minute in range(5):
+        _write_execution(f"exec-{minute}", _diamond(20, 60, f"exec-{minute}"),
+                         start_time=f"2025-01-01T12:0{minute}:00+00:00")
+    service = ExecutionAnalysisService()
+    loads, analyzed = [], []
+    load_snapshot, analyze = service._load_snapshot, service._analyze
+    monkeypatch.setattr(service, "_load_snapshot", lambda *args: loads.append(args[1]) or load_snapshot(*args))
+    monkeypatch.setattr(service, "_analyze", lambda *args: analyzed.append(args[1]) or analyze(*args))
+
+    result = service.analyze_deployment("dep-cp", limit=2)
+
+    assert result["execution_ids"] == ["exec-4", "exec-3"]
+    assert analyzed == ["exec-4", "exec-3"]
+    assert sorted(loads) == sorted([f"exec-{minute}" for minute in range(5)] + ["exec-3", "exec-4"])
@@ -0,0 +1,127 @@
+"""
+Unit tests for cooperative cancellation.
+Tests CancelToken, superstep-level graph invocation and cancellable LLM calls.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+
+from server.services.llm_gateway import invoke_llm
+from server.utils.execution_context import (
+    CancelToken, ExecutionCancelled, ExecutionTimedOut,
+    current_token, invoke_graph, use_token
+)
+
+
+class CounterState(BaseModel):
+    count: int = 0
+
+
+def _loop_graph(on_step=None):
+    """count가 100이 될 때까지 자기 자신으로 돌아가는 그래프"""
+    def step(state):
+        if on_step:
+            on_step(state.count)
+        return {"count": state.count + 1}
+
+    graph = StateGraph(CounterState)
+    graph.add_node("step", step)
+    graph.add_edge(START, "step")
+    graph.add_conditional_edges("step", lambda s: END if s.count >= 100 else "step")
+    return graph.compile()
+
+
+def test_invoke_graph_matches_invoke():
+    """토큰이 트리거되지 않으면 invoke와 같은 결과를 반환해야 합니다."""
+    app = _loop_graph()
+    token = CancelToken()
+
+    assert invoke_graph(app, {"count": 95}, {"recursion_limit": 200}, token) == app.invoke({"count": 95})
+    assert token.supersteps == 5
+
+
+def test_cancel_stops_between_supersteps():
+    """노드 실행 중 취소하면 다음 superstep 전에 멈춰야 합니다."""
+    token = CancelToken()
+    seen = []
+
+    def on_step(count):
+        seen.append(count)
+        if count == 3:
+            token.cancel("stop requested")
+
+    with pytest.raises(ExecutionCancelled, match="stop requested"):
+        invoke_graph(_loop_graph(on_step), {"count": 0}, {"recursion_limit": 200}, token)
+
+    assert seen == [0, 1, 2, 3]
+
+
+def test_max_supersteps_budget():
+    """superstep 예산을 넘으면 ExecutionTimedOut이 발생해야 합니다."""
+    token = CancelToken(max_supersteps=10)
+
+    with pytest.raises(ExecutionTimedOut):
+        invoke_graph(_loop_graph(), {"count": 0}, {"recursion_limit": 200}, token)
+
+    assert token.supersteps == 11
+
+
+def test_expired_deadline_fails_fast():
+    """이미 지난 deadline이면 그래프를 시작하지 않아야 합니다."""
+    token = CancelToken(deadline=time.time() - 1)
+    seen = []
+
+    with pytest.raises(ExecutionTimedOut):
+        invoke_graph(_loop_graph(seen.append), {"count": 0}, None, token)
+
+    assert seen == []
+
+
+def test_token_is_bound_to_context():
+    """use_token 안에서만 current_token이 반환되어야 합니다."""
+    token = CancelToken()
+    assert current_token() is None
+    with use_token(token):
+        assert current_token() is token
+    assert current_token() is None
+
+
+async def _slow_echo(inputs):
+    await asyncio.sleep(5)
+    return inputs
+
+
+def test_invoke_llm_without_token_is_plain_invoke():
+    """실행 컨텍스트 밖에서는 일반 invoke와 동일해야 합니다."""
+    runnable = RunnableLambda(lambda x: {"echo": x["q"]})
+    assert invoke_llm(runnable, {"q": "hi"}) == {"echo": "hi"}
+
+
+def test_invoke_llm_cancels_in_flight_call():
+    """진행 중인 비동기 LLM 호출은 취소 요청 즉시 중단되어야 합니다."""
+    runnable = RunnableLambda(lambda x: x, afunc=_slow_echo)
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+
+    started = time.monotonic()
+    with use_token(token):
+        with pytest.raises(ExecutionCancelled):
+            invoke_llm(runnable, {"q": "hi"})
+
+    assert time.monotonic() - started < 2
+
+
+def test_invoke_llm_respects_deadline():
+    """LLM 호출 중 deadline이 지나면 ExecutionTimedOut이 발생해야 합니다."""
+    runnable = RunnableLambda(lambda x: x, afunc=_slow_echo)
+    token = CancelToken.with_timeout(0.1)
+
+    with use_token(token):
+        with pytest.raises(ExecutionTimedOut):
+            invoke_llm(runnable, {"q": "hi"})
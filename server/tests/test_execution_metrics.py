@@ -0,0 +1,96 @@
+"""
+Unit tests for execution engine Prometheus metrics.
+Tests bounded deployment labels, node/execution histograms, LLM call latency, queue wait and the /metrics endpoint.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from server.models.execution import ExecutionPriority
+from server.routes import metrics
+from server.services import llm_gateway
+from server.services.execution_metrics import BoundedLabel, execution_registry, observe_execution
+from server.services.execution_queue import ExecutionQueue
+from server.services.llm_resilience import LLMResilience
+from server.services.llm_scheduler import LLMScheduler
+from server.testing.fake_provider import FakeProvider
+
+
+def _sample(name, labels):
+    return execution_registry.get_sample_value(name, labels) or 0
+
+
+def test_bounded_label_groups_overflow():
+    """제한 개수를 넘는 새 라벨 값은 other로 묶어야 합니다."""
+    label = BoundedLabel(2)
+
+    assert [label("a"), label("b"), label("c"), label("a")] == ["a", "b", "other", "a"]
+    assert label(None) == "other"
+
+
+def test_observe_execution_records_node_histograms():
+    """완료/실패한 노드 로그만 노드 타입별 히스토그램에 기록해야 합니다."""
+    labels = {"node_type": "agentNode", "deployment": "dep-metrics", "status": "succeeded"}
+    before = _sample("langstar_node_duration_seconds_count", labels)
+    runs_before = _sample("langstar_execution_duration_seconds_count", {"deployment": "dep-metrics", "status": "succeeded"})
+
+    observe_execution("dep-metrics", "succeeded", 1500, 3, [
+        {"node_type": "agentNode", "status": "started", "duration_ms": None},
+        {"node_type": "agentNode", "status": "succeeded", "duration_ms": 1200},
+        {"node_type": "startNode", "status": "succeeded", "duration_ms": 1},
+    ])
+
+    assert _sample("langstar_node_duration_seconds_count", labels) == before + 1
+    assert _sample("langstar_execution_duration_seconds_count",
+                   {"deployment": "dep-metrics", "status": "succeeded"}) == runs_before + 1
+    assert _sample("langstar_execution_supersteps_bucket", {"deployment": "dep-metrics", "le": "3.0"}) >= 1
+
+
+def test_llm_call_latency_by_provider_and_model(monkeypatch):
+    """게이트웨이를 지나는 모델 호출마다 프로바이더/모델별 지연 시간을 기록해야 합니다."""
+    resilience = LLMResilience()
+    monkeypatch.setattr(llm_gateway, "llm_resilience", resilience)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", LLMScheduler(limits={}))
+    labels = {"provider": "openai", "model": "gpt-4o-mini", "outcome": "ok"}
+    before = _sample("langstar_llm_call_duration_seconds_count", labels)
+
+    try:
+        with FakeProvider(latency=0.05) as provider:
+            prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}")])
+            llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", max_retries=0)
+            llm_gateway.invoke_llm(prompt | llm, {"user_prompt": "hi"})
+    finally:
+        resilience.shutdown()
+
+    assert _sample("langstar_llm_call_duration_seconds_count", labels) == before + 1
+    assert _sample("langstar_llm_call_duration_seconds_sum", labels) >= 0.05
+
+
+def test_queue_wait_is_observed(tmp_path):
+    """실행 큐에서 꺼낸 작업의 대기 시간을 레인별로 기록해야 합니다."""
+    before = _sample("langstar_execution_queue_wait_seconds_count", {"lane": "batch"})
+    queue = ExecutionQueue(db_path=str(tmp_path / "queue.db"), lane_workers={ExecutionPriority.BATCH: 1})
+    queue.register_handler("echo", lambda payload: payload)
+    try:
+        job = queue.submit("echo", {}, lane=ExecutionPriority.BATCH)
+        assert queue.wait(job.id, timeout=5).status == "succeeded"
+    finally:
+        queue.shutdown(timeout=1.0)
+
+    assert _sample("langstar_execution_queue_wait_seconds_count", {"lane": "batch"}) == before + 1
+
+
+def test_metrics_endpoint_serves_all_registries():
+    """/metrics는 실행 엔진과 LLM 지표를 함께 노출해야 합니다."""
+    app = FastAPI()
+    app.include_router(metrics.router)
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert "langstar_execution_duration_seconds" in response.text
+    assert "langstar_llm_call_duration_seconds" in response.text
+    assert "langstar_llm_cache_requests_total" in response.text
@@ -0,0 +1,140 @@
+"""
+Unit tests for ExecutionQueue.
+Tests priority lane isolation, backpressure, durability and queue statistics.
+"""
+
+import threading
+import pytest
+from server.models.execution import ExecutionPriority
+from server.services.execution_queue import ExecutionQueue, QueueFullError
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Create a fresh ExecutionQueue backed by a temporary SQLite file"""
+    q = ExecutionQueue(
+        db_path=str(tmp_path / "queue.db"),
+        lane_workers={
+            ExecutionPriority.INTERACTIVE: 1,
+            ExecutionPriority.SCHEDULED: 1,
+            ExecutionPriority.BATCH: 1,
+        },
+    )
+    yield q
+    q.shutdown(timeout=1.0)
+
+
+def test_submit_and_wait_returns_result(queue):
+    """핸들러 결과가 wait()으로 반환되어야 합니다."""
+    queue.register_handler("echo", lambda payload: {"echo": payload["value"]})
+
+    job = queue.submit("echo", {"value": 42})
+    job = queue.wait(job.id, timeout=5)
+
+    assert job.done.is_set()
+    assert job.status == "succeeded"
+    assert job.result == {"echo": 42}
+    assert job.wait_ms is not None
+
+
+def test_handler_error_is_captured(queue):
+    """핸들러 예외는 작업에 기록되고 워커는 계속 동작해야 합니다."""
+    def fail(payload):
+        raise ValueError("boom")
+
+    queue.register_handler("fail", fail)
+    queue.register_handler("echo", lambda payload: payload)
+
+    failed = queue.wait(queue.submit("fail", {}).id, timeout=5)
+    assert failed.status == "failed"
+    assert isinstance(failed.error, ValueError)
+
+    ok = queue.wait(queue.submit("echo", {"a": 1}).id, timeout=5)
+    assert ok.status == "succeeded"
+
+
+def test_unknown_kind_is_rejected(queue):
+    """등록되지 않은 작업 종류는 거부되어야 합니다."""
+    with pytest.raises(ValueError):
+        queue.submit("missing", {})
+
+
+def test_scheduled_backlog_does_not_starve_interactive(queue):
+    """scheduled 레인이 막혀 있어도 interactive 작업은 바로 실행되어야 합니다."""
+    release = threading.Event()
+    queue.register_handler("slow", lambda payload: release.wait(5))
+    queue.register_handler("fast", lambda payload: "done")
+
+    for _ in range(5):
+        queue.submit("slow", {}, lane=ExecutionPriority.SCHEDULED)
+
+    job = queue.wait(queue.submit("fast", {}, lane=ExecutionPriority.INTERACTIVE).id, timeout=2)
+    try:
+        assert job.done.is_set(), "Interactive job should not wait behind scheduled backlog"
+        assert job.result == "done"
+    finally:
+        release.set()
+
+
+def test_queue_full_raises_backpressure(tmp_path):
+    """레인의 최대 대기열 길이를 넘으면 QueueFullError가 발생해야 합니다."""
+    q = ExecutionQueue(
+        db_path=str(tmp_path / "queue.db"),
+        lane_workers={ExecutionPriority.BATCH: 0},
+        max_depth={ExecutionPriority.BATCH: 2},
+    )
+    q.register_handler("noop", lambda payload: None)
+    try:
+        q.submit("noop", {}, lane=ExecutionPriority.BATCH)
+        q.submit("noop", {}, lane=ExecutionPriority.BATCH)
+        with pytest.raises(QueueFullError) as exc_info:
+            q.submit("noop", {}, lane=ExecutionPriority.BATCH)
+
+        assert exc_info.value.retry_after >= 1
+        stats = q.get_stats()["lanes"]["batch"]
+        assert stats["depth"] == 2
+        assert stats["rejected"] == 1
+    finally:
+        q.shutdown(timeout=1.0)
+
+
+def test_durable_jobs_are_recovered_after_restart(tmp_path):
+    """종료 시 남아 있던 durable 작업은 다음 시작 시 복구되어 실행되어야 합니다."""
+    db_path = str(tmp_path / "queue.db")
+
+    first = ExecutionQueue(db_path=db_path, lane_workers={ExecutionPriority.BATCH: 0})
+    first.register_handler("record", lambda payload: None)
+    first.submit("record", {"n": 1}, lane=ExecutionPriority.BATCH)
+    first.submit("record", {"n": 2}, lane=ExecutionPriority.BATCH, durable=False)
+    first.shutdown(timeout=1.0)
+
+    seen = []
+    ran = threading.Event()
+
+    def record(payload):
+        seen.append(payload["n"])
+        ran.set()
+
+    second = ExecutionQueue(db_path=db_path, lane_workers={ExecutionPriority.BATCH: 1})
+    second.register_handler("record", record)
+    try:
+        second.start()
+        assert ran.wait(5), "Recovered job should run after restart"
+        assert seen == [1], "Only durable jobs should survive a restart"
+    finally:
+        second.shutdown(timeout=1.0)
+
+
+def test_stats_report_wait_time(queue):
+    """통계에 레인별 처리 건수와 대기 시간이 포함되어야 합니다."""
+    queue.register_handler("echo", lambda payload: payload)
+
+    for i in range(3):
+        queue.wait(queue.submit("echo", {"i": i}).id, timeout=5)
+
+    stats = queue.get_stats()
+    interactive = stats["lanes"]["interactive"]
+    assert interactive["succeeded"] == 3
+    assert interactive["depth"] == 0
+    assert set(interactive["wait_ms"]) == {"avg", "p50", "p95", "max"}
+    assert stats["total_depth"] == 0
@@ -0,0 +1,243 @@
+"""
+Unit tests for asynchronous executions in ExecutionService.
+Tests queued start, long-poll wait, completion callbacks, callback URL checks, cancellation and deadlines.
+"""
+
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from server.models.execution import ExecutionPriority, ExecutionStatus, StartExecutionRequest
+from server.services.execution_queue import ExecutionQueue
+from server.utils import security
+from server.utils.security import UnsafeURLError, check_callback_url
+
+
+@pytest.fixture
+def service_module(tmp_path, monkeypatch):
+    """Import execution_service inside a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    from server.services import execution_service as module
+
+    queue = ExecutionQueue(
+        db_path=str(tmp_path / "queue.db"),
+        lane_workers={ExecutionPriority.INTERACTIVE: 1},
+    )
+    monkeypatch.setattr(module, "execution_queue", queue)
+    monkeypatch.setattr(
+        module.deployment_service,
+        "get_deployment_by_id",
+        lambda deployment_id: SimpleNamespace(id=deployment_id, name="demo"),
+    )
+    yield module
+    queue.shutdown(timeout=1.0)
+
+
+def _fake_result(status="succeeded", error=None):
+    return {
+        "success": True,
+        "result": {
+            "output": "hello",
+            "error": error,
+            "execution_summary": {"overall_status": status},
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_start_returns_immediately_and_wait_returns_result(service_module, monkeypatch):
+    """실행 시작은 즉시 반환되고 wait는 저장된 결과를 반환해야 합니다."""
+    release = threading.Event()
+
+    def run_deployment(deployment_id, input_data, **kwargs):
+        release.wait(5)
+        return _fake_result()
+
+    monkeypatch.setattr(service_module.deployment_service, "run_deployment", run_deployment)
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution("dep-1", StartExecutionRequest(input={"q": "hi"}))
+    assert execution.status == ExecutionStatus.QUEUED
+
+    pending, completed = await service.wait_for_execution(execution.id, timeout=0.2)
+    assert completed is False
+    assert pending.status in (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING)
+
+    release.set()
+    finished, completed = await service.wait_for_execution(execution.id, timeout=5)
+    assert completed is True
+    assert finished.status == ExecutionStatus.SUCCEEDED
+    assert finished.output["result"]["output"] == "hello"
+    assert finished.queue_wait_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_run_is_recorded_as_failed(service_module, monkeypatch):
+    """run_deployment가 실패 결과를 반환하면 FAILED로 기록되어야 합니다."""
+    monkeypatch.setattr(
+        service_module.deployment_service,
+        "run_deployment",
+        lambda deployment_id, input_data, **kwargs: _fake_result("failed", "node error"),
+    )
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution("dep-1", StartExecutionRequest())
+    finished, completed = await service.wait_for_execution(execution.id, timeout=5)
+
+    assert completed is True
+    assert finished.status == ExecutionStatus.FAILED
+    assert finished.error_message == "node error"
+
+
+def test_callback_is_delivered_on_completion(service_module, monkeypatch):
+    """callback_url이 있으면 완료 시 결과를 POST해야 합니다."""
+    delivered = []
+
+    def fake_post(url, content=None, headers=None, timeout=None):
+        delivered.append((url, content, headers))
+        return SimpleNamespace(status_code=200)
+
+    monkeypatch.setattr(
+        service_module.deployment_service,
+        "run_deployment",
+        lambda deployment_id, input_data, **kwargs: _fake_result(),
+    )
+    monkeypatch.setattr(service_module.httpx, "post", fake_post)
+    monkeypatch.setattr(security, "CALLBACK_ALLOWED_HOSTS", ("callback.local",))
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution(
+        "dep-1", StartExecutionRequest(callback_url="http://callback.local/hook")
+    )
+
+    deadline = time.monotonic() + 5
+    while not delivered and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert delivered, "Callback should be delivered"
+    url, content, headers = delivered[0]
+    assert url == "http://callback.local/hook"
+    assert execution.id in content
+    assert headers["X-LangStar-Execution-Id"] == execution.id
+
+
+def _resolve_to(monkeypatch, *addresses):
+    """security 모듈의 DNS 조회 결과를 고정"""
+    monkeypatch.setattr(security.socket, "getaddrinfo", lambda host, port, **kwargs: [
+        (socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+        for address in addresses
+    ])
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:192.168.0.1]/hook",
+    "file:///etc/passwd",
+    "ftp://93.184.216.34/hook",
+    "/relative/hook",
+])
+def test_callback_url_rejects_internal_targets(url):
+    """http(s)가 아니거나 루프백, 링크 로컬, 사설 주소를 가리키는 콜백 주소는 거부해야 합니다."""
+    with pytest.raises(UnsafeURLError):
+        check_callback_url(url)
+
+
+def test_callback_url_checks_resolved_addresses_and_allowlist(monkeypatch):
+    """호스트 이름은 해석된 모든 주소를 검사하고, 허용 목록이 있으면 목록의 호스트만 허용해야 합니다."""
+    check_callback_url("https://93.184.216.34/hook")
+    _resolve_to(monkeypatch, "93.184.216.34", "192.168.1.10")
+    with pytest.raises(UnsafeURLError):
+        check_callback_url("https://hooks.example.com/hook")
+
+    monkeypatch.setattr(security, "CALLBACK_ALLOWED_HOSTS", ("hooks.internal",))
+    check_callback_url("http://hooks.internal:8080/hook")
+    with pytest.raises(UnsafeURLError):
+        check_callback_url("https://93.184.216.34/hook")
+
+
+def test_unsafe_callback_is_not_started_or_delivered(service_module, monkeypatch):
+    """내부 주소로의 콜백은 접수 시 거부하고, 접수 뒤 DNS가 내부 주소로 바뀌면 전송하지 않아야 합니다."""
+    delivered = []
+    monkeypatch.setattr(
+        service_module.deployment_service,
+        "run_deployment",
+        lambda deployment_id, input_data, **kwargs: _fake_result(),
+    )
+    monkeypatch.setattr(service_module.httpx, "post", lambda url, **kwargs: delivered.append(url))
+    service = service_module.ExecutionService()
+
+    with pytest.raises(UnsafeURLError):
+        service.start_execution("dep-1", StartExecutionRequest(callback_url="http://169.254.169.254/"))
+
+    _resolve_to(monkeypatch, "93.184.216.34")
+    execution = service.start_execution("dep-1", StartExecutionRequest(callback_url="https://hooks.example.com/hook"))
+    _resolve_to(monkeypatch, "127.0.0.1")
+    deadline = time.monotonic() + 5
+    while execution.callback_status is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert execution.callback_status == "rejected"
+    assert delivered == []
+
+
+def _cooperative_run(started):
+    """cancel_token을 superstep마다 확인하는 가짜 run_deployment"""
+    def run_deployment(deployment_id, input_data, cancel_token=None, **kwargs):
+        started.set()
+        for _ in range(200):
+            time.sleep(0.02)
+            cancel_token.step()
+        return _fake_result()
+    return run_deployment
+
+
+@pytest.mark.asyncio
+async def test_stop_execution_cancels_running_graph(service_module, monkeypatch):
+    """실행 중 중지하면 그래프가 멈추고 ABORTED로 기록되어야 합니다."""
+    started = threading.Event()
+    monkeypatch.setattr(service_module.deployment_service, "run_deployment", _cooperative_run(started))
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution("dep-1", StartExecutionRequest())
+    assert started.wait(5)
+
+    service.stop_execution(execution.id)
+    finished, completed = await service.wait_for_execution(execution.id, timeout=5)
+
+    assert completed is True
+    assert finished.status == ExecutionStatus.ABORTED
+    assert finished.supersteps < 200
+
+
+@pytest.mark.asyncio
+async def test_deadline_ends_with_timed_out(service_module, monkeypatch):
+    """제한 시간을 넘기면 TIMED_OUT으로 기록되어야 합니다."""
+    started = threading.Event()
+    monkeypatch.setattr(service_module.deployment_service, "run_deployment", _cooperative_run(started))
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution("dep-1", StartExecutionRequest(timeout_seconds=0.2))
+    finished, completed = await service.wait_for_execution(execution.id, timeout=5)
+
+    assert completed is True
+    assert finished.status == ExecutionStatus.TIMED_OUT
+
+
+@pytest.mark.asyncio
+async def test_max_supersteps_ends_with_timed_out(service_module, monkeypatch):
+    """superstep 예산을 넘기면 TIMED_OUT으로 기록되어야 합니다."""
+    started = threading.Event()
+    monkeypatch.setattr(service_module.deployment_service, "run_deployment", _cooperative_run(started))
+    service = service_module.ExecutionService()
+
+    execution = service.start_execution("dep-1", StartExecutionRequest(max_supersteps=3))
+    finished, completed = await service.wait_for_execution(execution.id, timeout=5)
+
+    assert finished.status == ExecutionStatus.TIMED_OUT
+    assert finished.supersteps == 4
+    assert "max supersteps" in finished.error_message
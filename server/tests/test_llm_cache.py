@@ -0,0 +1,182 @@
+"""
+Unit tests for the LLM response cache.
+Tests key construction, temperature bypass, TTL, the bounded SQLite tier and gateway integration.
+"""
+
+import os
+import sqlite3
+import time
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import tool
+
+from server.services import llm_gateway
+from server.services import llm_cache as llm_cache_module
+from server.services.llm_cache import LLMCache, build_cache_key, credential_fingerprint
+
+
+class FakeChatModel(FakeListChatModel):
+    """FakeListChatModel with sampling parameters"""
+    temperature: float = 0.0
+    model_name: str = "fake-model"
+    api_key: str = "sk-secret"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[t.name for t in tools])
+
+
+def _chain(temperature=0.0, responses=None, model_name="fake-model"):
+    prompt = ChatPromptTemplate.from_messages([("system", "You are terse."), ("human", "{user_prompt}")])
+    llm = FakeChatModel(responses=responses or ["first", "second", "third"], temperature=temperature, model_name=model_name)
+    return prompt | llm
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Replace the global cache with one backed by a temporary SQLite file"""
+    c = LLMCache(db_path=str(tmp_path / "llm_cache.db"), max_entries=2)
+    monkeypatch.setattr(llm_gateway, "llm_cache", c)
+    yield c
+    c.close()
+
+
+def test_key_depends_on_messages_model_and_params():
+    """렌더링된 메시지, 모델, 샘플링 파라미터가 다르면 키가 달라야 합니다."""
+    base = build_cache_key(_chain(), {"user_prompt": "hi"})
+
+    assert base == build_cache_key(_chain(), {"user_prompt": "hi"})
+    assert base != build_cache_key(_chain(), {"user_prompt": "hello"})
+    assert base != build_cache_key(_chain(model_name="other"), {"user_prompt": "hi"})
+    assert base != build_cache_key(_chain(temperature=0.5), {"user_prompt": "hi"}, force=True)
+
+
+def test_key_separates_credentials_and_includes_tool_schema():
+    """자격 증명이 다르면 키가 달라야 하고(원문 대신 해시 지문), 도구 스키마는 포함되어야 합니다."""
+    first = FakeChatModel(responses=["a"], api_key="sk-one")
+    second = FakeChatModel(responses=["a"], api_key="sk-two")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    assert build_cache_key(prompt | first, {"user_prompt": "x"}) != build_cache_key(prompt | second, {"user_prompt": "x"})
+    assert build_cache_key(prompt | first, {"user_prompt": "x"}) == build_cache_key(
+        prompt | FakeChatModel(responses=["a"], api_key="sk-one"), {"user_prompt": "x"}
+    )
+    fingerprint = credential_fingerprint(first)
+    assert len(fingerprint) == 64 and "sk-one" not in fingerprint
+
+    with_tool = AgentExecutor(agent=create_tool_calling_agent(first, [lookup], prompt), tools=[lookup])
+    without_tool = AgentExecutor(agent=create_tool_calling_agent(first, [], prompt), tools=[])
+    assert build_cache_key(with_tool, {"user_prompt": "x"}) != build_cache_key(without_tool, {"user_prompt": "x"})
+
+
+def test_temperature_above_zero_bypasses_unless_forced():
+    """temperature > 0 이면 force가 아닌 한 캐시하지 않아야 합니다."""
+    assert build_cache_key(_chain(temperature=0.7), {"user_prompt": "hi"}) is None
+    assert build_cache_key(_chain(temperature=0.7), {"user_prompt": "hi"}, force=True) is not None
+
+
+def test_gateway_returns_cached_response(cache):
+    """캐시가 켜져 있으면 같은 요청은 LLM을 다시 호출하지 않아야 합니다."""
+    chain = _chain()
+    options = {"enabled": True}
+
+    first = llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}, cache=options)
+    started = time.perf_counter()
+    second = llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}, cache=options)
+    elapsed = time.perf_counter() - started
+    third = llm_gateway.invoke_llm(chain, {"user_prompt": "other"}, cache=options)
+
+    assert isinstance(second, AIMessage)
+    assert first.content == second.content == "first"
+    assert third.content == "second"
+    assert elapsed < 0.05
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_gateway_without_cache_options_calls_llm(cache):
+    """캐시 설정이 없으면 매번 LLM을 호출해야 합니다."""
+    chain = _chain()
+    assert llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}).content == "first"
+    assert llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}).content == "second"
+    assert cache.get_stats()["hits"] == 0
+
+
+def test_ttl_expires_entries(cache):
+    """TTL이 지난 항목은 미스로 처리되어야 합니다."""
+    chain = _chain()
+    options = {"enabled": True, "ttlSeconds": 0.05}
+
+    llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}, cache=options)
+    time.sleep(0.1)
+    again = llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}, cache=options)
+
+    assert again.content == "second"
+    assert cache.get_stats()["expired"] >= 1
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    """메모리 LRU에서 밀려난 항목은 SQLite에서 다시 읽어야 합니다."""
+    db_path = str(tmp_path / "llm_cache.db")
+    c = LLMCache(db_path=db_path, max_entries=1)
+    c.set("a", AIMessage(content="alpha"), ttl=60)
+    c.set("b", AIMessage(content="beta"), ttl=60)
+
+    hit, value = c.get("a")
+    assert hit and value.content == "alpha"
+    assert c.get_stats()["disk_hits"] == 1
+    c.close()
+
+    reopened = LLMCache(db_path=db_path)
+    hit, value = reopened.get("b")
+    assert hit and value.content == "beta"
+    reopened.close()
+
+
+def test_disk_tier_is_bounded_and_purges_expired_rows(tmp_path):
+    """디스크 계층은 최대 행 수를 넘으면 가장 오래된 행을 지우고, 만료된 행은 주기적으로 한 번에 지워야 합니다."""
+    db_path = str(tmp_path / "llm_cache.db")
+    c = LLMCache(db_path=db_path, max_entries=1, max_disk_entries=3, purge_seconds=0)
+    for name in ("a", "b", "c", "d", "e"):
+        c.set(name, AIMessage(content=name), ttl=60)
+
+    stats = c.get_stats()
+    assert stats["disk_entries"] == 3 and stats["disk_evictions"] == 2
+    assert not c.get("a")[0] and c.get("c")[0]
+
+    c.set("short", AIMessage(content="short"), ttl=0.01)
+    time.sleep(0.05)
+    c.set("f", AIMessage(content="f"), ttl=60)
+    c.close()
+
+    with sqlite3.connect(db_path) as conn:
+        keys = {row[0] for row in conn.execute("SELECT key FROM llm_cache")}
+    assert keys == {"d", "e", "f"}
+
+
+def test_memory_hits_do_not_wait_for_disk_writes(tmp_path):
+    """디스크 계층이 쓰기 중이어도 메모리 적중은 기다리지 않아야 합니다."""
+    c = LLMCache(db_path=str(tmp_path / "llm_cache.db"))
+    c.set("a", AIMessage(content="alpha"), ttl=60)
+
+    with c._db_lock:
+        hit, value = c.get("a")
+
+    assert hit and value.content == "alpha"
+    c.close()
+
+
+def test_default_db_path_is_under_server_dir():
+    """기본 디스크 계층 경로는 작업 디렉터리가 아니라 server/executions 아래여야 합니다."""
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(llm_cache_module.__file__)))
+    if "LANGSTAR_LLM_CACHE_DB" not in os.environ:
+        assert llm_cache_module.LLM_CACHE_DB_PATH == os.path.join(server_dir, "executions", "llm_cache.db")
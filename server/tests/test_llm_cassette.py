@@ -0,0 +1,136 @@
+"""
+Unit tests for LLM record and replay cassettes.
+Tests recording agent model/tool calls, offline replay with scaled latency, replay order, misses and cache bypass.
+"""
+
+import json
+import time
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+from langchain_openai import ChatOpenAI
+
+from server.services import llm_gateway
+from server.services.llm_cache import LLMCache
+from server.services.llm_cassette import Cassette, CassetteMissError, current_cassette, llm_key, use_cassette
+from server.testing.fake_provider import FakeProvider
+
+# 연결할 수 없는 주소 (재생 중 프로바이더를 호출하면 실패)
+UNREACHABLE_URL = "http://127.0.0.1:9/v1"
+
+
+def _llm(base_url, api_key="sk-test"):
+    return ChatOpenAI(model="gpt-4o-mini", api_key=api_key, base_url=base_url, temperature=0, max_retries=0)
+
+
+def _chain(base_url):
+    prompt = ChatPromptTemplate.from_messages([("system", "Be brief."), ("human", "{user_prompt}")])
+    return prompt | _llm(base_url)
+
+
+def _agent(base_url, calls):
+    def lookup(query: str) -> str:
+        """Look up a record."""
+        calls.append(query)
+        return f"record:{query}"
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Use tools."), ("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}"),
+    ])
+    tools = [StructuredTool.from_function(lookup)]
+    return AgentExecutor(agent=create_tool_calling_agent(_llm(base_url), tools, prompt), tools=tools)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Replace the global response cache with a memory-only one"""
+    c = LLMCache(db_path=None)
+    monkeypatch.setattr(llm_gateway, "llm_cache", c)
+    return c
+
+
+def test_record_then_replay_agent_offline(tmp_path):
+    """녹화한 모델/도구 호출은 프로바이더와 도구를 호출하지 않고 같은 결과로 재생되어야 합니다."""
+    path = str(tmp_path / "agent.jsonl")
+    calls = []
+    with FakeProvider(tool_calls=True) as provider:
+        with use_cassette(Cassette(path, "record")) as cassette:
+            recorded = llm_gateway.invoke_llm(_agent(provider.base_url, calls), {"user_prompt": "hello"})
+        requests = provider.requests
+
+    with open(path, encoding="utf-8") as f:
+        kinds = [json.loads(line)["type"] for line in f]
+    assert kinds.count("llm") == requests == 2 and kinds.count("tool") == 1
+    assert cassette.get_stats()["recorded"] == 3
+
+    with use_cassette(Cassette(path, "replay", latency_scale=0)) as replay:
+        replayed = llm_gateway.invoke_llm(_agent(UNREACHABLE_URL, calls), {"user_prompt": "hello"})
+
+    assert replayed["output"] == recorded["output"]
+    assert len(calls) == 1
+    assert replay.get_stats()["replayed"] == 3 and replay.get_stats()["misses"] == 0
+
+
+def test_replay_scales_recorded_latency(tmp_path):
+    """재생 응답은 녹화된 지연 시간에 latency_scale을 곱한 만큼 늦게 돌아와야 합니다."""
+    path = str(tmp_path / "latency.jsonl")
+    with FakeProvider(latency=0.2) as provider:
+        with use_cassette(Cassette(path, "record")):
+            llm_gateway.invoke_llm(_chain(provider.base_url), {"user_prompt": "slow"})
+
+    timings = {}
+    for scale in (1.0, 0.0):
+        with use_cassette(Cassette(path, "replay", latency_scale=scale)):
+            started = time.perf_counter()
+            llm_gateway.invoke_llm(_chain(UNREACHABLE_URL), {"user_prompt": "slow"})
+            timings[scale] = time.perf_counter() - started
+
+    assert timings[1.0] >= 0.2
+    assert timings[0.0] < 0.15
+
+
+def test_replay_order_and_misses(tmp_path, cache):
+    """같은 요청은 녹화 순서대로 반복 재생하고, 녹화되지 않은 요청은 CassetteMissError로 실패해야 합니다."""
+    path = str(tmp_path / "order.jsonl")
+    with FakeProvider() as provider:
+        with use_cassette(Cassette(path, "record")):
+            # 녹화 중에는 응답 캐시가 켜져 있어도 두 호출 모두 프로바이더로 간다
+            first = llm_gateway.invoke_llm(_chain(provider.base_url), {"user_prompt": "same"}, cache={"enabled": True})
+            second = llm_gateway.invoke_llm(_chain(provider.base_url), {"user_prompt": "same"}, cache={"enabled": True})
+        assert provider.requests == 2
+    assert first.id != second.id
+
+    with use_cassette(Cassette(path, "replay", latency_scale=0)):
+        ids = [llm_gateway.invoke_llm(_chain(UNREACHABLE_URL), {"user_prompt": "same"}).id for _ in range(3)]
+        with pytest.raises(CassetteMissError):
+            llm_gateway.invoke_llm(_chain(UNREACHABLE_URL), {"user_prompt": "never recorded"})
+
+    assert ids == [first.id, second.id, first.id]
+
+
+def test_key_ignores_endpoint_and_secrets():
+    """카세트 키는 엔드포인트와 API 키가 달라도 같고, 메시지나 모델이 다르면 달라야 합니다."""
+    prompt = '[{"lc": 1, "type": "constructor", "id": ["x"], "kwargs": {"content": "hi", "id": "run-1"}}]'
+    other_id = prompt.replace("run-1", "run-2")
+    local = _llm("http://localhost:1/v1", api_key="sk-local")._get_llm_string()
+    remote = _llm("https://api.example.com/v1", api_key="sk-remote")._get_llm_string()
+    other_model = ChatOpenAI(model="gpt-4o", api_key="sk-test", temperature=0)._get_llm_string()
+
+    assert llm_key(prompt, local) == llm_key(other_id, remote)
+    assert llm_key(prompt, local) != llm_key(prompt.replace("hi", "bye"), local)
+    assert llm_key(prompt, local) != llm_key(prompt, other_model)
+
+
+def test_cassette_binding_and_validation(tmp_path):
+    """카세트는 컨텍스트에 바인딩된 동안만 적용되고, 잘못된 모드나 없는 재생 파일은 오류여야 합니다."""
+    cassette = Cassette(str(tmp_path / "bound.jsonl"), "record")
+    with use_cassette(cassette):
+        assert current_cassette() is cassette
+        with use_cassette(None):
+            assert current_cassette() is None
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "x.jsonl"), "rewind")
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "missing.jsonl"), "replay")
@@ -0,0 +1,192 @@
+"""
+Unit tests for LLM call resilience policies.
+Tests attempt timeouts, jittered retries, model-level retries for tool agents, hedged requests and the per-model circuit breaker.
+"""
+
+import time
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+from langchain_openai import ChatOpenAI
+
+from server.services import llm_gateway
+from server.services.llm_resilience import (
+    CircuitBreaker, CircuitOpenError, LLMCallTimeout, LLMResilience, is_transient_error
+)
+from server.services.llm_scheduler import LLMScheduler
+from server.testing.fake_provider import FakeProvider
+
+
+@pytest.fixture
+def provider():
+    with FakeProvider(latency=0.05) as fake:
+        yield fake
+
+
+@pytest.fixture
+def resilience(monkeypatch):
+    """Fresh resilience state and scheduler per test"""
+    instance = LLMResilience(failure_threshold=2, reset_seconds=0.3)
+    monkeypatch.setattr(llm_gateway, "llm_resilience", instance)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", LLMScheduler(limits={}))
+    yield instance
+    instance.shutdown()
+
+
+def _chain(provider):
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}")])
+    llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", temperature=0, max_retries=0)
+    return prompt | llm
+
+
+def test_slow_attempt_times_out_and_is_retried(provider, resilience):
+    """제한 시간을 넘은 시도는 취소하고 재시도해야 합니다."""
+    provider.latency = lambda number: 2.0 if number == 1 else 0.05
+    policy = {"timeoutSeconds": 0.3, "maxRetries": 1, "retryBaseDelay": 0.01}
+
+    started = time.perf_counter()
+    response = llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hi"}, resilience=policy)
+
+    assert response.content == "echo: hi"
+    assert time.perf_counter() - started < 1.5
+    stats = resilience.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["retries"] == 1
+
+
+def test_timeout_without_retries_raises(provider, resilience):
+    """재시도가 없으면 시도 제한 시간 초과 오류를 전달해야 합니다."""
+    provider.latency = 2.0
+
+    started = time.perf_counter()
+    with pytest.raises(LLMCallTimeout):
+        llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hi"}, resilience={"timeoutSeconds": 0.2})
+    assert time.perf_counter() - started < 1.0
+
+
+def test_server_errors_are_retried(provider, resilience):
+    """5xx 오류는 재시도하고 성공하면 서킷을 닫힌 상태로 유지해야 합니다."""
+    provider.errors = 1
+    policy = {"maxRetries": 2, "retryBaseDelay": 0.01}
+
+    response = llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hi"}, resilience=policy)
+
+    assert response.content == "echo: hi"
+    assert provider.requests == 2
+    assert resilience.get_stats()["models"]["openai:gpt-4o-mini"]["state"] == "closed"
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_tool_agent_retries_model_request_without_rerunning_tools(provider, resilience, status):
+    """도구 실행 뒤 모델 요청이 실패하면 그 요청만 재시도하고 도구는 다시 실행하지 않아야 합니다."""
+    calls = []
+
+    def lookup(query: str) -> str:
+        """Look something up."""
+        calls.append(query)
+        # 도구 결과를 보내는 다음 모델 요청을 한 번 실패시킨다
+        provider.errors, provider.error_status, provider.retry_after = 1, status, 0.05
+        return f"found {query}"
+
+    tool = StructuredTool.from_function(func=lookup, name="lookup", description="Look something up.")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", temperature=0, max_retries=0)
+    executor = AgentExecutor(agent=create_tool_calling_agent(llm, [tool], prompt), tools=[tool])
+    provider.tool_calls = True
+
+    response = llm_gateway.invoke_llm(executor, {"user_prompt": "hi"}, resilience={"maxRetries": 2, "retryBaseDelay": 0.01})
+
+    assert response["output"].startswith("echo:")
+    assert len(calls) == 1
+    assert provider.requests == 3
+    assert resilience.get_stats()["retries"] == 1
+
+
+def test_tool_agent_takes_a_scheduler_slot_per_model_request(provider, resilience, monkeypatch):
+    """도구 에이전트는 모델 요청마다 분당 요청 수와 슬롯을 차지하고, 도구 실행 중에는 슬롯을 반환해야 합니다."""
+    scheduler = LLMScheduler(limits={"*": {"rpm": 100, "concurrency": 1}})
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", scheduler)
+    in_flight = []
+
+    def lookup(query: str) -> str:
+        """Look something up."""
+        in_flight.extend(stats["in_flight"] for stats in scheduler.get_stats().values())
+        return f"found {query}"
+
+    tool = StructuredTool.from_function(func=lookup, name="lookup", description="Look something up.")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", temperature=0, max_retries=0)
+    executor = AgentExecutor(agent=create_tool_calling_agent(llm, [tool], prompt), tools=[tool])
+    provider.tool_calls = True
+
+    response = llm_gateway.invoke_llm(executor, {"user_prompt": "hi"})
+
+    assert response["output"].startswith("echo:")
+    [stats] = scheduler.get_stats().values()
+    assert provider.requests == 2
+    assert stats["requests"] == 2 and stats["in_flight"] == 0
+    assert in_flight == [0]
+
+
+def test_hedged_request_takes_first_response(provider, resilience):
+    """느린 응답은 헤징 요청으로 대체하고 먼저 도착한 응답을 사용해야 합니다."""
+    provider.latency = lambda number: 2.0 if number == 1 else 0.05
+    policy = {"hedge": True, "hedgeAfterMs": 200}
+
+    started = time.perf_counter()
+    response = llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hi"}, resilience=policy)
+
+    assert response.content == "echo: hi"
+    assert time.perf_counter() - started < 1.0
+    stats = resilience.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedging_waits_for_enough_latency_samples(provider, resilience):
+    """hedgeAfterMs가 없으면 p95를 계산할 표본이 쌓이기 전에는 헤징하지 않아야 합니다."""
+    llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hi"}, resilience={"hedge": True})
+
+    assert resilience.get_stats()["hedges"] == 0
+    assert provider.requests == 1
+
+
+def test_circuit_opens_and_fails_fast(provider, resilience):
+    """연속 실패가 임계값에 도달하면 프로바이더를 호출하지 않고 바로 실패해야 합니다."""
+    provider.errors = 10
+    chain = _chain(provider)
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            llm_gateway.invoke_llm(chain, {"user_prompt": "hi"})
+    with pytest.raises(CircuitOpenError):
+        llm_gateway.invoke_llm(chain, {"user_prompt": "hi"})
+    assert provider.requests == 2
+
+    # 열린 시간이 지나면 한 번의 시험 호출을 허용하고 성공하면 닫힌다
+    provider.errors = 0
+    time.sleep(0.35)
+    assert llm_gateway.invoke_llm(chain, {"user_prompt": "hi"}).content == "echo: hi"
+    assert resilience.get_stats()["models"]["openai:gpt-4o-mini"]["state"] == "closed"
+
+
+def test_client_errors_do_not_open_circuit():
+    """잘못된 요청 같은 클라이언트 오류는 재시도하거나 서킷 실패로 세지 않아야 합니다."""
+    class BadRequest(Exception):
+        status_code = 400
+
+    class ServiceUnavailable(Exception):
+        status_code = 503
+
+    assert not is_transient_error(BadRequest())
+    assert is_transient_error(ServiceUnavailable())
+    assert is_transient_error(LLMCallTimeout())
+
+    breaker = CircuitBreaker("p:m", failure_threshold=1, reset_seconds=60)
+    assert breaker.allow()
+    breaker.record_neutral()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
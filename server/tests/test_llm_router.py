@@ -0,0 +1,256 @@
+"""
+Unit tests for multi-provider fallback routing.
+Tests fallback on provider failure only, tool agents that already ran tools, health/latency ordering, split routing, model rebinding and generated agent code.
+"""
+
+import sys
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+from langchain_openai import ChatOpenAI
+
+from server.benchmarks.workflows import build_workflow
+from server.services import llm_gateway, llm_router as router_module
+from server.services.llm_cache import describe_runnable
+from server.services.llm_resilience import LLMResilience
+from server.services.llm_router import (
+    LLMRouter, agent_output_text, pop_routing_decisions, resolve_routing, with_chat_model
+)
+from server.services.llm_scheduler import LLMScheduler
+from server.services.workflow_service import WorkflowService
+from server.testing.fake_provider import FakeProvider
+
+
+class NamedChatModel(BaseChatModel):
+    """Fake chat model that answers with its own name"""
+    name: str = "model"
+
+    @property
+    def _llm_type(self) -> str:
+        return f"fake-{self.name}"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[tool.name for tool in tools])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name))])
+
+
+class ServiceUnavailableError(Exception):
+    """Provider 503 error"""
+    status_code = 503
+
+
+class UnavailableChatModel(NamedChatModel):
+    """Fake chat model whose provider is down"""
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        raise ServiceUnavailableError(f"{self.name} unavailable")
+
+
+class FailingAfterToolModel(NamedChatModel):
+    """Fake chat model that requests a tool, then fails on the next request (or with ``error`` right away)"""
+    error: Optional[Exception] = None
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        if self.error is not None:
+            raise self.error
+        if any(isinstance(message, ToolMessage) for message in messages):
+            raise ServiceUnavailableError(f"{self.name} unavailable")
+        call = {"name": "lookup", "args": {"query": "x"}, "id": "call_1"}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """Fresh router, resilience and scheduler state per test"""
+    instance = LLMRouter()
+    resilience = LLMResilience()
+    monkeypatch.setattr(llm_gateway, "llm_router", instance)
+    monkeypatch.setattr(llm_gateway, "llm_resilience", resilience)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", LLMScheduler(limits={}))
+    pop_routing_decisions()
+    yield instance
+    resilience.shutdown()
+
+
+@pytest.fixture
+def providers():
+    with FakeProvider(latency=0.02) as primary, FakeProvider(latency=0.02) as fallback:
+        yield primary, fallback
+
+
+def _chain(provider):
+    prompt = ChatPromptTemplate.from_messages([("system", "Be brief."), ("human", "{user_prompt}")])
+    llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", temperature=0, max_retries=0)
+    return prompt | llm
+
+
+def _fallback(provider, model="gpt-4o"):
+    return {"providerName": "openai", "modelName": model, "apiKey": "sk-fallback", "baseUrl": provider.base_url}
+
+
+def test_resolve_routing_requires_fallbacks():
+    """대체 모델이 없으면 라우팅하지 않아야 합니다."""
+    assert resolve_routing(None) is None
+    assert resolve_routing({"strategy": "fastest"}) is None
+    route = resolve_routing({"fallbacks": [{"providerName": "openai", "modelName": "gpt-4o"}], "splitPercent": 25})
+    assert route["strategy"] == "failover" and route["split"] == 0.25
+
+
+def test_falls_back_when_primary_fails(router, providers):
+    """기본 모델이 실패하면 대체 모델로 같은 프롬프트를 보내야 합니다."""
+    primary, fallback = providers
+    primary.errors = 10
+
+    response = llm_gateway.invoke_llm(
+        _chain(primary), {"user_prompt": "hi"}, routing={"fallbacks": [_fallback(fallback)]}
+    )
+
+    assert response.content == "echo: hi"
+    assert primary.requests == 1 and fallback.requests == 1
+    decisions = pop_routing_decisions()
+    assert len(decisions) == 1
+    assert decisions[0]["selected"] == "openai:gpt-4o"
+    assert [attempt["outcome"] for attempt in decisions[0]["attempts"]] == ["error", "ok"]
+    assert pop_routing_decisions() == []
+
+
+def test_all_routes_failing_raises_last_error(router, providers):
+    """모든 후보가 실패하면 마지막 오류를 전달하고 결정을 기록해야 합니다."""
+    primary, fallback = providers
+    primary.errors = fallback.errors = 10
+
+    with pytest.raises(Exception):
+        llm_gateway.invoke_llm(_chain(primary), {"user_prompt": "hi"}, routing={"fallbacks": [_fallback(fallback)]})
+
+    decision = pop_routing_decisions()[0]
+    assert decision["selected"] is None
+    assert len(decision["attempts"]) == 2
+
+
+def _tool_agent(model, runs):
+    def lookup(query: str) -> str:
+        """Look something up."""
+        runs.append(query)
+        return query
+
+    tool = StructuredTool.from_function(func=lookup, name="lookup", description="Look something up.")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    return AgentExecutor(agent=create_tool_calling_agent(model, [tool], prompt), tools=[tool])
+
+
+def test_tool_agent_does_not_fall_back_after_a_tool_ran(router, providers):
+    """도구를 실행한 뒤 기본 모델이 실패하면 대체 모델로 에이전트를 다시 실행하지 않아 도구가 한 번만 실행되어야 합니다."""
+    _, fallback = providers
+    runs = []
+
+    with pytest.raises(ServiceUnavailableError):
+        llm_gateway.invoke_llm(
+            _tool_agent(FailingAfterToolModel(name="primary"), runs), {"user_prompt": "hi"},
+            routing={"fallbacks": [_fallback(fallback)]},
+        )
+
+    assert runs == ["x"]
+    assert fallback.requests == 0
+    [attempt] = pop_routing_decisions()[0]["attempts"]
+    assert attempt["outcome"] == "error" and attempt["tool_runs"] == 1
+
+
+@pytest.mark.parametrize("error", [ValueError("Could not parse tool input"), RuntimeError("tool failed")])
+def test_non_provider_errors_are_not_routed(router, providers, error):
+    """출력 파싱이나 도구 오류처럼 프로바이더 장애가 아닌 오류는 다음 모델로 넘기지 않고 그대로 전달해야 합니다."""
+    _, fallback = providers
+
+    with pytest.raises(type(error)):
+        llm_gateway.invoke_llm(
+            _tool_agent(FailingAfterToolModel(name="primary", error=error), []), {"user_prompt": "hi"},
+            routing={"fallbacks": [_fallback(fallback)]},
+        )
+
+    assert fallback.requests == 0
+    assert router.get_stats() == {}
+
+
+def test_unhealthy_route_is_tried_last():
+    """최근 오류율이 높은 경로는 순서의 맨 뒤로 가야 합니다."""
+    instance = LLMRouter()
+    for _ in range(5):
+        instance._stats("a:primary").observe(False, 0.1)
+    instance._stats("b:fast").observe(True, 0.05)
+    instance._stats("c:slow").observe(True, 0.5)
+
+    assert instance.order(["a:primary", "c:slow", "b:fast"])[0] == ["c:slow", "b:fast", "a:primary"]
+    assert instance.order(["a:primary", "c:slow", "b:fast"], strategy="fastest")[0] == ["b:fast", "c:slow", "a:primary"]
+
+
+def test_split_routes_share_to_fastest(monkeypatch):
+    """splitPercent 비율만큼 가장 빠른 정상 경로로 먼저 보내야 합니다."""
+    instance = LLMRouter()
+    instance._stats("a:primary").observe(True, 0.5)
+    instance._stats("b:fast").observe(True, 0.05)
+
+    monkeypatch.setattr(router_module.random, "random", lambda: 0.05)
+    assert instance.order(["a:primary", "b:fast"], split=0.1) == (["b:fast", "a:primary"], True)
+    monkeypatch.setattr(router_module.random, "random", lambda: 0.5)
+    assert instance.order(["a:primary", "b:fast"], split=0.1) == (["a:primary", "b:fast"], False)
+
+
+def test_with_chat_model_rebinds_agent_tools():
+    """에이전트의 모델을 바꿀 때 프롬프트와 도구는 유지하고 도구는 새 모델에 다시 바인딩해야 합니다."""
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    tool = StructuredTool.from_function(func=lookup, name="lookup", description="Look something up.")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    executor = AgentExecutor(agent=create_tool_calling_agent(NamedChatModel(name="primary"), [tool], prompt), tools=[tool])
+
+    replacement = NamedChatModel(name="backup")
+    rebound = with_chat_model(executor, replacement)
+    described = describe_runnable(rebound)
+
+    assert described["llm"] is replacement
+    assert described["bound_tools"] == ["lookup"]
+    assert described["prompt"] is describe_runnable(executor)["prompt"]
+    assert describe_runnable(executor)["llm"].name == "primary"
+    assert rebound.invoke({"user_prompt": "hi"})["output"] == "backup"
+
+
+def test_agent_output_text_accepts_any_provider_shape():
+    """Bedrock의 content 블록과 <thinking> 태그, 대체 모델의 문자열 출력 모두에서 답변만 꺼내야 합니다."""
+    bedrock = [{"type": "text", "text": "<thinking>plan</thinking>\n\nanswer"}, {"type": "tool_use", "id": "t1"}]
+
+    assert agent_output_text(bedrock) == "\n\nanswer"
+    assert agent_output_text([{"type": "text", "text": "plain"}]) == "plain"
+    assert agent_output_text("echo: hi") == "echo: hi"
+    assert agent_output_text("<thinking>plan</thinking>done") == "done"
+    assert agent_output_text(None) == ""
+
+
+def test_generated_bedrock_agent_falls_back_to_openai(router, providers, monkeypatch, tmp_path):
+    """생성된 AWS 도구 에이전트 노드는 Bedrock이 실패하면 대체 모델의 문자열 답변을 그대로 출력해야 합니다."""
+    _, fallback = providers
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, "langchain_aws", SimpleNamespace(
+        ChatBedrockConverse=lambda model, temperature, max_tokens, **aws_config: UnavailableChatModel(name=model)
+    ))
+    workflow = build_workflow("agent_tools", 1, tools=1)
+    config = next(node for node in workflow["nodes"] if node["type"] == "agentNode")["data"]["config"]
+    config["model"] = {"providerName": "aws", "modelName": "anthropic.claude-3-5-sonnet-20240620-v1:0",
+                       "accessKeyId": "AKIA", "secretAccessKey": "secret", "region": "us-east-1"}
+    config["routing"] = {"fallbacks": [_fallback(fallback)]}
+
+    namespace = {}
+    exec(compile(WorkflowService.generate_langgraph_code(workflow), "generated_workflow", "exec"), namespace)
+    result = namespace["app"].invoke({"Start": {"question": "hi", "value": 1}}, {"configurable": {"thread_id": "aws"}})
+
+    assert result["response"]["answer_1"] == "echo: hi"
+    assert fallback.requests == 1
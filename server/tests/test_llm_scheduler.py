@@ -0,0 +1,138 @@
+"""
+Unit tests for the LLM scheduler.
+Tests rate-limit retries against the fake provider, request pacing, concurrency caps and tenant fairness.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from server.services import llm_gateway
+from server.services.llm_scheduler import LLMScheduler, ProviderLimiter, retry_after_seconds
+from server.testing.fake_provider import FakeProvider
+from server.utils.execution_context import use_tenant
+
+
+@pytest.fixture
+def provider():
+    with FakeProvider(latency=0.1) as fake:
+        yield fake
+
+
+def _chain(provider, api_key="sk-test"):
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}")])
+    llm = ChatOpenAI(base_url=provider.base_url, api_key=api_key, model="gpt-4o-mini", temperature=0, max_retries=0)
+    return prompt | llm
+
+
+def _use_scheduler(monkeypatch, **kwargs):
+    scheduler = LLMScheduler(**kwargs)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", scheduler)
+    return scheduler
+
+
+def test_retry_after_header_parsing():
+    """retry-after 계열 헤더를 초 단위로 해석해야 합니다."""
+    assert retry_after_seconds({"retry-after": "2"}) == 2
+    assert retry_after_seconds({"Retry-After-Ms": "250"}) == 0.25
+    assert retry_after_seconds({"x-ratelimit-reset-requests": "1m30s"}) == 90
+    assert retry_after_seconds({}) is None
+
+
+def test_rate_limited_call_is_retried_after_backoff(provider, monkeypatch):
+    """429 응답은 retry-after만큼 기다린 뒤 재시도해야 합니다."""
+    provider.fail_first, provider.retry_after = 2, 0.2
+    scheduler = _use_scheduler(monkeypatch, limits={}, max_retries=3)
+
+    started = time.perf_counter()
+    response = llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hello"})
+    elapsed = time.perf_counter() - started
+
+    assert response.content == "echo: hello"
+    assert provider.requests == 3
+    assert elapsed >= 0.4
+    stats = next(iter(scheduler.get_stats().values()))
+    assert stats["rate_limited"] == 2
+    assert stats["rate_scale"] < 1.0
+
+
+def test_rate_limit_error_raised_after_max_retries(provider, monkeypatch):
+    """재시도 횟수를 넘으면 마지막 429 오류를 그대로 전달해야 합니다."""
+    provider.fail_first, provider.retry_after = 5, 0.05
+    _use_scheduler(monkeypatch, limits={}, max_retries=1)
+
+    with pytest.raises(Exception) as exc_info:
+        llm_gateway.invoke_llm(_chain(provider), {"user_prompt": "hello"})
+
+    assert getattr(exc_info.value, "status_code", None) == 429
+    assert provider.requests == 2
+
+
+def test_concurrency_limit_per_model(provider, monkeypatch):
+    """같은 키/모델의 동시 호출 수는 설정값을 넘지 않아야 합니다."""
+    scheduler = _use_scheduler(monkeypatch, limits={"openai:gpt-4o-mini": {"concurrency": 2}})
+    chain = _chain(provider)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda i: llm_gateway.invoke_llm(chain, {"user_prompt": f"q{i}"}), range(6)))
+
+    assert [r.content for r in results] == [f"echo: q{i}" for i in range(6)]
+    assert provider.peak_concurrency == 2
+    assert sum(s["requests"] for s in scheduler.get_stats().values()) == 6
+
+
+def test_limits_are_separate_per_api_key(provider, monkeypatch):
+    """API 키가 다르면 별도의 한도를 사용해야 합니다."""
+    scheduler = _use_scheduler(monkeypatch, limits={"openai:*": {"concurrency": 1}})
+
+    llm_gateway.invoke_llm(_chain(provider, "sk-one"), {"user_prompt": "a"})
+    llm_gateway.invoke_llm(_chain(provider, "sk-two"), {"user_prompt": "b"})
+
+    keys = list(scheduler.get_stats())
+    assert len(keys) == 2
+    assert all(key.startswith("openai:gpt-4o-mini:") for key in keys)
+    assert "sk-one" not in "".join(keys)
+
+
+def test_request_bucket_paces_bursts():
+    """분당 요청 한도를 넘는 호출은 버킷이 채워질 때까지 기다려야 합니다."""
+    limiter = ProviderLimiter("test", rpm=600, burst=2)  # 초당 10회, 버스트 2회
+
+    started = time.perf_counter()
+    for _ in range(5):
+        limiter.acquire("t")
+        limiter.release(True)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed >= 0.25
+
+
+def test_tenants_are_served_round_robin():
+    """한 배포의 버스트가 다른 배포의 호출을 뒤로 밀어내지 않아야 합니다."""
+    limiter = ProviderLimiter("test", concurrency=1)
+    limiter.acquire("holder")
+    order, lock = [], threading.Lock()
+
+    def call(tenant, name):
+        with use_tenant(tenant):
+            limiter.acquire(tenant)
+        with lock:
+            order.append(name)
+        limiter.release(True)
+
+    threads = []
+    for tenant, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]:
+        thread = threading.Thread(target=call, args=(tenant, name))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)  # 대기열 순서를 고정
+
+    limiter.release(True)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["a1", "b1", "a2", "a3"]
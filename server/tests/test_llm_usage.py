@@ -0,0 +1,96 @@
+"""
+Unit tests for LLM token usage and cost accounting.
+Tests price lookup, cost estimation with cache tokens, execution totals, Prometheus counters and deployment usage.
+"""
+
+import json
+import os
+
+import pytest
+
+from server.services.deployment_service import deployment_service
+from server.services.llm_cache import llm_registry
+from server.services.llm_usage import (
+    estimate_cost, merge_usage, model_price, pop_node_usage, record_execution_usage, record_node_usage
+)
+
+
+def _usage(model, input_tokens, output_tokens, cache_read=0, cache_write=0, calls=1):
+    counts = {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+        "calls": calls,
+    }
+    return {**counts, "models": {model: dict(counts)}}
+
+
+def test_price_lookup_uses_longest_match():
+    """가장 길게 일치하는 가격표 항목을 사용해야 합니다."""
+    assert model_price("gpt-4o-mini-2024-07-18")["input"] == 0.15
+    assert model_price("gpt-4o")["input"] == 2.5
+    assert model_price("anthropic.claude-3-5-sonnet-20240620-v1:0")["output"] == 15.0
+    assert model_price("my-local-model") is None
+
+
+def test_cache_tokens_are_priced_separately():
+    """캐시 읽기/쓰기 토큰은 입력 토큰에서 빼고 각각의 가격으로 계산해야 합니다."""
+    prices = {"model": {"input": 10.0, "output": 20.0, "cache_read": 1.0, "cache_write": 12.0}}
+    usage = {"input_tokens": 1_000_000, "output_tokens": 500_000, "cache_read_tokens": 600_000, "cache_write_tokens": 100_000}
+
+    # 300k * 10 + 600k * 1 + 100k * 12 + 500k * 20 (100만 토큰당)
+    assert estimate_cost("model", usage, prices) == pytest.approx(3.0 + 0.6 + 1.2 + 10.0)
+    assert estimate_cost("unknown", usage, prices) is None
+
+
+def test_node_usage_includes_cost():
+    """노드 사용량에는 모델별 비용과 합계 비용이 포함되어야 합니다."""
+    pop_node_usage()
+    record_node_usage(_usage("gpt-4o-mini", 1000, 100))
+    record_node_usage(_usage("my-local-model", 500, 50))
+
+    usage = pop_node_usage()
+
+    assert usage["calls"] == 2 and usage["input_tokens"] == 1500
+    assert usage["models"]["gpt-4o-mini"]["cost_usd"] == pytest.approx((1000 * 0.15 + 100 * 0.6) / 1_000_000)
+    assert usage["models"]["my-local-model"]["cost_usd"] is None
+    assert usage["cost_usd"] == usage["models"]["gpt-4o-mini"]["cost_usd"]
+    assert pop_node_usage() == {}
+
+
+def test_execution_usage_updates_prometheus():
+    """배포 실행의 노드 사용량을 합산하고 배포/버전/모델별 카운터를 올려야 합니다."""
+    labels = {"deployment": "dep-usage", "version": "v1", "model": "gpt-4o"}
+    before = llm_registry.get_sample_value("langstar_llm_tokens_total", {**labels, "type": "input"}) or 0
+
+    usage = record_execution_usage("dep-usage", "v1", [
+        _usage("gpt-4o", 1000, 200), None, _usage("gpt-4o", 3000, 100, cache_read=2000),
+    ])
+
+    assert usage["calls"] == 2
+    assert usage["models"]["gpt-4o"]["cache_read_tokens"] == 2000
+    assert llm_registry.get_sample_value("langstar_llm_tokens_total", {**labels, "type": "input"}) == before + 4000
+    assert llm_registry.get_sample_value("langstar_llm_cost_usd_total", labels) >= usage["cost_usd"]
+    assert record_execution_usage("dep-usage", "v1", [None]) == {}
+
+
+def test_deployment_usage_groups_by_version(tmp_path, monkeypatch):
+    """배포 사용량은 실행 기록을 버전별로 합산해야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    records = [("e1", "v1", _usage("gpt-4o", 100, 10)), ("e2", "v1", _usage("gpt-4o", 200, 20)),
+               ("e3", "v2", _usage("sonnet", 50, 5)), ("e4", "v2", None)]
+    for execution_id, version_id, usage in records:
+        execution_dir = os.path.join("deployments", "dep-1", "executions", execution_id)
+        os.makedirs(execution_dir)
+        with open(os.path.join(execution_dir, "workflow_snap.json"), "w", encoding="utf-8") as f:
+            json.dump({"execution_metadata": {"id": execution_id, "version_id": version_id, "usage": usage}}, f)
+
+    result = deployment_service.get_deployment_usage("dep-1")
+
+    assert result["executions"] == 4
+    assert result["versions"]["v1"]["input_tokens"] == 300
+    assert result["versions"]["v2"]["calls"] == 1
+    assert result["total"] == merge_usage(result["versions"].values())
+    assert deployment_service.get_deployment_usage("missing")["total"] == {}
@@ -0,0 +1,133 @@
+"""
+Unit tests for the HTTP load-test harness.
+Tests open-loop arrival scheduling, per-stage statistics, saturation detection and a full run against a stub server.
+"""
+
+import asyncio
+import uuid
+
+from fastapi import FastAPI, HTTPException, Response
+
+from server.benchmarks.loadtest import LoadStage, LoadTest, find_saturation, in_process_server, summarize_stage, Sample
+from server.benchmarks.runner import percentiles
+
+
+def _stub_app(capacity: int = 100, delay: float = 0.005) -> FastAPI:
+    """실제 서버와 같은 경로를 가진 작은 앱 (동시 실행이 capacity를 넘으면 429)"""
+    app = FastAPI()
+    state = {"running": 0, "schedules": {}, "executions": set()}
+
+    @app.post("/api/deployment/create")
+    def create():
+        return {"deployment": {"id": "dep-1"}}
+
+    @app.post("/api/deployment/{deployment_id}/activate")
+    def activate(deployment_id: str):
+        return {"success": True}
+
+    @app.post("/api/deployment/{deployment_id}/run")
+    async def run(deployment_id: str, body: dict, response: Response):
+        if state["running"] >= capacity:
+            raise HTTPException(status_code=429, detail="busy", headers={"Retry-After": "1"})
+        state["running"] += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["running"] -= 1
+        execution_id = str(uuid.uuid4())
+        state["executions"].add(execution_id)
+        response.headers["Server-Timing"] = "queue_wait;dur=1.5, total;dur=5"
+        return {"success": True, "execution_id": execution_id}
+
+    @app.get("/api/executions/{execution_id}")
+    def describe(execution_id: str):
+        if execution_id not in state["executions"]:
+            raise HTTPException(status_code=404)
+        return {"success": True}
+
+    @app.get("/api/workflows/{workflow_id}/executions")
+    def executions(workflow_id: str, max_results: int = 20):
+        return {"success": True, "executions": []}
+
+    @app.post("/api/schedules")
+    def create_schedule(body: dict):
+        schedule_id = str(uuid.uuid4())
+        state["schedules"][schedule_id] = body
+        return {"success": True, "schedule": {"id": schedule_id}}
+
+    @app.get("/api/schedules/{schedule_id}")
+    def get_schedule(schedule_id: str):
+        if schedule_id not in state["schedules"]:
+            raise HTTPException(status_code=404)
+        return {"success": True}
+
+    @app.delete("/api/schedules/{schedule_id}")
+    def delete_schedule(schedule_id: str):
+        if state["schedules"].pop(schedule_id, None) is None:
+            raise HTTPException(status_code=404)
+        return {"success": True}
+
+    @app.get("/api/deployments/{deployment_id}/schedules")
+    def deployment_schedules(deployment_id: str):
+        return {"success": True, "schedules": []}
+
+    return app
+
+
+def test_arrivals_follow_target_rate():
+    """도착 시각은 응답과 무관하게 목표 도착률과 단계 길이로만 정해져야 합니다."""
+    constant = LoadTest("http://localhost", arrival="constant")._arrivals(LoadStage(rate=10, duration=2))
+    poisson = LoadTest("http://localhost", seed=7)._arrivals(LoadStage(rate=200, duration=5))
+
+    assert len(constant) == 19 and abs(constant[1] - constant[0] - 0.1) < 1e-9
+    assert 900 <= len(poisson) <= 1100
+    assert all(0 < offset < 5 for offset in poisson)
+    assert LoadTest("http://localhost")._arrivals(LoadStage(rate=0, duration=5)) == []
+
+
+def test_summarize_and_find_saturation():
+    """오류율, p95 SLO, 처리량 기준 중 하나라도 넘은 첫 단계를 포화 지점으로 보고해야 합니다."""
+    samples = [Sample("run", "200", 10.0, 1.0)] * 18 + [Sample("run", "429", 2.0), Sample("run", "timeout", 60000.0)]
+    stage = summarize_stage(LoadStage(rate=10, duration=2), samples, elapsed=2.0, dropped=1)
+
+    assert stage["requests"] == 21 and stage["statuses"]["dropped"] == 1
+    assert stage["error_rate"] == round(3 / 21, 4)
+    assert stage["operations"]["run"]["errors"] == 2
+    assert stage["queue_wait_ms"]["p50"] == 1.0
+
+    def healthy(rate, p95=50.0):
+        return {"target_rate": rate, "offered_rate": rate, "throughput_per_second": rate, "error_rate": 0.0,
+                "latency_ms": {**percentiles([10.0]), "p95": p95}}
+
+    saturation = find_saturation([healthy(1), healthy(2), healthy(4, p95=5000.0), stage])
+    assert saturation == {"saturated": True, "rate": 4, "max_sustainable_rate": 2,
+                          "reasons": ["p95 5000ms > 2000ms"]}
+    assert find_saturation([healthy(1), healthy(2)])["max_sustainable_rate"] == 2
+    assert any("throughput" in reason for reason in find_saturation(
+        [{**healthy(8), "throughput_per_second": 3.0}])["reasons"])
+
+
+def test_load_test_drives_every_endpoint(tmp_path):
+    """실행 결과와 생성된 스케줄 ID를 이후 조회/삭제 요청에 사용하고 큐 대기 시간을 수집해야 합니다."""
+    with in_process_server(str(tmp_path), app=_stub_app()) as base_url:
+        report = LoadTest(base_url, arrival="constant", seed=1).run([LoadStage(rate=60, duration=1.5)])
+
+    stage = report["stages"][0]
+    assert report["deployment_id"] == "dep-1"
+    assert stage["error_rate"] == 0.0 and stage["requests"] == 89
+    assert {"run", "execution_describe", "execution_list"} <= set(stage["operations"])
+    assert stage["queue_wait_ms"]["p50"] == 1.5
+    assert report["saturation"]["saturated"] is False
+
+
+def test_load_test_reports_saturation(tmp_path):
+    """서버가 처리 한도를 넘으면 429와 시간 초과를 오류로 세어 포화 지점을 찾아야 합니다."""
+    with in_process_server(str(tmp_path), app=_stub_app(capacity=2, delay=0.2)) as base_url:
+        load_test = LoadTest(base_url, mix={"run": 1}, timeout=5, arrival="constant")
+        report = load_test.run([LoadStage(rate=2, duration=1), LoadStage(rate=40, duration=1)])
+
+    low, high = report["stages"]
+    assert low["error_rate"] == 0.0
+    assert high["statuses"].get("429", 0) > 0
+    assert report["saturation"]["rate"] == 40
+    assert report["saturation"]["max_sustainable_rate"] == 2
@@ -0,0 +1,111 @@
+"""
+Unit tests for memory diagnostics.
+Tests deep size estimation, tracked structure sizes, InMemorySaver and sys.modules accounting, tracemalloc diffing and the admin endpoints.
+"""
+
+import sys
+import types
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.routes import diagnostics
+from server.utils import security
+from server.utils.memory_diagnostics import MemoryDiagnostics, deep_sizeof
+
+_retained = []
+
+
+@pytest.fixture
+def stop_tracemalloc():
+    was_tracing = tracemalloc.is_tracing()
+    yield
+    if not was_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _retained.clear()
+
+
+def test_deep_sizeof_follows_containers_and_objects():
+    """중첩 컨테이너와 인스턴스 속성을 따라가되, 모듈/함수는 따라가지 않아야 합니다."""
+    holder = types.SimpleNamespace(payload=["x" * 10_000], module=sys, function=deep_sizeof)
+    size, objects, truncated = deep_sizeof({"a": holder})
+
+    assert size > 10_000 and not truncated
+    assert objects < 20
+    _, _, cut = deep_sizeof([[i] for i in range(100)], limit=10)
+    assert cut
+
+
+def test_structure_sizes_report_tracked_structures():
+    """등록한 구조체의 항목 수와 크기, InMemorySaver 체크포인트 수를 보고해야 합니다."""
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    store = {f"key-{i}": f"{i}-" + "v" * 1000 for i in range(50)}
+    saver = InMemorySaver()
+    saver.storage["thread-1"][""]["cp-1"] = ("checkpoint", "metadata", None)
+    diagnostics_ = MemoryDiagnostics(structures={"test.store": lambda: store})
+    diagnostics_.register_structure("test.broken", lambda: 1 / 0)
+
+    sizes = diagnostics_.structure_sizes()
+
+    assert sizes["test.store"]["entries"] == 50
+    assert sizes["test.store"]["bytes"] > 50_000
+    assert sizes["test.broken"]["error"].startswith("ZeroDivisionError")
+    savers = sizes["langgraph.in_memory_savers"]
+    assert savers["entries"] >= 1 and savers["threads"] >= 1 and savers["checkpoints"] >= 1
+
+
+def test_module_growth_lists_dynamic_deployment_modules(monkeypatch):
+    """시작 이후 추가된 모듈과 동적으로 로드된 배포 모듈을 보고해야 합니다."""
+    diagnostics_ = MemoryDiagnostics(structures={})
+    monkeypatch.setitem(sys.modules, "deployment_leak_test", types.ModuleType("deployment_leak_test"))
+
+    modules = diagnostics_.module_growth(limit=100_000)
+
+    assert "deployment_leak_test" in modules["added_modules"]
+    assert "deployment_leak_test" in modules["deployment_modules"]
+    assert modules["total"] == modules["baseline"] + modules["added"] - modules["removed"]
+
+
+def test_allocations_diff_against_baseline(stop_tracemalloc):
+    """기준 스냅샷 이후 할당된 메모리의 증가 위치를 보여주고, 꺼져 있으면 ValueError를 발생시켜야 합니다."""
+    diagnostics_ = MemoryDiagnostics(structures={})
+    if not tracemalloc.is_tracing():
+        with pytest.raises(ValueError):
+            diagnostics_.allocations()
+
+    status = diagnostics_.start_tracing(frames=5)
+    _retained.extend(bytearray(1024) for _ in range(2000))
+    result = diagnostics_.allocations(compare="baseline", limit=50)
+
+    assert status["tracing"] and status["has_baseline"]
+    assert result["total_size_diff_bytes"] > 1024 * 2000
+    assert any("test_memory_diagnostics.py" in site["location"] and site["size_diff_bytes"] > 1024 * 1000
+               for site in result["growth"])
+    again = diagnostics_.allocations(compare="previous")
+    assert again["compare"] == "previous" and again["top"]
+
+
+def test_memory_endpoints_require_admin_token(monkeypatch, stop_tracemalloc):
+    """메모리 진단 API는 관리자 토큰을 요구하고, 요약/tracemalloc 시작·중지/할당 위치를 반환해야 합니다."""
+    app = FastAPI()
+    app.include_router(diagnostics.router, prefix="/api")
+    client = TestClient(app)
+    monkeypatch.setattr(security, "ADMIN_TOKEN", "s3cret")
+    headers = {"X-Admin-Token": "s3cret"}
+
+    assert client.get("/api/diagnostics/memory").status_code == 401
+    summary = client.get("/api/diagnostics/memory", params={"include_objects": False}, headers=headers).json()["memory"]
+    assert "workflow.memory_store" in summary["structures"] and "objects" not in summary
+    assert summary["rss_bytes"] > 0
+
+    started = client.post("/api/diagnostics/memory/tracemalloc/start", params={"frames": 3}, headers=headers)
+    allocations = client.get("/api/diagnostics/memory/allocations", params={"limit": 5}, headers=headers)
+    stopped = client.post("/api/diagnostics/memory/tracemalloc/stop", headers=headers)
+
+    assert started.json()["tracemalloc"]["frames"] == 3
+    assert allocations.status_code == 200 and len(allocations.json()["allocations"]["top"]) <= 5
+    assert stopped.json()["tracemalloc"]["tracing"] is False
+    assert client.get("/api/diagnostics/memory/allocations", headers=headers).status_code == 409
@@ -0,0 +1,171 @@
+"""
+Unit tests for on-demand profiling.
+Tests all-thread stack sampling, collapsed stack output, admin-only diagnostics endpoints and per-execution cProfile runs.
+"""
+
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.models.deployment import DeploymentStatus, WorkflowSnapshot
+from server.routes import deployment, diagnostics
+from server.services.deployment_service import deployment_service
+from server.utils import security
+from server.utils.profiler import (
+    ProfilerBusyError, SamplingProfiler, collapsed, deterministic_profile, profile_scope, use_profiling
+)
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_loop, args=(stop,), name="ThreadPoolExecutor-7_3", daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_sampling_captures_busy_threads(busy_thread):
+    """모든 스레드의 스택을 샘플링하고, 풀 스레드는 이름으로 묶고 대기 중인 스레드는 제외해야 합니다."""
+    idle = threading.Event()
+    waiter = threading.Thread(target=idle.wait, name="idle-waiter", daemon=True)
+    waiter.start()
+    try:
+        result = SamplingProfiler().sample(0.2, interval=0.005)
+    finally:
+        idle.set()
+
+    assert result["samples"] > 5
+    busy = [stack for stack in result["stacks"] if stack.startswith("ThreadPoolExecutor-7;")]
+    assert busy and all("_busy_loop (tests/test_profiler.py:" in stack for stack in busy)
+    assert "idle-waiter" not in result["threads"]
+    line = collapsed({"main;f (a.py:1)": 3})
+    assert line == "main;f (a.py:1) 3\n"
+
+
+def test_only_one_sampling_profile_at_a_time():
+    """동시에 두 번째 샘플링을 요청하면 ProfilerBusyError가 발생해야 합니다."""
+    profiler = SamplingProfiler()
+    thread = threading.Thread(target=profiler.sample, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ProfilerBusyError):
+            profiler.sample(0.01)
+    finally:
+        thread.join()
+
+
+def test_diagnostics_endpoints_require_admin_token(monkeypatch, busy_thread):
+    """관리자 토큰이 없거나 틀리면 거부하고, 맞으면 collapsed stack 파일을 반환해야 합니다."""
+    app = FastAPI()
+    app.include_router(diagnostics.router, prefix="/api")
+    client = TestClient(app)
+
+    monkeypatch.setattr(security, "ADMIN_TOKEN", None)
+    assert client.get("/api/diagnostics/profile", params={"seconds": 0.05}).status_code == 403
+    monkeypatch.setattr(security, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/diagnostics/profile", params={"seconds": 0.05},
+                      headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    response = client.get("/api/diagnostics/profile", params={"seconds": 0.1, "interval_ms": 5},
+                          headers={"X-Admin-Token": "s3cret"})
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.folded"')
+    assert any(line.startswith("ThreadPoolExecutor-7;") for line in response.text.splitlines())
+    missing = client.get("/api/diagnostics/deployments/dep/executions/none/profile", headers={"X-Admin-Token": "s3cret"})
+    assert missing.status_code == 404
+
+
+def _demo_deployment(monkeypatch):
+    """시작 노드와 끝 노드만 있는 활성 배포를 deployment_service에 연결"""
+    snapshot = WorkflowSnapshot(
+        projectId="p1", projectName="demo", viewport={}, lastModified="now",
+        nodes=[
+            {"id": "start", "type": "startNode", "data": {"label": "start", "config": {"variables": [{"name": "question"}]}}},
+            {"id": "end", "type": "endNode", "data": {"label": "end", "config": {}}},
+        ],
+        edges=[{"source": "start", "target": "end"}],
+    )
+    monkeypatch.setattr(deployment_service, "get_deployment_by_id", lambda deployment_id: SimpleNamespace(
+        id=deployment_id, name="demo", status=DeploymentStatus.ACTIVE
+    ))
+    monkeypatch.setattr(deployment_service, "get_deployment_versions", lambda deployment_id: [
+        SimpleNamespace(id="v1", workflowSnapshot=snapshot)
+    ])
+
+
+def test_deployment_run_with_profiling(tmp_path, monkeypatch):
+    """프로파일링을 요청한 배포 실행은 cProfile 요약과 pstats 파일을 남겨야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    _demo_deployment(monkeypatch)
+
+    plain = deployment_service.run_deployment("dep-prof", {"question": "hi"}, execution_id="exec-plain")
+    with use_profiling(True):
+        result = deployment_service.run_deployment("dep-prof", {"question": "hi"}, execution_id="exec-prof")
+
+    assert "profile" not in plain["result"]
+    profile = result["result"]["profile"]
+    assert profile["total_calls"] > 0 and profile["functions"]
+    assert profile["scope"] == profile_scope()
+    assert any("_run_deployment" in entry["function"] for entry in profile["functions"])
+    assert os.path.exists(os.path.join("deployments", "dep-prof", "executions", "exec-prof", "profile.pstats"))
+
+
+def test_profiled_run_does_not_record_credentials(tmp_path, monkeypatch):
+    """실행 기록의 api_call_info.headers에는 관리자 토큰 등 자격 증명 헤더가 남지 않아야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(security, "ADMIN_TOKEN", "s3cret")
+    _demo_deployment(monkeypatch)
+    app = FastAPI()
+    app.include_router(deployment.router, prefix="/api")
+
+    response = TestClient(app).post(
+        "/api/deployment/dep-prof/run?profile=true", json={"question": "hi"},
+        headers={"X-Admin-Token": "s3cret", "Authorization": "Bearer t", "Cookie": "session=1",
+                 "X-API-Key": "k", "User-Agent": "pytest"},
+    )
+
+    assert response.status_code == 200
+    [execution_id] = os.listdir(os.path.join("deployments", "dep-prof", "executions"))
+    with open(os.path.join("deployments", "dep-prof", "executions", execution_id, "workflow_snap.json")) as f:
+        headers = json.load(f)["execution_metadata"]["api_call_info"]["headers"]
+    assert headers["user-agent"] == "pytest"
+    assert not set(headers) & set(security.SENSITIVE_HEADERS)
+    assert "s3cret" not in json.dumps(headers)
+
+
+def test_concurrent_profiled_run_is_rejected(tmp_path, monkeypatch):
+    """cProfile 측정은 프로세스 전역으로 하나만 가능하므로, 측정 중에 profile=true 실행을 요청하면 409를 반환해야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(security, "ADMIN_TOKEN", "s3cret")
+    _demo_deployment(monkeypatch)
+    app = FastAPI()
+    app.include_router(deployment.router, prefix="/api")
+    client = TestClient(app)
+
+    with deterministic_profile():
+        busy = client.post("/api/deployment/dep-prof/run?profile=true", json={"question": "hi"},
+                           headers={"X-Admin-Token": "s3cret"})
+        with pytest.raises(ProfilerBusyError):
+            with deterministic_profile():
+                pass
+    after = client.post("/api/deployment/dep-prof/run?profile=true", json={"question": "hi"},
+                        headers={"X-Admin-Token": "s3cret"})
+
+    assert busy.status_code == 409
+    assert "process-wide" in busy.json()["detail"]
+    assert after.status_code == 200 and after.json()["result"]["profile"]["total_calls"] > 0
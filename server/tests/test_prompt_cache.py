@@ -0,0 +1,147 @@
+"""
+Unit tests for provider prompt-prefix caching.
+Tests Anthropic cache_control / Bedrock cachePoint markers, tool marking and cache usage reporting.
+"""
+
+import pytest
+from langchain_anthropic import ChatAnthropic
+from langchain_aws import ChatBedrockConverse
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_openai import ChatOpenAI
+
+from server.services import llm_gateway
+from server.services.llm_resilience import LLMResilience
+from server.services.llm_scheduler import LLMScheduler
+from server.services.llm_usage import normalize_usage, pop_node_usage
+from server.services.prompt_cache import _mark_tools, apply_prompt_cache, mark_cacheable_messages
+from server.testing.fake_provider import FakeProvider
+
+SYSTEM_PROMPT = "You are a careful assistant. " * 20
+
+
+@pytest.fixture(autouse=True)
+def gateway(monkeypatch):
+    """Fresh resilience and scheduler state per test"""
+    resilience = LLMResilience()
+    monkeypatch.setattr(llm_gateway, "llm_resilience", resilience)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", LLMScheduler(limits={}))
+    pop_node_usage()
+    yield
+    resilience.shutdown()
+
+
+@pytest.fixture
+def provider():
+    with FakeProvider() as fake:
+        yield fake
+
+
+def _prompt():
+    return ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{user_prompt}"),
+    ])
+
+
+def _inputs(question="hi"):
+    history = [HumanMessage(content="earlier question"), AIMessage(content="earlier answer")]
+    return {"user_prompt": question, "chat_history": history}
+
+
+def _anthropic(provider):
+    llm = ChatAnthropic(base_url=provider.root_url, api_key="sk-test", model="claude-sonnet-4-5",
+                        temperature=0, max_retries=0)
+    return _prompt() | llm
+
+
+def _bedrock(provider):
+    llm = ChatBedrockConverse(endpoint_url=provider.root_url, region_name="us-east-1",
+                              model="anthropic.claude-3-5-sonnet-20240620-v1:0",
+                              aws_access_key_id="AKIA", aws_secret_access_key="x", temperature=0)
+    return _prompt() | llm
+
+
+def test_marks_system_prompt_and_history_end():
+    """시스템 프롬프트와 마지막 사용자 메시지 직전 메시지에 캐시 표시를 붙여야 합니다."""
+    messages = [SystemMessage(content="system"), HumanMessage(content="q1"), AIMessage(content="a1"),
+                HumanMessage(content="q2")]
+
+    marked = mark_cacheable_messages(messages, "anthropic")
+
+    assert marked[0].content[-1]["cache_control"] == {"type": "ephemeral"}
+    assert marked[2].content[-1]["cache_control"] == {"type": "ephemeral"}
+    assert marked[1].content == "q1" and marked[3].content == "q2"
+    assert messages[0].content == "system"
+
+    bedrock = mark_cacheable_messages(messages, "aws")
+    assert bedrock[0].content[-1] == {"cachePoint": {"type": "default"}}
+
+
+def test_anthropic_second_call_reads_cache(provider):
+    """두 번째 호출은 같은 프리픽스를 캐시에서 읽고 실행 로그용 사용량에 기록해야 합니다."""
+    chain = _anthropic(provider)
+
+    llm_gateway.invoke_llm(chain, _inputs("first"), cache={"promptCache": True})
+    first = pop_node_usage()
+    llm_gateway.invoke_llm(chain, _inputs("second"), cache={"promptCache": True})
+    second = pop_node_usage()
+
+    payload = provider.payloads[-1]
+    assert payload["system"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert payload["messages"][-2]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert first["cache_write_tokens"] > 0 and first["cache_read_tokens"] == 0
+    assert second["cache_read_tokens"] > 0
+    assert second["models"]["claude-sonnet-4-5"]["calls"] == 1
+
+
+def test_prompt_cache_is_opt_in(provider):
+    """promptCache가 꺼져 있으면 요청에 캐시 표시가 없어야 합니다."""
+    llm_gateway.invoke_llm(_anthropic(provider), _inputs(), cache={"promptCache": False})
+
+    assert "cache_control" not in str(provider.payloads[-1])
+    assert pop_node_usage()["cache_read_tokens"] == 0
+
+
+def test_bedrock_uses_cache_points(provider):
+    """Bedrock Converse 요청에는 system과 대화 기록 끝에 cachePoint 블록이 들어가야 합니다."""
+    chain = _bedrock(provider)
+
+    llm_gateway.invoke_llm(chain, _inputs("first"), cache={"promptCache": True})
+    pop_node_usage()
+    llm_gateway.invoke_llm(chain, _inputs("second"), cache={"promptCache": True})
+
+    payload = provider.payloads[-1]
+    assert payload["system"][-1] == {"cachePoint": {"type": "default"}}
+    assert payload["messages"][-2]["content"][-1] == {"cachePoint": {"type": "default"}}
+    usage = pop_node_usage()
+    assert usage["cache_read_tokens"] > 0
+    assert "anthropic.claude-3-5-sonnet-20240620-v1:0" in usage["models"]
+
+
+def test_tool_definitions_are_marked():
+    """도구 정의의 마지막 도구(Anthropic) 또는 toolConfig 끝(Bedrock)에 캐시 표시를 붙여야 합니다."""
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    anthropic = ChatAnthropic(api_key="sk-test", model="claude-sonnet-4-5").bind_tools([lookup])
+    marked = _mark_tools(anthropic, "anthropic")
+    assert marked.kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in anthropic.kwargs["tools"][-1]
+
+    bedrock = ChatBedrockConverse(region_name="us-east-1", model="anthropic.claude-3-5-sonnet-20240620-v1:0",
+                                  aws_access_key_id="AKIA", aws_secret_access_key="x").bind_tools([lookup])
+    tool_config = _mark_tools(bedrock, "aws").kwargs["toolConfig"]
+    assert tool_config["tools"][0]["toolSpec"]["name"] == "lookup"
+    assert tool_config["tools"][-1] == {"cachePoint": {"type": "default"}}
+
+
+def test_other_providers_are_unchanged(provider):
+    """OpenAI 체인은 자동 프리픽스 캐시를 쓰므로 그대로 두어야 합니다."""
+    chain = _prompt() | ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", max_retries=0)
+
+    assert apply_prompt_cache(chain) is chain
+    assert normalize_usage({"input_tokens": 10, "output_tokens": 2,
+                            "input_token_details": {"cache_read": 8}})["cache_read_tokens"] == 8
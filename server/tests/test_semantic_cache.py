@@ -0,0 +1,139 @@
+"""
+Unit tests for the semantic response cache.
+Tests the hashing embedder, partitioning, thresholds, eviction and gateway integration.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from server.services import llm_gateway
+from server.services.llm_cache import LLMCache
+from server.services.semantic_cache import HashingEmbedder, SemanticCache
+
+
+class FakeChatModel(FakeListChatModel):
+    """FakeListChatModel with a deterministic temperature"""
+    temperature: float = 0.0
+
+
+def _chain(system="You answer questions about LangStar."):
+    prompt = ChatPromptTemplate.from_messages([("system", system), ("human", "{user_prompt}")])
+    return prompt | FakeChatModel(responses=["answer-1", "answer-2", "answer-3"])
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    """Replace the global exact and semantic caches"""
+    exact = LLMCache(db_path=str(tmp_path / "llm_cache.db"))
+    semantic = SemanticCache(capacity=10, threshold=0.8)
+    monkeypatch.setattr(llm_gateway, "llm_cache", exact)
+    monkeypatch.setattr(llm_gateway, "semantic_cache", semantic)
+    yield exact, semantic
+    exact.close()
+
+
+def test_hashing_embedder_scores_paraphrases_higher():
+    """해싱 임베더는 비슷한 문장에 더 높은 유사도를 주어야 합니다."""
+    embedder = HashingEmbedder(dimensions=512)
+    vectors = embedder.embed([
+        "How do I reset my password?",
+        "how can I reset my password",
+        "What is the weather in Seoul tomorrow?",
+    ])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    assert vectors.shape == (3, 512)
+    assert vectors[0] @ vectors[1] > 0.7
+    assert vectors[0] @ vectors[2] < 0.3
+
+
+def test_lookup_respects_partition_and_threshold():
+    """다른 구획이거나 유사도가 임계값보다 낮으면 적중하지 않아야 합니다."""
+    cache = SemanticCache(capacity=10, threshold=0.8)
+    cache.store("p1", "How do I reset my password?", "Use the reset link.", ttl=60)
+
+    hit, value, similarity = cache.lookup("p1", "how can I reset my password")
+    assert hit and value == "Use the reset link."
+    assert similarity >= 0.8
+
+    assert cache.lookup("p2", "How do I reset my password?")[0] is False
+    assert cache.lookup("p1", "What is the weather in Seoul tomorrow?")[0] is False
+    assert cache.lookup("p1", "how can I reset my password", threshold=0.999)[0] is False
+
+
+def test_capacity_evicts_least_recently_used():
+    """용량을 넘으면 가장 오래 사용하지 않은 항목을 제거해야 합니다."""
+    cache = SemanticCache(capacity=2, threshold=0.95)
+    cache.store("p", "first question about billing", "a", ttl=60)
+    cache.store("p", "second question about shipping", "b", ttl=60)
+    assert cache.lookup("p", "first question about billing")[0]
+
+    cache.store("p", "third question about refunds", "c", ttl=60)
+
+    assert cache.lookup("p", "first question about billing")[0]
+    assert not cache.lookup("p", "second question about shipping")[0]
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+def test_evicting_last_entry_drops_partition():
+    """구획의 마지막 항목이 밀려나면 구획 인덱스에서도 제거되어 구획 수가 용량을 넘지 않아야 합니다."""
+    cache = SemanticCache(capacity=2, threshold=0.95)
+    for number in range(50):
+        cache.store(f"tenant-{number}", f"question number {number}", number, ttl=60)
+
+    assert cache.get_stats()["partitions"] == 2
+    assert cache.lookup("tenant-49", "question number 49")[1] == 49
+    assert cache.lookup("tenant-48", "question number 48")[1] == 48
+    assert not cache.lookup("tenant-0", "question number 0")[0]
+
+    cache.store("tenant-48", "another tenant 48 question", "x", ttl=60)
+    assert cache.get_stats()["partitions"] == 1
+    assert cache.lookup("tenant-48", "question number 48")[1] == 48
+
+
+def test_stats_report_hit_rate_and_similarity():
+    """통계에 적중률과 유사도 분포가 포함되어야 합니다."""
+    cache = SemanticCache(capacity=10, threshold=0.8)
+    cache.store("p", "How do I reset my password?", "x", ttl=60)
+    cache.lookup("p", "How do I reset my password?")
+    cache.lookup("p", "Completely unrelated topic")
+
+    stats = cache.get_stats()
+    assert stats["hit_rate"] == 0.5
+    assert set(stats["similarity"]) == {"avg", "p50", "p90", "max"}
+    assert stats["similarity"]["max"] == pytest.approx(1.0, abs=1e-4)
+
+
+def test_gateway_serves_paraphrase_from_semantic_cache(caches):
+    """시맨틱 캐시가 켜진 노드는 비슷한 질문에 저장된 답변을 반환해야 합니다."""
+    exact, semantic = caches
+    chain = _chain()
+    options = {"enabled": True, "semantic": True}
+
+    first = llm_gateway.invoke_llm(chain, {"user_prompt": "How do I reset my password?"}, cache=options)
+    second = llm_gateway.invoke_llm(chain, {"user_prompt": "how can I reset my password"}, cache=options)
+    other_system = llm_gateway.invoke_llm(
+        _chain("You are a billing assistant."), {"user_prompt": "how can I reset my password"}, cache=options
+    )
+
+    assert first.content == second.content == "answer-1"
+    assert other_system.content == "answer-1"  # 새 체인의 첫 응답 (다른 구획이므로 캐시 미적중)
+    assert semantic.get_stats()["hits"] == 1
+    assert exact.get_stats()["misses"] == 3
+
+
+def test_gateway_without_semantic_flag_skips_index(caches):
+    """semantic 설정이 없으면 시맨틱 캐시를 사용하지 않아야 합니다."""
+    _, semantic = caches
+    chain = _chain()
+    options = {"enabled": True}
+
+    llm_gateway.invoke_llm(chain, {"user_prompt": "How do I reset my password?"}, cache=options)
+    second = llm_gateway.invoke_llm(chain, {"user_prompt": "how can I reset my password"}, cache=options)
+
+    assert second.content == "answer-2"
+    assert semantic.get_stats()["entries"] == 0
@@ -0,0 +1,114 @@
+"""
+Unit tests for per-request phase timing.
+Tests trace id propagation, Server-Timing rendering, the ASGI middleware, queue context propagation and deployment run phases.
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.models.deployment import DeploymentStatus, WorkflowSnapshot
+from server.models.execution import ExecutionPriority
+from server.services.deployment_service import deployment_service
+from server.services.execution_queue import ExecutionQueue
+from server.utils.timing import PhaseTimer, TimingMiddleware, add_phase, phase, trace_id_from_headers, use_timer
+
+
+def test_trace_id_continues_caller_trace():
+    """traceparent 또는 X-Request-ID가 있으면 같은 추적 ID를 이어받아야 합니다."""
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+    assert trace_id_from_headers({"traceparent": traceparent}) == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert trace_id_from_headers({"x-request-id": "req-42"}) == "req-42"
+    assert len(trace_id_from_headers({})) == 32
+
+
+def test_phases_accumulate_and_render_server_timing():
+    """같은 이름의 단계는 합산하고 Server-Timing 형식으로 출력해야 합니다."""
+    timer = PhaseTimer("t1")
+    with use_timer(timer):
+        for _ in range(2):
+            with phase("graph invoke"):
+                pass
+        add_phase("queue_wait", 0.25)
+    with phase("outside"):
+        pass
+
+    phases = {entry["name"]: entry for entry in timer.phases()}
+    assert phases["graph invoke"]["count"] == 2
+    assert phases["queue_wait"]["duration_ms"] == 250.0
+    assert "outside" not in phases
+    header = timer.server_timing()
+    assert header.startswith("graph_invoke;dur=")
+    assert "queue_wait;dur=250.0" in header and "total;dur=" in header
+
+
+def test_middleware_adds_server_timing_and_request_id():
+    """응답에 요청 중 기록한 단계와 추적 ID 헤더가 붙어야 합니다."""
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/work")
+    def work():
+        with phase("mongo_lookup"):
+            pass
+        return {"ok": True}
+
+    response = TestClient(app).get("/work", headers={"X-Request-ID": "abc123"})
+
+    assert response.headers["x-request-id"] == "abc123"
+    assert "mongo_lookup;dur=" in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def test_queued_jobs_keep_request_context(tmp_path):
+    """실행 큐 워커에서 처리한 작업의 단계와 큐 대기 시간도 제출한 요청의 타이머에 기록되어야 합니다."""
+    queue = ExecutionQueue(db_path=str(tmp_path / "queue.db"), lane_workers={ExecutionPriority.INTERACTIVE: 1})
+    queue.register_handler("work", lambda payload: add_phase("handler", 0.01))
+    timer = PhaseTimer()
+    try:
+        with use_timer(timer):
+            job = queue.submit("work", {}, durable=False)
+        assert queue.wait(job.id, timeout=5).status == "succeeded"
+    finally:
+        queue.shutdown(timeout=1.0)
+
+    assert [entry["name"] for entry in timer.phases()] == ["queue_wait", "handler"]
+
+
+def test_deployment_run_records_phases(tmp_path, monkeypatch):
+    """배포 실행은 단계별 시간과 추적 ID를 실행 기록에 저장해야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    snapshot = WorkflowSnapshot(
+        projectId="p1", projectName="demo", viewport={}, lastModified="now",
+        nodes=[
+            {"id": "start", "type": "startNode", "data": {"label": "start", "config": {"variables": [{"name": "question"}]}}},
+            {"id": "end", "type": "endNode", "data": {"label": "end", "config": {}}},
+        ],
+        edges=[{"source": "start", "target": "end"}],
+    )
+    monkeypatch.setattr(deployment_service, "get_deployment_by_id", lambda deployment_id: SimpleNamespace(
+        id=deployment_id, name="demo", status=DeploymentStatus.ACTIVE
+    ))
+    monkeypatch.setattr(deployment_service, "get_deployment_versions", lambda deployment_id: [
+        SimpleNamespace(id="v1", workflowSnapshot=snapshot)
+    ])
+
+    timer = PhaseTimer("trace-1")
+    with use_timer(timer):
+        result = deployment_service.run_deployment("dep-timing", {"question": "hi"}, execution_id="exec-1")
+
+    summary = result["result"]["execution_summary"]
+    assert summary["trace_id"] == "trace-1"
+    names = [entry["name"] for entry in summary["timing"]]
+    for name in ("deployment_lookup", "version_lookup", "graph_build", "graph_invoke", "execution_log_read", "snapshot_write"):
+        assert name in names
+    assert "snapshot_metadata_write" in [entry["name"] for entry in timer.phases()]
+
+    with open(os.path.join("deployments", "dep-timing", "executions", "exec-1", "workflow_snap.json"), encoding="utf-8") as f:
+        metadata = json.load(f)["execution_metadata"]
+    assert metadata["trace_id"] == "trace-1"
+    assert metadata["timing"] == summary["timing"]
@@ -0,0 +1,142 @@
+"""
+Unit tests for the agent tool runtime.
+Tests tool result memoization policies and concurrent execution of parallel tool calls.
+"""
+
+import threading
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+
+from server.services import llm_gateway, tool_runtime
+from server.services.tool_runtime import ToolResultCache, memoize_tool
+from server.services.workflow_service import WorkflowService
+
+
+class ParallelToolCallingModel(BaseChatModel):
+    """Fake model that requests two lookups in one turn, then answers"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-parallel-tools"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        if any(isinstance(message, ToolMessage) for message in messages):
+            message = AIMessage(content="done")
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": "slow_lookup", "args": {"query": "a"}, "id": "call-1"},
+                {"name": "slow_lookup", "args": {"query": "b"}, "id": "call-2"},
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    """Use an empty tool result cache per test"""
+    monkeypatch.setattr(tool_runtime, "tool_result_cache", ToolResultCache())
+
+
+def _counting_tool(calls):
+    def lookup(query: str, page: int = 1) -> str:
+        """Look something up."""
+        calls.append((query, page))
+        return f"{query}-{page}-{len(calls)}"
+    return StructuredTool.from_function(func=lookup, name="lookup", description="Look something up.")
+
+
+def test_memoized_tool_reuses_results():
+    """같은 인자로 호출하면 캐시된 결과를 반환해야 합니다."""
+    calls = []
+    tool = memoize_tool(_counting_tool(calls), {"enabled": True, "ttlSeconds": 60})
+
+    assert tool.invoke({"query": "x"}) == "x-1-1"
+    assert tool.invoke({"query": "x"}) == "x-1-1"
+    assert tool.invoke({"query": "y"}) == "y-1-2"
+    assert len(calls) == 2
+    assert tool_runtime.tool_result_cache.get_stats()["lookup"]["hits"] == 1
+
+
+def test_key_args_limit_the_cache_key():
+    """keyArgs에 지정한 인자만 캐시 키에 사용해야 합니다."""
+    calls = []
+    tool = memoize_tool(_counting_tool(calls), {"ttlSeconds": 60, "keyArgs": ["query"]})
+
+    tool.invoke({"query": "x", "page": 1})
+    tool.invoke({"query": "x", "page": 2})
+
+    assert len(calls) == 1
+
+
+def test_ttl_expiry_and_disabled_policy():
+    """TTL이 지나면 다시 호출하고, 정책이 없으면 캐시하지 않아야 합니다."""
+    calls = []
+    tool = memoize_tool(_counting_tool(calls), {"ttlSeconds": 0.05})
+    tool.invoke({"query": "x"})
+    time.sleep(0.1)
+    tool.invoke({"query": "x"})
+    assert len(calls) == 2
+
+    plain = _counting_tool([])
+    assert memoize_tool(plain, None) is plain
+    assert memoize_tool(plain, {"enabled": False}) is plain
+
+
+def test_create_tool_from_api_applies_policy():
+    """에디터에서 만든 도구도 캐시 정책을 적용해야 합니다."""
+    code = "COUNT = []\ndef echo(text: str) -> str:\n    COUNT.append(text)\n    return text * len(COUNT)\n"
+    tool = WorkflowService.create_tool_from_api("echo", "Echo text", code, tool_cache={"ttlSeconds": 60})
+
+    assert tool.invoke({"text": "a"}) == "a"
+    assert tool.invoke({"text": "a"}) == "a"
+
+
+def test_parallel_tool_calls_run_concurrently():
+    """한 턴의 여러 도구 호출은 동시에 실행되어야 합니다."""
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_lookup(query: str) -> str:
+        """Slow lookup."""
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.5)
+        with lock:
+            active[0] -= 1
+        return query.upper()
+
+    tool = StructuredTool.from_function(func=slow_lookup, name="slow_lookup", description="Slow lookup.")
+    prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}"), ("placeholder", "{agent_scratchpad}")])
+    model = ParallelToolCallingModel()
+    executor = AgentExecutor(agent=create_tool_calling_agent(model, [tool], prompt), tools=[tool])
+
+    started = time.perf_counter()
+    result = llm_gateway.invoke_llm(executor, {"user_prompt": "look up a and b"})
+    elapsed = time.perf_counter() - started
+
+    assert result["output"] == "done"
+    assert peak[0] == 2
+    assert elapsed < 0.9
+
+
+@pytest.mark.parametrize("provider", ["openai", "aws", "anthropic", "google"])
+def test_exported_tools_share_runtime_namespace(provider):
+    """내보낸 코드의 도구 캐시 네임스페이스는 공급자와 관계없이 tool_runtime.source_namespace와 같아야 합니다."""
+    import importlib
+
+    templates = importlib.import_module(f"server.services.code_export.{provider}_templates")
+    code = "def lookup(key: str) -> str:\n    return key\n"
+    node = {"data": {"config": {"tools": [{"code": code, "description": "lookup", "cache": {"ttl": 60}}]}}}
+
+    assert f'"{tool_runtime.source_namespace(code)}")' in templates.get_tool_list(node)
@@ -0,0 +1,169 @@
+"""
+Unit tests for OpenTelemetry-compatible trace export.
+Tests span nesting, file and OTLP/HTTP export, LLM gateway and tool call spans, and deployment execution traces.
+"""
+
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+from langchain_openai import ChatOpenAI
+
+from server.models.deployment import DeploymentStatus, WorkflowSnapshot
+from server.services import llm_gateway
+from server.services.deployment_service import deployment_service
+from server.services.llm_cache import LLMCache
+from server.services.llm_resilience import LLMResilience
+from server.services.llm_scheduler import LLMScheduler
+from server.services.tool_runtime import memoize_tool, tool_result_cache
+from server.testing.fake_provider import FakeProvider
+from server.testing.otlp_collector import OTLPCollector
+from server.utils import tracing
+from server.utils.timing import PhaseTimer, use_timer
+from server.utils.tracing import (
+    STATUS_ERROR, FileSpanExporter, OTLPHttpExporter, TraceCallbackHandler, Tracer, current_traceparent,
+    parse_traceparent, start_span, use_span
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def by_name(self, name):
+        return [span for span in self.spans if span.name == name]
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = ListExporter()
+    test_tracer = Tracer([exporter])
+    monkeypatch.setattr(tracing, "tracer", test_tracer)
+    yield exporter
+    test_tracer.shutdown()
+
+
+def test_spans_nest_and_continue_request_trace(exporter):
+    """자식 스팬은 현재 스팬 아래에 붙고, 루트 스팬은 요청의 추적 ID를 이어받아야 합니다."""
+    with use_timer(PhaseTimer("4bf92f3577b34da6a3ce929d0e0e4736")):
+        with start_span("root") as root:
+            with start_span("child", {"answer": 42}):
+                pass
+            with pytest.raises(ValueError):
+                with start_span("failing"):
+                    raise ValueError("boom")
+    tracing.tracer.flush()
+
+    child, failing = exporter.by_name("child")[0], exporter.by_name("failing")[0]
+    assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736" and root.parent_span_id is None
+    assert child.parent_span_id == root.span_id and child.attributes == {"answer": 42}
+    assert failing.status_code == STATUS_ERROR and failing.events[0]["name"] == "exception"
+
+    remote = parse_traceparent(root.traceparent)
+    with use_span(remote):
+        assert current_traceparent() == root.traceparent
+        with start_span("in_worker") as worker_span:
+            pass
+    assert (worker_span.trace_id, worker_span.parent_span_id) == (root.trace_id, root.span_id)
+
+
+def test_file_and_otlp_exporters(tmp_path, monkeypatch):
+    """파일과 OTLP/HTTP 수신기에 같은 OTLP/JSON 스팬을 내보내야 합니다."""
+    path = tmp_path / "traces.jsonl"
+    with OTLPCollector() as collector:
+        test_tracer = Tracer([FileSpanExporter(str(path)), OTLPHttpExporter(collector.endpoint)])
+        monkeypatch.setattr(tracing, "tracer", test_tracer)
+        with start_span("execution", {"tokens": 12, "cached": True}):
+            pass
+        test_tracer.shutdown()
+        received = collector.wait_for(1)
+
+    line = json.loads(path.read_text(encoding="utf-8").splitlines()[0])
+    span = line["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "execution" and len(span["traceId"]) == 32
+    assert received[0]["attributes"] == {"tokens": 12, "cached": True}
+    assert received[0]["resource"]["service.name"] == tracing.SERVICE_NAME
+
+
+def test_gateway_emits_llm_spans_with_usage(exporter, monkeypatch, tmp_path):
+    """게이트웨이 호출은 캐시 결과가 담긴 스팬과 모델/토큰 속성이 담긴 모델 호출 스팬을 남겨야 합니다."""
+    resilience = LLMResilience()
+    monkeypatch.setattr(llm_gateway, "llm_resilience", resilience)
+    monkeypatch.setattr(llm_gateway, "llm_scheduler", LLMScheduler(limits={}))
+    cache = LLMCache(db_path=str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(llm_gateway, "llm_cache", cache)
+
+    try:
+        with FakeProvider() as provider:
+            prompt = ChatPromptTemplate.from_messages([("human", "{user_prompt}")])
+            llm = ChatOpenAI(base_url=provider.base_url, api_key="sk-test", model="gpt-4o-mini", max_retries=0)
+            chain = prompt | llm
+            options = {"enabled": True, "force": True}
+            inputs = {"user_prompt": f"trace me {uuid.uuid4().hex}"}
+            with start_span("node agent") as node:
+                llm_gateway.invoke_llm(chain, inputs, cache=options)
+                llm_gateway.invoke_llm(chain, inputs, cache=options)
+    finally:
+        resilience.shutdown()
+        cache.close()
+    tracing.tracer.flush()
+
+    gateway_spans = exporter.by_name("llm_gateway")
+    assert [span.attributes["langstar.cache.result"] for span in gateway_spans] == ["miss", "exact"]
+    assert all(span.parent_span_id == node.span_id for span in gateway_spans)
+    chat = exporter.by_name("chat gpt-4o-mini")
+    assert len(chat) == 1 and chat[0].parent_span_id == gateway_spans[0].span_id
+    assert chat[0].attributes["gen_ai.system"] == "openai"
+    assert chat[0].attributes["gen_ai.usage.input_tokens"] > 0
+
+
+def test_tool_spans_record_cache_hits(exporter):
+    """도구 호출 스팬에 도구 결과 캐시 적중 여부가 기록되어야 합니다."""
+    tool_result_cache.clear()
+    tool = memoize_tool(StructuredTool.from_function(func=lambda city: f"sunny in {city}", name="weather",
+                                                     description="Weather lookup"), {"ttlSeconds": 60})
+
+    for _ in range(2):
+        tool.invoke({"city": "Seoul"}, config={"callbacks": [TraceCallbackHandler()]})
+    tracing.tracer.flush()
+
+    spans = exporter.by_name("execute_tool weather")
+    assert [span.attributes["langstar.tool.cache_hit"] for span in spans] == [False, True]
+    assert spans[0].attributes["gen_ai.tool.name"] == "weather"
+    assert tracing.current_span() is tracing.INVALID_SPAN
+
+
+def test_deployment_run_is_one_trace(exporter, tmp_path, monkeypatch):
+    """배포 실행은 루트 스팬 하나와 그 아래 노드 스팬들로 기록되어야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    snapshot = WorkflowSnapshot(
+        projectId="p1", projectName="demo", viewport={}, lastModified="now",
+        nodes=[
+            {"id": "start", "type": "startNode", "data": {"label": "start", "config": {"variables": [{"name": "question"}]}}},
+            {"id": "end", "type": "endNode", "data": {"label": "end", "config": {}}},
+        ],
+        edges=[{"source": "start", "target": "end"}],
+    )
+    monkeypatch.setattr(deployment_service, "get_deployment_by_id", lambda deployment_id: SimpleNamespace(
+        id=deployment_id, name="demo", status=DeploymentStatus.ACTIVE
+    ))
+    monkeypatch.setattr(deployment_service, "get_deployment_versions", lambda deployment_id: [
+        SimpleNamespace(id="v1", workflowSnapshot=snapshot)
+    ])
+
+    deployment_service.run_deployment("dep-trace", {"question": "hi"}, execution_id="exec-trace")
+    tracing.tracer.flush()
+
+    root = exporter.by_name("workflow_execution")[0]
+    assert root.parent_span_id is None
+    assert root.attributes["langstar.execution.id"] == "exec-trace"
+    assert root.attributes["langstar.execution.status"] == "succeeded"
+    nodes = [span for span in exporter.spans if span.name.startswith("node ")]
+    assert {span.attributes["langstar.node.type"] for span in nodes} == {"startNode", "endNode"}
+    assert all(span.trace_id == root.trace_id and span.parent_span_id == root.span_id for span in nodes)
@@ -0,0 +1,189 @@
+"""
+Unit tests for traffic capture and replay.
+Tests exporting execution records, concurrency profiles, timed replay against a stub server and result diffs.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from server.benchmarks.loadtest import in_process_server
+from server.benchmarks.traffic_replay import (
+    REPLAY_HEADER, TrafficReplayer, concurrency_profile, diff_results, export_traffic, _parse_time
+)
+from server.models.deployment import DeploymentStatus, WorkflowSnapshot
+from server.models.execution import ExecutionPriority
+from server.routes import deployment
+from server.services.deployment_service import deployment_service
+from server.services.execution_queue import ExecutionQueue
+
+BASE = datetime(2026, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _write_execution(root, deployment_id, execution_id, seconds, duration_ms=100, queue_wait_ms=0.0,
+                     api_call_info=True, output=None, status="succeeded"):
+    directory = os.path.join(root, deployment_id, "executions", execution_id)
+    os.makedirs(directory)
+    metadata = {
+        "id": execution_id,
+        "workflow_id": deployment_id,
+        "deployment_id": deployment_id,
+        "version_id": "v1",
+        "status": status,
+        "start_time": (BASE + timedelta(seconds=seconds)).isoformat(),
+        "duration_ms": duration_ms,
+        "input": {"Start": {"question": execution_id}},
+        "output": {"result": output if output is not None else execution_id},
+        "execution_source": "external",
+        "api_call_info": {"headers": {"authorization": "Bearer secret", "user-agent": "curl"}} if api_call_info else None,
+        "timing": [{"name": "queue_wait", "duration_ms": queue_wait_ms, "count": 1}],
+    }
+    with open(os.path.join(directory, "workflow_snap.json"), "w", encoding="utf-8") as f:
+        json.dump({"workflow_snapshot": {}, "execution_metadata": metadata}, f)
+
+
+def test_export_window_arrival_and_sanitizing(tmp_path):
+    """시간 구간의 API 실행만 도착 순서대로 내보내고, 도착 시각은 큐 대기를 빼며, 인증 헤더는 지워야 합니다."""
+    root = str(tmp_path)
+    _write_execution(root, "dep-a", "first", seconds=10, queue_wait_ms=2000)
+    _write_execution(root, "dep-a", "second", seconds=9)
+    _write_execution(root, "dep-b", "scheduled", seconds=9.5, api_call_info=False)
+    _write_execution(root, "dep-b", "late", seconds=120)
+
+    capture = export_traffic(root, since=BASE, until=BASE + timedelta(minutes=1))
+    requests = capture["requests"]
+
+    assert [request["source_execution_id"] for request in requests] == ["first", "second"]
+    assert [request["offset_ms"] for request in requests] == [0.0, 1000.0]
+    assert requests[0]["output"] == "first"
+    assert requests[0]["api_call_info"]["headers"] == {"user-agent": "curl"}
+    assert capture["deployments"] == ["dep-a"]
+    assert len(export_traffic(root, api_calls_only=False, deployment_ids=["dep-b"])["requests"]) == 2
+
+
+def test_export_subtracts_queue_wait_of_queued_run(tmp_path, monkeypatch):
+    """/run으로 큐에서 기다린 실행은 실행 기록에 queue_wait가 남고, 내보낸 도착 시각은 그만큼 앞서야 합니다."""
+    monkeypatch.chdir(tmp_path)
+    snapshot = WorkflowSnapshot(
+        projectId="p1", projectName="demo", viewport={}, lastModified="now",
+        nodes=[
+            {"id": "start", "type": "startNode", "data": {"label": "start", "config": {"variables": [{"name": "question"}]}}},
+            {"id": "end", "type": "endNode", "data": {"label": "end", "config": {}}},
+        ],
+        edges=[{"source": "start", "target": "end"}],
+    )
+    monkeypatch.setattr(deployment_service, "get_deployment_by_id", lambda deployment_id: SimpleNamespace(
+        id=deployment_id, name="demo", status=DeploymentStatus.ACTIVE
+    ))
+    monkeypatch.setattr(deployment_service, "get_deployment_versions", lambda deployment_id: [
+        SimpleNamespace(id="v1", workflowSnapshot=snapshot)
+    ])
+    # 워커 하나를 막아 두어 /run 요청이 큐에서 기다리게 한다
+    queue = ExecutionQueue(db_path=str(tmp_path / "queue.db"), lane_workers={
+        ExecutionPriority.INTERACTIVE: 1, ExecutionPriority.SCHEDULED: 0, ExecutionPriority.BATCH: 0
+    })
+    queue.register_handler("deployment_run", deployment_service._run_queued_deployment)
+    release = threading.Event()
+    queue.register_handler("block", lambda payload: release.wait(5))
+    monkeypatch.setattr(deployment, "execution_queue", queue)
+    app = FastAPI()
+    app.include_router(deployment.router, prefix="/api")
+
+    try:
+        queue.submit("block", {}, durable=False)
+        responses = []
+        caller = threading.Thread(target=lambda: responses.append(
+            TestClient(app).post("/api/deployment/dep-q/run", json={"question": "hi"})
+        ), daemon=True)
+        caller.start()
+        deadline = time.time() + 10
+        lane = queue.get_stats()["lanes"]["interactive"]
+        while not (lane["running"] and lane["depth"]) and time.time() < deadline:
+            time.sleep(0.01)
+            lane = queue.get_stats()["lanes"]["interactive"]
+        time.sleep(0.3)
+        release.set()
+        caller.join(10)
+    finally:
+        queue.shutdown(timeout=1.0)
+
+    assert responses[0].status_code == 200
+    [request] = export_traffic("deployments")["requests"]
+    [execution_id] = os.listdir(os.path.join("deployments", "dep-q", "executions"))
+    with open(os.path.join("deployments", "dep-q", "executions", execution_id, "workflow_snap.json")) as f:
+        metadata = json.load(f)["execution_metadata"]
+    [queue_wait] = [entry["duration_ms"] for entry in metadata["timing"] if entry["name"] == "queue_wait"]
+    assert queue_wait >= 250
+    waited = _parse_time(metadata["start_time"]) - _parse_time(request["arrival_time"])
+    assert abs(waited.total_seconds() * 1000 - queue_wait) < 1
+
+
+def test_concurrency_profile():
+    """동시 실행 수는 겹치는 구간의 최대값과 구간 전체의 시간 평균이어야 합니다."""
+    profile = concurrency_profile([(0.0, 2.0), (1.0, 3.0), (2.0, 4.0), (3.0, 4.0)])
+
+    assert profile["peak"] == 2
+    assert profile["mean"] == 1.75 and profile["window_seconds"] == 4.0
+    assert concurrency_profile([]) == {"peak": 0, "mean": 0.0, "window_seconds": 0.0}
+
+
+def test_replay_keeps_arrival_pattern(tmp_path):
+    """재생은 도착 간격(/speed)대로 요청을 보내고, 배포 ID를 바꾸고, 원래 실행 ID 헤더를 붙여야 합니다."""
+    root = str(tmp_path / "deployments")
+    for index in range(3):
+        _write_execution(root, "dep-a", f"exec-{index}", seconds=index * 0.4)
+    capture = export_traffic(root)
+
+    app = FastAPI()
+    received = []
+
+    @app.post("/api/deployment/{deployment_id}/run")
+    async def run(deployment_id: str, body: dict, request: Request):
+        received.append((deployment_id, request.headers.get(REPLAY_HEADER)))
+        return {"success": True, "execution_id": f"new-{len(received)}", "result": {
+            "output": body["Start"]["question"],
+            "execution_summary": {"overall_status": "succeeded", "duration_ms": 3},
+        }}
+
+    with in_process_server(str(tmp_path), app=app) as base_url:
+        results = TrafficReplayer(base_url, speed=2, deployment_map={"dep-a": "dep-b"}, label="b").run(capture)
+
+    samples = results["samples"]
+    assert [sample["offset_ms"] for sample in samples] == [0.0, 200.0, 400.0]
+    assert received == [("dep-b", f"exec-{index}") for index in range(3)]
+    assert all(sample["outcome"] == "succeeded" and sample["server_duration_ms"] == 3 for sample in samples)
+    assert [sample["output"] for sample in samples] == ["exec-0", "exec-1", "exec-2"]
+    assert results["summary"]["error_rate"] == 0.0 and 0.4 <= results["summary"]["elapsed_seconds"] < 1.0
+
+
+def test_diff_reports_latency_outcomes_and_outputs(tmp_path):
+    """diff는 원래 실행 ID로 짝지어 지연 시간 변화, 결과 상태 변화, 출력 차이를 보고해야 합니다."""
+    def sample(source, latency, outcome="succeeded", output="same"):
+        return {"source_execution_id": source, "latency_ms": latency, "outcome": outcome,
+                "server_duration_ms": latency - 5, "output": output}
+
+    baseline = {"kind": "replay", "label": "a", "samples": [
+        sample("x", 100.0), sample("y", 100.0), sample("z", 100.0), sample("gone", 10.0)]}
+    candidate = {"kind": "replay", "label": "b", "samples": [
+        sample("x", 150.0), sample("y", 200.0, output="changed"), sample("z", 100.0, outcome="failed")]}
+
+    diff = diff_results(baseline, candidate)
+
+    assert diff["matched"] == 3 and diff["only_in_baseline"] == ["gone"]
+    assert diff["outcome_changes"] == [{"source_execution_id": "z", "baseline": "succeeded", "candidate": "failed"}]
+    assert [row["source_execution_id"] for row in diff["output_mismatches"]] == ["y"]
+    assert [row["source_execution_id"] for row in diff["slowest_regressions"]] == ["y", "x"]
+    assert diff["latency_ms"]["change"]["p50"] == 0.5
+
+    # 캡처 파일을 기준으로 쓰면 서버 처리 시간만 비교한다
+    root = str(tmp_path)
+    _write_execution(root, "dep", "x", seconds=0, duration_ms=100, output="same")
+    from_capture = diff_results(export_traffic(root), candidate)
+    assert from_capture["latency_ms"] is None and from_capture["server_duration_ms"]["change"]["p50"] == 0.45
+    assert _parse_time("2026-10-01T09:00:00") == BASE
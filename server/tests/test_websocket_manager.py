@@ -3,9 +3,13 @@ Unit tests for WebSocketManager.
 Tests connection management, message routing, and broadcasting.
 """
 
+import asyncio
+import json
+import time
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from server.services.websocket_manager import WebSocketManager
+from server.services.websocket_manager import WebSocketManager, serialize_message
 from server.models.collaboration import SessionInfo
 
 
@@ -73,8 +77,9 @@ async def test_send_personal_message():
     message = {"type": "test", "data": "hello"}
     await manager.send_personal_message(message, user_id)
     
-    # Verify message was sent
-    websocket.send_json.assert_called_once_with(message)
+    # Verify message was sent as JSON text
+    websocket.send_text.assert_called_once_with(serialize_message(message))
+    assert json.loads(websocket.send_text.call_args.args[0]) == message
 
 
 @pytest.mark.asyncio
@@ -107,11 +112,11 @@ async def test_broadcast_to_workflow():
     await manager.broadcast_to_workflow(message, "workflow1")
     
     # Verify message was sent to users in workflow1
-    user1_ws.send_json.assert_called_once_with(message)
-    user2_ws.send_json.assert_called_once_with(message)
+    user1_ws.send_text.assert_called_once_with(serialize_message(message))
+    user2_ws.send_text.assert_called_once_with(serialize_message(message))
     
     # Verify message was NOT sent to user in workflow2
-    user3_ws.send_json.assert_not_called()
+    user3_ws.send_text.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -132,10 +137,10 @@ async def test_broadcast_to_workflow_exclude_user():
     await manager.broadcast_to_workflow(message, "workflow1", exclude_user="user1")
     
     # Verify message was NOT sent to user1
-    user1_ws.send_json.assert_not_called()
+    user1_ws.send_text.assert_not_called()
     
     # Verify message was sent to user2
-    user2_ws.send_json.assert_called_once_with(message)
+    user2_ws.send_text.assert_called_once_with(serialize_message(message))
 
 
 @pytest.mark.asyncio
@@ -200,3 +205,71 @@ async def test_multiple_connections_and_disconnections():
     assert manager.is_connected("user1")
     assert manager.is_connected("user3")
     assert manager.is_connected("user4")
+
+
+@pytest.mark.asyncio
+async def test_workflow_index_follows_connections():
+    """Test that the workflow index is updated on connect, reconnect and disconnect"""
+    manager = WebSocketManager()
+    
+    await manager.connect(AsyncMock(), "user1", "workflow1")
+    await manager.connect(AsyncMock(), "user2", "workflow1")
+    
+    # Reconnecting to another workflow moves the user
+    new_ws = AsyncMock()
+    await manager.connect(new_ws, "user1", "workflow2")
+    
+    assert manager.get_workflow_users("workflow1") == ["user2"]
+    assert manager.workflow_connections["workflow2"] == {"user1": new_ws}
+    
+    # Empty workflows are removed from the index
+    await manager.disconnect("user2")
+    assert "workflow1" not in manager.workflow_connections
+    assert manager.get_workflow_users("workflow1") == []
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once_and_sends_concurrently():
+    """Test that a broadcast is serialized once and a slow recipient does not delay the others"""
+    manager = WebSocketManager()
+    received = {}
+    
+    def recorder(user_id, delay):
+        async def send_text(payload):
+            await asyncio.sleep(delay)
+            received[user_id] = (payload, time.perf_counter())
+        return AsyncMock(send_text=AsyncMock(side_effect=send_text))
+    
+    await manager.connect(recorder("slow", 0.2), "slow", "workflow1")
+    for i in range(3):
+        await manager.connect(recorder(f"user{i}", 0), f"user{i}", "workflow1")
+    
+    message = {"type": "cursor_moved", "user_id": "slow", "position": {"x": 1.0, "y": 2.0}}
+    started = time.perf_counter()
+    await manager.broadcast_to_workflow(message, "workflow1")
+    
+    # All recipients get the same serialized object
+    payloads = [payload for payload, _ in received.values()]
+    assert len(payloads) == 4 and all(payload is payloads[0] for payload in payloads)
+    assert json.loads(payloads[0]) == message
+    
+    # Fast recipients are not queued behind the slow one
+    assert all(received[f"user{i}"][1] - started < 0.1 for i in range(3))
+
+
+@pytest.mark.asyncio
+async def test_broadcast_disconnects_failed_recipient():
+    """Test that a failed send disconnects only that recipient"""
+    manager = WebSocketManager()
+    broken_ws = AsyncMock()
+    broken_ws.send_text.side_effect = RuntimeError("connection lost")
+    healthy_ws = AsyncMock()
+    
+    await manager.connect(broken_ws, "user1", "workflow1")
+    await manager.connect(healthy_ws, "user2", "workflow1")
+    
+    await manager.broadcast_to_workflow({"type": "test"}, "workflow1")
+    
+    healthy_ws.send_text.assert_called_once()
+    assert not manager.is_connected("user1")
+    assert manager.get_workflow_users("workflow1") == ["user2"]
@@ -0,0 +1,97 @@
+"""
+Unit tests for the collaboration WebSocket scale benchmark.
+Tests collaboration changes on the in-memory MongoDB, event-loop lag probing and a small run against the benchmark server.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from server.benchmarks.ws_bench import CollaborationBenchmark, LoopLagMonitor, local_server
+from server.models.collaboration import WorkflowChange
+from server.services.sync_service import SyncService
+from server.testing.memory_mongo import MemoryDatabase, use_memory_mongo
+
+
+def _change(change_type, data, change_id="c1"):
+    return WorkflowChange(id=change_id, type=change_type, workflow_id="wf", user_id="u1", data=data)
+
+
+def test_sync_service_changes_on_memory_mongo():
+    """메모리 MongoDB는 협업 변경에 쓰이는 $push, $pull, 위치 연산자 갱신과 modified_count를 지원해야 합니다."""
+    with use_memory_mongo(MemoryDatabase()) as db:
+        db["workflows"].insert_one({"projectId": "wf", "nodes": [{"id": "a", "position": {"x": 0, "y": 0}}],
+                                    "edges": []})
+        service = SyncService()
+
+        async def apply_all():
+            return [
+                await service.apply_change("wf", _change("node_add", {"id": "b", "position": {"x": 1, "y": 1}})),
+                await service.apply_change("wf", _change("node_move", {"id": "b", "position": {"x": 5, "y": 5}})),
+                await service.apply_change("wf", _change("node_update", {"id": "a", "label": "A"})),
+                await service.apply_change("wf", _change("edge_add", {"id": "e1", "source": "a", "target": "b"})),
+                await service.apply_change("wf", _change("node_delete", {"id": "a"})),
+            ]
+
+        assert asyncio.run(apply_all()) == [True] * 5
+        workflow = db["workflows"].find_one({"projectId": "wf"})
+        assert workflow["nodes"] == [{"id": "b", "position": {"x": 5, "y": 5}}]
+        assert workflow["edges"] == [{"id": "e1", "source": "a", "target": "b"}]
+        assert db["workflows"].find_one({"nodes.id": "b"}) is not None
+        assert db["workflows"].find_one({"nodes.id": "a"}) is None
+
+        # 값이 그대로면 갱신되지 않은 것으로 본다 (실제 MongoDB와 같음)
+        unchanged = db["workflows"].update_one({"projectId": "wf", "nodes.id": "b"},
+                                               {"$set": {"nodes.$.position": {"x": 5, "y": 5}}})
+        assert unchanged.matched_count == 1 and unchanged.modified_count == 0
+
+
+def test_loop_lag_monitor_detects_blocking():
+    """이벤트 루프를 막으면 그 시간만큼 깨어남이 늦어진 것으로 기록해야 합니다."""
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def block_loop():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(block_loop())
+    summary = monitor.summary()
+    assert summary["samples"] >= 3
+    assert summary["max"] >= 80.0 and summary["p50"] < 50.0
+    monitor.reset()
+    assert monitor.summary()["samples"] == 0
+
+
+def test_benchmark_measures_fan_out_memory_and_lag():
+    """벤치마크는 모든 메시지 종류의 팬아웃 지연과 전달률, 연결당 서버 메모리, 서버 루프 지연을 보고해야 합니다."""
+    with local_server(workflows=2, nodes=4, trace_memory=True) as base_url:
+        benchmark = CollaborationBenchmark(base_url, workflows=2, clients_per_workflow=3, nodes=4,
+                                           message_rate=3, seed=3)
+        report = benchmark.run(duration=1.5)
+
+    assert report["connections"]["connected"] == 6 and report["connections"]["server_count"] == 6
+    assert set(report["fan_out"]) == {"cursor", "viewport", "lock", "change"}
+    cursor = report["fan_out"]["cursor"]
+    assert cursor["broadcasts"] > 0 and cursor["delivered"] == cursor["broadcasts"] * 2
+    assert all(row["delivery_ratio"] == 1.0 for row in report["fan_out"].values())
+    assert cursor["latency_ms"]["p50"] > 0 and cursor["completion_ms"]["max"] >= cursor["latency_ms"]["p50"]
+    assert report["throughput"]["sent_per_second"] > 0
+    assert report["memory"]["rss_per_connection_bytes"] is not None
+    assert report["memory"]["traced_per_connection_bytes"] > 0
+    assert report["loop_lag_ms"]["server"]["samples"] > 0 and report["loop_lag_ms"]["client"]["samples"] > 0
+    assert report["errors"] == {}
+
+
+def test_benchmark_options():
+    """URL은 http/ws 어느 쪽으로 줘도 되고, 알 수 없는 메시지 종류는 거부해야 합니다."""
+    benchmark = CollaborationBenchmark("ws://localhost:8000/", mix={"cursor": 1, "ping": 0})
+
+    assert benchmark.http_url == "http://localhost:8000" and benchmark.ws_url == "ws://localhost:8000"
+    assert benchmark.mix == {"cursor": 1}
+    assert CollaborationBenchmark("https://example.com").ws_url == "wss://example.com"
+    with pytest.raises(ValueError):
+        CollaborationBenchmark("http://localhost", mix={"typing": 1})
@@ -0,0 +1,185 @@
+"""
+Execution context for cooperative cancellation and deadlines.
+
+실행 중인 워크플로우에 CancelToken을 연결해 superstep 사이와 비동기 LLM/도구 호출 중에
+중지 요청, 실행 제한 시간(deadline), 최대 superstep 수를 확인합니다.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class ExecutionCancelled(Exception):
+    """Raised when an execution is stopped by the user."""
+
+
+class ExecutionTimedOut(Exception):
+    """Raised when an execution exceeds its deadline or superstep budget."""
+
+
+class CancelToken:
+    """
+    Thread-safe cancellation token with an optional deadline and superstep budget.
+
+    Args:
+        deadline: Absolute wall-clock deadline (``time.time()`` epoch seconds)
+        max_supersteps: Maximum number of LangGraph supersteps
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_supersteps: Optional[int] = None):
+        self.deadline = deadline
+        self.max_supersteps = max_supersteps
+        self.supersteps = 0
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @classmethod
+    def with_timeout(cls, timeout_seconds: Optional[float] = None, max_supersteps: Optional[int] = None) -> "CancelToken":
+        """Create a token whose deadline is ``timeout_seconds`` from now."""
+        deadline = time.time() + timeout_seconds if timeout_seconds else None
+        return cls(deadline=deadline, max_supersteps=max_supersteps)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Execution stopped by user") -> None:
+        """Request cancellation and notify registered callbacks."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a callback invoked on cancel (immediately if already cancelled).
+
+        Returns:
+            A function that unregisters the callback
+        """
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            callback()
+
+        def remove():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return remove
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None if no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def check(self) -> None:
+        """
+        Raise if the execution must stop.
+
+        Raises:
+            ExecutionCancelled: If cancel() was called
+            ExecutionTimedOut: If the deadline passed
+        """
+        if self._event.is_set():
+            raise ExecutionCancelled(self.reason or "Execution cancelled")
+        if self.expired():
+            raise ExecutionTimedOut("Execution deadline exceeded")
+
+    def step(self) -> None:
+        """Count a completed superstep and enforce the budget."""
+        self.supersteps += 1
+        self.check()
+        if self.max_supersteps is not None and self.supersteps > self.max_supersteps:
+            raise ExecutionTimedOut(f"Execution exceeded max supersteps ({self.max_supersteps})")
+
+
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar(
+    "langstar_cancel_token", default=None
+)
+
+
+def current_token() -> Optional[CancelToken]:
+    """Return the cancel token of the running execution, if any."""
+    return _current_token.get()
+
+
+@contextmanager
+def use_token(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    """Bind a cancel token to the current context."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+_current_tenant: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "langstar_tenant", default=None
+)
+
+
+def current_tenant() -> Optional[str]:
+    """Return the deployment (tenant) the current execution belongs to, if any."""
+    return _current_tenant.get()
+
+
+@contextmanager
+def use_tenant(tenant: Optional[str]) -> Iterator[Optional[str]]:
+    """Bind the owning deployment to the current context (LLM 스케줄러의 공정 대기열 구분용)."""
+    reset = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(reset)
+
+
+def check_cancelled() -> None:
+    """Raise if the current execution was cancelled or timed out (no-op outside executions)."""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+def invoke_graph(app: Any, input_data: Dict[str, Any], config: Optional[Dict[str, Any]], token: CancelToken) -> Any:
+    """
+    Run a compiled LangGraph app superstep by superstep, checking the token in between.
+
+    Args:
+        app: Compiled LangGraph application
+        input_data: Graph input
+        config: Runnable config (thread_id 등)
+        token: Cancel token for this execution
+
+    Returns:
+        Final graph state (same as ``app.invoke``)
+    """
+    token.check()
+    state = None
+    with use_token(token):
+        # stream_mode="values"는 입력 상태를 먼저 내보낸 뒤 superstep마다 전체 상태를 내보낸다
+        for index, state in enumerate(app.stream(input_data, config, stream_mode="values")):
+            if index == 0:
+                token.check()
+                continue
+            token.step()
+    return state
@@ -9,6 +9,9 @@ import uuid
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from server.utils.timing import phase
+from server.utils.tracing import node_span_attributes, start_span
+
 class NodeStatus(Enum):
     STARTED = "started"
     SUCCEEDED = "succeeded"
@@ -35,6 +38,7 @@ class NodeExecutionLog:
     error_traceback: Optional[str] = None
     position: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
+    usage: Optional[Dict[str, Any]] = None  # LLM 토큰 사용량과 예상 비용 (모델별)
 
 class ExecutionLogger:
     """실행 로그 관리자"""
@@ -66,7 +70,12 @@ class ExecutionLogger:
         """노드 실행 로그 저장"""
         if not self.current_execution_id:
             raise ValueError("Execution not started. Call start_execution() first.")
-            
+        
+        with phase("execution_log_write"):
+            self._write_node_log(node_log)
+    
+    def _write_node_log(self, node_log: NodeExecutionLog):
+        """노드 실행 로그를 통합 로그 파일에 추가"""
         # 배포별 실행 로그 파일 경로
         log_file = os.path.join(
             "deployments",
@@ -95,6 +104,11 @@ class ExecutionLogger:
             
     def get_execution_logs(self, deployment_id: str, version_id: str, execution_id: str) -> list[NodeExecutionLog]:
         """실행 로그 조회"""
+        with phase("execution_log_read"):
+            return self._read_execution_logs(deployment_id, execution_id)
+    
+    def _read_execution_logs(self, deployment_id: str, execution_id: str) -> list[NodeExecutionLog]:
+        """통합 로그 파일에서 노드 실행 로그 읽기"""
         # 배포별 실행 로그 파일 경로
         log_file = os.path.join("deployments", deployment_id, "executions", execution_id, "execution_log.json")
         if not os.path.exists(log_file):
@@ -200,8 +214,9 @@ def log_node_execution(node_id: str, node_name: str, node_type: str, position: O
             execution_logger.log_node_execution(node_log)
             
             try:
-                # 원본 노드 함수 실행
-                result = func(*args, **kwargs)
+                # 원본 노드 함수 실행 (실행 트레이스의 노드 스팬)
+                with start_span(f"node {node_name}", node_span_attributes(node_id, node_name, node_type, node_log.execution_id)):
+                    result = func(*args, **kwargs)
                 
                 # 실행 완료
                 end_time = datetime.utcnow()
@@ -0,0 +1,329 @@
+"""
+Memory diagnostics for the live server process.
+
+운영 중 워커가 OOM으로 종료되기 전에 누수를 찾기 위한 도구입니다.
+    - tracemalloc 스냅샷: 기준 스냅샷과 현재(또는 직전) 스냅샷의 할당 위치별 증감, 상위 할당 위치
+    - 추적 대상 구조체: 크기 제한 없이 자라는 캐시/저장소의 항목 수와 대략적인 메모리 크기
+      (MEMORY_STORE, InMemorySaver 체크포인트, RateLimiter.user_messages,
+       MonitoringService.message_start_times/session_start_times, FlowerManager 배포 모듈과 임시 파일, 도구 결과 캐시)
+    - sys.modules: 서버 시작 이후 추가된 모듈 (동적으로 로드한 배포 모듈 포함)
+    - gc 객체 수: 타입별 상위 객체 수
+
+tracemalloc은 오버헤드가 있어 기본으로 꺼져 있으며 진단 API로 켜고 끕니다
+(PYTHONTRACEMALLOC 환경 변수로 시작부터 켤 수도 있음).
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TRACEMALLOC_FRAMES = int(os.getenv("LANGSTAR_TRACEMALLOC_FRAMES", "10"))
+DEEP_SIZEOF_LIMIT = 200_000  # 구조체 하나를 측정할 때 따라가는 최대 객체 수
+# 측정 중 따라가지 않는 객체 (모듈/클래스/함수를 따라가면 프로세스 전체를 세게 된다)
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType,
+                 types.CodeType, types.FrameType)
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def deep_sizeof(obj: Any, limit: int = DEEP_SIZEOF_LIMIT) -> Tuple[int, int, bool]:
+    """
+    Approximate retained size of ``obj`` by following containers and instance dicts.
+
+    Returns:
+        (bytes, objects visited, truncated) - truncated이면 limit에서 멈춘 하한값
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        if len(seen) >= limit:
+            return total, len(seen), True
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _OPAQUE_TYPES):
+            continue
+        seen.add(id(current))
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+    return total, len(seen), False
+
+
+def _entries(value: Any) -> Optional[int]:
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _process_rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux /proc, 그 외에는 최대 RSS)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+# ----------------------------------------------------------------------
+# Tracked structures (지연 import: 진단 모듈이 서비스 모듈에 의존하지 않도록)
+# ----------------------------------------------------------------------
+
+def _memory_store() -> Any:
+    from server.services.workflow_service import WorkflowService
+    return WorkflowService.MEMORY_STORE
+
+
+def _rate_limiter_messages() -> Any:
+    from server.utils.security import rate_limiter
+    return rate_limiter.user_messages
+
+
+def _message_start_times() -> Any:
+    from server.services.monitoring_service import monitoring_service
+    return monitoring_service.message_start_times
+
+
+def _session_start_times() -> Any:
+    from server.services.monitoring_service import monitoring_service
+    return monitoring_service.session_start_times
+
+
+def _flower_deployments() -> Any:
+    from server.services.workflow_service import flower_manager
+    return flower_manager.deployments
+
+
+def _tool_result_cache() -> Any:
+    from server.services.tool_runtime import tool_result_cache
+    return tool_result_cache._entries
+
+
+def _in_memory_savers() -> List[Any]:
+    """Live InMemorySaver checkpointers (생성된 배포/워크플로우 코드의 모듈 전역 checkpointer)."""
+    try:
+        from langgraph.checkpoint.memory import InMemorySaver
+    except ImportError:
+        return []
+    return [obj for obj in gc.get_objects() if isinstance(obj, InMemorySaver)]
+
+
+DEFAULT_STRUCTURES: Dict[str, Callable[[], Any]] = {
+    "workflow.memory_store": _memory_store,
+    "security.rate_limiter.user_messages": _rate_limiter_messages,
+    "monitoring.message_start_times": _message_start_times,
+    "monitoring.session_start_times": _session_start_times,
+    "flower_manager.deployments": _flower_deployments,
+    "tool_runtime.tool_result_cache": _tool_result_cache,
+}
+
+
+class MemoryDiagnostics:
+    """tracemalloc snapshots, tracked structure sizes, sys.modules growth and gc object counts."""
+
+    def __init__(self, structures: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.structures = dict(DEFAULT_STRUCTURES if structures is None else structures)
+        self.baseline_modules = set(sys.modules)
+        self.started_at = time.time()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def register_structure(self, name: str, getter: Callable[[], Any]) -> None:
+        """Track another structure (getter는 측정 시점의 객체를 반환)."""
+        self.structures[name] = getter
+
+    # ------------------------------------------------------------------
+    # tracemalloc
+    # ------------------------------------------------------------------
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = DEFAULT_TRACEMALLOC_FRAMES) -> Dict[str, Any]:
+        """Start tracemalloc (이미 켜져 있으면 유지) and take the baseline snapshot."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._snapshot()
+            self._previous = self._baseline
+            return self.tracing_status()
+
+    def stop_tracing(self) -> Dict[str, Any]:
+        """Stop tracemalloc and drop the stored snapshots."""
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = self._previous = None
+            return self.tracing_status()
+
+    def tracing_status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracemalloc.is_tracing() else 0,
+            "has_baseline": self._baseline is not None,
+        }
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    @staticmethod
+    def _location(stat: Any) -> Dict[str, Any]:
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        return {"location": frames[0] if frames else "<unknown>", "traceback": frames}
+
+    def allocations(self, compare: str = "baseline", group_by: str = "lineno", limit: int = 20) -> Dict[str, Any]:
+        """
+        Take a snapshot and report allocation sites.
+
+        Args:
+            compare: "baseline" (시작 시점 대비), "previous" (직전 호출 대비) or "none" (현재 상위 할당 위치만)
+            group_by: tracemalloc key type ("lineno", "filename", "traceback")
+            limit: Number of sites to return
+
+        Raises:
+            ValueError: If tracemalloc is not tracing
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise ValueError("tracemalloc is not tracing; start it first")
+            snapshot = self._snapshot()
+            reference = {"baseline": self._baseline, "previous": self._previous}.get(compare)
+            self._previous = snapshot
+
+        top = [
+            {**self._location(stat), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+        result: Dict[str, Any] = {**self.tracing_status(), "group_by": group_by, "top": top}
+        if reference is not None:
+            diff = [stat for stat in snapshot.compare_to(reference, group_by) if stat.size_diff or stat.count_diff]
+            result["compare"] = compare
+            result["growth"] = [
+                {**self._location(stat), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff,
+                 "size_bytes": stat.size, "count": stat.count}
+                for stat in diff[:limit]
+            ]
+            result["total_size_diff_bytes"] = sum(stat.size_diff for stat in diff)
+        return result
+
+    # ------------------------------------------------------------------
+    # Structures, modules and objects
+    # ------------------------------------------------------------------
+
+    def structure_sizes(self) -> Dict[str, Dict[str, Any]]:
+        """Entry counts and approximate deep size of every tracked structure."""
+        sizes: Dict[str, Dict[str, Any]] = {}
+        for name, getter in self.structures.items():
+            try:
+                value = getter()
+                size, objects, truncated = deep_sizeof(value)
+                sizes[name] = {"entries": _entries(value), "bytes": size, "objects": objects, "truncated": truncated}
+            except Exception as e:
+                sizes[name] = {"error": f"{type(e).__name__}: {e}"}
+        sizes["langgraph.in_memory_savers"] = self._saver_sizes()
+        return sizes
+
+    @staticmethod
+    def _saver_sizes() -> Dict[str, Any]:
+        savers = _in_memory_savers()
+        threads = checkpoints = writes = 0
+        size = 0
+        truncated = False
+        for saver in savers:
+            storage = getattr(saver, "storage", {})
+            threads += len(storage)
+            checkpoints += sum(len(checkpoints_by_id) for namespaces in storage.values()
+                               for checkpoints_by_id in namespaces.values())
+            writes += sum(len(entries) for entries in getattr(saver, "writes", {}).values())
+            for attribute in ("storage", "writes", "blobs"):
+                saver_bytes, _, saver_truncated = deep_sizeof(getattr(saver, attribute, {}))
+                size += saver_bytes
+                truncated = truncated or saver_truncated
+        return {"entries": len(savers), "threads": threads, "checkpoints": checkpoints, "writes": writes,
+                "bytes": size, "truncated": truncated}
+
+    def module_growth(self, limit: int = 50) -> Dict[str, Any]:
+        """sys.modules growth since startup and dynamically loaded deployment modules."""
+        flower_modules: List[str] = []
+        temp_files = []
+        try:
+            from server.services.workflow_service import flower_manager
+            flower_modules = sorted(name for name in flower_manager.loaded_modules if name in sys.modules)
+            for deployment_id, info in flower_manager.deployments.items():
+                temp_files.append({"deployment_id": deployment_id, "file_path": info.get("file_path"),
+                                   "exists": bool(info.get("file_path")) and os.path.exists(info["file_path"])})
+        except Exception:
+            pass
+        modules = set(sys.modules)
+        added = sorted(modules - self.baseline_modules)
+        dynamic = sorted(name for name in modules if name.startswith("deployment_")) + flower_modules
+        return {
+            "total": len(modules),
+            "removed": len(self.baseline_modules - modules),
+            "baseline": len(self.baseline_modules),
+            "added": len(added),
+            "added_modules": added[:limit],
+            "deployment_modules": dynamic,
+            "flower_temp_files": temp_files,
+        }
+
+    @staticmethod
+    def object_counts(limit: int = 20) -> Dict[str, Any]:
+        """Most common live object types tracked by gc."""
+        counts = Counter(f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects())
+        return {
+            "tracked_objects": sum(counts.values()),
+            "gc_counts": list(gc.get_count()),
+            "gc_garbage": len(gc.garbage),
+            "top_types": [{"type": name, "count": count} for name, count in counts.most_common(limit)],
+        }
+
+    def summary(self, include_objects: bool = True, limit: int = 20) -> Dict[str, Any]:
+        """Everything except tracemalloc allocation sites (gc 객체 스캔은 include_objects로 생략 가능)."""
+        summary = {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "rss_bytes": _process_rss_bytes(),
+            "tracemalloc": self.tracing_status(),
+            "structures": self.structure_sizes(),
+            "modules": self.module_growth(limit),
+        }
+        if include_objects:
+            summary["objects"] = self.object_counts(limit)
+        return summary
+
+
+# Global memory diagnostics
+memory_diagnostics = MemoryDiagnostics()
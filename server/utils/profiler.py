@@ -0,0 +1,241 @@
+"""
+On-demand profiling of the live server process.
+
+SamplingProfiler는 지정한 시간 동안 일정 간격으로 sys._current_frames()를 읽어 모든 스레드
+(이벤트 루프, Starlette 스레드 풀, APScheduler 워커, 실행 큐 워커 등)의 호출 스택을 모읍니다.
+결과는 flamegraph.pl / speedscope에서 바로 열 수 있는 collapsed stack 형식(한 줄에 "프레임;프레임 개수")입니다.
+대상 코드에 계측을 넣지 않으므로 샘플링 간격(기본 10ms) 외의 오버헤드가 거의 없습니다.
+
+실행 단위 결정적 프로파일링: use_profiling(True) 안에서 제출된 배포 실행은 cProfile로 측정되어
+실행 디렉토리에 profile.pstats(snakeviz, pstats로 열기)를 남기고 상위 함수 요약을 응답에 포함합니다.
+Python 3.12부터 cProfile은 프로세스 전역 sys.monitoring을 사용하므로 한 프로세스에서 한 번에 하나의
+실행만 측정할 수 있고(동시에 요청하면 ProfilerBusyError), 측정 결과에는 같은 시간 동안 다른 스레드에서
+실행된 코드도 포함됩니다.
+배포 워커 프로세스(LANGSTAR_DEPLOYMENT_RUNTIME=process)에서 실행되는 그래프 코드는 측정되지 않습니다.
+"""
+
+import contextvars
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_INTERVAL_SECONDS = 0.01
+MIN_INTERVAL_SECONDS = 0.001
+MAX_DURATION_SECONDS = float(os.getenv("LANGSTAR_PROFILE_MAX_SECONDS", "60"))
+MAX_STACK_DEPTH = 128
+PROFILE_FILE_NAME = "profile.pstats"
+
+# 대기 중인 스레드의 마지막 프레임 (include_idle=False이면 제외)
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever"),
+    ("connection.py", "_recv_bytes"),
+    ("connection.py", "_poll"),
+}
+
+_THREAD_INDEX_PATTERN = re.compile(r"[-_ ]?\d+$")
+
+_profile_requested: contextvars.ContextVar[bool] = contextvars.ContextVar("langstar_profile_requested", default=False)
+# cProfile 측정은 프로세스 전체에서 한 번에 하나만 (3.12+ sys.monitoring은 프로세스 전역)
+_deterministic_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile of the same kind is already running."""
+    pass
+
+
+def _frame_label(code: Any) -> str:
+    path = code.co_filename.replace("\\", "/")
+    short = "/".join(path.split("/")[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _thread_label(name: str) -> str:
+    """Group pool threads by name ("ThreadPoolExecutor-0_3" -> "ThreadPoolExecutor-0")."""
+    return _THREAD_INDEX_PATTERN.sub("", name) or name
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the stacks of all threads.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, duration: float, interval: Optional[float] = None, include_idle: bool = False,
+               group_threads: bool = True) -> Dict[str, Any]:
+        """
+        Sample all thread stacks for ``duration`` seconds (호출한 스레드에서 블로킹).
+
+        Args:
+            duration: Seconds to sample (최대 LANGSTAR_PROFILE_MAX_SECONDS)
+            interval: Seconds between samples (기본: 생성 시 간격)
+            include_idle: Keep samples of threads blocked in wait/select/queue.get
+            group_threads: Merge numbered pool threads into one root frame
+
+        Returns:
+            {"duration_seconds", "interval_seconds", "samples", "threads", "stacks": {collapsed stack: count}}
+
+        Raises:
+            ProfilerBusyError: If another profile is running
+        """
+        duration = max(0.0, min(duration, MAX_DURATION_SECONDS))
+        interval = max(MIN_INTERVAL_SECONDS, interval or self.interval)
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A sampling profile is already running")
+        try:
+            stacks: Counter = Counter()
+            threads: Counter = Counter()
+            samples = 0
+            own_ident = threading.get_ident()
+            started = time.perf_counter()
+            deadline = started + duration
+            while True:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stack = self._stack(frame, include_idle)
+                    if stack is None:
+                        continue
+                    name = names.get(ident, f"thread-{ident}")
+                    thread = _thread_label(name) if group_threads else name
+                    stacks[";".join([thread] + stack)] += 1
+                    threads[thread] += 1
+                samples += 1
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                time.sleep(min(interval, deadline - now))
+            return {
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "interval_seconds": interval,
+                "samples": samples,
+                "threads": dict(threads.most_common()),
+                "stacks": dict(stacks.most_common()),
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _stack(frame: Any, include_idle: bool) -> Optional[List[str]]:
+        """Root-first frame labels of one thread (대기 중인 스레드는 None)."""
+        if not include_idle:
+            leaf = frame.f_code
+            if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                return None
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return labels
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """Render stacks in the collapsed format used by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+# ----------------------------------------------------------------------
+# Deterministic (cProfile) profiling of single executions
+# ----------------------------------------------------------------------
+
+def profiling_requested() -> bool:
+    """Whether the current request asked for a deterministic profile of its execution."""
+    return _profile_requested.get()
+
+
+@contextmanager
+def use_profiling(enabled: bool = True) -> Iterator[None]:
+    """Request cProfile profiling for executions submitted in this context (실행 큐가 컨텍스트를 넘겨받음)."""
+    reset = _profile_requested.set(enabled)
+    try:
+        yield
+    finally:
+        _profile_requested.reset(reset)
+
+
+def profile_scope() -> str:
+    """What a cProfile run measures: "process" (3.12+, sys.monitoring) or "thread"."""
+    return "process" if sys.version_info >= (3, 12) else "thread"
+
+
+@contextmanager
+def deterministic_profile() -> Iterator[cProfile.Profile]:
+    """
+    Profile the enclosed block with cProfile.
+
+    cProfile 측정은 프로세스 전역으로 하나만 허용된다. Python 3.12+에서는 sys.monitoring을 쓰므로
+    같은 시간 동안 다른 스레드의 호출도 함께 기록된다 (profile_scope()).
+
+    Raises:
+        ProfilerBusyError: If another execution (or another sys.monitoring tool) is being profiled
+    """
+    if not _deterministic_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Another execution is already being profiled (cProfile is process-wide, one at a time)")
+    try:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # 디버거/커버리지 등 다른 도구가 sys.monitoring 프로파일러 슬롯을 쓰고 있음
+            raise ProfilerBusyError(f"cProfile is unavailable in this process: {e}")
+        try:
+            yield profile
+        finally:
+            profile.disable()
+    finally:
+        _deterministic_lock.release()
+
+
+def profile_summary(profile: cProfile.Profile, top: int = 25) -> Dict[str, Any]:
+    """Top functions by cumulative time ({"total_calls", "total_seconds", "functions": [...]})."""
+    stats = pstats.Stats(profile)
+    entries: List[Tuple[Tuple[str, int, str], Tuple[int, int, float, float, Any]]] = list(stats.stats.items())
+    entries.sort(key=lambda entry: entry[1][3], reverse=True)
+    return {
+        "total_calls": stats.total_calls,
+        "total_seconds": round(stats.total_tt, 6),
+        "functions": [
+            {
+                "function": f"{function} ({'/'.join(filename.replace(chr(92), '/').split('/')[-2:])}:{line})",
+                "calls": calls,
+                "self_seconds": round(self_time, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            }
+            for (filename, line, function), (_, calls, self_time, cumulative, _) in entries[:top]
+        ],
+    }
+
+
+def save_profile(profile: cProfile.Profile, directory: str, top: int = 25) -> Dict[str, Any]:
+    """Write ``profile.pstats`` into ``directory`` and return its summary with the file path and scope."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, PROFILE_FILE_NAME)
+    profile.dump_stats(path)
+    return {"file": path, "scope": profile_scope(), **profile_summary(profile, top)}
+
+
+# Global sampling profiler
+sampling_profiler = SamplingProfiler()
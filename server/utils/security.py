@@ -1,13 +1,18 @@
 """
 Security utilities for authentication and authorization.
-Provides JWT token validation, workflow access control, and rate limiting.
+Provides JWT token validation, workflow access control, admin endpoint access, outbound URL checks, and rate limiting.
 """
 
+import hmac
+import ipaddress
+import os
+import socket
 import time
 from typing import Optional, Dict, List
+from urllib.parse import urlsplit
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from fastapi import HTTPException, status
+from fastapi import Header, HTTPException, status
 from server.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -16,6 +21,20 @@ logger = setup_logger()
 SECRET_KEY = "your-secret-key-here-change-in-production"  # TODO: Move to environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# 진단(프로파일링 등) 엔드포인트용 관리자 토큰 (설정하지 않으면 관리자 엔드포인트 비활성화)
+ADMIN_TOKEN = os.getenv("LANGSTAR_ADMIN_TOKEN")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+# 실행 기록(api_call_info)이나 내보낸 트래픽에 남기면 안 되는 자격 증명 헤더 (소문자)
+SENSITIVE_HEADERS = ("authorization", "proxy-authorization", "cookie", "x-admin-token", "x-api-key")
+# 완료 콜백을 보낼 수 있는 호스트 (쉼표로 구분, 설정하면 이 호스트만 허용하고 내부 주소 검사는 생략)
+CALLBACK_ALLOWED_HOSTS = tuple(
+    host.strip().lower() for host in os.getenv("LANGSTAR_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+
+
+class UnsafeURLError(ValueError):
+    """Raised when an outbound URL (e.g. an execution callback) points at a disallowed target."""
+    pass
 
 
 class TokenData:
@@ -125,6 +144,74 @@ async def authorize_workflow_access(user_id: str, workflow_id: str) -> bool:
     return True
 
 
+def check_admin_token(token: Optional[str]) -> None:
+    """
+    Verify an admin token against LANGSTAR_ADMIN_TOKEN.
+    
+    Args:
+        token: Value of the X-Admin-Token header
+        
+    Raises:
+        HTTPException: 403 if admin endpoints are disabled, 401 if the token is missing or wrong
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled (LANGSTAR_ADMIN_TOKEN not set)")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        logger.warning("Rejected admin request with invalid token")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+
+def redact_headers(headers) -> Dict[str, str]:
+    """
+    Copy request headers without credential headers (SENSITIVE_HEADERS).
+    
+    Args:
+        headers: Request headers (Starlette Headers or dict)
+        
+    Returns:
+        Plain dict safe to persist in execution records
+    """
+    return {name: value for name, value in dict(headers).items() if name.lower() not in SENSITIVE_HEADERS}
+
+
+def check_callback_url(url: str) -> None:
+    """
+    Verify that the server may POST to a user-supplied callback URL (SSRF 방지).
+    
+    http(s)만 허용합니다. LANGSTAR_CALLBACK_ALLOWED_HOSTS가 설정되어 있으면 그 호스트만 허용하고,
+    아니면 호스트가 해석되는 모든 주소가 공인 주소여야 합니다 (루프백, 링크 로컬, 사설, 예약 대역 거부).
+    DNS 응답이 바뀔 수 있으므로 전송 직전에도 다시 검사해야 합니다.
+    
+    Args:
+        url: Callback URL
+        
+    Raises:
+        UnsafeURLError: If the scheme, host or resolved addresses are not allowed
+    """
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError(f"Callback URL must be an absolute http(s) URL: {url}")
+    host = parts.hostname.lower()
+    if CALLBACK_ALLOWED_HOSTS:
+        if host not in CALLBACK_ALLOWED_HOSTS:
+            raise UnsafeURLError(f"Callback host is not in LANGSTAR_CALLBACK_ALLOWED_HOSTS: {host}")
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, ValueError) as e:
+        raise UnsafeURLError(f"Cannot resolve callback host {host}: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise UnsafeURLError(f"Callback host {host} resolves to a non-public address ({ip})")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency for admin-only endpoints (X-Admin-Token header)."""
+    check_admin_token(x_admin_token)
+
+
 class RateLimiter:
     """
     Rate limiter for WebSocket messages.
@@ -0,0 +1,144 @@
+"""
+Per-request phase timing.
+
+요청마다 PhaseTimer를 실행 컨텍스트에 연결하고, 요청 경로의 각 단계(배포 조회, 버전 로드, 모듈 로드,
+그래프 실행, 로그 집계, 스냅샷 저장 등)를 phase()로 감싸 소요 시간을 기록합니다.
+TimingMiddleware가 응답에 Server-Timing 헤더와 요청/추적 ID(X-Request-ID)를 붙이며,
+배포 실행 기록에도 같은 추적 ID와 단계별 시간이 저장됩니다.
+
+추적 ID: 요청의 traceparent(W3C) 또는 X-Request-ID 헤더 값을 이어받고, 없으면 새로 만듭니다.
+"""
+
+import contextvars
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+REQUEST_ID_HEADER = "x-request-id"
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+_TOKEN_PATTERN = re.compile(r"[^A-Za-z0-9_.-]")
+
+_timer: contextvars.ContextVar[Optional["PhaseTimer"]] = contextvars.ContextVar("langstar_phase_timer", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def trace_id_from_headers(headers: Dict[str, str]) -> str:
+    """Continue the caller's trace (traceparent, then X-Request-ID) or start a new one."""
+    match = _TRACEPARENT_PATTERN.match((headers.get(TRACEPARENT_HEADER) or "").strip().lower())
+    if match:
+        return match.group(1)
+    request_id = (headers.get(REQUEST_ID_HEADER) or "").strip()
+    if request_id and len(request_id) <= 128:
+        return _TOKEN_PATTERN.sub("", request_id) or new_trace_id()
+    return new_trace_id()
+
+
+class PhaseTimer:
+    """Accumulates named phase durations for one request or execution (같은 이름은 합산)."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or new_trace_id()
+        self.started = time.perf_counter()
+        self._phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._phases.setdefault(name, {"ms": 0.0, "count": 0})
+            entry["ms"] += seconds * 1000
+            entry["count"] += 1
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def phases(self) -> List[Dict[str, Any]]:
+        """Phases in the order they first started."""
+        with self._lock:
+            return [
+                {"name": name, "duration_ms": round(entry["ms"], 3), "count": int(entry["count"])}
+                for name, entry in self._phases.items()
+            ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "phases": self.phases()}
+
+    def server_timing(self, total: bool = True) -> str:
+        """Render a Server-Timing header value (e.g. ``graph_invoke;dur=812.4, total;dur=905.1``)."""
+        entries = [f"{_TOKEN_PATTERN.sub('_', phase['name'])};dur={phase['duration_ms']:.1f}" for phase in self.phases()]
+        if total:
+            entries.append(f"total;dur={self.elapsed_ms:.1f}")
+        return ", ".join(entries)
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    """Return the phase timer bound to the current request/execution, if any."""
+    return _timer.get()
+
+
+@contextmanager
+def use_timer(timer: Optional[PhaseTimer]) -> Iterator[Optional[PhaseTimer]]:
+    """Bind a phase timer to the current context."""
+    reset = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _timer.reset(reset)
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Record an already measured duration (e.g. queue wait) on the current timer."""
+    timer = _timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record the duration of the enclosed block as ``name`` (타이머가 없으면 아무것도 하지 않음)."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that times each HTTP request.
+
+    응답 헤더에 Server-Timing(단계별 시간 + total)과 X-Request-ID(추적 ID)를 추가합니다.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        timer = PhaseTimer(trace_id_from_headers(headers))
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = list(message.get("headers", []))
+                response_headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                response_headers.append((REQUEST_ID_HEADER.encode("latin-1"), timer.trace_id.encode("latin-1")))
+                message = {**message, "headers": response_headers}
+            await send(message)
+
+        with use_timer(timer):
+            await self.app(scope, receive, send_with_timing)
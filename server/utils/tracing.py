@@ -0,0 +1,521 @@
+"""
+OpenTelemetry-compatible trace export.
+
+배포 실행 하나를 트레이스 하나로 기록합니다: 실행 루트 스팬 아래에 노드 스팬(log_node_execution 데코레이터,
+서버 측/생성 코드 모두), 그 아래에 게이트웨이 스팬(응답/시맨틱 캐시 결과), 모델 호출 스팬(모델, 토큰,
+프롬프트 캐시 토큰)과 도구 호출 스팬(도구 결과 캐시 적중 여부)이 붙습니다.
+스팬 속성은 OpenTelemetry GenAI 시맨틱 규약(gen_ai.*)을 따릅니다.
+
+OpenTelemetry SDK 없이 OTLP/JSON(ExportTraceServiceRequest) 형식으로 내보내므로
+Jaeger, Tempo, OpenTelemetry Collector 등 OTLP/HTTP 수신기에서 그대로 받을 수 있습니다.
+
+설정 (기본값은 내보내기 꺼짐):
+    LANGSTAR_TRACE_EXPORT=file,otlp
+    LANGSTAR_TRACE_FILE=traces.jsonl               # 파일 내보내기 경로 (한 줄에 배치 하나)
+    OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318  # /v1/traces를 붙여 POST
+    OTEL_SERVICE_NAME=langstar-server
+
+루트 스팬의 trace ID는 요청의 추적 ID(traceparent, 32자리 hex인 X-Request-ID)를 이어받으므로
+Server-Timing/X-Request-ID 헤더와 실행 기록의 trace_id로 트레이스를 찾을 수 있습니다.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from server.utils.timing import current_timer
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORT = os.getenv("LANGSTAR_TRACE_EXPORT", "")
+TRACE_FILE = os.getenv("LANGSTAR_TRACE_FILE", "traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "langstar-server")
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+EXPORT_TIMEOUT_SECONDS = 5.0
+
+# OTLP SpanKind / StatusCode 값
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def _new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+class Span:
+    """One timed operation of a trace (OTLP span)."""
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL,
+                 tracer: Optional["Tracer"] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._tracer = tracer
+        self.set_attributes(attributes or {})
+
+    @property
+    def recording(self) -> bool:
+        return self.end_ns is None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None and self.recording:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_status(self, code: int, message: str = "") -> None:
+        if self.recording:
+            self.status_code = code
+            self.status_message = message
+
+    def record_exception(self, error: BaseException) -> None:
+        self.events.append({
+            "name": "exception",
+            "time_ns": time.time_ns(),
+            "attributes": {"exception.type": type(error).__name__, "exception.message": str(error)},
+        })
+        self.set_status(STATUS_ERROR, f"{type(error).__name__}: {error}")
+
+    def end(self) -> None:
+        if not self.recording:
+            return
+        self.end_ns = time.time_ns()
+        if self._tracer is not None:
+            self._tracer.enqueue(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON span representation."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"name": event["name"], "timeUnixNano": str(event["time_ns"]),
+                 "attributes": _otlp_attributes(event["attributes"])}
+                for event in self.events
+            ],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _RemoteSpan(Span):
+    """Parent span context received from another process (내보내지 않음)."""
+
+    def __init__(self, trace_id: str, span_id: str):
+        super().__init__("remote", trace_id)
+        self.span_id = span_id
+        self.end_ns = self.start_ns
+
+
+class _NonRecordingSpan(Span):
+    """Span used while tracing is disabled (모든 기록을 무시)."""
+
+    def __init__(self):
+        super().__init__("", "0" * 32)
+        self.span_id = "0" * 16
+        self.end_ns = self.start_ns
+
+
+INVALID_SPAN = _NonRecordingSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("langstar_current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def export_request(spans: Sequence[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """Build an OTLP ExportTraceServiceRequest (JSON) for ``spans``."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service_name, "process.pid": os.getpid()})},
+            "scopeSpans": [{
+                "scope": {"name": "langstar"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class FileSpanExporter:
+    """Appends each batch as one OTLP/JSON line to a file."""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        line = json.dumps(export_request(spans), ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class OTLPHttpExporter:
+    """POSTs batches to an OTLP/HTTP receiver (``{endpoint}/v1/traces``, JSON encoding)."""
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, timeout: float = EXPORT_TIMEOUT_SECONDS):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: Sequence[Span]) -> None:
+        response = httpx.post(self.url, json=export_request(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+
+def exporters_from_env(setting: str = TRACE_EXPORT) -> List[Any]:
+    """Create exporters named in LANGSTAR_TRACE_EXPORT ("file", "otlp")."""
+    exporters: List[Any] = []
+    for name in (part.strip().lower() for part in setting.split(",")):
+        if name == "file":
+            exporters.append(FileSpanExporter())
+        elif name == "otlp":
+            exporters.append(OTLPHttpExporter())
+        elif name:
+            logger.warning(f"Unknown trace exporter: {name}")
+    return exporters
+
+
+class Tracer:
+    """
+    Creates spans and exports finished ones in batches from a background thread.
+
+    Args:
+        exporters: Span exporters (비어 있으면 스팬을 만들지 않음)
+        batch_size: Maximum spans per export call
+        interval: Seconds between background exports
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None, batch_size: int = EXPORT_BATCH_SIZE,
+                 interval: float = EXPORT_INTERVAL_SECONDS):
+        self.exporters = list(exporters or [])
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stopped = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters) and not self._stopped
+
+    def configure(self, exporters: List[Any]) -> None:
+        """Replace the exporters (pending spans go to the new exporters)."""
+        self.exporters = list(exporters)
+        self._stopped = False
+
+    def start_span(self, name: str, parent: Optional[Span] = None, attributes: Optional[Dict[str, Any]] = None,
+                   kind: int = SPAN_KIND_INTERNAL) -> Span:
+        """Start a span under ``parent`` (없으면 현재 스팬, 그것도 없으면 새 트레이스)."""
+        if not self.enabled:
+            return INVALID_SPAN
+        parent = parent or _current_span.get()
+        if parent is not None and parent is not INVALID_SPAN:
+            return Span(name, parent.trace_id, parent.span_id, attributes, kind, self)
+        timer = current_timer()
+        trace_id = timer.trace_id if timer and _TRACE_ID_PATTERN.match(timer.trace_id) else _new_trace_id()
+        return Span(name, trace_id, None, attributes, kind, self)
+
+    def enqueue(self, span: Span) -> None:
+        with self._lock:
+            if len(self._pending) >= self.batch_size * 20:
+                self.dropped += 1
+                return
+            self._pending.append(span)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_thread(self) -> None:
+        # 배포 워커처럼 fork된 프로세스에서는 내보내기 스레드를 새로 띄운다
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def _export_loop(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Export all finished spans now."""
+        with self._export_lock:
+            while True:
+                with self._lock:
+                    batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                if not batch:
+                    return
+                for exporter in self.exporters:
+                    try:
+                        exporter.export(batch)
+                    except Exception as e:
+                        logger.warning(f"Failed to export {len(batch)} spans with {type(exporter).__name__}: {str(e)}")
+
+    def shutdown(self) -> None:
+        """Flush pending spans and stop the export thread."""
+        self.flush()
+        self._stopped = True
+        self._wakeup.set()
+
+
+def tracing_enabled() -> bool:
+    return tracer.enabled
+
+
+def current_span() -> Span:
+    """Return the span of the current context (없으면 기록하지 않는 스팬)."""
+    return _current_span.get() or INVALID_SPAN
+
+
+@contextmanager
+def use_span(span: Optional[Span]) -> Iterator[Optional[Span]]:
+    """Make ``span`` the current span without ending it."""
+    reset = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(reset)
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL) -> Iterator[Span]:
+    """
+    Run the enclosed block in a child span of the current span.
+
+    예외가 발생하면 스팬에 exception 이벤트와 ERROR 상태를 남기고 다시 발생시킵니다.
+    """
+    span = tracer.start_span(name, attributes=attributes, kind=kind)
+    if span is INVALID_SPAN:
+        yield span
+        return
+    reset = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(reset)
+        span.end()
+
+
+def parse_traceparent(traceparent: Optional[str]) -> Optional[Span]:
+    """Parent span context from a W3C traceparent header value."""
+    match = _TRACEPARENT_PATTERN.match((traceparent or "").strip().lower())
+    if not match:
+        return None
+    return _RemoteSpan(match.group(1), match.group(2))
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span, for handing the trace to another process."""
+    span = _current_span.get()
+    if span is None or span is INVALID_SPAN:
+        return None
+    return span.traceparent
+
+
+def node_span_attributes(node_id: str, node_name: str, node_type: str,
+                         execution_id: Optional[str] = None) -> Dict[str, Any]:
+    """Attributes of a workflow node span."""
+    return {
+        "langstar.node.id": node_id,
+        "langstar.node.name": node_name,
+        "langstar.node.type": node_type,
+        "langstar.execution.id": execution_id,
+    }
+
+
+def usage_attributes(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """GenAI usage span attributes from a normalized usage dict (llm_usage 형식)."""
+    if not usage:
+        return {}
+    return {
+        "gen_ai.usage.input_tokens": usage.get("input_tokens"),
+        "gen_ai.usage.output_tokens": usage.get("output_tokens"),
+        "gen_ai.usage.cache_read_input_tokens": usage.get("cache_read_tokens") or None,
+        "gen_ai.usage.cache_creation_input_tokens": usage.get("cache_write_tokens") or None,
+        "langstar.cost_usd": usage.get("cost_usd"),
+    }
+
+
+def set_tool_attribute(key: str, value: Any) -> None:
+    """Set an attribute on the current tool call span (도구 스팬 안이 아니면 무시)."""
+    span = current_span()
+    if span.attributes.get("gen_ai.operation.name") == "execute_tool":
+        span.set_attribute(key, value)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler that emits chat model and tool call spans under ``parent``.
+
+    도구 스팬은 도구 함수가 실행되는 동안 현재 스팬으로 설정되어 도구 결과 캐시가 적중 여부를 기록할 수 있습니다.
+    run_inline: 비동기 경로에서도 도구를 실행하는 태스크의 컨텍스트에서 콜백을 호출하게 한다.
+    """
+
+    run_inline = True
+
+    def __init__(self, parent: Optional[Span] = None):
+        self.parent = parent if parent is not None else _current_span.get()
+        self._spans: Dict[UUID, Span] = {}
+        self._previous: Dict[UUID, Optional[Span]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, attributes: Dict[str, Any],
+               kind: int) -> Span:
+        with self._lock:
+            parent = self._spans.get(parent_run_id) if parent_run_id else None
+        span = tracer.start_span(name, parent=parent or self.parent, attributes=attributes, kind=kind)
+        with self._lock:
+            self._spans[run_id] = span
+        return span
+
+    def _pop(self, run_id: UUID) -> Optional[Span]:
+        with self._lock:
+            return self._spans.pop(run_id, None)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                            **kwargs: Any) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name")
+        self._start(run_id, parent_run_id, f"chat {model}" if model else "chat", {
+            "gen_ai.operation.name": "chat",
+            "gen_ai.system": metadata.get("ls_provider"),
+            "gen_ai.request.model": model,
+            "gen_ai.request.temperature": metadata.get("ls_temperature"),
+        }, SPAN_KIND_CLIENT)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._pop(run_id)
+        if span is None:
+            return
+        # 순환 import를 피하기 위해 지연 import (llm_usage -> execution_metrics)
+        from server.services.llm_usage import normalize_usage
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    span.set_attributes(usage_attributes(normalize_usage(usage)))
+                model = (getattr(message, "response_metadata", None) or {}).get("model_name")
+                span.set_attribute("gen_ai.response.model", model)
+        span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._pop(run_id)
+        if span is not None:
+            span.record_exception(error)
+            span.end()
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        span = self._start(run_id, parent_run_id, f"execute_tool {name}", {
+            "gen_ai.operation.name": "execute_tool",
+            "gen_ai.tool.name": name,
+        }, SPAN_KIND_INTERNAL)
+        # 도구 함수가 이 스팬을 현재 스팬으로 보도록 한다 (reset 대신 set: 콜백 사이에 토큰을 넘길 수 없음)
+        with self._lock:
+            self._previous[run_id] = _current_span.get()
+        _current_span.set(span)
+
+    def _end_tool(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        span = self._pop(run_id)
+        with self._lock:
+            previous = self._previous.pop(run_id, None)
+        if span is None:
+            return
+        if _current_span.get() is span:
+            _current_span.set(previous)
+        if error is not None:
+            span.record_exception(error)
+        span.end()
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, error)
+
+
+# Global tracer
+tracer = Tracer(exporters_from_env())